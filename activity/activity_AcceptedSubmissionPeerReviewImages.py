@@ -104,6 +104,7 @@ class activity_AcceptedSubmissionPeerReviewImages(AcceptedBaseActivity):
             self.name,
             self.logger,
             getattr(self.settings, "user_agent", None),
+            file_cache=peer_review.image_file_cache(self.settings),
         )
 
         # add log messages if an external href download was not successful
@@ -137,19 +137,30 @@ class activity_ArchiveArticle(Activity):
         self.logger.info("ArchiveArticle listing files from %s", orig_resource)
         files_in_bucket = storage.list_resources(orig_resource)
         self.logger.info("files_in_bucket: %s", files_in_bucket)
-        try:
-            for key_name in files_in_bucket:
-                file_name = key_name.split("/")[-1]
-                file_path = os.path.join(zip_dir_path, file_name)
-                storage_resource_origin = orig_resource + "/" + file_name
-                with open(file_path, "wb") as open_file:
-                    self.logger.info(
-                        "Downloading %s to %s", (storage_resource_origin, file_path)
-                    )
-                    storage.get_resource_to_file(storage_resource_origin, open_file)
-        except IOError:
-            self.logger.exception("Failed to download file %s.", key_name)
-            return None
+        # keep the subfolders of the expanded folder, files in different
+        # subfolders can have the same name
+        folder_prefix = expanded_folder.strip("/") + "/"
+        resource_files = []
+        for key_name in files_in_bucket:
+            if key_name.endswith("/"):
+                continue
+            if key_name.startswith(folder_prefix):
+                key_name = key_name[len(folder_prefix) :]
+            resource_files.append(
+                (
+                    orig_resource + "/" + key_name,
+                    os.path.join(zip_dir_path, *key_name.split("/")),
+                )
+            )
+        self.logger.info("Downloading %s to %s", resource_files, zip_dir_path)
+        results = storage.get_resources_to_files(resource_files)
+        for result in results:
+            if result.get("error"):
+                self.logger.error(
+                    "Failed to download file %s: %s"
+                    % (result.get("resource"), result.get("error"))
+                )
+                return None
         return True
 
     def zip_files(self, zip_dir_name, zip_dir_path):
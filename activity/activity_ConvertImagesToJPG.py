@@ -2,7 +2,7 @@ import os
 from activity.objects import Activity
 import json
 from provider.execution_context import get_session
-from provider.storage_provider import storage_context
+from provider.storage_provider import raise_transfer_errors, storage_context
 from provider import article_structure, image_conversion, utils
 
 
@@ -70,12 +70,15 @@ class activity_ConvertImagesToJPG(Activity):
                 "Original": {"sources": "tif", "format": "jpg", "download": "yes"}
             }
 
-            for file_name in figures:
-                figure_resource = orig_resource + "/" + file_name
+            # download the figures concurrently
+            results = storage.get_resources_to_dir(
+                [orig_resource + "/" + file_name for file_name in figures],
+                self.get_tmp_dir(),
+            )
+            raise_transfer_errors(results)
 
+            for file_name in figures:
                 file_path = self.get_tmp_dir() + os.sep + file_name
-                with open(file_path, "wb") as open_file:
-                    storage.get_resource_to_file(figure_resource, open_file)
 
                 cdn_bucket_name = (
                     self.settings.publishing_buckets_prefix
@@ -1,5 +1,5 @@
 from provider.execution_context import get_session
-from provider.storage_provider import storage_context
+from provider.storage_provider import raise_transfer_errors, storage_context
 from provider import article_structure, utils
 from activity.objects import Activity
 
@@ -78,31 +78,26 @@ class activity_DepositAssets(Activity):
                 self.settings.no_download_extensions
             )
 
+            orig_resource = (
+                storage_provider
+                + expanded_folder_bucket
+                + "/"
+                + expanded_folder_name
+                + "/"
+            )
+            dest_resource = (
+                storage_provider
+                + cdn_bucket_name
+                + "/"
+                + utils.pad_msid(article_id)
+                + "/"
+            )
+            resource_pairs = []
             for file_name in other_assets:
-                orig_resource = (
-                    storage_provider
-                    + expanded_folder_bucket
-                    + "/"
-                    + expanded_folder_name
-                    + "/"
-                )
-                dest_resource = (
-                    storage_provider
-                    + cdn_bucket_name
-                    + "/"
-                    + utils.pad_msid(article_id)
-                    + "/"
+                resource_pairs.append(
+                    (orig_resource + file_name, dest_resource + file_name)
                 )
 
-                storage.copy_resource(
-                    orig_resource + file_name, dest_resource + file_name
-                )
-
-                if self.logger:
-                    self.logger.info(
-                        "Uploaded file %s to %s" % (file_name, cdn_bucket_name)
-                    )
-
                 file_name_no_extension, extension = file_name.rsplit(".", 1)
                 if extension not in no_download_extensions:
                     content_type = utils.content_type_from_file_name(file_name)
@@ -117,10 +112,20 @@ class activity_DepositAssets(Activity):
                     file_download = file_name_no_extension + "-download." + extension
 
                     # file is copied with additional metadata
-                    storage.copy_resource(
-                        orig_resource + file_name,
-                        dest_resource + file_download,
-                        additional_dict_metadata=dict_metadata,
+                    resource_pairs.append(
+                        (
+                            orig_resource + file_name,
+                            dest_resource + file_download,
+                            dict_metadata,
+                        )
+                    )
+
+            results = storage.copy_resources(resource_pairs)
+            raise_transfer_errors(results)
+            if self.logger:
+                for file_name in other_assets:
+                    self.logger.info(
+                        "Uploaded file %s to %s" % (file_name, cdn_bucket_name)
                     )
 
             self.emit_monitor_event(
@@ -89,50 +89,61 @@ class activity_DepositCrossref(Activity):
             article_object_map, crossref_config, self.bad_xml_files
         )
 
+        max_workers = crossref.generate_max_workers(self.settings)
+
         # build Crossref deposit objects
         crossref_object_map = OrderedDict()
-        for xml_file, article in list(generate_article_object_map.items()):
-            crossref_object_list = crossref.build_crossref_xml(
-                {xml_file: article},
-                crossref_config,
-                self.good_xml_files,
-                self.bad_xml_files,
-                submission_type="journal",
-            )
-            if crossref_object_list and crossref_object_list[0]:
-                crossref_object_map[article] = crossref_object_list[0]
+        crossref_xml_file_map = {}
+        crossref_object_list = crossref.build_crossref_xml(
+            generate_article_object_map,
+            crossref_config,
+            self.good_xml_files,
+            self.bad_xml_files,
+            submission_type="journal",
+            crossref_xml_file_map=crossref_xml_file_map,
+            max_workers=max_workers,
+        )
+        for c_xml in crossref_object_list:
+            article = generate_article_object_map.get(crossref_xml_file_map.get(c_xml))
+            crossref_object_map[article] = c_xml
 
         # duplicate and modify the article for a version_doi deposit, set a different batch_id
+        version_article_object_map = OrderedDict()
         for xml_file, article in list(generate_article_object_map.items()):
             if article.version_doi:
-                # track a separate list of good and bad files later to be collated
-                good_xml_files = []
-                bad_xml_files = []
                 article_version = copy.copy(article)
                 article_version.doi = article_version.version_doi
                 article_version.version_doi = None
-                # generate CrossrefXML
-                crossref_object_list = crossref.build_crossref_xml(
-                    {xml_file: article_version},
-                    crossref_config,
-                    good_xml_files,
-                    bad_xml_files,
-                    submission_type="journal",
-                )
-                # collate good and bad files
-                self.good_xml_files = list(
-                    set(self.good_xml_files).union(set(good_xml_files))
+                version_article_object_map[xml_file] = article_version
+        if version_article_object_map:
+            # track a separate list of good and bad files later to be collated
+            good_xml_files = []
+            bad_xml_files = []
+            # generate CrossrefXML
+            crossref_object_list = crossref.build_crossref_xml(
+                version_article_object_map,
+                crossref_config,
+                good_xml_files,
+                bad_xml_files,
+                submission_type="journal",
+                crossref_xml_file_map=crossref_xml_file_map,
+                max_workers=max_workers,
+            )
+            # collate good and bad files
+            self.good_xml_files = list(
+                set(self.good_xml_files).union(set(good_xml_files))
+            )
+            self.bad_xml_files = list(set(self.bad_xml_files).union(set(bad_xml_files)))
+            # add the CrossrefXML
+            for c_xml in crossref_object_list:
+                # change the batch_id
+                c_xml.batch_id = c_xml.batch_id.replace(
+                    "elife-crossref-", "elife-crossref-version-"
                 )
-                self.bad_xml_files = list(
-                    set(self.bad_xml_files).union(set(bad_xml_files))
+                article_version = version_article_object_map.get(
+                    crossref_xml_file_map.get(c_xml)
                 )
-                # add the CrossrefXML
-                if crossref_object_list and crossref_object_list[0]:
-                    # change the batch_id
-                    crossref_object_list[0].batch_id = crossref_object_list[
-                        0
-                    ].batch_id.replace("elife-crossref-", "elife-crossref-version-")
-                    crossref_object_map[article_version] = crossref_object_list[0]
+                crossref_object_map[article_version] = c_xml
 
         # generate status will be True if no unhandled exception was raised
         self.statuses["generate"] = True
@@ -157,26 +168,36 @@ class activity_DepositCrossref(Activity):
                         )
 
         # output CrossrefXML objects to XML files
+        deposit_file_map = {}
         for article, c_xml in list(crossref_object_map.items()):
-            crossref.crossref_xml_to_disk(c_xml, self.directories.get("TMP_DIR"))
+            deposit_file = crossref.crossref_xml_to_disk(
+                c_xml, self.directories.get("TMP_DIR")
+            )
+            deposit_file_map[deposit_file] = crossref_xml_file_map.get(c_xml)
 
         # Approve files for publishing
         self.statuses["approve"] = self.approve_for_publishing()
 
         http_detail_list = []
+        deposit_results = []
         if self.statuses.get("approve") is True:
             try:
                 # Publish files
+                deposit_results = self.deposit_files_to_endpoint(
+                    sub_dir=self.directories.get("TMP_DIR")
+                )
                 (
                     self.statuses["publish"],
                     http_detail_list,
-                ) = self.deposit_files_to_endpoint(
-                    sub_dir=self.directories.get("TMP_DIR")
-                )
+                ) = crossref.deposit_status(deposit_results)
             except:
                 self.statuses["publish"] = False
 
-        if self.statuses.get("publish") is True:
+        # files which were not deposited are left in the outbox to try again
+        published_xml_files = crossref.deposited_xml_files(
+            self.good_xml_files, deposit_file_map, deposit_results
+        )
+        if published_xml_files:
             # Clean up outbox
             self.logger.info("Moving files from outbox folder to published folder")
             to_folder = outbox_provider.get_to_folder_name(
@@ -187,10 +208,10 @@ class activity_DepositCrossref(Activity):
                 self.publish_bucket,
                 self.outbox_folder,
                 to_folder,
-                self.good_xml_files,
+                published_xml_files,
             )
             # copy the Crossref deposit XML files to the batch folder
-            batch_file_names = glob.glob(self.directories.get("TMP_DIR") + "/*.xml")
+            batch_file_names = crossref.deposited_files(deposit_results)
             batch_file_to_folder = to_folder + "batch/"
             outbox_provider.upload_files_to_s3_folder(
                 self.settings,
@@ -232,7 +253,10 @@ class activity_DepositCrossref(Activity):
         """turn XML into article objects and populate their data"""
         # parse XML files into the basic article object map to start with
         article_object_map = crossref.article_xml_list_parse(
-            article_xml_files, self.bad_xml_files, self.directories.get("TMP_DIR")
+            article_xml_files,
+            self.bad_xml_files,
+            self.directories.get("TMP_DIR"),
+            max_workers=crossref.generate_max_workers(self.settings),
         )
         # continue with setting more article data
         for article in list(article_object_map.values()):
@@ -252,17 +276,18 @@ class activity_DepositCrossref(Activity):
         return bool(glob.glob(self.directories.get("INPUT_DIR") + "/*.xml"))
 
     def deposit_files_to_endpoint(self, file_type="/*.xml", sub_dir=None):
-        """Using an HTTP POST, deposit the file to the endpoint"""
+        """Using an HTTP POST, deposit the files to the endpoint, return the results"""
         xml_files = glob.glob(sub_dir + file_type)
         payload = crossref.crossref_data_payload(
             self.settings.crossref_login_id, self.settings.crossref_login_passwd
         )
         user_agent = getattr(self.settings, "user_agent", None)
-        return crossref.upload_files_to_endpoint(
+        return crossref.deposit_files(
             self.settings.crossref_url,
             payload,
             xml_files,
             user_agent,
+            settings=self.settings,
         )
 
     def send_admin_email(self, outbox_s3_key_names, http_detail_list):
@@ -113,12 +113,15 @@ class activity_DepositCrossrefMinimal(Activity):
         )
 
         # build Crossref deposit objects
+        crossref_xml_file_map = {}
         crossref_object_list = crossref.build_crossref_xml(
             generate_article_object_map,
             crossref_config,
             self.good_xml_files,
             self.bad_xml_files,
             submission_type="journal",
+            crossref_xml_file_map=crossref_xml_file_map,
+            max_workers=crossref.generate_max_workers(self.settings),
         )
 
         self.logger.info(
@@ -141,28 +144,38 @@ class activity_DepositCrossrefMinimal(Activity):
             )
 
         # output CrossrefXML objects to XML files
+        deposit_file_map = {}
         for c_xml in crossref_object_list:
-            crossref.crossref_xml_to_disk(c_xml, self.directories.get("TMP_DIR"))
+            deposit_file = crossref.crossref_xml_to_disk(
+                c_xml, self.directories.get("TMP_DIR")
+            )
+            deposit_file_map[deposit_file] = crossref_xml_file_map.get(c_xml)
 
         # Approve files for publishing
         self.statuses["approve"] = self.approve_for_publishing()
 
         http_detail_list = []
+        deposit_results = []
         if self.statuses.get("approve") is True:
             try:
                 # Publish files
+                deposit_results = self.deposit_files_to_endpoint(
+                    sub_dir=self.directories.get("TMP_DIR")
+                )
                 (
                     self.statuses["publish"],
                     http_detail_list,
-                ) = self.deposit_files_to_endpoint(
-                    sub_dir=self.directories.get("TMP_DIR")
-                )
+                ) = crossref.deposit_status(deposit_results)
             except:
                 self.statuses["publish"] = False
         else:
             self.logger.info("%s, no articles approved for publishing" % self.name)
 
-        if self.statuses.get("publish") is True:
+        # files which were not deposited are left in the outbox to try again
+        published_xml_files = crossref.deposited_xml_files(
+            self.good_xml_files, deposit_file_map, deposit_results
+        )
+        if published_xml_files:
             # Clean up outbox
             self.logger.info("Moving files from outbox folder to published folder")
             to_folder = outbox_provider.get_to_folder_name(
@@ -173,10 +186,10 @@ class activity_DepositCrossrefMinimal(Activity):
                 self.publish_bucket,
                 self.outbox_folder,
                 to_folder,
-                self.good_xml_files,
+                published_xml_files,
             )
             # copy the Crossref deposit XML files to the batch folder
-            batch_file_names = glob.glob(self.directories.get("TMP_DIR") + "/*.xml")
+            batch_file_names = crossref.deposited_files(deposit_results)
             batch_file_to_folder = to_folder + "batch/"
             outbox_provider.upload_files_to_s3_folder(
                 self.settings,
@@ -185,7 +198,7 @@ class activity_DepositCrossrefMinimal(Activity):
                 batch_file_names,
             )
             self.statuses["outbox"] = True
-        else:
+        if self.statuses.get("publish") is not True:
             self.logger.info("%s, not all articles published" % self.name)
 
         # Set the activity status of this activity based on successes
@@ -220,7 +233,10 @@ class activity_DepositCrossrefMinimal(Activity):
         """turn XML into article objects and populate their data"""
         # parse XML files into the basic article object map to start with
         article_object_map = crossref.article_xml_list_parse(
-            article_xml_files, self.bad_xml_files, self.directories.get("TMP_DIR")
+            article_xml_files,
+            self.bad_xml_files,
+            self.directories.get("TMP_DIR"),
+            max_workers=crossref.generate_max_workers(self.settings),
         )
         # continue with setting more article data
         for article in list(article_object_map.values()):
@@ -239,17 +255,18 @@ class activity_DepositCrossrefMinimal(Activity):
         return bool(glob.glob(self.directories.get("INPUT_DIR") + "/*.xml"))
 
     def deposit_files_to_endpoint(self, file_type="/*.xml", sub_dir=None):
-        """Using an HTTP POST, deposit the file to the endpoint"""
+        """Using an HTTP POST, deposit the files to the endpoint, return the results"""
         xml_files = glob.glob(sub_dir + file_type)
         payload = crossref.crossref_data_payload(
             self.settings.crossref_login_id, self.settings.crossref_login_passwd
         )
         user_agent = getattr(self.settings, "user_agent", None)
-        return crossref.upload_files_to_endpoint(
+        return crossref.deposit_files(
             self.settings.crossref_url,
             payload,
             xml_files,
             user_agent,
+            settings=self.settings,
         )
 
     def send_admin_email(self, outbox_s3_key_names, http_detail_list):
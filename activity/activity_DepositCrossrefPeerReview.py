@@ -55,6 +55,9 @@ class activity_DepositCrossrefPeerReview(Activity):
         self.good_xml_files = []
         self.bad_xml_files = []
 
+        # BigQuery client used for all the articles
+        self.bigquery_client = None
+
     def do_activity(self, data=None):
         """
         Activity, do the work
@@ -107,7 +110,10 @@ class activity_DepositCrossrefPeerReview(Activity):
             else:
                 journal_article_object_map[xml_file] = article
 
+        max_workers = crossref.generate_max_workers(self.settings)
+
         # Generate crossref XML for journal articles
+        deposit_file_map = {}
         self.statuses["generate"] = crossref.generate_crossref_xml_to_disk(
             journal_article_object_map,
             crossref_config,
@@ -116,6 +122,8 @@ class activity_DepositCrossrefPeerReview(Activity):
             submission_type="peer_review",
             pretty=True,
             indent="    ",
+            deposit_file_map=deposit_file_map,
+            max_workers=max_workers,
         )
 
         # Generate crossref XML for preprint articles using a different config
@@ -127,21 +135,25 @@ class activity_DepositCrossrefPeerReview(Activity):
             submission_type="peer_review",
             pretty=True,
             indent="    ",
+            deposit_file_map=deposit_file_map,
+            max_workers=max_workers,
         )
 
         # Approve files for publishing
         self.statuses["approve"] = self.approve_for_publishing()
 
         http_detail_list = []
+        deposit_results = []
         if self.statuses.get("approve") is True:
             file_type = "/*.xml"
             sub_dir = self.directories.get("TMP_DIR")
             try:
                 # Publish files
+                deposit_results = self.deposit_files_to_endpoint(file_type, sub_dir)
                 (
                     self.statuses["publish"],
                     http_detail_list,
-                ) = self.deposit_files_to_endpoint(file_type, sub_dir)
+                ) = crossref.deposit_status(deposit_results)
             except:
                 self.logger.info(
                     "Exception publishing files to Crossref: %s"
@@ -149,7 +161,11 @@ class activity_DepositCrossrefPeerReview(Activity):
                 )
                 self.statuses["publish"] = False
 
-        if self.statuses.get("publish") is True:
+        # files which were not deposited are left in the outbox to try again
+        published_xml_files = crossref.deposited_xml_files(
+            self.good_xml_files, deposit_file_map, deposit_results
+        )
+        if published_xml_files:
             # Clean up outbox
             self.logger.info("Moving files from outbox folder to published folder")
             to_folder = outbox_provider.get_to_folder_name(
@@ -160,10 +176,10 @@ class activity_DepositCrossrefPeerReview(Activity):
                 self.publish_bucket,
                 self.outbox_folder,
                 to_folder,
-                self.good_xml_files,
+                published_xml_files,
             )
             # copy the Crossref deposit XML files to the batch folder
-            batch_file_names = glob.glob(self.directories.get("TMP_DIR") + "/*.xml")
+            batch_file_names = crossref.deposited_files(deposit_results)
             batch_file_to_folder = to_folder + "batch/"
             outbox_provider.upload_files_to_s3_folder(
                 self.settings,
@@ -172,7 +188,7 @@ class activity_DepositCrossrefPeerReview(Activity):
                 batch_file_names,
             )
             self.statuses["outbox"] = True
-        else:
+        if self.statuses.get("publish") is not True:
             self.logger.info("Failed to publish all peer review deposits to Crossref")
 
         # Set the activity status of this activity based on successes
@@ -214,7 +230,10 @@ class activity_DepositCrossrefPeerReview(Activity):
         """turn XML into article objects and populate their data"""
         # parse XML files into the basic article object map to start with
         article_object_map = crossref.article_xml_list_parse(
-            article_xml_files, self.bad_xml_files, self.directories.get("TMP_DIR")
+            article_xml_files,
+            self.bad_xml_files,
+            self.directories.get("TMP_DIR"),
+            max_workers=crossref.generate_max_workers(self.settings),
         )
         # continue with setting more article data
         for article in list(article_object_map.values()):
@@ -285,13 +304,12 @@ class activity_DepositCrossrefPeerReview(Activity):
 
     def get_manuscript_object(self, doi):
         """get data from BigQuery and populate a Manuscript object"""
-        bigquery_client = bigquery.get_client(self.settings, self.logger)
-        rows = bigquery.article_data(bigquery_client, doi)
-        # use the first row returned
-        try:
-            first_row = list(rows)[0]
-        except IndexError:
-            first_row = None
+        if not self.bigquery_client:
+            self.bigquery_client = bigquery.get_client(self.settings, self.logger)
+        first_row = bigquery.manuscript_data(
+            self.bigquery_client, doi, cache=bigquery.get_query_cache(self.settings)
+        )
+        if first_row is None:
             self.logger.info("No data from BigQuery for DOI %s" % doi)
         return bigquery.Manuscript(first_row)
 
@@ -334,17 +352,18 @@ class activity_DepositCrossrefPeerReview(Activity):
         return bool(glob.glob(self.directories.get("INPUT_DIR") + "/*.xml"))
 
     def deposit_files_to_endpoint(self, file_type="/*.xml", sub_dir=None):
-        """Using an HTTP POST, deposit the file to the endpoint"""
+        """Using an HTTP POST, deposit the files to the endpoint, return the results"""
         xml_files = glob.glob(sub_dir + file_type)
         payload = crossref.crossref_data_payload(
             self.settings.crossref_login_id, self.settings.crossref_login_passwd
         )
         user_agent = getattr(self.settings, "user_agent", None)
-        return crossref.upload_files_to_endpoint(
+        return crossref.deposit_files(
             self.settings.crossref_url,
             payload,
             xml_files,
             user_agent,
+            settings=self.settings,
         )
 
     def send_admin_email(self, outbox_s3_key_names, http_detail_list):
@@ -278,7 +278,10 @@ class activity_DepositCrossrefPendingPublication(Activity):
         """turn XML into article objects and populate their data"""
         # parse XML files into the basic article object map to start with
         article_object_map = crossref.article_xml_list_parse(
-            article_xml_files, self.bad_xml_files, self.directories.get("TMP_DIR")
+            article_xml_files,
+            self.bad_xml_files,
+            self.directories.get("TMP_DIR"),
+            max_workers=crossref.generate_max_workers(self.settings),
         )
         return article_object_map
 
@@ -95,8 +95,8 @@ class activity_DepositCrossrefPostedContent(Activity):
 
         article_object_map = self.get_article_objects(article_xml_files)
 
-        # build Crossref deposit objects
-        crossref_object_map = OrderedDict()
+        # select articles to build Crossref deposit objects from
+        build_article_object_map = OrderedDict()
         for xml_file, article in list(article_object_map.items()):
         
             # set the article_type based on preprint status
@@ -138,55 +138,70 @@ class activity_DepositCrossrefPostedContent(Activity):
                 )
                 continue
 
-            crossref_object_list = crossref.build_crossref_xml(
-                {xml_file: article},
-                crossref_config,
-                self.good_xml_files,
-                self.bad_xml_files,
-                submission_type="posted_content",
-            )
-            if crossref_object_list and crossref_object_list[0]:
-                crossref_object_map[article] = crossref_object_list[0]
+            build_article_object_map[xml_file] = article
+
+        max_workers = crossref.generate_max_workers(self.settings)
+
+        # build Crossref deposit objects
+        crossref_object_map = OrderedDict()
+        crossref_xml_file_map = {}
+        crossref_object_list = crossref.build_crossref_xml(
+            build_article_object_map,
+            crossref_config,
+            self.good_xml_files,
+            self.bad_xml_files,
+            submission_type="posted_content",
+            crossref_xml_file_map=crossref_xml_file_map,
+            max_workers=max_workers,
+        )
+        for c_xml in crossref_object_list:
+            article = build_article_object_map.get(crossref_xml_file_map.get(c_xml))
+            crossref_object_map[article] = c_xml
 
         # duplicate and modify the article for a version_doi deposit, set a different batch_id
+        version_article_object_map = OrderedDict()
         for xml_file, article in list(article_object_map.items()):
             if article.version_doi:
-                # track a separate list of good and bad files later to be collated
-                good_xml_files = []
-                bad_xml_files = []
                 article_version = copy.copy(article)
                 article_version.doi = article_version.version_doi
                 article_version.version_doi = None
-                # generate CrossrefXML
-                crossref_object_list = crossref.build_crossref_xml(
-                    {xml_file: article_version},
-                    crossref_version_config,
-                    good_xml_files,
-                    bad_xml_files,
-                    submission_type="posted_content",
-                )
-                # collate good and bad files
-                self.good_xml_files = list(
-                    set(self.good_xml_files).union(set(good_xml_files))
+                version_article_object_map[xml_file] = article_version
+        if version_article_object_map:
+            # track a separate list of good and bad files later to be collated
+            good_xml_files = []
+            bad_xml_files = []
+            # generate CrossrefXML
+            crossref_object_list = crossref.build_crossref_xml(
+                version_article_object_map,
+                crossref_version_config,
+                good_xml_files,
+                bad_xml_files,
+                submission_type="posted_content",
+                crossref_xml_file_map=crossref_xml_file_map,
+                max_workers=max_workers,
+            )
+            # collate good and bad files
+            self.good_xml_files = list(
+                set(self.good_xml_files).union(set(good_xml_files))
+            )
+            self.bad_xml_files = list(set(self.bad_xml_files).union(set(bad_xml_files)))
+            # add the CrossrefXML
+            for c_xml in crossref_object_list:
+                # change the batch_id
+                c_xml.batch_id = c_xml.batch_id.replace(
+                    "elife-crossref-preprint-posted_content-",
+                    "elife-crossref-preprint-posted_content-version-",
                 )
-                self.bad_xml_files = list(
-                    set(self.bad_xml_files).union(set(bad_xml_files))
+                article_version = version_article_object_map.get(
+                    crossref_xml_file_map.get(c_xml)
                 )
-                # add the CrossrefXML
-                if crossref_object_list and crossref_object_list[0]:
-                    # change the batch_id
-                    crossref_object_list[0].batch_id = crossref_object_list[
-                        0
-                    ].batch_id.replace(
-                        "elife-crossref-preprint-posted_content-",
-                        "elife-crossref-preprint-posted_content-version-",
-                    )
-                    crossref_object_map[article_version] = crossref_object_list[0]
+                crossref_object_map[article_version] = c_xml
 
         # generate status will be True if no unhandled exception was raised
         self.statuses["generate"] = True
 
         # output CrossrefXML objects to XML files
+        deposit_file_map = {}
         for article, c_xml in list(crossref_object_map.items()):
             if article.version_doi:
                 # add rel:program tag if not present
@@ -199,23 +214,26 @@ class activity_DepositCrossrefPostedContent(Activity):
                     # add intra_work_relation isSameAs tag
                     crossref.add_is_same_as_tag(rel_program_tag, article.version_doi)
 
-            crossref.crossref_xml_to_disk(
+            deposit_file = crossref.crossref_xml_to_disk(
                 c_xml, self.directories.get("TMP_DIR"), pretty=True
             )
+            deposit_file_map[deposit_file] = crossref_xml_file_map.get(c_xml)
 
         # Approve files for publishing
         self.statuses["approve"] = self.approve_for_publishing()
 
         http_detail_list = []
+        deposit_results = []
         if self.statuses.get("approve") is True:
             file_type = "/*.xml"
             sub_dir = self.directories.get("TMP_DIR")
             try:
                 # Publish files
+                deposit_results = self.deposit_files_to_endpoint(file_type, sub_dir)
                 (
                     self.statuses["publish"],
                     http_detail_list,
-                ) = self.deposit_files_to_endpoint(file_type, sub_dir)
+                ) = crossref.deposit_status(deposit_results)
             except:
                 self.logger.info(
                     "%s, exception publishing files to Crossref: %s"
@@ -223,7 +241,11 @@ class activity_DepositCrossrefPostedContent(Activity):
                 )
                 self.statuses["publish"] = False
 
-        if self.statuses.get("publish") is True:
+        # files which were not deposited are left in the outbox to try again
+        published_xml_files = crossref.deposited_xml_files(
+            self.good_xml_files, deposit_file_map, deposit_results or []
+        )
+        if published_xml_files:
             # Clean up outbox
             self.logger.info(
                 "%s, moving files from outbox folder to published folder" % self.name
@@ -236,10 +258,10 @@ class activity_DepositCrossrefPostedContent(Activity):
                 self.publish_bucket,
                 self.outbox_folder,
                 to_folder,
-                self.good_xml_files,
+                published_xml_files,
             )
             # copy the Crossref deposit XML files to the batch folder
-            batch_file_names = glob.glob(self.directories.get("TMP_DIR") + "/*.xml")
+            batch_file_names = crossref.deposited_files(deposit_results)
             batch_file_to_folder = to_folder + "batch/"
             outbox_provider.upload_files_to_s3_folder(
                 self.settings,
@@ -264,7 +286,7 @@ class activity_DepositCrossrefPostedContent(Activity):
             )
 
             self.statuses["outbox"] = True
-        elif self.statuses.get("publish") is False:
+        if self.statuses.get("publish") is False:
             self.logger.info(
                 "%s, failed to publish all posted content deposits to Crossref"
                 % self.name
@@ -307,7 +329,10 @@ class activity_DepositCrossrefPostedContent(Activity):
         """turn XML into article objects and populate their data"""
         # parse XML files into the basic article object map to start with
         article_object_map = crossref.article_xml_list_parse(
-            article_xml_files, self.bad_xml_files, self.directories.get("TMP_DIR")
+            article_xml_files,
+            self.bad_xml_files,
+            self.directories.get("TMP_DIR"),
+            max_workers=crossref.generate_max_workers(self.settings),
         )
         return article_object_map
 
@@ -316,7 +341,7 @@ class activity_DepositCrossrefPostedContent(Activity):
         return bool(glob.glob(self.directories.get("INPUT_DIR") + "/*.xml"))
 
     def deposit_files_to_endpoint(self, file_type="/*.xml", sub_dir=None):
-        """Using an HTTP POST, deposit the file to the endpoint"""
+        """Using an HTTP POST, deposit the files to the endpoint, return the results"""
         xml_files = glob.glob(sub_dir + file_type)
         if not xml_files:
             return None
@@ -324,11 +349,12 @@ class activity_DepositCrossrefPostedContent(Activity):
             self.settings.crossref_login_id, self.settings.crossref_login_passwd
         )
         user_agent = getattr(self.settings, "user_agent", None)
-        return crossref.upload_files_to_endpoint(
+        return crossref.deposit_files(
             self.settings.crossref_url,
             payload,
             xml_files,
             user_agent,
+            settings=self.settings,
         )
 
     def send_admin_email(self, outbox_s3_key_names, http_detail_list):
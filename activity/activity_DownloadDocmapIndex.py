@@ -104,7 +104,14 @@ class activity_DownloadDocmapIndex(Activity):
             + self.bucket_folder
         )
 
-        prev_run_folder = previous_run_folder(storage, run_folder_bucket_path)
+        # the latest run folder is the only one needed to find the previous and next
+        latest_folder = latest_run_folder(storage, run_folder_bucket_path)
+        self.logger.info("%s, latest_run_folder: %s" % (self.name, latest_folder))
+        run_folders = [latest_folder] if latest_folder else []
+
+        prev_run_folder = previous_run_folder(
+            storage, run_folder_bucket_path, run_folders=run_folders
+        )
         prev_run_folder_bucket_path = None
         self.logger.info("%s, prev_run_folder: %s" % (self.name, prev_run_folder))
         if prev_run_folder:
@@ -135,7 +142,9 @@ class activity_DownloadDocmapIndex(Activity):
             )
 
         # new run folder name, based on the immediately previous run folder name
-        new_run_folder_name = new_run_folder(storage, run_folder_bucket_path)
+        new_run_folder_name = new_run_folder(
+            storage, run_folder_bucket_path, run_folders=run_folders
+        )
         new_run_docmap_index_resource = "%s%s/%s" % (
             run_folder_bucket_path,
             new_run_folder_name,
@@ -156,6 +165,9 @@ class activity_DownloadDocmapIndex(Activity):
         )
         self.statuses["upload"] = True
 
+        # point to the new run folder as the latest run folder
+        save_latest_run_folder(storage, run_folder_bucket_path, new_run_folder_name)
+
         session.store_value(
             "new_run_docmap_index_resource", new_run_docmap_index_resource
         )
@@ -173,6 +185,9 @@ class activity_DownloadDocmapIndex(Activity):
 
 RUN_FOLDER_PREFIX = "run_"
 
+# name of the object in the bucket folder recording the latest run folder name
+LATEST_RUN_FILE_NAME = "latest_run.json"
+
 
 def date_from_run_folder(folder_name):
     "parse a date from a run folder name"
@@ -186,13 +201,18 @@ def date_from_run_folder(folder_name):
         raise ValueError("Could not parse date from %s" % folder_name) from exception
 
 
-def run_folder_names(storage, resource):
-    "get list of previous run folders from the bucket"
+def run_folder_names(storage, resource, start_after=None):
+    "get list of previous run folders from the bucket, after start_after if specified"
     # separate the bucket name from the other object path data
     bucket_name, bucket_path_prefix = storage.s3_storage_objects(resource)
 
-    # full list of objects for the S3 prefix
-    s3_key_names = storage.list_resources(resource)
+    # list objects for the S3 prefix, subfolders are listed as common prefixes
+    list_start_after = None
+    if start_after:
+        list_start_after = "%s%s/" % (bucket_path_prefix.lstrip("/"), start_after)
+    s3_key_names = storage.list_resources(
+        resource, delimiter="/", start_after=list_start_after
+    )
 
     # match folder names by their start value
     starts_with = "%s%s" % (bucket_path_prefix.lstrip("/"), RUN_FOLDER_PREFIX)
@@ -214,16 +234,51 @@ def run_folder_names(storage, resource):
         and folder_path.count("/") == delimiter_count
     ]
     # strip away subfolder names and extra delimiter
-    return sorted(
-        [folder_name.rstrip("/").rsplit("/", 1)[-1] for folder_name in run_folder_paths]
+    folder_names = sorted(
+        {
+            folder_name.rstrip("/").rsplit("/", 1)[-1]
+            for folder_name in run_folder_paths
+        }
+    )
+    if start_after:
+        return [
+            folder_name for folder_name in folder_names if folder_name > start_after
+        ]
+    return folder_names
+
+
+def latest_run_folder(storage, bucket_path):
+    """
+    get the latest run folder name from the latest run object, and any run
+    folders listed after it in case the latest run object was not updated
+    """
+    latest_run_resource = bucket_path + LATEST_RUN_FILE_NAME
+    latest_folder = None
+    if storage.resource_exists(latest_run_resource):
+        latest_folder = json.loads(
+            storage.get_resource_as_string(latest_run_resource)
+        ).get("run_folder")
+    run_folders = run_folder_names(storage, bucket_path, start_after=latest_folder)
+    if run_folders:
+        return run_folders[-1]
+    return latest_folder
+
+
+def save_latest_run_folder(storage, bucket_path, folder_name):
+    "save the latest run folder name to the latest run object"
+    storage.set_resource_from_string(
+        bucket_path + LATEST_RUN_FILE_NAME,
+        json.dumps({"run_folder": folder_name}),
+        content_type="application/json",
     )
 
 
-def new_run_folder(storage, bucket_path):
+def new_run_folder(storage, bucket_path, run_folders=None):
     "get a next run folder name"
 
     # get latest run folder index
-    run_folders = run_folder_names(storage, bucket_path)
+    if run_folders is None:
+        run_folders = run_folder_names(storage, bucket_path)
     date_string = datetime.strftime(utils.get_current_datetime(), "%Y_%m_%d")
 
     run_folder_prefix = "%s%s" % (RUN_FOLDER_PREFIX, date_string)
@@ -243,9 +298,10 @@ def new_run_folder(storage, bucket_path):
     return "%s_%s" % (run_folder_prefix, str(latest_run_index + 1).zfill(4))
 
 
-def previous_run_folder(storage, bucket_path, from_folder=None):
+def previous_run_folder(storage, bucket_path, from_folder=None, run_folders=None):
     "find name of the previous run folder, previous to from_folder if specified"
-    run_folders = run_folder_names(storage, bucket_path)
+    if run_folders is None:
+        run_folders = run_folder_names(storage, bucket_path)
 
     if not run_folders:
         return None
@@ -1,12 +1,9 @@
 import json
 from zipfile import ZipFile
 import os
-from os.path import isfile, join
-from os import listdir, makedirs
-from os import path
 from S3utility.s3_notification_info import S3NotificationInfo
 from provider.execution_context import get_session
-from provider.storage_provider import storage_context
+from provider.storage_provider import raise_transfer_errors, storage_context
 from provider.article_structure import ArticleInfo
 from provider import utils
 from activity.objects import Activity
@@ -34,7 +31,6 @@ class activity_ExpandArticle(Activity):
         self.logger = logger
 
     def do_activity(self, data=None):
-
         """
         Do the work
         """
@@ -86,8 +82,6 @@ class activity_ExpandArticle(Activity):
         )
 
         try:
-            # download zip to temp folder
-            tmp = self.get_tmp_dir()
             storage_resource_origin = (
                 self.settings.storage_provider
                 + "://"
@@ -95,38 +89,51 @@ class activity_ExpandArticle(Activity):
                 + "/"
                 + info.file_name
             )
-            with open(os.path.join(tmp, filename_last_element), "wb") as local_zip_file:
-                storage.get_resource_to_file(storage_resource_origin, local_zip_file)
-
-            # extract zip contents
-            folder_name = path.join(article_version_id, run)
-            content_folder = path.join(tmp, folder_name)
-            makedirs(content_folder)
-            with ZipFile(path.join(tmp, filename_last_element)) as zf:
-                zf.extractall(content_folder)
-
-            upload_filenames = []
-            for f in listdir(content_folder):
-                if isfile(join(content_folder, f)) and f[0] != "." and not f[0] == "_":
-                    upload_filenames.append(f)
-            self.check_filenames(upload_filenames)
-
             bucket_folder_name = article_version_id + "/" + run
-            for filename in upload_filenames:
-                source_path = path.join(content_folder, filename)
-                dest_path = bucket_folder_name + "/" + filename
-                storage_resource_dest = (
-                    self.settings.storage_provider
-                    + "://"
-                    + self.settings.publishing_buckets_prefix
-                    + self.settings.expanded_bucket
-                    + "/"
-                    + dest_path
-                )
-                metadata = {"ContentType": utils.content_type_from_file_name(filename)}
-                storage.set_resource_from_filename(
-                    storage_resource_dest, source_path, metadata
+            with self.open_zip_source(
+                storage, storage_resource_origin, filename_last_element
+            ) as zip_source, ZipFile(zip_source) as open_zip_file:
+                upload_filenames = zip_upload_file_names(open_zip_file)
+                self.check_filenames(upload_filenames)
+
+                if self.cancel_requested:
+                    self.logger.info(
+                        "Cancel requested when expanding article %s" % article_id
+                    )
+                    self.clean_tmp_dir()
+                    return self.ACTIVITY_TEMPORARY_FAILURE
+                # upload the zip members without extracting them to disk
+                resource_members = []
+                for filename in upload_filenames:
+                    dest_path = bucket_folder_name + "/" + filename
+                    storage_resource_dest = (
+                        self.settings.storage_provider
+                        + "://"
+                        + self.settings.publishing_buckets_prefix
+                        + self.settings.expanded_bucket
+                        + "/"
+                        + dest_path
+                    )
+                    metadata = {
+                        "ContentType": utils.content_type_from_file_name(filename)
+                    }
+                    resource_members.append((storage_resource_dest, filename, metadata))
+
+                uploaded = []
+
+                def upload_progress(result):
+                    uploaded.append(result)
+                    self.set_heartbeat_details(
+                        {
+                            "files_uploaded": len(uploaded),
+                            "files_total": len(resource_members),
+                        }
+                    )
+
+                results = storage.set_resources_from_zip(
+                    open_zip_file, resource_members, callback=upload_progress
                 )
+            raise_transfer_errors(results)
 
             self.clean_tmp_dir()
 
@@ -162,6 +169,18 @@ class activity_ExpandArticle(Activity):
 
         return True
 
+    def open_zip_source(self, storage, storage_resource_origin, file_name):
+        """
+        open the zip file for reading directly from the bucket when
+        expand_zip_ranged_read is set, otherwise download it to the tmp folder
+        """
+        if getattr(self.settings, "expand_zip_ranged_read", None):
+            return storage.open_resource(storage_resource_origin)
+        zip_file_path = os.path.join(self.get_tmp_dir(), file_name)
+        with open(zip_file_path, "wb") as local_zip_file:
+            storage.get_resource_to_file(storage_resource_origin, local_zip_file)
+        return open(zip_file_path, "rb")
+
     def check_filenames(self, filenames):
         xml_found = False
         for filename in filenames:
@@ -171,3 +190,14 @@ class activity_ExpandArticle(Activity):
             raise RuntimeError(
                 "No .xml file found. List of files found is %s" % filenames
             )
+
+
+def zip_upload_file_names(open_zip_file):
+    "names of the files in the root folder of the zip to be uploaded"
+    return [
+        zip_info.filename
+        for zip_info in open_zip_file.infolist()
+        if not zip_info.is_dir()
+        and "/" not in zip_info.filename
+        and zip_info.filename[0] not in [".", "_"]
+    ]
@@ -3,7 +3,7 @@ import json
 import os
 import zipfile
 from provider.execution_context import get_session
-from provider.storage_provider import storage_context
+from provider.storage_provider import raise_transfer_errors, storage_context
 from provider import (
     download_helper,
     github_provider,
@@ -118,18 +118,28 @@ class activity_ExpandMeca(Activity):
             download_settings = self.settings
 
         try:
-            # Download zip from S3
-            self.logger.info("%s downloading %s" % (self.name, meca_filename))
-            local_meca_file = download_helper.download_file_from_s3(
-                download_settings,
-                meca_filename,
-                bucket_name,
-                bucket_folder,
-                self.directories.get("INPUT_DIR"),
-            )
-            self.logger.info(
-                "%s downloaded %s to %s" % (self.name, meca_filename, local_meca_file)
-            )
+            if getattr(self.settings, "expand_zip_ranged_read", None):
+                # read the zip directly from the bucket
+                self.logger.info("%s opening %s" % (self.name, computer_file_url))
+                zip_source = storage_context(download_settings).open_resource(
+                    computer_file_url
+                )
+                local_meca_file = computer_file_url
+            else:
+                # Download zip from S3
+                self.logger.info("%s downloading %s" % (self.name, meca_filename))
+                local_meca_file = download_helper.download_file_from_s3(
+                    download_settings,
+                    meca_filename,
+                    bucket_name,
+                    bucket_folder,
+                    self.directories.get("INPUT_DIR"),
+                )
+                self.logger.info(
+                    "%s downloaded %s to %s"
+                    % (self.name, meca_filename, local_meca_file)
+                )
+                zip_source = open(local_meca_file, "rb")
 
         except Exception as exception:
             self.logger.exception(
@@ -140,62 +150,57 @@ class activity_ExpandMeca(Activity):
             return self.ACTIVITY_PERMANENT_FAILURE
 
         try:
-            # extract zip contents
+            # upload the zip contents without extracting them to disk
             self.logger.info("%s expanding file %s" % (self.name, local_meca_file))
-            with zipfile.ZipFile(local_meca_file) as open_zip_file:
-                for zip_file_name in open_zip_file.namelist():
-                    open_zip_file.extract(
-                        zip_file_name, self.directories.get("TEMP_DIR")
-                    )
-
-            # get a list of files including the subfolder paths
-            files = []
-            for root, dirs, file_names in os.walk(self.directories.get("TEMP_DIR")):
-                for dir_file in file_names:
+            with zip_source, zipfile.ZipFile(zip_source) as open_zip_file:
+                files = []
+                for zip_info in open_zip_file.infolist():
+                    if zip_info.is_dir():
+                        # do not copy directories alone
+                        continue
+                    path_parts = zip_info.filename.split("/")
                     # ignore hidden files and directories
-                    if root.rsplit(os.sep, 1)[-1].startswith(
-                        "."
-                    ) or dir_file.startswith("."):
+                    if path_parts[-1].startswith(".") or (
+                        len(path_parts) > 1 and path_parts[-2].startswith(".")
+                    ):
                         self.logger.info(
                             "%s %s ignoring file: %s"
-                            % (self.name, local_meca_file, os.path.join(root, dir_file))
+                            % (self.name, local_meca_file, zip_info.filename)
                         )
                         continue
-                    # strip the TEMP_DIR and add to list of files
-                    files.append(
-                        os.path.join(
-                            root.rsplit(self.directories.get("TEMP_DIR"), 1)[-1].lstrip(
-                                "/"
-                            ),
-                            dir_file,
-                        )
-                    )
-
-            self.logger.info("%s %s files: %s" % (self.name, local_meca_file, files))
-
-            # upload the files to the bucket
-            for file_name in files:
-                source_path = os.path.join(self.directories.get("TEMP_DIR"), file_name)
-                dest_path = expanded_folder + "/" + file_name
+                    files.append(zip_info.filename)
 
-                storage_resource_dest = (
-                    self.settings.storage_provider
-                    + "://"
-                    + self.settings.bot_bucket
-                    + "/"
-                    + dest_path
-                )
                 self.logger.info(
-                    "%s uploading %s to %s"
-                    % (self.name, source_path, storage_resource_dest)
+                    "%s %s files: %s" % (self.name, local_meca_file, files)
                 )
-                try:
-                    storage.set_resource_from_filename(
-                        storage_resource_dest, source_path
+
+                # the manifest is read from disk to find the article XML path
+                if meca.MANIFEST_XML_PATH in files:
+                    open_zip_file.extract(
+                        meca.MANIFEST_XML_PATH, self.directories.get("TEMP_DIR")
                     )
-                except IsADirectoryError:
-                    # do not copy directories alone
-                    pass
+
+                # upload the files to the bucket
+                resource_members = []
+                for file_name in files:
+                    dest_path = expanded_folder + "/" + file_name
+
+                    storage_resource_dest = (
+                        self.settings.storage_provider
+                        + "://"
+                        + self.settings.bot_bucket
+                        + "/"
+                        + dest_path
+                    )
+                    self.logger.info(
+                        "%s uploading %s to %s"
+                        % (self.name, file_name, storage_resource_dest)
+                    )
+                    resource_members.append((storage_resource_dest, file_name))
+                results = storage.set_resources_from_zip(
+                    open_zip_file, resource_members
+                )
+            raise_transfer_errors(results)
 
             session.store_value("expanded_folder", expanded_folder)
 
@@ -233,6 +238,7 @@ class activity_ExpandMeca(Activity):
 
 class TemporarySettings:
     "object to hold settings from STS service"
+
     aws_access_key_id = None
     aws_secret_access_key = None
     aws_session_token = None
@@ -15,6 +15,9 @@ from provider.storage_provider import storage_context
 # path to save docmap index in the bucket run folder
 DOCMAP_INDEX_BUCKET_PATH = "docmap_index/docmap_index.json"
 
+# file name of a docmap index downloaded to disk
+DOCMAP_INDEX_FILE_NAME = "docmap_index.json"
+
 
 class activity_FindNewDocmaps(Activity):
     def __init__(self, settings, logger, client=None, token=None, activity_task=None):
@@ -68,38 +71,61 @@ class activity_FindNewDocmaps(Activity):
         # get previous run folder name from S3 bucket
         storage = storage_context(self.settings)
 
-        # get docmap index JSON
+        # profile the new docmap index, reading one docmap at a time
         self.logger.info(
-            "%s, getting new_run_docmap_index_resource %s as string"
+            "%s, getting new_run_docmap_index_resource %s to file"
             % (
                 self.name,
                 new_run_docmap_index_resource,
             )
         )
-        docmap_index_json_string = storage.get_resource_as_string(
-            new_run_docmap_index_resource
+        docmap_profile = self.docmap_index_profile(
+            storage, new_run_docmap_index_resource
         )
-        docmap_index_json = json.loads(docmap_index_json_string)
 
-        # download previous docmap index file
+        # save the profile next to the docmap index to compare with on the next run
+        new_run_docmap_profile_resource = docmap_provider.docmap_profile_resource(
+            new_run_docmap_index_resource
+        )
         self.logger.info(
-            "%s, getting prev_run_docmap_index_resource %s as string"
-            % (
-                self.name,
-                prev_run_docmap_index_resource,
-            )
+            "%s, saving docmap profile to %s"
+            % (self.name, new_run_docmap_profile_resource)
+        )
+        storage.set_resource_from_string(
+            new_run_docmap_profile_resource,
+            docmap_provider.docmap_profile_to_json(docmap_profile),
+            content_type="application/json",
         )
 
-        prev_docmap_index_json = None
+        # get the previous docmap profile, or profile the previous docmap index
+        prev_docmap_profile = {}
         if prev_run_docmap_index_resource:
-            prev_docmap_index_json_content = storage.get_resource_as_string(
+            prev_run_docmap_profile_resource = docmap_provider.docmap_profile_resource(
                 prev_run_docmap_index_resource
             )
-            prev_docmap_index_json = json.loads(prev_docmap_index_json_content)
-
-        # compare previous docmap index to new docmap index
-        docmap_data = docmap_provider.changed_version_doi_data(
-            docmap_index_json, prev_docmap_index_json, self.logger
+            if storage.resource_exists(prev_run_docmap_profile_resource):
+                self.logger.info(
+                    "%s, getting prev_run_docmap_profile_resource %s as string"
+                    % (self.name, prev_run_docmap_profile_resource)
+                )
+                prev_docmap_profile = docmap_provider.docmap_profile_from_json(
+                    storage.get_resource_as_string(prev_run_docmap_profile_resource)
+                )
+            else:
+                self.logger.info(
+                    "%s, getting prev_run_docmap_index_resource %s to file"
+                    % (
+                        self.name,
+                        prev_run_docmap_index_resource,
+                    )
+                )
+                prev_docmap_profile = self.docmap_index_profile(
+                    storage, prev_run_docmap_index_resource
+                )
+
+        # compare previous docmap profile to new docmap profile
+        docmap_data = docmap_provider.changed_profile_version_doi_data(
+            docmap_profile, prev_docmap_profile, self.logger
         )
         ingest_version_doi_list = docmap_data.get("ingest_version_doi_list")
         self.logger.info(
@@ -151,6 +177,20 @@ class activity_FindNewDocmaps(Activity):
 
         return True
 
+    def docmap_index_profile(self, storage, docmap_index_resource):
+        "download the docmap index to disk and profile its docmaps as a stream"
+        docmap_index_path = os.path.join(
+            self.directories.get("TEMP_DIR"), DOCMAP_INDEX_FILE_NAME
+        )
+        with open(docmap_index_path, "wb") as open_file:
+            storage.get_resource_to_file(docmap_index_resource, open_file)
+        with open(docmap_index_path, "r", encoding="utf-8") as open_file:
+            docmap_profile = docmap_provider.docmaps_profile_step_map(
+                docmap_provider.iter_docmap_index(open_file)
+            )
+        os.remove(docmap_index_path)
+        return docmap_profile
+
     def send_admin_email(self, ingest_version_doi_list):
         "after do_activity is finished, send emails to admin with the status"
         datetime_string = time.strftime("%Y-%m-%d %H:%M", time.gmtime())
@@ -2,7 +2,7 @@ import os
 import glob
 import json
 import time
-from provider import github_provider, outbox_provider, preprint, meca
+from provider import endpoint_client, github_provider, outbox_provider, preprint, meca
 from provider.execution_context import get_session
 from provider.storage_provider import storage_context
 from activity.objects import Activity
@@ -112,6 +112,7 @@ class activity_GeneratePreprintPDF(Activity):
                 user_agent=getattr(self.settings, "user_agent", None),
                 caller_name=self.name,
                 logger=self.logger,
+                settings=self.settings,
             )
             response_content = response.content
         except Exception as exception:
@@ -155,8 +156,12 @@ class activity_GeneratePreprintPDF(Activity):
             if int(session.get_value(SESSION_ATTEMPT_COUNTER_NAME)) < MAX_ATTEMPTS:
                 # Clean up disk
                 self.clean_tmp_dir()
-                # sleep a short time
-                time.sleep(SLEEP_SECONDS)
+                # sleep a short time, or until the endpoint accepts requests again
+                time.sleep(
+                    endpoint_client.temporary_failure_seconds(
+                        endpoint_url, SLEEP_SECONDS, self.settings
+                    )
+                )
                 # return a temporary failure
                 return self.ACTIVITY_TEMPORARY_FAILURE
             if int(session.get_value(SESSION_ATTEMPT_COUNTER_NAME)) >= MAX_ATTEMPTS:
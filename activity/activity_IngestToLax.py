@@ -60,6 +60,8 @@ class activity_IngestToLax(Activity):
             return self.ACTIVITY_PERMANENT_FAILURE
 
         self.write_message(queue_connection_settings, queue, message)
+        # Lax data for the article will change, do not use cached responses
+        lax_provider.invalidate_article(data["article_id"])
 
         self.emit_monitor_event(*end_event_details)
         return self.ACTIVITY_SUCCESS
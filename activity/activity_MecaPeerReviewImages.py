@@ -137,6 +137,7 @@ class activity_MecaPeerReviewImages(MecaBaseActivity):
             self.name,
             self.logger,
             getattr(self.settings, "user_agent", None),
+            file_cache=peer_review.image_file_cache(self.settings),
         )
 
         self.logger.info(
@@ -207,11 +207,18 @@ class activity_ModifyMecaXml(MecaBaseActivity):
 
             cleaner.set_editors(article_meta_tag, editors)
 
-        # 9. add data availability statement and data citations
+        # get data availability, funding and author data from BigQuery in one query
+        preprint_metadata = None
         if session.get_value("run_type") != "silent-correction":
-            data_availability_data = get_data_availability_data(
+            preprint_metadata = get_preprint_metadata(
                 article_id, version, self.settings, self.name, self.logger
             )
+
+        # 9. add data availability statement and data citations
+        if session.get_value("run_type") != "silent-correction":
+            data_availability_data = (
+                preprint_metadata.data_availability_data if preprint_metadata else None
+            )
             if data_availability_data:
                 try:
                     add_data_availability(xml_root, data_availability_data)
@@ -231,9 +238,7 @@ class activity_ModifyMecaXml(MecaBaseActivity):
 
         # 10. add funding XML
         if session.get_value("run_type") != "silent-correction":
-            funding_data = get_funding_data(
-                article_id, version, self.settings, self.name, self.logger
-            )
+            funding_data = preprint_metadata.funding_data if preprint_metadata else None
             if funding_data:
                 try:
                     add_funding(xml_root, funding_data)
@@ -253,9 +258,7 @@ class activity_ModifyMecaXml(MecaBaseActivity):
 
         # 11. add author ORCID details
         if session.get_value("run_type") != "silent-correction":
-            author_data = get_author_data(
-                article_id, version, self.settings, self.name, self.logger
-            )
+            author_data = preprint_metadata.author_data if preprint_metadata else None
             if author_data:
                 try:
                     add_author_orcid(xml_root, author_data, self.name, self.logger)
@@ -376,31 +379,20 @@ def add_data_availability(xml_root, data_availability_data):
         cleaner.set_data_citations(xml_root, dataset_list)
 
 
-def get_data_availability_data(article_id, version, settings, caller_name, logger):
-    "from BigQuery get the data availability data"
+def get_preprint_metadata(article_id, version, settings, caller_name, logger):
+    "from BigQuery get the data availability, funding and author data"
     bigquery_client = bigquery.get_client(settings, logger)
     try:
-        return bigquery.get_data_availability_data(bigquery_client, article_id, version)
-    except Exception as exception:
-        logger.exception(
-            (
-                "%s, exception getting data availability data from"
-                " BigQuery for article_id %s, version %s: %s"
-            )
-            % (caller_name, article_id, version, str(exception))
+        metadata_map = bigquery.get_preprint_metadata(
+            bigquery_client,
+            [(article_id, version)],
+            cache=bigquery.get_query_cache(settings),
         )
-    return None
-
-
-def get_funding_data(article_id, version, settings, caller_name, logger):
-    "from BigQuery get the funding data"
-    bigquery_client = bigquery.get_client(settings, logger)
-    try:
-        return bigquery.get_funding_data(bigquery_client, article_id, version)
+        return metadata_map.get((str(article_id), str(version)))
     except Exception as exception:
         logger.exception(
             (
-                "%s, exception getting funding data from"
+                "%s, exception getting preprint metadata from"
                 " BigQuery for article_id %s, version %s: %s"
             )
             % (caller_name, article_id, version, str(exception))
@@ -417,22 +409,6 @@ def add_funding(xml_root, funding_data):
         cleaner.set_funding_award_data(xml_root, funding_awards)
 
 
-def get_author_data(article_id, version, settings, caller_name, logger):
-    "from BigQuery get the author data"
-    bigquery_client = bigquery.get_client(settings, logger)
-    try:
-        return bigquery.get_author_data(bigquery_client, article_id, version)
-    except Exception as exception:
-        logger.exception(
-            (
-                "%s, exception getting author data from"
-                " BigQuery for article_id %s, version %s: %s"
-            )
-            % (caller_name, article_id, version, str(exception))
-        )
-    return None
-
-
 def tag_text(parent, tag_name, selector=None):
     "from the parent tag get the text of tag_name if present"
     if selector:
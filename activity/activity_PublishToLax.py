@@ -79,6 +79,8 @@ class activity_PublishToLax(Activity):
                 QueueUrl=queue_url,
                 MessageBody=message_body,
             )
+            # Lax data for the article will change, do not use cached responses
+            lax_provider.invalidate_article(article_id)
             #########
 
         except Exception as exception:
@@ -1,6 +1,9 @@
 import json
 import os
+import shutil
+import struct
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from xml.etree import ElementTree
 from provider.execution_context import get_session
 from provider import software_heritage
@@ -11,6 +14,12 @@ DESCRIPTION_PATTERN = 'ERA complement for "%s", %s'
 # maximum size of each zip file part when splitting apart large zip files
 MAX_ZIP_SIZE_IN_BYTES = 50000000
 
+# bytes copied at a time from the original zip file to a part
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# header ID of the ZIP64 extra field, zipfile adds it again if needed
+ZIP64_EXTRA_FIELD_ID = 0x0001
+
 
 class activity_PushSWHDeposit(Activity):
     def __init__(self, settings, logger, client=None, token=None, activity_task=None):
@@ -105,102 +114,92 @@ class activity_PushSWHDeposit(Activity):
         to True as each file is uploaded, until the final file use In-Progress of False
         """
 
-        # preparatory step, break up the zip file into smaller zip file chunks
-        new_zip_files = split_zip_file(
-            zip_file_path,
-            self.directories.get("TMP_DIR"),
-            self.logger,
-            max_zip_size=MAX_ZIP_SIZE_IN_BYTES,
-        )
-        self.logger.info(
-            "%s, ready to send %s zip files" % (self.name, len(new_zip_files))
-        )
-
-        # first API request, part one, upload the first file
-        first_request_url = "%s/%s/" % (
-            self.settings.software_heritage_deposit_endpoint,
-            self.settings.software_heritage_collection_name,
-        )
-        first_zip_file_path = os.path.join(
-            self.directories.get("TMP_DIR"), new_zip_files[0]
-        )
-        # if there is only one zip file to upload, use in_progress False
-        in_progress = True
-        if len(new_zip_files) == 1:
-            in_progress = False
-        try:
-            response = self.post_file_to_swh(
-                endpoint_url=first_request_url,
-                article_id=article_id,
-                zip_file_path=first_zip_file_path,
-                atom_file_path=atom_file_path,
-                in_progress=in_progress,
-            )
-
-        except Exception as exception:
-            self.logger.exception(
-                "Exception in %s posting first file to endpoint, workflow permanent failure"
-                % self.name,
+        # preparatory step, plan how to break up the zip file into smaller zip file chunks
+        with zipfile.ZipFile(
+            zip_file_path, "r", zipfile.ZIP_DEFLATED, allowZip64=True
+        ) as open_zip:
+            parts = plan_zip_parts(
+                open_zip.infolist(),
+                zip_file_name_start(zip_file_path),
+                self.logger,
+                max_zip_size=MAX_ZIP_SIZE_IN_BYTES,
             )
-            return self.ACTIVITY_PERMANENT_FAILURE
-
-        # first API request, part two, get the URI of this upload to which we can send more files
-        edit_request_url = endpoint_from_response(response.content)
-        self.logger.info(
-            "%s, endpoint for sending additional files: %s"
-            % (self.name, edit_request_url)
-        )
-
-        # send multiple files in a loop if there is more than two files to upload
-        if len(new_zip_files) > 2:
-            file_count = 2
-            # second phase, send each additional file as a separate request
-            for new_zip_file in new_zip_files[1:-1]:
+            self.logger.info("%s, ready to send %s zip files" % (self.name, len(parts)))
+            if not parts:
                 self.logger.info(
-                    "%s, sending zip file %s of %s"
-                    % (self.name, file_count, len(new_zip_files))
-                )
-                zip_file_path = os.path.join(
-                    self.directories.get("TMP_DIR"), new_zip_file
+                    "%s, no files in the zip %s to send" % (self.name, zip_file_path)
                 )
-                try:
-                    response = self.post_file_to_swh(
-                        endpoint_url=edit_request_url,
-                        article_id=article_id,
-                        zip_file_path=zip_file_path,
-                        atom_file_path=None,
-                        in_progress=True,
-                    )
-
-                except Exception as exception:
-                    self.logger.exception(
-                        "Exception in %s posting file %s to endpoint, workflow permanent failure"
-                        % (self.name, new_zip_file),
-                    )
-                    return self.ACTIVITY_PERMANENT_FAILURE
+                return self.ACTIVITY_PERMANENT_FAILURE
 
-                file_count = file_count + 1
+            # write the next zip file while the previous one is being sent
+            with ThreadPoolExecutor(max_workers=1) as executor:
 
-        # third and final request, upload the final file with In-Progress False header
-        if len(new_zip_files) > 1:
-            final_zip_file_path = os.path.join(
-                self.directories.get("TMP_DIR"), new_zip_files[-1]
-            )
-            try:
-                response = self.post_file_to_swh(
-                    endpoint_url=edit_request_url,
-                    article_id=article_id,
-                    zip_file_path=final_zip_file_path,
-                    atom_file_path=None,
-                    in_progress=False,
-                )
+                def write_part(index):
+                    new_zip_filename, zip_members = parts[index]
+                    return write_zip_part(
+                        open_zip,
+                        zip_members,
+                        os.path.join(self.directories.get("TMP_DIR"), new_zip_filename),
+                    )
 
-            except Exception as exception:
-                self.logger.exception(
-                    "Exception in %s posting final file to endpoint, workflow permanent failure"
-                    % self.name,
+                # first API request goes to the collection, later ones to the
+                # URI of the upload returned by the first request
+                first_request_url = "%s/%s/" % (
+                    self.settings.software_heritage_deposit_endpoint,
+                    self.settings.software_heritage_collection_name,
                 )
-                return self.ACTIVITY_PERMANENT_FAILURE
+                edit_request_url = None
+                future = executor.submit(write_part, 0)
+                for index, (new_zip_file, _) in enumerate(parts):
+                    new_zip_file_path = future.result()
+                    if index + 1 < len(parts):
+                        future = executor.submit(write_part, index + 1)
+                    # the final zip file is sent with In-Progress False header
+                    in_progress = index < len(parts) - 1
+                    if index == 0:
+                        endpoint_url = first_request_url
+                        part_atom_file_path = atom_file_path
+                        failure_message = "posting first file to endpoint"
+                    else:
+                        endpoint_url = edit_request_url
+                        part_atom_file_path = None
+                        if in_progress:
+                            self.logger.info(
+                                "%s, sending zip file %s of %s"
+                                % (self.name, index + 1, len(parts))
+                            )
+                            failure_message = (
+                                "posting file %s to endpoint" % new_zip_file
+                            )
+                        else:
+                            failure_message = "posting final file to endpoint"
+                    try:
+                        response = self.post_file_to_swh(
+                            endpoint_url=endpoint_url,
+                            article_id=article_id,
+                            zip_file_path=new_zip_file_path,
+                            atom_file_path=part_atom_file_path,
+                            in_progress=in_progress,
+                        )
+
+                    except Exception as exception:
+                        self.logger.exception(
+                            "Exception in %s %s, workflow permanent failure"
+                            % (self.name, failure_message),
+                        )
+                        return self.ACTIVITY_PERMANENT_FAILURE
+
+                    # the zip file is no longer needed once it is sent
+                    os.remove(new_zip_file_path)
+
+                    if index == 0:
+                        # first API request, part two, get the URI of this upload
+                        # to which we can send more files
+                        edit_request_url = endpoint_from_response(response.content)
+                        self.logger.info(
+                            "%s, endpoint for sending additional files: %s"
+                            % (self.name, edit_request_url)
+                        )
 
         # clean temporary directory
         self.clean_tmp_dir()
@@ -257,57 +256,135 @@ def download_bucket_resource(settings, storage_resource, to_dir, logger):
     return file_path
 
 
-def split_zip_file(zip_file_path, output_dir, logger, max_zip_size=0):
-    "create a new zip file for each file in the original zip file"
-    zip_file_name = zip_file_path.split(os.sep)[-1]
-    # remove the .zip file extension
-    zip_file_name_start = ".".join(zip_file_name.split(".")[:-1])
-    with zipfile.ZipFile(
-        zip_file_path, "r", zipfile.ZIP_DEFLATED, allowZip64=True
-    ) as open_zip:
-        open_zip_info_list = open_zip.infolist()
-        part_count = 1
-        new_zip_filename = None
-
-        for zip_info in sorted(
-            open_zip_info_list, key=lambda zip_info: zip_info.filename
-        ):
-            if zip_info.filename.endswith("/"):
-                logger.info(
-                    'split_zip_file, "%s" ends with a slash, skipping it'
-                    % zip_info.filename
+def strip_zip64_extra(extra):
+    "remove the ZIP64 field from zip extra data, it is added again if needed"
+    fields = b""
+    index = 0
+    while index + 4 <= len(extra):
+        field_id, field_size = struct.unpack("<HH", extra[index : index + 4])
+        if field_id != ZIP64_EXTRA_FIELD_ID:
+            fields += extra[index : index + 4 + field_size]
+        index += 4 + field_size
+    return fields
+
+
+def zip_member_size(zip_info):
+    "estimated bytes the member adds to a zip file, header, data and central directory entry"
+    try:
+        filename_size = len(zip_info.filename.encode("ascii"))
+    except UnicodeEncodeError:
+        filename_size = len(zip_info.filename.encode("utf-8"))
+    extra_size = len(strip_zip64_extra(zip_info.extra))
+    size = (
+        zipfile.sizeFileHeader
+        + filename_size
+        + extra_size
+        + zip_info.compress_size
+        + zipfile.sizeCentralDir
+        + filename_size
+        + extra_size
+        + len(zip_info.comment)
+    )
+    if max(zip_info.file_size, zip_info.compress_size) > zipfile.ZIP64_LIMIT:
+        # ZIP64 fields in the local header and central directory entry
+        size += 20 + 20
+    return size
+
+
+def plan_zip_parts(zip_info_list, zip_file_name_start, logger, max_zip_size=0):
+    """
+    group the zip members into parts from their compressed sizes, a part is
+    full after adding a member makes it larger than max_zip_size,
+    return a list of (part file name, list of members) tuples
+    """
+    parts = []
+    part_members = None
+    part_size = 0
+    for zip_info in sorted(zip_info_list, key=lambda zip_info: zip_info.filename):
+        if zip_info.filename.endswith("/"):
+            logger.info(
+                'split_zip_file, "%s" ends with a slash, skipping it'
+                % zip_info.filename
+            )
+            continue
+
+        if part_members is None:
+            part_members = []
+            part_size = zipfile.sizeEndCentDir
+            parts.append(
+                (
+                    "%s_part%s.zip"
+                    % (zip_file_name_start, "{:04d}".format(len(parts) + 1)),
+                    part_members,
                 )
-                continue
+            )
 
-            if not new_zip_filename:
-                new_zip_filename = "%s_part%s.zip" % (
-                    zip_file_name_start,
-                    "{:04d}".format(part_count),
-                )
-            new_zip_filename_path = os.path.join(output_dir, new_zip_filename)
+        logger.info(
+            'split_zip_file, "%s" new zip file name "%s"'
+            % (zip_info.filename, parts[-1][0])
+        )
+        part_members.append(zip_info)
+        part_size += zip_member_size(zip_info)
 
+        # check size of zip file exceeds the max, and whether to start writing a new one
+        if part_size > max_zip_size:
             logger.info(
-                'split_zip_file, "%s" new zip file name "%s"'
-                % (zip_info.filename, new_zip_filename)
+                "zip file %s size of %s bytes exceeds maximum of %s bytes, "
+                "it will not be written to again"
+                % (parts[-1][0], part_size, max_zip_size)
             )
+            part_members = None
+    return parts
+
+
+def copy_zip_member(open_zip, zip_info, new_zip):
+    "stream the member data from open_zip to new_zip in chunks"
+    new_zip_info = zipfile.ZipInfo(zip_info.filename, zip_info.date_time)
+    new_zip_info.compress_type = zip_info.compress_type
+    new_zip_info.comment = zip_info.comment
+    new_zip_info.extra = strip_zip64_extra(zip_info.extra)
+    new_zip_info.create_system = zip_info.create_system
+    new_zip_info.internal_attr = zip_info.internal_attr
+    new_zip_info.external_attr = zip_info.external_attr
+    # the size decides whether ZIP64 fields are written
+    new_zip_info.file_size = zip_info.file_size
+    with open_zip.open(zip_info) as open_member, new_zip.open(
+        new_zip_info, "w"
+    ) as new_member:
+        shutil.copyfileobj(open_member, new_member, COPY_CHUNK_SIZE)
+
+
+def write_zip_part(open_zip, zip_members, new_zip_filename_path):
+    "write a zip file of the members copied from open_zip"
+    with zipfile.ZipFile(
+        new_zip_filename_path, "w", zipfile.ZIP_DEFLATED, allowZip64=True
+    ) as new_zip:
+        for zip_info in zip_members:
+            copy_zip_member(open_zip, zip_info, new_zip)
+    return new_zip_filename_path
 
-            with zipfile.ZipFile(
-                new_zip_filename_path,
-                "a",
-                zipfile.ZIP_DEFLATED,
-            ) as new_zip:
-                new_zip.writestr(zip_info, open_zip.read(zip_info))
-
-            # check size of zip file exceeds the max, and whether to start writing a new one
-            zip_file_size = os.path.getsize(new_zip_filename_path)
-            if zip_file_size > max_zip_size:
-                logger.info(
-                    "zip file %s size of %s bytes exceeds maximum of %s bytes, "
-                    "it will not be written to again"
-                    % (new_zip_filename, zip_file_size, max_zip_size)
-                )
-                new_zip_filename = None
-                part_count += 1
+
+def zip_file_name_start(zip_file_path):
+    "zip file name without the .zip file extension"
+    zip_file_name = zip_file_path.split(os.sep)[-1]
+    return ".".join(zip_file_name.split(".")[:-1])
+
+
+def split_zip_file(zip_file_path, output_dir, logger, max_zip_size=0):
+    "split the members of the original zip file into zip files of about max_zip_size"
+    with zipfile.ZipFile(
+        zip_file_path, "r", zipfile.ZIP_DEFLATED, allowZip64=True
+    ) as open_zip:
+        parts = plan_zip_parts(
+            open_zip.infolist(),
+            zip_file_name_start(zip_file_path),
+            logger,
+            max_zip_size,
+        )
+        for new_zip_filename, zip_members in parts:
+            write_zip_part(
+                open_zip, zip_members, os.path.join(output_dir, new_zip_filename)
+            )
     return sorted(os.listdir(output_dir))
 
 
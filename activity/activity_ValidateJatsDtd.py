@@ -1,7 +1,7 @@
 import os
 import json
 import time
-from provider import github_provider, meca
+from provider import endpoint_client, github_provider, meca
 from provider.execution_context import get_session
 from provider.storage_provider import storage_context
 from activity.objects import Activity
@@ -102,6 +102,7 @@ class activity_ValidateJatsDtd(Activity):
             getattr(self.settings, "user_agent", None),
             self.name,
             self.logger,
+            settings=self.settings,
         )
 
         if response_content:
@@ -131,8 +132,12 @@ class activity_ValidateJatsDtd(Activity):
             if int(session.get_value(SESSION_ATTEMPT_COUNTER_NAME)) < MAX_ATTEMPTS:
                 # Clean up disk
                 self.clean_tmp_dir()
-                # sleep a short time
-                time.sleep(SLEEP_SECONDS)
+                # sleep a short time, or until the endpoint accepts requests again
+                time.sleep(
+                    endpoint_client.temporary_failure_seconds(
+                        endpoint_url, SLEEP_SECONDS, self.settings
+                    )
+                )
                 # return a temporary failure
                 return self.ACTIVITY_TEMPORARY_FAILURE
             if int(session.get_value(SESSION_ATTEMPT_COUNTER_NAME)) >= MAX_ATTEMPTS:
@@ -121,14 +121,30 @@ class activity_VerifyImageServer(Activity):
             return self.ACTIVITY_PERMANENT_FAILURE
 
     def retrieve_endpoints_check(self, original_figures, iiif_path_for_article):
-        user_agent = getattr(self.settings, "user_agent", None)
-        return list(
+        "check the figure endpoints at the same time, return a list of results"
+        report = iiif.verify_endpoints(
             [
-                iiif.try_endpoint(
-                    iiif.endpoint(self.settings, iiif_path_for_article, fig),
-                    self.logger,
-                    user_agent,
-                )
+                iiif.endpoint(self.settings, iiif_path_for_article, fig)
                 for fig in original_figures
-            ]
+            ],
+            self.logger,
+            getattr(self.settings, "user_agent", None),
+            max_workers=int(
+                getattr(self.settings, "iiif_verify_max_workers", None)
+                or iiif.MAX_WORKERS
+            ),
+            deadline_seconds=int(
+                getattr(self.settings, "iiif_verify_deadline_seconds", None)
+                or iiif.DEADLINE_SECONDS
+            ),
+        )
+        self.logger.info(
+            "%s, checked %s endpoints in %s seconds, %s failed"
+            % (
+                self.name,
+                len(report.get("results")),
+                report.get("seconds"),
+                len(report.get("failed")),
+            )
         )
+        return report.get("results")
@@ -55,6 +55,11 @@ class Activity:
         self.default_task_start_to_close_timeout = 60 * 5
         self.description = None
 
+        # progress details sent to SWF with each activity task heartbeat,
+        # and set to True by the worker if SWF requests a cancel
+        self.heartbeat_details = None
+        self.cancel_requested = False
+
         self.tmp_base_dir = "tmp"
         self.tmp_dir = None
         self.directories = None
@@ -149,6 +154,10 @@ class Activity:
 
         return activityId
 
+    def set_heartbeat_details(self, details):
+        "set the progress details to send to SWF with the next heartbeat"
+        self.heartbeat_details = details
+
     def make_tmp_dir(self):
         """
         Check or create temporary directory for this activity
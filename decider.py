@@ -2,6 +2,7 @@ import os
 import copy
 import json
 import importlib
+from collections import OrderedDict
 from botocore.config import Config
 from provider import process, utils
 from log import create_log
@@ -27,27 +28,51 @@ def decide(settings, flag, debug=False):
 
     token = None
 
+    # cache of event histories, to fetch only new events of each decision task
+    history_cache = None
+    max_cached_events = get_history_cache_events(settings)
+    if max_cached_events:
+        history_cache = HistoryCache(max_cached_events)
+
     # Poll for a decision task
     while flag.green():
         if token is None:
             logger.info("polling for decision...")
 
-            decision = client.poll_for_decision_task(
-                domain=settings.domain,
-                taskList={"name": settings.default_task_list},
-                identity=identity,
-                maximumPageSize=maximum_page_size,
-            )
+            if history_cache:
+                # newest events first, to stop paging at the cached events
+                decision = client.poll_for_decision_task(
+                    domain=settings.domain,
+                    taskList={"name": settings.default_task_list},
+                    identity=identity,
+                    maximumPageSize=maximum_page_size,
+                    reverseOrder=True,
+                )
+                decision = history_cache.get_all_events(
+                    decision,
+                    client,
+                    settings.domain,
+                    settings.default_task_list,
+                    identity,
+                    maximum_page_size,
+                )
+            else:
+                decision = client.poll_for_decision_task(
+                    domain=settings.domain,
+                    taskList={"name": settings.default_task_list},
+                    identity=identity,
+                    maximumPageSize=maximum_page_size,
+                )
 
-            # Check for a nextPageToken and keep polling until all events are pulled
-            decision = get_all_paged_events(
-                decision,
-                client,
-                settings.domain,
-                settings.default_task_list,
-                identity,
-                maximum_page_size,
-            )
+                # Check for a nextPageToken and keep polling until all events are pulled
+                decision = get_all_paged_events(
+                    decision,
+                    client,
+                    settings.domain,
+                    settings.default_task_list,
+                    identity,
+                    maximum_page_size,
+                )
 
             token = get_task_token(decision)
             logger.info("got token: %s", token)
@@ -71,7 +96,7 @@ def decide(settings, flag, debug=False):
 
             if token is not None:
                 workflow_type = get_workflow_type(decision)
-                process_workflow(
+                workflow_object = process_workflow(
                     workflow_type,
                     decision,
                     settings,
@@ -80,6 +105,11 @@ def decide(settings, flag, debug=False):
                     token,
                     maximum_page_size,
                 )
+                if history_cache and (
+                    workflow_object is None or workflow_object.closed
+                ):
+                    # no more decisions will be made for the workflow execution
+                    history_cache.evict(get_workflow_execution_key(decision))
 
         # Reset and loop
         token = None
@@ -90,7 +120,7 @@ def decide(settings, flag, debug=False):
 def process_workflow(
     workflow_type, decision, settings, logger, client, token, maximum_page_size
 ):
-    """for each decision token load the workflow and run it"""
+    """for each decision token load the workflow and run it, return the workflow object"""
     # for the workflowType attempt to do the work
     if workflow_type is not None:
 
@@ -114,8 +144,9 @@ def process_workflow(
             )
             # Process the workflow
             invoke_do_workflow(workflow_name, workflow_object, logger)
-        else:
-            logger.info("error: could not load object %s\n", workflow_name)
+            return workflow_object
+        logger.info("error: could not load object %s\n", workflow_name)
+    return None
 
 
 def invoke_do_workflow(workflow_name, workflow_object, logger):
@@ -133,10 +164,13 @@ def invoke_do_workflow(workflow_name, workflow_object, logger):
 
 def trimmed_decision(decision, debug=False):
     """trim data from a copy of decision prior to logging if not debug"""
-    decision_trimmed = copy.deepcopy(decision)
-    if not debug:
-        # removed to limit verbosity
-        decision_trimmed["events"] = []
+    if debug:
+        return copy.deepcopy(decision)
+    # removed to limit verbosity, without copying the events first
+    decision_trimmed = copy.deepcopy(
+        {key: value for key, value in decision.items() if key != "events"}
+    )
+    decision_trimmed["events"] = []
     return decision_trimmed
 
 
@@ -183,6 +217,127 @@ def get_all_paged_events(
     return decision
 
 
+def get_history_cache_events(settings):
+    "maximum number of events to keep in the decider history cache, 0 to disable it"
+    try:
+        return max(int(getattr(settings, "decider_history_cache_events", 0)), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def get_workflow_execution_key(decision):
+    "(workflowId, runId) of the workflow execution of a decision task"
+    try:
+        workflow_execution = decision["workflowExecution"]
+        return (workflow_execution["workflowId"], workflow_execution["runId"])
+    except (KeyError, TypeError):
+        return None
+
+
+class HistoryCache:
+    """
+    LRU cache of the event history of each workflow execution, keyed by
+    (workflowId, runId). Decision tasks are polled newest events first so
+    only the events after the last cached eventId are paged in. The total
+    number of cached events is bounded by max_events
+    """
+
+    def __init__(self, max_events):
+        self.max_events = max_events
+        self.histories = OrderedDict()
+        self.event_count = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        "cached events of a workflow execution, in history order"
+        events = self.histories.get(key)
+        if events is not None:
+            self.histories.move_to_end(key)
+        return events
+
+    def put(self, key, events):
+        replaced_events = self.histories.pop(key, None)
+        if replaced_events is not None:
+            self.event_count -= len(replaced_events)
+        if len(events) > self.max_events:
+            return
+        self.histories[key] = events
+        self.event_count += len(events)
+        while self.event_count > self.max_events:
+            _, evicted_events = self.histories.popitem(last=False)
+            self.event_count -= len(evicted_events)
+
+    def evict(self, key):
+        events = self.histories.pop(key, None)
+        if events is not None:
+            self.event_count -= len(events)
+
+    def get_all_events(
+        self, decision, client, domain, task_list, identity, maximum_page_size
+    ):
+        """
+        Given a poll_for_decision_task response polled with reverseOrder,
+        page in events until reaching the cached events, and return the
+        decision with its full history in history order
+        """
+        key = get_workflow_execution_key(decision)
+        if key is None or not decision.get("events"):
+            return decision
+
+        cached_events = self.get(key)
+        last_event_id = cached_events[-1]["eventId"] if cached_events else 0
+
+        polled_events = list(decision["events"])
+        while decision.get("nextPageToken") is not None and (
+            polled_events[-1]["eventId"] > last_event_id + 1
+        ):
+            decision = self.poll_next_page(
+                decision, client, domain, task_list, identity, maximum_page_size
+            )
+            polled_events += decision["events"]
+        new_events = [
+            event
+            for event in reversed(polled_events)
+            if event["eventId"] > last_event_id
+        ]
+
+        if cached_events and (
+            not new_events or new_events[0]["eventId"] == last_event_id + 1
+        ):
+            self.hits += 1
+            all_events = cached_events + new_events
+        else:
+            self.misses += 1
+            # not contiguous with any cached events, page in the whole history
+            while decision.get("nextPageToken") is not None:
+                decision = self.poll_next_page(
+                    decision, client, domain, task_list, identity, maximum_page_size
+                )
+                polled_events += decision["events"]
+            all_events = list(reversed(polled_events))
+
+        self.put(key, all_events)
+        decision["events"] = all_events
+        # all events are loaded, do not page any further
+        decision.pop("nextPageToken", None)
+        return decision
+
+    @staticmethod
+    def poll_next_page(
+        decision, client, domain, task_list, identity, maximum_page_size
+    ):
+        "poll for the next page of events of a decision task, newest events first"
+        return client.poll_for_decision_task(
+            domain=domain,
+            taskList={"name": task_list},
+            identity=identity,
+            nextPageToken=decision.get("nextPageToken"),
+            maximumPageSize=maximum_page_size,
+            reverseOrder=True,
+        )
+
+
 def get_input(decision):
     """
     From the decision response, which is JSON data form SWF, get the
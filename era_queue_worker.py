@@ -1,7 +1,7 @@
 import os
 import json
 import log
-from provider import process, software_heritage, utils
+from provider import process, software_heritage, sqs_provider, utils
 
 
 WORKFLOW_NAME = "SoftwareHeritageDeposit"
@@ -34,11 +34,7 @@ class EraQueueWorker:
     def connect(self):
         "connect to the queue service"
         if not self.client:
-            self.client = self.settings.aws_conn('sqs', {
-                'aws_access_key_id': self.settings.aws_access_key_id,
-                'aws_secret_access_key': self.settings.aws_secret_access_key,
-                'region_name': self.settings.sqs_region,
-            })
+            self.client = sqs_provider.get_client(self.settings)
 
     def queues(self):
         "get the queues"
@@ -61,91 +57,77 @@ class EraQueueWorker:
 
         # Poll for an activity task indefinitely
         if input_queue_url:
-            while flag.green():
-
-                self.logger.info("reading message")
-                queue_messages = self.client.receive_message(
-                    QueueUrl=input_queue_url,
-                    MaxNumberOfMessages=1,
-                    VisibilityTimeout=60,
-                    WaitTimeSeconds=self.wait_time_seconds,
-                )
-
-                if not queue_messages.get("Messages"):
-                    self.logger.info("no messages available")
-                else:
-                    for queue_message in queue_messages.get("Messages"):
-                        self.logger.info(
-                            "got message id: %s" % queue_message.get("MessageId")
-                        )
-
-                        message_body = queue_message.get("Body")
-                        try:
-                            message_dict = json.loads(message_body)
-                        except json.decoder.JSONDecodeError as exception:
-                            self.logger.exception(
-                                "Exception loading message body as JSON: %s: %s"
-                                % (message_body, str(exception))
-                            )
-                            message_dict = {}
-
-                        # get values from the queue message
-                        article_id = message_dict.get("id")
-                        input_file = message_dict.get("download")
-                        display = message_dict.get("display")
-
-                        origin = software_heritage.display_to_origin(display)
-                        self.logger.info(
-                            'display value "%s" turned into origin value "%s"',
-                            display,
-                            origin,
-                        )
-
-                        # determine if a workflow should be started
-                        if origin:
-                            if self.approve_workflow_start(origin=origin):
-                                run = None
-                                info = {
-                                    "article_id": article_id,
-                                    "version": "1",
-                                    "workflow": "software_heritage",
-                                    "recipient": "software_heritage",
-                                    "input_file": input_file,
-                                    "data": {
-                                        "display": display,
-                                    },
-                                }
-                                workflow_data = {"run": run, "info": info}
-
-                                # build message
-                                message = {
-                                    "workflow_name": WORKFLOW_NAME,
-                                    "workflow_data": workflow_data,
-                                }
-                                self.logger.info(
-                                    "Starting a %s workflow for %s",
-                                    WORKFLOW_NAME,
-                                    display,
-                                )
-                                # send workflow initiation message
-                                self.client.send_message(
-                                    QueueUrl=output_queue_url,
-                                    MessageBody=json.dumps(message),
-                                )
-
-                            # cancel incoming message
-                            self.logger.info("cancelling message")
-                            self.client.delete_message(
-                                QueueUrl=input_queue_url,
-                                ReceiptHandle=queue_message.get("ReceiptHandle"),
-                            )
-                            self.logger.info("message cancelled")
+            consumer = sqs_provider.QueueConsumer(
+                self.client,
+                self.logger,
+                input_queue_url,
+                output_queue_url,
+                visibility_timeout=60,
+                wait_time_seconds=self.wait_time_seconds,
+            )
+            consumer.consume(flag, self.process_message)
 
             self.logger.info("graceful shutdown")
 
         else:
             self.logger.error("error obtaining queue")
 
+    def process_message(self, queue_message):
+        "return the workflow starter message bodies to send for a queue message"
+        self.logger.info("got message id: %s" % queue_message.get("MessageId"))
+
+        message_body = queue_message.get("Body")
+        try:
+            message_dict = json.loads(message_body)
+        except json.decoder.JSONDecodeError as exception:
+            self.logger.exception(
+                "Exception loading message body as JSON: %s: %s"
+                % (message_body, str(exception))
+            )
+            message_dict = {}
+
+        # get values from the queue message
+        article_id = message_dict.get("id")
+        input_file = message_dict.get("download")
+        display = message_dict.get("display")
+
+        origin = software_heritage.display_to_origin(display)
+        self.logger.info(
+            'display value "%s" turned into origin value "%s"',
+            display,
+            origin,
+        )
+
+        # determine if a workflow should be started
+        if not origin:
+            return None
+        if not self.approve_workflow_start(origin=origin):
+            return []
+        run = None
+        info = {
+            "article_id": article_id,
+            "version": "1",
+            "workflow": "software_heritage",
+            "recipient": "software_heritage",
+            "input_file": input_file,
+            "data": {
+                "display": display,
+            },
+        }
+        workflow_data = {"run": run, "info": info}
+
+        # build workflow initiation message
+        message = {
+            "workflow_name": WORKFLOW_NAME,
+            "workflow_data": workflow_data,
+        }
+        self.logger.info(
+            "Starting a %s workflow for %s",
+            WORKFLOW_NAME,
+            display,
+        )
+        return [json.dumps(message)]
+
     def approve_workflow_start(self, origin):
         try:
             origin_exists = software_heritage.swh_origin_exists(
@@ -1,7 +1,7 @@
 import json
 from dateutil.parser import parse
 import log
-from provider import process
+from provider import process, sqs_provider
 from provider import utils
 
 
@@ -21,11 +21,7 @@ class LaxResponseAdapter:
     def listen(self, flag):
         self.logger.info("started")
 
-        client = self._settings.aws_conn('sqs', {
-            'aws_access_key_id': self._settings.aws_access_key_id,
-            'aws_secret_access_key': self._settings.aws_secret_access_key,
-            'region_name': self._settings.sqs_region,
-        })
+        client = sqs_provider.get_client(self._settings)
 
         input_queue_url_response = client.get_queue_url(
             QueueName=self._settings.lax_response_queue
@@ -37,50 +33,34 @@ class LaxResponseAdapter:
         output_queue_url = output_queue_url_response.get("QueueUrl")
 
         if input_queue_url is not None:
-            while flag.green():
-
-                self.logger.debug("reading queue")
-                queue_messages = client.receive_message(
-                    QueueUrl=input_queue_url,
-                    MaxNumberOfMessages=1,
-                    VisibilityTimeout=60,
-                    WaitTimeSeconds=20,
-                )
-
-                if queue_messages.get("Messages"):
-                    queue_message = queue_messages.get("Messages")[0]
+            consumer = sqs_provider.QueueConsumer(
+                client,
+                self.logger,
+                input_queue_url,
+                output_queue_url,
+                visibility_timeout=60,
+            )
+
+            def starter_messages(queue_message):
+                self.logger.info("got message id: %s", queue_message.get("MessageId"))
+                try:
+                    workflow_starter_message = self.process_message(queue_message)
+                except ShortRetryException as exception:
                     self.logger.info(
-                        "got message id: %s", queue_message.get("MessageId")
+                        "short retry: %s because of %s",
+                        queue_message.get("MessageId"),
+                        exception,
                     )
-                    try:
-                        workflow_starter_message = self.process_message(queue_message)
-                        # send workflow initiation message
-                        self.logger.info(
-                            "sending workflow starter message: %s",
-                            workflow_starter_message,
-                        )
-                        client.send_message(
-                            QueueUrl=output_queue_url,
-                            MessageBody=json.dumps(workflow_starter_message),
-                        )
-                        self.logger.info(
-                            "deleting message id: %s", queue_message.get("MessageId")
-                        )
-                        client.delete_message(
-                            QueueUrl=input_queue_url,
-                            ReceiptHandle=queue_message.get("ReceiptHandle"),
-                        )
-                    except ShortRetryException as exception:
-                        self.logger.info(
-                            "short retry: %s because of %s",
-                            queue_message.get("MessageId"),
-                            exception,
-                        )
-                        client.change_message_visibility(
-                            QueueUrl=input_queue_url,
-                            ReceiptHandle=queue_message.get("ReceiptHandle"),
-                            VisibilityTimeout=10,
-                        )
+                    consumer.change_visibility(queue_message, 10)
+                    return None
+                # send workflow initiation message
+                self.logger.info(
+                    "sending workflow starter message: %s",
+                    workflow_starter_message,
+                )
+                return [json.dumps(workflow_starter_message)]
+
+            consumer.consume(flag, starter_messages)
 
             self.logger.info("graceful shutdown")
 
@@ -1,5 +1,14 @@
+import threading
+import time
+from collections import OrderedDict
 from xml.etree import ElementTree
-from google.cloud.bigquery import Client, QueryJobConfig, ScalarQueryParameter
+from google.cloud.bigquery import (
+    ArrayQueryParameter,
+    Client,
+    QueryJobConfig,
+    ScalarQueryParameter,
+    StructQueryParameter,
+)
 from google.auth.exceptions import DefaultCredentialsError
 from elifearticle.article import Award, Contributor, FundingAward
 from provider import utils
@@ -25,6 +34,10 @@ BIG_QUERY_PREPRINT_FUNDING_VIEW_NAME = (
 
 BIG_QUERY_PREPRINT_AUTHOR_VIEW_NAME = "elife-data-pipeline.prod.mv_rp_author_details"
 
+# default seconds query results are kept in the cache, and most results kept
+CACHE_SECONDS = 600
+CACHE_MAX_ENTRIES = 1000
+
 
 class Manuscript:
     """manuscript data populated from BigQuery row"""
@@ -115,6 +128,100 @@ class Preprint:
             setattr(self, attr_name, getattr(row, row_key, None))
 
 
+class StructRow(dict):
+    "row of a repeated STRUCT column, with its fields readable like a Row"
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+class PreprintMetadata:
+    "data availability, funding and author data of a preprint version"
+
+    def __init__(self, row=None):
+        self.data_availability_data = None
+        self.funding_data = []
+        self.author_data = []
+        # populate from the row
+        self.populate_from_row(row)
+
+    def populate_from_row(self, row):
+        if not row:
+            return
+        data_availability_data = [
+            StructRow(row_dict) for row_dict in row.get("data_availability") or []
+        ]
+        # use the first row returned
+        if data_availability_data:
+            self.data_availability_data = data_availability_data[0]
+        self.funding_data = [
+            StructRow(row_dict) for row_dict in row.get("funding") or []
+        ]
+        self.author_data = [StructRow(row_dict) for row_dict in row.get("author") or []]
+
+    def is_complete(self):
+        "whether there is data availability, funding and author data"
+        return bool(
+            self.data_availability_data and self.funding_data and self.author_data
+        )
+
+
+class QueryCache:
+    """
+    query results kept in memory for ttl_seconds, so activities running in
+    the same process do not query again for the same data
+    """
+
+    def __init__(self, ttl_seconds=CACHE_SECONDS, max_entries=CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        "the cached value, or None if it is not cached or has expired"
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if time.monotonic() >= expires:
+                del self.entries[key]
+                return None
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+QUERY_CACHES = {}
+QUERY_CACHES_LOCK = threading.Lock()
+
+
+def get_query_cache(settings=None):
+    """
+    query cache shared by the process for the bigquery_cache_seconds
+    and bigquery_cache_max_entries settings
+    """
+    cache_key = (
+        int(getattr(settings, "bigquery_cache_seconds", None) or CACHE_SECONDS),
+        int(getattr(settings, "bigquery_cache_max_entries", None) or CACHE_MAX_ENTRIES),
+    )
+    with QUERY_CACHES_LOCK:
+        if cache_key not in QUERY_CACHES:
+            QUERY_CACHES[cache_key] = QueryCache(
+                ttl_seconds=cache_key[0], max_entries=cache_key[1]
+            )
+        return QUERY_CACHES.get(cache_key)
+
+
 def get_client(settings, logger):
     """path to credentials file in env var GOOGLE_APPLICATION_CREDENTIALS"""
     try:
@@ -141,6 +248,24 @@ def article_data(client, doi):
     return query_job.result()  # Waits for query to finish
 
 
+def manuscript_data(client, doi, cache=None):
+    "first row of article data for the DOI, from the cache if it was queried recently"
+    cache_key = ("article_data", doi)
+    if cache:
+        first_row = cache.get(cache_key)
+        if first_row is not None:
+            return first_row
+    rows = article_data(client, doi)
+    # use the first row returned
+    try:
+        first_row = list(rows)[0]
+    except IndexError:
+        return None
+    if cache:
+        cache.put(cache_key, first_row)
+    return first_row
+
+
 def date_to_string(datetime_date):
     return datetime_date.strftime("%Y-%m-%d")
 
@@ -226,30 +351,9 @@ def future_preprint_article_result(client, day_interval=None):
 
 def get_data_availability_data(client, manuscript_id, version):
     "get data availability data from the view for a preprint version"
-
-    # query
-    query = (
-        "SELECT * FROM `{view_name}`"
-        " WHERE `manuscript_id` = @manuscript_id"
-        " AND `manuscript_version_str` = @manuscript_version_str"
-    ).format(view_name=BIG_QUERY_DATA_AVAILABILITY_VIEW_NAME)
-
-    # parameters
-    job_config = QueryJobConfig(
-        query_parameters=[
-            ScalarQueryParameter("manuscript_id", "STRING", manuscript_id),
-            ScalarQueryParameter("manuscript_version_str", "STRING", version),
-        ]
-    )
-
-    query_job = client.query(query, job_config=job_config)  # API request
-    rows = query_job.result()  # Waits for query to fini
-    # use the first row returned
-    try:
-        first_row = list(rows)[0]
-    except IndexError:
-        first_row = None
-    return first_row
+    return preprint_version_metadata(
+        client, manuscript_id, version
+    ).data_availability_data
 
 
 def parse_data_availability_data(data_availability_data):
@@ -298,26 +402,8 @@ def parse_data_availability_data(data_availability_data):
 
 
 def get_funding_data(client, manuscript_id, version):
-    "get funding datafrom the view for a preprint version"
-
-    # query
-    query = (
-        "SELECT * FROM `{view_name}`"
-        " WHERE `manuscript_id` = @manuscript_id"
-        " AND `manuscript_version_str` = @manuscript_version_str"
-        " ORDER BY `funding_order_number` ASC"
-    ).format(view_name=BIG_QUERY_PREPRINT_FUNDING_VIEW_NAME)
-
-    # parameters
-    job_config = QueryJobConfig(
-        query_parameters=[
-            ScalarQueryParameter("manuscript_id", "STRING", manuscript_id),
-            ScalarQueryParameter("manuscript_version_str", "STRING", version),
-        ]
-    )
-
-    query_job = client.query(query, job_config=job_config)  # API request
-    return query_job.result()  # return rows
+    "get funding data from the view for a preprint version"
+    return preprint_version_metadata(client, manuscript_id, version).funding_data
 
 
 def parse_funding_data(funding_data):
@@ -353,24 +439,7 @@ def parse_funding_data(funding_data):
 
 def get_author_data(client, manuscript_id, version):
     "get author data from the view for a preprint version"
-
-    # query
-    query = (
-        "SELECT * FROM `{view_name}`"
-        " WHERE `manuscript_id` = @manuscript_id"
-        " AND `manuscript_version_str` = @manuscript_version_str"
-    ).format(view_name=BIG_QUERY_PREPRINT_AUTHOR_VIEW_NAME)
-
-    # parameters
-    job_config = QueryJobConfig(
-        query_parameters=[
-            ScalarQueryParameter("manuscript_id", "STRING", manuscript_id),
-            ScalarQueryParameter("manuscript_version_str", "STRING", version),
-        ]
-    )
-
-    query_job = client.query(query, job_config=job_config)  # API request
-    return query_job.result()  # return rows
+    return preprint_version_metadata(client, manuscript_id, version).author_data
 
 
 def parse_author_data(author_data):
@@ -382,3 +451,98 @@ def parse_author_data(author_data):
         for author_detail_data in author_data_item.author_details:
             author_details.append(author_detail_data)
     return author_details
+
+
+def preprint_metadata_query():
+    """
+    query for the data availability, funding and author data of a list of
+    preprint versions, one row for each version with a column for each view
+    """
+    return (
+        "SELECT version.manuscript_id, version.manuscript_version_str,"
+        " ARRAY(SELECT AS STRUCT * FROM `{data_availability_view_name}` AS view"
+        " WHERE view.manuscript_id = version.manuscript_id"
+        " AND view.manuscript_version_str = version.manuscript_version_str"
+        ") AS data_availability,"
+        " ARRAY(SELECT AS STRUCT * FROM `{funding_view_name}` AS view"
+        " WHERE view.manuscript_id = version.manuscript_id"
+        " AND view.manuscript_version_str = version.manuscript_version_str"
+        " ORDER BY view.funding_order_number ASC"
+        ") AS funding,"
+        " ARRAY(SELECT AS STRUCT * FROM `{author_view_name}` AS view"
+        " WHERE view.manuscript_id = version.manuscript_id"
+        " AND view.manuscript_version_str = version.manuscript_version_str"
+        ") AS author"
+        " FROM UNNEST(@versions) AS version"
+    ).format(
+        data_availability_view_name=BIG_QUERY_DATA_AVAILABILITY_VIEW_NAME,
+        funding_view_name=BIG_QUERY_PREPRINT_FUNDING_VIEW_NAME,
+        author_view_name=BIG_QUERY_PREPRINT_AUTHOR_VIEW_NAME,
+    )
+
+
+def preprint_metadata_result(client, versions):
+    "run a preprint metadata query for a list of (manuscript_id, version) tuples"
+    query = preprint_metadata_query()
+    job_config = QueryJobConfig(
+        query_parameters=[
+            ArrayQueryParameter(
+                "versions",
+                "STRUCT",
+                [
+                    StructQueryParameter(
+                        None,
+                        ScalarQueryParameter(
+                            "manuscript_id", "STRING", str(manuscript_id)
+                        ),
+                        ScalarQueryParameter(
+                            "manuscript_version_str", "STRING", str(version)
+                        ),
+                    )
+                    for manuscript_id, version in versions
+                ],
+            ),
+        ]
+    )
+    query_job = client.query(query, job_config=job_config)  # API request
+    return query_job.result()  # Waits for query to finish
+
+
+def get_preprint_metadata(client, versions, cache=None):
+    """
+    get PreprintMetadata for each (manuscript_id, version) tuple in one query job,
+    versions found in the cache are not queried again,
+    returns a dict keyed by (manuscript_id, version) as strings
+    """
+    metadata_map = {}
+    query_versions = []
+    for manuscript_id, version in versions:
+        key = (str(manuscript_id), str(version))
+        if key in metadata_map or key in query_versions:
+            continue
+        metadata = cache.get(("preprint_metadata",) + key) if cache else None
+        if metadata is not None:
+            metadata_map[key] = metadata
+        else:
+            query_versions.append(key)
+    if not query_versions:
+        return metadata_map
+    rows = preprint_metadata_result(client, query_versions)
+    for row in rows:
+        key = (str(row.get("manuscript_id")), str(row.get("manuscript_version_str")))
+        metadata = PreprintMetadata(row)
+        metadata_map[key] = metadata
+        # versions missing any data may be loaded later, they are queried again
+        if cache and metadata.is_complete():
+            cache.put(("preprint_metadata",) + key, metadata)
+    for key in query_versions:
+        if key not in metadata_map:
+            metadata_map[key] = PreprintMetadata()
+    return metadata_map
+
+
+def preprint_version_metadata(client, manuscript_id, version):
+    "get PreprintMetadata for one preprint version"
+    return get_preprint_metadata(client, [(manuscript_id, version)]).get(
+        (str(manuscript_id), str(version))
+    )
@@ -7,7 +7,6 @@ import time
 from urllib.parse import urlparse
 from xml.etree import ElementTree
 from xml.etree.ElementTree import Element, SubElement
-import requests
 from docmaptools import parse as docmap_parse
 from elifearticle import parse as elifearticle_parse
 from elifearticle.article import Dataset
@@ -32,7 +31,7 @@ from elifecleaner import (
 from elifetools import xmlio
 from jatsgenerator import build
 from jatsgenerator import utils as jats_utils
-from provider import utils
+from provider import docmap_provider, utils
 from provider.storage_provider import storage_context
 from provider.article_processing import file_extension
 
@@ -659,32 +658,28 @@ def clean_inline_graphic_tags(root):
                 parent_tag.remove(tag)
 
 
-def get_docmap(url, user_agent=None):
+def get_docmap(url, user_agent=None, cache=None, max_age=0):
     "GET request for the docmap json"
-    headers = None
-    if user_agent:
-        headers = {"user-agent": user_agent}
-    response = requests.get(url, timeout=REQUESTS_TIMEOUT, headers=headers)
-    LOGGER.info("Request to docmaps API: GET %s", url)
-    LOGGER.info(
-        "Response from docmaps API: %s\n%s", response.status_code, response.content
+    status_code, content = docmap_provider.get_docmap_response(
+        url, user_agent=user_agent, cache=cache, max_age=max_age
     )
-    status_code = response.status_code
+    LOGGER.info("Request to docmaps API: GET %s", url)
+    LOGGER.info("Response from docmaps API: %s\n%s", status_code, content)
     if status_code not in [200]:
         raise Exception(
             "Error looking up docmap URL "
             + url
-            + " in digest API: %s\n%s" % (status_code, response.content)
+            + " in digest API: %s\n%s" % (status_code, content)
         )
 
     if status_code == 200:
-        return response.content
+        return content
     return None
 
 
-def get_docmap_by_account_id(url, account_id, user_agent=None):
+def get_docmap_by_account_id(url, account_id, user_agent=None, cache=None, max_age=0):
     "GET request for the docmap json and return the eLife docmap if a list is returned"
-    content = get_docmap(url, user_agent=user_agent)
+    content = get_docmap(url, user_agent=user_agent, cache=cache, max_age=max_age)
     if content:
         LOGGER.info("Parsing docmap content as JSON for URL %s", url)
         content_json = json.loads(content)
@@ -718,11 +713,15 @@ def get_docmap_string(settings, article_id, identifier, caller_name, logger):
         docmap_endpoint_url,
         settings.docmap_account_id,
         user_agent=getattr(settings, "user_agent", None),
+        cache=docmap_provider.docmap_cache(settings),
+        max_age=docmap_provider.docmap_cache_max_age(settings),
     )
 
 
-# time in seconds to sleep when a docmap string request is not successful
-DOCMAP_SLEEP_SECONDS = 5
+# time in seconds of the first sleep when a docmap string request is not successful
+DOCMAP_SLEEP_SECONDS = 1
+# most time in seconds to sleep as the sleep time doubles after each failure
+DOCMAP_MAX_SLEEP_SECONDS = 10
 # number of times to sleep after a docmap string request is not successful
 DOCMAP_RETRY = 24
 
@@ -745,8 +744,12 @@ def get_docmap_string_with_retry(settings, article_id, caller_name, logger):
         except Exception as exception:
             # handle if a docmap string could not be found
             logger.exception(exception)
-            # sleep a short time
-            time.sleep(DOCMAP_SLEEP_SECONDS)
+            # sleep a short time, for longer after each failure
+            time.sleep(
+                utils.backoff_seconds(
+                    tries, DOCMAP_SLEEP_SECONDS, DOCMAP_MAX_SLEEP_SECONDS
+                )
+            )
         finally:
             tries += 1
 
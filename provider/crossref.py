@@ -1,15 +1,26 @@
 import os
 import copy
+import multiprocessing
+import threading
 import time
 from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
 from xml.etree.ElementTree import SubElement
 import requests
+from requests.adapters import HTTPAdapter
 from elifearticle.article import ArticleDate
 from elifecrossref import generate, related
 from elifecrossref.conf import raw_config, parse_raw_config
+import log
 from provider import lax_provider, utils
 
 
+identity = "process_%s" % os.getpid()
+logger = log.logger("crossref_provider.log", "INFO", identity, loggerName=__name__)
+
+
 def override_tmp_dir(tmp_dir):
     """explicit override of TMP_DIR in the generate module"""
     if tmp_dir:
@@ -45,31 +56,82 @@ def elifecrossref_preprint_version_config(settings):
     )
 
 
-def parse_article_xml(article_xml_files, tmp_dir=None):
+# default processes parsing and generating articles, 1 does the work in the
+# activity process
+GENERATE_MAX_WORKERS = 1
+
+
+def generate_max_workers(settings):
+    "processes to parse and generate articles with, from the crossref_generate_max_workers setting"
+    return int(
+        getattr(settings, "crossref_generate_max_workers", None) or GENERATE_MAX_WORKERS
+    )
+
+
+def map_articles(function, items, max_workers=None):
+    """
+    call function with each of the items, in a pool of up to max_workers processes
+    when there is more than one item, return the results in the order of items
+    """
+    items = list(items)
+    max_workers = min(int(max_workers or GENERATE_MAX_WORKERS), len(items))
+    if max_workers <= 1:
+        return [function(item) for item in items]
+    # send a few items to a process at a time to reduce pickling round trips
+    chunksize = max(1, len(items) // (max_workers * 4))
+    try:
+        # start new processes instead of forking, the worker has other threads
+        # running which may hold locks a forked process would never release
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as executor:
+            return list(executor.map(function, items, chunksize=chunksize))
+    except (BrokenProcessPool, OSError):
+        logger.exception("process pool failed, continuing in this process")
+        return [function(item) for item in items]
+
+
+def parse_article_xml_file(article_xml, tmp_dir=None):
+    """Given an article XML file, parse into an object, None if it cannot be parsed"""
+    override_tmp_dir(tmp_dir)
+    try:
+        # Convert the XML file as a list to a list of article objects
+        article_list = generate.build_articles([article_xml])
+    except:
+        return None
+    if article_list:
+        return article_list[0]
+    return None
+
+
+def parse_article_xml(article_xml_files, tmp_dir=None, max_workers=None):
     """Given a list of article XML files, parse into objects"""
     override_tmp_dir(tmp_dir)
-    articles = []
     # convert one file at a time
-    for article_xml in article_xml_files:
-        article_list = None
-        try:
-            # Convert the XML file as a list to a list of article objects
-            article_list = generate.build_articles([article_xml])
-        except:
-            continue
-        if article_list:
-            articles.append(article_list[0])
-    return articles
+    articles = map_articles(
+        partial(parse_article_xml_file, tmp_dir=tmp_dir),
+        article_xml_files,
+        max_workers,
+    )
+    return [article for article in articles if article]
 
 
-def article_xml_list_parse(article_xml_files, bad_xml_files, tmp_dir=None):
+def article_xml_list_parse(
+    article_xml_files, bad_xml_files, tmp_dir=None, max_workers=None
+):
     """given a list of article XML file names parse to an article object map"""
+    override_tmp_dir(tmp_dir)
     article_object_map = OrderedDict()
     # parse one at a time to check which parse and which are bad
-    for xml_file in article_xml_files:
-        articles = parse_article_xml([xml_file], tmp_dir)
-        if articles:
-            article_object_map[xml_file] = articles[0]
+    articles = map_articles(
+        partial(parse_article_xml_file, tmp_dir=tmp_dir),
+        article_xml_files,
+        max_workers,
+    )
+    for xml_file, article in zip(article_xml_files, articles):
+        if article:
+            article_object_map[xml_file] = article
         else:
             bad_xml_files.append(xml_file)
     return article_object_map
@@ -161,33 +223,209 @@ def crossref_data_payload(
     }
 
 
-def upload_files_to_endpoint(url, payload, xml_files, user_agent=None):
-    """Using an HTTP POST, deposit the file to the Crossref endpoint"""
+# default deposit files sent at the same time, times to retry a deposit,
+# and the backoff before each retry
+DEPOSIT_MAX_WORKERS = 4
+DEPOSIT_MAX_RETRIES = 3
+DEPOSIT_RETRY_SECONDS = 2
+DEPOSIT_MAX_RETRY_SECONDS = 60
 
-    # Default return status
-    status = True
-    http_detail_list = []
+# connect and read timeout of a deposit request
+DEPOSIT_TIMEOUT = (10, 120)
+
+
+class CrossrefDepositClient:
+    """
+    POST deposit files to the Crossref endpoint reusing connections through
+    one requests session, max_workers files at a time, retrying server errors
+    and connection errors with backoff, which is safe to do because a DOI
+    deposited again replaces its previous metadata
+    """
+
+    def __init__(
+        self,
+        max_workers=DEPOSIT_MAX_WORKERS,
+        max_retries=DEPOSIT_MAX_RETRIES,
+        retry_seconds=DEPOSIT_RETRY_SECONDS,
+        max_retry_seconds=DEPOSIT_MAX_RETRY_SECONDS,
+    ):
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_maxsize=max_workers))
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=max_workers))
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.retry_seconds = retry_seconds
+        self.max_retry_seconds = max_retry_seconds
+
+    def deposit_file(self, url, payload, xml_file, headers=None):
+        "POST the deposit file, return a dict of the result"
+        attempt = 0
+        while True:
+            response = None
+            error = None
+            try:
+                with open(xml_file, "rb") as open_file:
+                    response = self.session.post(
+                        url,
+                        data=payload,
+                        files={"file": open_file},
+                        headers=headers,
+                        timeout=DEPOSIT_TIMEOUT,
+                    )
+            except (
+                requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout,
+            ) as exception:
+                error = exception
+            except Exception as exception:
+                # not a problem retrying will fix
+                return deposit_result(xml_file, error=exception)
+            if attempt < self.max_retries and (
+                error is not None or response.status_code >= 500
+            ):
+                time.sleep(
+                    utils.backoff_seconds(
+                        attempt, self.retry_seconds, self.max_retry_seconds
+                    )
+                )
+                attempt += 1
+                continue
+            return deposit_result(xml_file, response, error)
+
+    def deposit_files(self, url, payload, xml_files, user_agent=None):
+        "POST each deposit file, return a list of results in the order of xml_files"
+        headers = None
+        if user_agent:
+            headers = {"user-agent": user_agent}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(
+                executor.map(
+                    lambda xml_file: self.deposit_file(url, payload, xml_file, headers),
+                    xml_files,
+                )
+            )
+
+
+DEPOSIT_CLIENTS = {}
+DEPOSIT_CLIENTS_LOCK = threading.Lock()
 
-    headers = None
-    if user_agent:
-        headers = {"user-agent": user_agent}
 
-    for xml_file in xml_files:
-        files = {"file": open(xml_file, "rb")}
+def get_deposit_client(settings=None):
+    """
+    deposit client shared by the process for the crossref_deposit_max_workers
+    and crossref_deposit_max_retries settings
+    """
+    max_retries = getattr(settings, "crossref_deposit_max_retries", None)
+    client_key = (
+        int(
+            getattr(settings, "crossref_deposit_max_workers", None)
+            or DEPOSIT_MAX_WORKERS
+        ),
+        int(DEPOSIT_MAX_RETRIES if max_retries is None else max_retries),
+    )
+    with DEPOSIT_CLIENTS_LOCK:
+        if client_key not in DEPOSIT_CLIENTS:
+            DEPOSIT_CLIENTS[client_key] = CrossrefDepositClient(
+                max_workers=client_key[0], max_retries=client_key[1]
+            )
+        return DEPOSIT_CLIENTS.get(client_key)
+
+
+def deposit_result(xml_file, response=None, error=None):
+    "result of depositing a file, it was successful if the status_code is 200"
+    return {
+        "xml_file": xml_file,
+        "status_code": response.status_code if response is not None else None,
+        "text": response.text if response is not None else None,
+        "error": str(error) if error is not None else None,
+    }
+
+
+def deposit_files(url, payload, xml_files, user_agent=None, settings=None):
+    "Using an HTTP POST, deposit the files to the Crossref endpoint, return the results"
+    return get_deposit_client(settings).deposit_files(
+        url, payload, xml_files, user_agent
+    )
 
-        response = requests.post(url, data=payload, files=files, headers=headers)
 
+def deposit_status(deposit_results):
+    "whether all the deposits were successful, and the details of each for an email"
+    status = True
+    http_detail_list = []
+    for result in deposit_results:
         # Check for good HTTP status code
-        if response.status_code != 200:
+        if result.get("status_code") != 200:
             status = False
-        # print response.text
-        http_detail_list.append("XML file: " + xml_file)
-        http_detail_list.append("HTTP status: " + str(response.status_code))
-        http_detail_list.append("HTTP response: " + response.text)
-
+        http_detail_list.append("XML file: " + result.get("xml_file"))
+        http_detail_list.append("HTTP status: " + str(result.get("status_code")))
+        http_detail_list.append(
+            "HTTP response: "
+            + str(
+                result.get("text")
+                if result.get("text") is not None
+                else result.get("error")
+            )
+        )
     return status, http_detail_list
 
 
+def deposited_files(deposit_results):
+    "the deposit files which were deposited successfully"
+    return [
+        result.get("xml_file")
+        for result in deposit_results
+        if result.get("status_code") == 200
+    ]
+
+
+def deposited_xml_files(xml_files, deposit_file_map, deposit_results):
+    """
+    the xml_files which can be removed from the outbox, deposit_file_map is the
+    outbox XML file each deposit file was generated from, an XML file is not
+    removed if any of its deposit files failed
+    """
+    deposited = set()
+    failed = set()
+    for result in deposit_results:
+        xml_file = deposit_file_map.get(result.get("xml_file"))
+        if result.get("status_code") == 200:
+            deposited.add(xml_file)
+        else:
+            failed.add(xml_file)
+    return [
+        xml_file
+        for xml_file in xml_files
+        if xml_file in deposited and xml_file not in failed
+    ]
+
+
+def upload_files_to_endpoint(url, payload, xml_files, user_agent=None, settings=None):
+    """Using an HTTP POST, deposit the file to the Crossref endpoint"""
+    return deposit_status(
+        deposit_files(url, payload, xml_files, user_agent, settings=settings)
+    )
+
+
+def generate_crossref_xml_file(
+    article,
+    crossref_config=None,
+    submission_type="journal",
+    output_dir=None,
+    pretty=False,
+    indent="",
+):
+    "write the Crossref deposit XML of the article, return the file name, None if it fails"
+    try:
+        c_xml = generate.build_crossref_xml(
+            [article],
+            crossref_config,
+            submission_type=submission_type,
+        )
+        return crossref_xml_to_disk(c_xml, output_dir, pretty=pretty, indent=indent)
+    except:
+        return None
+
+
 def generate_crossref_xml_to_disk(
     article_object_map,
     crossref_config,
@@ -196,49 +434,82 @@ def generate_crossref_xml_to_disk(
     submission_type="journal",
     pretty=False,
     indent="",
+    deposit_file_map=None,
+    max_workers=None,
 ):
-    """from the article object generate crossref deposit XML"""
-    for xml_file, article in list(article_object_map.items()):
-        try:
-            # Will write the XML to the TMP_DIR
-            generate.crossref_xml_to_disk(
-                [article],
-                crossref_config,
-                submission_type=submission_type,
-                pretty=pretty,
-                indent=indent,
-            )
+    """
+    from the article object generate crossref deposit XML, if deposit_file_map
+    is specified the XML file of each deposit file written is added to it
+    """
+    # Will write the XML to the TMP_DIR
+    deposit_files = map_articles(
+        partial(
+            generate_crossref_xml_file,
+            crossref_config=crossref_config,
+            submission_type=submission_type,
+            output_dir=generate.TMP_DIR,
+            pretty=pretty,
+            indent=indent,
+        ),
+        article_object_map.values(),
+        max_workers,
+    )
+    for xml_file, deposit_file in zip(list(article_object_map), deposit_files):
+        if deposit_file:
+            if deposit_file_map is not None:
+                deposit_file_map[deposit_file] = xml_file
             # Add filename to the list of good files
             good_xml_files.append(xml_file)
-        except:
+        else:
             # Add the file to the list of bad files
             bad_xml_files.append(xml_file)
     # Any files generated is a sucess, even if one failed
     return True
 
 
+def build_crossref_xml_object(article, crossref_config=None, submission_type="journal"):
+    "build the CrossrefXML object of the article, None if it fails"
+    try:
+        return generate.build_crossref_xml(
+            [article],
+            crossref_config,
+            submission_type=submission_type,
+        )
+    except:
+        return None
+
+
 def build_crossref_xml(
     article_object_map,
     crossref_config,
     good_xml_files,
     bad_xml_files,
     submission_type="journal",
+    crossref_xml_file_map=None,
+    max_workers=None,
 ):
-    "from the article object build CrossrefXML objects"
+    """
+    from the article object build CrossrefXML objects, if crossref_xml_file_map
+    is specified the XML file each object is built from is added to it
+    """
     object_list = []
-    for xml_file, article in list(article_object_map.items()):
-        try:
-            # Will write the XML to the TMP_DIR
-            object_list.append(
-                generate.build_crossref_xml(
-                    [article],
-                    crossref_config,
-                    submission_type=submission_type,
-                )
-            )
+    c_xml_list = map_articles(
+        partial(
+            build_crossref_xml_object,
+            crossref_config=crossref_config,
+            submission_type=submission_type,
+        ),
+        article_object_map.values(),
+        max_workers,
+    )
+    for xml_file, c_xml in zip(list(article_object_map), c_xml_list):
+        if c_xml:
+            object_list.append(c_xml)
+            if crossref_xml_file_map is not None:
+                crossref_xml_file_map[c_xml] = xml_file
             # Add filename to the list of good files
             good_xml_files.append(xml_file)
-        except:
+        else:
             # Add the file to the list of bad files
             bad_xml_files.append(xml_file)
     # Any files generated is a sucess, even if one failed
@@ -336,12 +607,25 @@ def add_has_preprint_tag(rel_program_tag, doi):
 
 
 def crossref_xml_to_disk(c_xml, output_dir, pretty=False, indent=""):
-    "generate XML string from the CrossrefXML object and write it to the disk"
+    """
+    generate XML string from the CrossrefXML object and write it to a new file on
+    the disk, a number is added to the file name if the batch_id file already exists
+    """
     xml_string = c_xml.output_xml(pretty=pretty, indent=indent)
-    # Write to file
-    filename = os.path.join(output_dir, "%s.xml" % c_xml.batch_id)
-    with open(filename, "wb") as open_file:
-        open_file.write(xml_string.encode("utf-8"))
+    # Write to file, two outbox files for the same manuscript have the same batch_id
+    file_name = c_xml.batch_id
+    file_number = 1
+    while True:
+        filename = os.path.join(output_dir, "%s.xml" % file_name)
+        try:
+            open_file = open(filename, "xb")
+        except FileExistsError:
+            file_number += 1
+            file_name = "%s-%s" % (c_xml.batch_id, file_number)
+            continue
+        with open_file:
+            open_file.write(xml_string.encode("utf-8"))
+        return filename
 
 
 def doi_exists(doi, logger, user_agent=None):
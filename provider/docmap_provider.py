@@ -1,8 +1,11 @@
 import datetime
 import json
+import os
+import time
 import requests
 from docmaptools import parse
 from provider import utils
+from provider.file_cache import FileCache
 
 
 REPAIR_XML = True
@@ -18,29 +21,142 @@ REQUESTS_TIMEOUT = (10, 240)
 PUBLISHED_DATE_HOURS_DELTA = 0
 
 
+# default size limit of the docmap response cache
+DOCMAP_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# default seconds a cached article docmap is used without a request
+DOCMAP_CACHE_MAX_AGE_SECONDS = 300
+
+# characters read at a time when streaming a docmap index file
+INDEX_READ_SIZE = 64 * 1024
+
+# file name of the docmap profile saved next to the docmap index in a run folder
+PROFILE_FILE_NAME = "docmap_profile.json"
+
+
 def docmap_index_url(settings):
     "URL of the preprint docmap index endpoint"
     return getattr(settings, "docmap_index_url", None)
 
 
-def get_docmap_index(url, logger, user_agent=None):
+class DocmapCache:
+    """
+    Docmap endpoint responses saved on disk, keyed by URL, with the ETag and
+    Last-Modified response headers used to make conditional requests, the
+    modified time of a file is when its content was last known to be current
+    """
+
+    def __init__(self, directory, max_bytes=DOCMAP_CACHE_MAX_BYTES):
+        self.file_cache = FileCache(directory, max_bytes)
+
+    def get(self, url):
+        """
+        return dict of the cached response headers, the time it was last known to
+        be current and the open file to read the content from, or None
+        """
+        try:
+            open_file = open(self.file_cache.path("docmap", url, None), "rb")
+        except FileNotFoundError:
+            return None
+        cached = json.loads(open_file.readline())
+        cached["time"] = os.fstat(open_file.fileno()).st_mtime
+        cached["file"] = open_file
+        return cached
+
+    def touch(self, url):
+        "record the cached content is current now"
+        try:
+            os.utime(self.file_cache.path("docmap", url, None))
+        except FileNotFoundError:
+            pass
+
+    def put(self, url, etag, last_modified, content):
+        "save the response content and headers"
+        header_line = json.dumps({"etag": etag, "last_modified": last_modified}).encode(
+            "utf-8"
+        )
+
+        def write(open_file):
+            open_file.write(header_line + b"\n")
+            open_file.write(content)
+
+        self.file_cache.put("docmap", url, None, write)
+
+
+def docmap_cache(settings):
+    "docmap response cache if the docmap_cache_dir setting is set"
+    cache_dir = getattr(settings, "docmap_cache_dir", None)
+    if not cache_dir:
+        return None
+    return DocmapCache(
+        cache_dir,
+        int(
+            getattr(settings, "docmap_cache_max_bytes", None) or DOCMAP_CACHE_MAX_BYTES
+        ),
+    )
+
+
+def docmap_cache_max_age(settings):
+    "seconds a cached article docmap is used before asking the endpoint again"
+    max_age = getattr(settings, "docmap_cache_max_age_seconds", None)
+    if max_age is None:
+        return DOCMAP_CACHE_MAX_AGE_SECONDS
+    return int(max_age)
+
+
+def get_docmap_response(url, user_agent=None, cache=None, max_age=0):
+    """
+    GET request for a docmap URL, return the status code and content,
+    with a cache the content is returned without a request if it is newer than
+    max_age seconds, otherwise a conditional request is made and the cached
+    content returned with a 200 status code if it is not modified
+    """
+    cached = cache.get(url) if cache else None
+    try:
+        if cached and time.time() - cached.get("time") < max_age:
+            return 200, cached.get("file").read()
+        headers = {"Accept-Encoding": "gzip"}
+        if user_agent:
+            headers["user-agent"] = user_agent
+        if cached and cached.get("etag"):
+            headers["If-None-Match"] = cached.get("etag")
+        if cached and cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached.get("last_modified")
+        response = requests.get(url, timeout=REQUESTS_TIMEOUT, headers=headers)
+        if cached and response.status_code == 304:
+            # record when the content was last confirmed unchanged
+            cache.touch(url)
+            return 200, cached.get("file").read()
+    finally:
+        if cached:
+            cached.get("file").close()
+    if cache and response.status_code == 200:
+        response_headers = response.headers or {}
+        cache.put(
+            url,
+            response_headers.get("ETag"),
+            response_headers.get("Last-Modified"),
+            response.content,
+        )
+    return response.status_code, response.content
+
+
+def get_docmap_index(url, logger, user_agent=None, cache=None):
     "GET request for docmap index json"
-    headers = None
-    if user_agent:
-        headers = {"user-agent": user_agent}
-    response = requests.get(url, timeout=REQUESTS_TIMEOUT, headers=headers)
+    status_code, content = get_docmap_response(url, user_agent=user_agent, cache=cache)
     logger.info("Request to docmaps API: GET %s", url)
-    logger.info("Response from docmaps API: %s\n", response.status_code)
-    status_code = response.status_code
+    logger.info("Response from docmaps API: %s\n", status_code)
     if status_code not in [200]:
         raise Exception(("Error looking up docmap URL " + url + ": %s\n") % status_code)
 
-    return response.content
+    return content
 
 
-def get_docmap_index_by_account_id(url, account_id, logger, user_agent=None):
+def get_docmap_index_by_account_id(
+    url, account_id, logger, user_agent=None, cache=None
+):
     "GET request for the docmap json and return the eLife docmap if a list is returned"
-    content = get_docmap_index(url, logger, user_agent=user_agent)
+    content = get_docmap_index(url, logger, user_agent=user_agent, cache=cache)
     docmaps = None
     if content:
         logger.info("Parsing docmap index content as JSON for URL %s", url)
@@ -75,6 +191,7 @@ def get_docmap_index_json(settings, caller_name, logger):
         settings.docmap_account_id,
         logger,
         user_agent=getattr(settings, "user_agent", None),
+        cache=docmap_cache(settings),
     )
 
 
@@ -139,18 +256,148 @@ def version_doi_step_map(docmap_json):
     return parse.preprint_version_doi_step_map(docmap_json)
 
 
+def docmaps_profile_step_map(docmaps):
+    "from an iterable of docmaps create a map of version DOI to docmap profile data"
+    full_step_map = {}
+    for docmap in docmaps or []:
+        try:
+            step_map = version_doi_step_map(docmap)
+        except TypeError:
+            continue
+        for key, value in step_map.items():
+            full_step_map[key] = profile_docmap_steps(value)
+    return full_step_map
+
+
 def docmap_profile_step_map(docmap_index_json):
     "from docmap index create a map of version DOI to docmap profile data"
-    full_step_map = {}
-    if docmap_index_json:
-        for docmap in docmap_index_json.get("docmaps"):
+    if not docmap_index_json:
+        return {}
+    return docmaps_profile_step_map(docmap_index_json.get("docmaps"))
+
+
+class DocmapIndexStream:
+    "decode JSON values one at a time from a text file as it is read"
+
+    def __init__(self, open_file, read_size=INDEX_READ_SIZE):
+        self.open_file = open_file
+        self.read_size = read_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+
+    def read(self):
+        "read more of the file into the buffer, return False at the end of file"
+        chunk = self.open_file.read(self.read_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.position :] + chunk
+        self.position = 0
+        return True
+
+    def next_char(self):
+        "skip whitespace and return the next character without consuming it"
+        while True:
+            while (
+                self.position < len(self.buffer)
+                and self.buffer[self.position].isspace()
+            ):
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self.read():
+                raise ValueError("Unexpected end of docmap index JSON")
+
+    def expect(self, chars):
+        "consume and return the next character if it is one of chars"
+        char = self.next_char()
+        if char not in chars:
+            raise ValueError(
+                "Expected one of %s in docmap index JSON, found %s" % (chars, char)
+            )
+        self.position += 1
+        return char
+
+    def decode(self):
+        "decode and return the next JSON value"
+        self.next_char()
+        while True:
             try:
-                step_map = version_doi_step_map(docmap)
-            except TypeError:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                # the value may continue past the end of the buffer
+                if not self.read():
+                    raise
                 continue
-            for key, value in step_map.items():
-                full_step_map[key] = profile_docmap_steps(value)
-    return full_step_map
+            # a number at the end of the buffer may have more digits
+            if end == len(self.buffer) and not self.eof and self.read():
+                continue
+            self.position = end
+            return value
+
+
+def iter_docmap_index(open_file, read_size=INDEX_READ_SIZE):
+    """
+    yield each docmap in the docmaps list of a docmap index JSON text file,
+    decoding one docmap at a time so the whole index is not held in memory
+    """
+    stream = DocmapIndexStream(open_file, read_size)
+    stream.expect("{")
+    if stream.next_char() == "}":
+        return
+    while True:
+        key = stream.decode()
+        stream.expect(":")
+        if key == "docmaps" and stream.next_char() == "[":
+            stream.expect("[")
+            if stream.next_char() == "]":
+                stream.expect("]")
+            else:
+                while True:
+                    yield stream.decode()
+                    if stream.expect(",]") == "]":
+                        break
+        else:
+            stream.decode()
+        if stream.expect(",}") == "}":
+            return
+
+
+def docmap_profile_resource(docmap_index_resource):
+    "resource of the docmap profile saved next to the docmap index resource"
+    return "%s/%s" % (docmap_index_resource.rsplit("/", 1)[0], PROFILE_FILE_NAME)
+
+
+def docmap_profile_to_json(step_map):
+    """
+    compact JSON of a docmap profile step map, a list of computer-file count,
+    peer-review count and published date for each version DOI
+    """
+    return json.dumps(
+        {
+            key: [
+                value.get("computer-file-count"),
+                value.get("peer-review-count"),
+                value.get("published"),
+            ]
+            for key, value in step_map.items()
+        },
+        separators=(",", ":"),
+    )
+
+
+def docmap_profile_from_json(json_string):
+    "docmap profile step map from its compact JSON"
+    return {
+        key: {
+            "computer-file-count": value[0],
+            "peer-review-count": value[1],
+            "published": value[2],
+        }
+        for key, value in json.loads(json_string).items()
+    }
 
 
 def check_published_date(datetime_string):
@@ -171,12 +418,19 @@ def check_published_date(datetime_string):
 
 def changed_version_doi_data(docmap_index_json, prev_docmap_index_json, logger):
     "compare current and previous docmap lists, return version DOI that have changed"
+    # filter docmaps by attributes compared to previous docmap
+    return changed_profile_version_doi_data(
+        docmap_profile_step_map(docmap_index_json),
+        docmap_profile_step_map(prev_docmap_index_json),
+        logger,
+    )
+
+
+def changed_profile_version_doi_data(current_step_map, prev_step_map, logger):
+    "compare current and previous docmap profiles, return version DOI that have changed"
     ingest_version_doi_list = []
     new_version_doi_list = []
     no_computer_file_version_doi_list = []
-    # filter docmaps by attributes compared to previous docmap
-    current_step_map = docmap_profile_step_map(docmap_index_json)
-    prev_step_map = docmap_profile_step_map(prev_docmap_index_json)
     # compare
     for key, value in current_step_map.items():
         prev_value = prev_step_map.get(key)
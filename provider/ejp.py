@@ -1,10 +1,14 @@
 import calendar
+from collections import OrderedDict
 from operator import itemgetter
 import csv
 import re
 import os
 import io
+import pickle
+import threading
 from ejpcsvparser.utils import entity_to_unicode
+from provider.file_cache import FileCache
 from provider.storage_provider import storage_context
 from provider import utils
 
@@ -37,6 +41,86 @@ S3_FILENAME_FRAGMENT_MAP = {
 }
 
 
+# most author indexes kept in memory by a process
+AUTHOR_INDEXES_MAX_SIZE = 4
+
+# default size limit of the folder of saved author indexes
+AUTHOR_INDEX_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# author indexes built by this process, keyed by S3 resource and ETag
+AUTHOR_INDEXES = OrderedDict()
+AUTHOR_INDEXES_LOCK = threading.Lock()
+
+# latest S3 key names found by this process today, keyed by bucket, file type
+# and date, with whether the key was found by its expected name
+LATEST_S3_FILE_NAMES = {}
+LATEST_S3_FILE_NAMES_LOCK = threading.Lock()
+
+
+class AuthorIndex:
+    """
+    Rows of an EJP author CSV file grouped by manuscript id, and by
+    manuscript id and version for preprint author files, so the authors
+    of an article are found without scanning every row
+    """
+
+    def __init__(self, column_headings, rows):
+        self.column_headings = column_headings
+        self.rows = rows
+        self.rows_by_doi_id = {}
+        self.rows_by_version = {}
+        # first version of each manuscript starts at 1 if it has an appeal row
+        version_starts = {}
+        for fields in rows:
+            try:
+                row_doi_id = int(fields[0])
+            except (IndexError, ValueError):
+                continue
+            self.rows_by_doi_id.setdefault(row_doi_id, []).append(fields)
+            try:
+                sheet_version = int(fields[1])
+                sheet_appeal = fields[2]
+            except (IndexError, ValueError):
+                continue
+            if sheet_appeal != "":
+                version_starts[row_doi_id] = 1
+            version = sheet_version - version_starts.get(row_doi_id, 0) + 1
+            self.rows_by_version.setdefault((row_doi_id, version), []).append(fields)
+
+    @classmethod
+    def from_document(cls, document):
+        "parse the CSV file into an index"
+        (column_headings, rows) = parse_author_data(document)
+        return cls(column_headings, rows)
+
+    def authors(self, doi_id=None, corresponding=None):
+        "same result as author_detail_list() for the indexed file"
+        if doi_id is None:
+            rows = self.rows
+        else:
+            rows = self.rows_by_doi_id.get(int(doi_id), [])
+        authors = []
+        for fields in rows:
+            if corresponding is not None:
+                is_corr = is_corresponding_author(fields[4], fields[5])
+                if corresponding is True and is_corr is not True:
+                    continue
+                if corresponding is False and is_corr is True:
+                    continue
+            authors.append([entity_to_unicode(field) for field in fields])
+        return (self.column_headings, authors or None)
+
+    def preprint_authors(self, doi_id, version):
+        "same result as preprint_author_detail_list() for the indexed file"
+        if not doi_id or not version:
+            return (self.column_headings, None)
+        authors = [
+            [entity_to_unicode(field) for field in fields]
+            for fields in self.rows_by_version.get((int(doi_id), int(version)), [])
+        ]
+        return (self.column_headings, authors or None)
+
+
 class EJP:
     def __init__(self, settings, tmp_dir):
         self.settings = settings
@@ -83,29 +167,39 @@ class EJP:
             None, return all authors
         """
 
-        # Find the document on S3, save the content to
-        #  the tmp_dir
-        storage = storage_context(self.settings)
-        s3_key_name = self.find_latest_s3_file_name(file_type="author")
-        s3_resource = (
-            self.settings.storage_provider
-            + "://"
-            + self.bucket_name
-            + "/"
-            + s3_key_name
-        )
-        contents = storage.get_resource_as_string(s3_resource)
-        document = self.write_content_to_file(self.author_default_filename, contents)
-
-        return author_detail_list(document, doi_id, corresponding)
+        index = self.get_author_index("author", self.author_default_filename)
+        return index.authors(doi_id, corresponding)
 
     def get_preprint_authors(self, doi_id, version):
         "get a list of authors for a preprint article"
 
-        # Find the document on S3, save the content to
-        #  the tmp_dir
+        index = self.get_author_index(
+            "preprint_author", self.preprint_author_default_filename
+        )
+        return index.preprint_authors(doi_id, version)
+
+    def get_author_index_cache(self):
+        "folder of saved author indexes, if the ejp_author_index_dir setting is set"
+        cache_dir = getattr(self.settings, "ejp_author_index_dir", None)
+        if not cache_dir:
+            return None
+        return FileCache(
+            cache_dir,
+            int(
+                getattr(self.settings, "ejp_author_index_max_bytes", None)
+                or AUTHOR_INDEX_CACHE_MAX_BYTES
+            ),
+        )
+
+    def get_author_index(self, file_type, filename):
+        """
+        index of the latest author CSV file of the file_type, the CSV file is
+        only downloaded and parsed once by a process for each ETag, and
+        indexes can be shared with other processes in the ejp_author_index_dir
+        """
+        # Find the document on S3
         storage = storage_context(self.settings)
-        s3_key_name = self.find_latest_s3_file_name(file_type="preprint_author")
+        s3_key_name = self.find_latest_s3_file_name(file_type=file_type)
         s3_resource = (
             self.settings.storage_provider
             + "://"
@@ -113,12 +207,49 @@ class EJP:
             + "/"
             + s3_key_name
         )
-        contents = storage.get_resource_as_string(s3_resource)
-        document = self.write_content_to_file(
-            self.preprint_author_default_filename, contents
-        )
-
-        return preprint_author_detail_list(document, doi_id, version)
+        # the ETag of the latest object, to check if it is already indexed
+        etag = storage.get_resource_attributes(s3_resource).get("ETag")
+        if etag:
+            with AUTHOR_INDEXES_LOCK:
+                index = AUTHOR_INDEXES.get((s3_resource, etag))
+                if index:
+                    AUTHOR_INDEXES.move_to_end((s3_resource, etag))
+                    return index
+
+        index = None
+        cache = self.get_author_index_cache() if etag else None
+        if cache:
+            cached_file = io.BytesIO()
+            if cache.get_to_file(self.bucket_name, s3_key_name, etag, cached_file):
+                try:
+                    index = pickle.loads(cached_file.getvalue())
+                except Exception:
+                    # a corrupt index or one saved by other code, build it again
+                    index = None
+
+        if index is None:
+            # save the content to the tmp_dir and parse it, the object may have
+            # changed so keep the index under the ETag of the content downloaded
+            contents, etag = storage.get_resource_as_string_and_etag(s3_resource)
+            document = self.write_content_to_file(filename, contents)
+            index = AuthorIndex.from_document(document)
+            cache = self.get_author_index_cache() if etag else None
+            if cache:
+                cache.put(
+                    self.bucket_name,
+                    s3_key_name,
+                    etag,
+                    lambda open_file: pickle.dump(
+                        index, open_file, protocol=pickle.HIGHEST_PROTOCOL
+                    ),
+                )
+
+        if etag:
+            with AUTHOR_INDEXES_LOCK:
+                AUTHOR_INDEXES[(s3_resource, etag)] = index
+                while len(AUTHOR_INDEXES) > AUTHOR_INDEXES_MAX_SIZE:
+                    AUTHOR_INDEXES.popitem(last=False)
+        return index
 
     def find_latest_s3_file_name(self, file_type, file_list=None):
         """
@@ -126,14 +257,28 @@ class EJP:
         that is the latest file in the S3 bucket
           file_type options: author, editor
         Optional: for running tests, provide a file_list without connecting to S3
+        The key name found is reused by the process for the rest of the day
         """
 
         s3_key_name = None
 
+        latest_key = (self.bucket_name, file_type, utils.set_datestamp("_"))
+        latest = None
+        if file_list is None:
+            with LATEST_S3_FILE_NAMES_LOCK:
+                latest = LATEST_S3_FILE_NAMES.get(latest_key)
+            if latest and latest.get("by_convention"):
+                return latest.get("s3_key_name")
+
         # first try to locate the s3 key by looking for the expected name
         s3_key_name = self.latest_s3_file_name_by_convention(
             S3_FILENAME_FRAGMENT_MAP, file_type
         )
+        by_convention = bool(s3_key_name)
+
+        if not s3_key_name and latest:
+            # the bucket was already listed today
+            return latest.get("s3_key_name")
 
         if not s3_key_name:
             # find s3_key_name by checking for the latest modified date on the s3 key
@@ -141,6 +286,18 @@ class EJP:
                 S3_FILENAME_FRAGMENT_MAP, file_type, file_list
             )
 
+        if file_list is None and s3_key_name:
+            with LATEST_S3_FILE_NAMES_LOCK:
+                # forget the key names found on previous days
+                for key in [
+                    key for key in LATEST_S3_FILE_NAMES if key[2] != latest_key[2]
+                ]:
+                    del LATEST_S3_FILE_NAMES[key]
+                LATEST_S3_FILE_NAMES[latest_key] = {
+                    "s3_key_name": s3_key_name,
+                    "by_convention": by_convention,
+                }
+
         return s3_key_name
 
     def latest_s3_file_name_by_convention(self, fn_fragment, file_type):
@@ -0,0 +1,277 @@
+import bisect
+import gzip
+import threading
+import time
+from email.utils import parsedate_to_datetime
+import requests
+from requests.adapters import HTTPAdapter
+from provider import utils
+
+
+# status codes returned while an endpoint is overloaded or restarting
+RETRY_STATUS_CODES = [429, 502, 503, 504]
+
+# default times to retry a request, and the backoff before each retry
+MAX_RETRIES = 3
+RETRY_SECONDS = 2
+MAX_RETRY_SECONDS = 30
+
+# default consecutive failures which open the circuit for an endpoint,
+# and seconds before a request is allowed through again
+FAILURE_THRESHOLD = 5
+RESET_SECONDS = 60
+
+# upper bounds in seconds of the request latency histogram buckets
+LATENCY_BUCKETS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 180]
+
+# connections kept open to each host
+POOL_MAXSIZE = 10
+
+
+class CircuitOpenException(RuntimeError):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Count consecutive failed requests to an endpoint, after failure_threshold
+    failures requests are refused for reset_seconds, then one request at a
+    time is allowed through until one succeeds
+    """
+
+    def __init__(
+        self, failure_threshold=FAILURE_THRESHOLD, reset_seconds=RESET_SECONDS
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_time = None
+        self.lock = threading.Lock()
+
+    def allow(self):
+        "whether a request can be sent to the endpoint"
+        with self.lock:
+            if self.opened_time is None:
+                return True
+            if time.monotonic() - self.opened_time >= self.reset_seconds:
+                # let a trial request through and refuse others until it is done
+                self.opened_time = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_time = None
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_time = time.monotonic()
+
+    def wait_seconds(self):
+        "seconds until a request is allowed through, 0 if the circuit is closed"
+        with self.lock:
+            if self.opened_time is None:
+                return 0
+            return max(self.reset_seconds - (time.monotonic() - self.opened_time), 0)
+
+
+class LatencyHistogram:
+    "count of request latencies in seconds in each bucket, and their sum"
+
+    def __init__(self, buckets=None):
+        self.buckets = buckets or LATENCY_BUCKETS
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self.lock:
+            self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self.sum += seconds
+
+    def to_dict(self):
+        "cumulative counts keyed by bucket upper bound, with the count and sum"
+        with self.lock:
+            buckets = {}
+            total = 0
+            for bucket, count in zip(self.buckets + ["+Inf"], self.counts):
+                total += count
+                buckets[str(bucket)] = total
+            return {"count": total, "sum": round(self.sum, 3), "buckets": buckets}
+
+
+def retry_after_seconds(response, attempt, base_seconds, max_seconds):
+    "seconds to wait from the Retry-After header, or the backoff if it has none"
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after:
+        try:
+            seconds = float(retry_after)
+        except ValueError:
+            try:
+                seconds = parsedate_to_datetime(retry_after).timestamp() - time.time()
+            except (TypeError, ValueError):
+                seconds = None
+        if seconds is not None:
+            return min(max(seconds, 0), max_seconds)
+    return utils.backoff_seconds(attempt, base_seconds, max_seconds)
+
+
+class EndpointClient:
+    """
+    POST requests to XML endpoints reusing connections through one requests
+    session, retrying overloaded responses and connection errors with backoff,
+    with a circuit breaker and latency histogram for each endpoint URL. A read
+    timeout is not retried, the endpoint may still be running the request
+    """
+
+    def __init__(
+        self,
+        max_retries=MAX_RETRIES,
+        retry_seconds=RETRY_SECONDS,
+        max_retry_seconds=MAX_RETRY_SECONDS,
+        failure_threshold=FAILURE_THRESHOLD,
+        reset_seconds=RESET_SECONDS,
+        gzip_requests=False,
+    ):
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_maxsize=POOL_MAXSIZE))
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=POOL_MAXSIZE))
+        self.max_retries = max_retries
+        self.retry_seconds = retry_seconds
+        self.max_retry_seconds = max_retry_seconds
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.gzip_requests = gzip_requests
+        self.breakers = {}
+        self.latencies = {}
+        self.lock = threading.Lock()
+
+    def endpoint_state(self, endpoint_url):
+        "circuit breaker and latency histogram of the endpoint"
+        with self.lock:
+            if endpoint_url not in self.breakers:
+                self.breakers[endpoint_url] = CircuitBreaker(
+                    self.failure_threshold, self.reset_seconds
+                )
+                self.latencies[endpoint_url] = LatencyHistogram()
+            return self.breakers[endpoint_url], self.latencies[endpoint_url]
+
+    def post(self, endpoint_url, data, headers=None, timeout=None):
+        "POST the data bytes to the endpoint and return the response"
+        breaker, latency = self.endpoint_state(endpoint_url)
+        headers = dict(headers or {})
+        if self.gzip_requests:
+            data = gzip.compress(data)
+            headers["Content-Encoding"] = "gzip"
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                raise CircuitOpenException(
+                    "circuit open for endpoint %s after %s consecutive failures"
+                    % (endpoint_url, breaker.failures)
+                )
+            start_time = time.monotonic()
+            try:
+                response = self.session.post(
+                    endpoint_url, data=data, headers=headers, timeout=timeout
+                )
+            except requests.exceptions.ConnectionError:
+                # includes a connect timeout, but not a read timeout
+                latency.observe(time.monotonic() - start_time)
+                breaker.record_failure()
+                if attempt >= self.max_retries:
+                    raise
+                time.sleep(
+                    utils.backoff_seconds(
+                        attempt, self.retry_seconds, self.max_retry_seconds
+                    )
+                )
+                attempt += 1
+                continue
+            latency.observe(time.monotonic() - start_time)
+            if response is None or (
+                response.status_code < 500
+                and response.status_code not in RETRY_STATUS_CODES
+            ):
+                breaker.record_success()
+                return response
+            breaker.record_failure()
+            if response.status_code not in RETRY_STATUS_CODES or (
+                attempt >= self.max_retries
+            ):
+                return response
+            time.sleep(
+                retry_after_seconds(
+                    response, attempt, self.retry_seconds, self.max_retry_seconds
+                )
+            )
+            attempt += 1
+
+    def wait_seconds(self, endpoint_url):
+        "seconds until the circuit of the endpoint allows a request through"
+        with self.lock:
+            breaker = self.breakers.get(endpoint_url)
+        if breaker is None:
+            return 0
+        return breaker.wait_seconds()
+
+    def histograms(self):
+        "latency histogram of each endpoint URL"
+        with self.lock:
+            return {
+                endpoint_url: latency.to_dict()
+                for endpoint_url, latency in self.latencies.items()
+            }
+
+
+# endpoint clients shared by the process, keyed by their options
+ENDPOINT_CLIENTS = {}
+ENDPOINT_CLIENTS_LOCK = threading.Lock()
+
+
+def endpoint_client_options(settings=None):
+    """
+    EndpointClient arguments from the endpoint_max_retries,
+    endpoint_failure_threshold, endpoint_reset_seconds and
+    endpoint_gzip_requests settings
+    """
+    max_retries = getattr(settings, "endpoint_max_retries", None)
+    return {
+        "max_retries": int(MAX_RETRIES if max_retries is None else max_retries),
+        "failure_threshold": int(
+            getattr(settings, "endpoint_failure_threshold", None) or FAILURE_THRESHOLD
+        ),
+        "reset_seconds": int(
+            getattr(settings, "endpoint_reset_seconds", None) or RESET_SECONDS
+        ),
+        "gzip_requests": bool(getattr(settings, "endpoint_gzip_requests", None)),
+    }
+
+
+def get_endpoint_client(settings=None):
+    "endpoint client shared by the process for the endpoint settings"
+    options = endpoint_client_options(settings)
+    client_key = tuple(sorted(options.items()))
+    with ENDPOINT_CLIENTS_LOCK:
+        if client_key not in ENDPOINT_CLIENTS:
+            ENDPOINT_CLIENTS[client_key] = EndpointClient(**options)
+        return ENDPOINT_CLIENTS.get(client_key)
+
+
+def histograms():
+    "latency histogram of each endpoint URL for each endpoint client"
+    with ENDPOINT_CLIENTS_LOCK:
+        clients = list(ENDPOINT_CLIENTS.values())
+    return [client.histograms() for client in clients]
+
+
+def temporary_failure_seconds(endpoint_url, sleep_seconds, settings=None):
+    """
+    seconds for an activity to wait before returning a temporary failure after
+    posting to the endpoint, longer than sleep_seconds if its circuit is open
+    so the activity retries are not all used while requests are refused
+    """
+    return max(sleep_seconds, get_endpoint_client(settings).wait_seconds(endpoint_url))
@@ -1,17 +1,68 @@
+from contextlib import contextmanager
 from pydoc import locate
 import json
+import threading
 import redis
 from provider.utils import unicode_encode
 from provider.storage_provider import storage_context
 
 
+# sessions opened by get_session inside a session_scope, per thread
+SESSION_SCOPE = threading.local()
+
+# Redis connection pools by server, shared by all the sessions in the process
+REDIS_CONNECTION_POOLS = {}
+REDIS_CONNECTION_POOLS_LOCK = threading.Lock()
+
+
 def get_session(settings, input_data, session_key):
     settings_session_class = "RedisSession"  # Default
     if hasattr(settings, "session_class"):
         settings_session_class = settings.session_class
 
+    scope_sessions = getattr(SESSION_SCOPE, "sessions", None)
+    scope_key = (settings_session_class, session_key)
+    if scope_sessions is not None and scope_key in scope_sessions:
+        session = scope_sessions.get(scope_key)
+        if input_data is not None:
+            session.input_data = input_data
+        return session
+
     session_class = locate("provider.execution_context." + settings_session_class)
-    return session_class(settings, input_data, session_key)
+    session = session_class(settings, input_data, session_key)
+    if scope_sessions is not None and hasattr(session, "flush"):
+        session.scoped = True
+        scope_sessions[scope_key] = session
+    return session
+
+
+@contextmanager
+def session_scope():
+    """
+    inside the scope get_session returns one shared session per session key,
+    sessions which support it cache what they read and write the stored
+    values once when the scope exits
+    """
+    previous_sessions = getattr(SESSION_SCOPE, "sessions", None)
+    SESSION_SCOPE.sessions = {}
+    try:
+        yield
+    finally:
+        scope_sessions = SESSION_SCOPE.sessions
+        SESSION_SCOPE.sessions = previous_sessions
+        for session in scope_sessions.values():
+            session.flush()
+
+
+def get_redis_connection_pool(settings):
+    "connection pool shared by the sessions connecting to the same Redis db"
+    pool_key = (settings.redis_host, settings.redis_port, settings.redis_db)
+    with REDIS_CONNECTION_POOLS_LOCK:
+        if pool_key not in REDIS_CONNECTION_POOLS:
+            REDIS_CONNECTION_POOLS[pool_key] = redis.ConnectionPool(
+                host=settings.redis_host, port=settings.redis_port, db=settings.redis_db
+            )
+        return REDIS_CONNECTION_POOLS.get(pool_key)
 
 
 class FileSession:
@@ -48,6 +99,13 @@ class FileSession:
                 value = self.input_data[key]
         return value
 
+    def store_values(self, values):
+        for key, value in values.items():
+            self.store_value(key, value)
+
+    def get_values(self, keys):
+        return {key: self.get_value(key) for key in keys}
+
     def get_full_key(self, key):
 
         return self.session_key + "__" + key
@@ -60,24 +118,69 @@ class RedisSession:
         self.expire_key = settings.redis_expire_key
         self.session_key = session_key
         self.redis_client = redis.StrictRedis(
-            host=settings.redis_host, port=settings.redis_port, db=settings.redis_db
+            connection_pool=get_redis_connection_pool(settings)
         )
+        # set by session_scope, to cache reads and buffer writes until flush
+        self.scoped = False
+        # JSON values of the session hash, read all at once when scoped
+        self.cache = None
+        # JSON values stored but not yet written
+        self.pending = {}
 
     def store_value(self, key, value):
 
-        value = json.dumps(value)
-        self.redis_client.hset(self.session_key, key, value)
-        self.redis_client.expire(self.session_key, self.expire_key)
+        self.store_values({key: value})
+
+    def store_values(self, values):
+        "store a dict of values, written together in one request"
+        json_values = {key: json.dumps(value) for key, value in values.items()}
+        if self.cache is not None:
+            self.cache.update(json_values)
+        if self.scoped:
+            self.pending.update(json_values)
+        else:
+            self.write(json_values)
+
+    def write(self, json_values):
+        pipeline = self.redis_client.pipeline()
+        pipeline.hset(self.session_key, mapping=json_values)
+        pipeline.expire(self.session_key, self.expire_key)
+        pipeline.execute()
+
+    def flush(self):
+        "write the values stored since the last flush"
+        if self.pending:
+            json_values = self.pending
+            self.pending = {}
+            self.write(json_values)
 
     def get_value(self, key):
 
-        value = self.redis_client.hget(self.session_key, key)
-        if value is None:
-            if self.input_data is not None and key in self.input_data:
-                value = self.input_data[key]
+        return self.get_values([key]).get(key)
+
+    def get_values(self, keys):
+        "dict of values for the keys, read together in one request"
+        if self.scoped:
+            if self.cache is None:
+                self.cache = {
+                    unicode_encode(key): value
+                    for key, value in self.redis_client.hgetall(
+                        self.session_key
+                    ).items()
+                }
+                self.cache.update(self.pending)
+            json_values = [self.cache.get(key) for key in keys]
         else:
-            value = json.loads(value)
-        return value
+            json_values = self.redis_client.hmget(self.session_key, keys)
+        values = {}
+        for key, value in zip(keys, json_values):
+            if value is None:
+                if self.input_data is not None and key in self.input_data:
+                    value = self.input_data[key]
+            else:
+                value = json.loads(value)
+            values[key] = value
+        return values
 
 
 class S3Session:
@@ -109,6 +212,13 @@ class S3Session:
                 value = self.input_data[key]
         return value
 
+    def store_values(self, values):
+        for key, value in values.items():
+            self.store_value(key, value)
+
+    def get_values(self, keys):
+        return {key: self.get_value(key) for key in keys}
+
     def get_s3_resource(self, full_key):
         return self.storage_provider + self.bucket_name + "/" + full_key
 
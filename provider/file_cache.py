@@ -0,0 +1,88 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+
+# prefix of files being written which are not yet in the cache
+TEMP_FILE_PREFIX = "tmp_"
+
+
+class FileCache:
+    """
+    Copies of bucket objects on local disk, keyed by bucket name, object key
+    and ETag, so a changed object is never read from the cache. Files are
+    added with an atomic rename so the cache folder can be shared by all the
+    worker processes on a host. When the total size is more than max_bytes
+    the least recently used files are removed.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, bucket_name, key, etag):
+        "path to the cached file for the object"
+        digest = hashlib.sha256(
+            ("%s\n%s\n%s" % (bucket_name, key, etag)).encode("utf-8")
+        ).hexdigest()
+        return os.path.join(self.directory, digest)
+
+    def get_to_file(self, bucket_name, key, etag, file):
+        "copy the cached file to the file pointer, return False if not cached"
+        cache_path = self.path(bucket_name, key, etag)
+        try:
+            with open(cache_path, "rb") as open_file:
+                shutil.copyfileobj(open_file, file)
+            # record the file was used recently
+            os.utime(cache_path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def put(self, bucket_name, key, etag, download):
+        """
+        add a file to the cache, download is a function writing the object
+        data to the file pointer it is passed
+        """
+        cache_path = self.path(bucket_name, key, etag)
+        file_descriptor, temp_path = tempfile.mkstemp(
+            prefix=TEMP_FILE_PREFIX, dir=self.directory
+        )
+        try:
+            with os.fdopen(file_descriptor, "wb") as open_file:
+                download(open_file)
+            os.replace(temp_path, cache_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self.evict(keep=cache_path)
+        return cache_path
+
+    def evict(self, keep=None):
+        "remove least recently used files until the cache is not too big"
+        entries = []
+        total_bytes = 0
+        with os.scandir(self.directory) as dir_entries:
+            for dir_entry in dir_entries:
+                if dir_entry.name.startswith(TEMP_FILE_PREFIX):
+                    continue
+                try:
+                    stat = dir_entry.stat()
+                except FileNotFoundError:
+                    # removed by another process
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, dir_entry.path))
+                total_bytes += stat.st_size
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
@@ -1,4 +1,27 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
+from provider import utils
+
+# status codes the image server returns while an image is not ready yet
+RETRY_STATUS_CODES = [404, 504]
+
+# most times to retry an endpoint after a retry status code, when there
+# is no deadline
+MAX_RETRIES = 5
+
+# first and most time in seconds to wait before retrying an endpoint
+RETRY_SECONDS = 0.5
+MAX_RETRY_SECONDS = 8
+
+# default number of endpoints checked at the same time
+MAX_WORKERS = 10
+
+# default seconds allowed to check all the endpoints of an article
+DEADLINE_SECONDS = 240
+
+REQUESTS_TIMEOUT = (10, 60)
 
 
 class ShortRetryException(RuntimeError):
@@ -10,28 +33,95 @@ def endpoint(settings, iiif_path_for_article, figure):
     return settings.path_to_iiif_server + iiif_path_for_figure
 
 
-def try_endpoint(endpoint_uri, logger, user_agent=None):
+def try_endpoint(
+    endpoint_uri,
+    logger,
+    user_agent=None,
+    session=None,
+    max_retries=MAX_RETRIES,
+    deadline=None,
+):
+    """
+    HEAD request to the endpoint, retrying a 404 or 504 response with
+    exponential backoff until the deadline time, or up to max_retries times
+    if there is no deadline
+    """
     headers = None
     if user_agent:
         headers = {"user-agent": user_agent}
-    try:
-        response = requests.head(endpoint_uri, headers=headers)
-        if response.status_code == 504:
-            raise ShortRetryException("Response code was %s" % response.status_code)
-        if response.status_code == 404:
-            raise ShortRetryException("Response code was %s" % response.status_code)
-        if response.status_code != 200:
-            logger.error(
-                "Error status code != 200. Status code: %s for URL %s\nContent:\n%s",
-                response.status_code,
-                endpoint_uri,
-                response.content,
+    head = session.head if session else requests.head
+    attempt = 0
+    while True:
+        try:
+            response = head(endpoint_uri, headers=headers, timeout=REQUESTS_TIMEOUT)
+            if response.status_code in RETRY_STATUS_CODES:
+                raise ShortRetryException("Response code was %s" % response.status_code)
+            if response.status_code != 200:
+                logger.error(
+                    "Error status code != 200. Status code: %s for URL %s\nContent:\n%s",
+                    response.status_code,
+                    endpoint_uri,
+                    response.content,
+                )
+                return False, endpoint_uri
+            return True, endpoint_uri
+        except ShortRetryException as e:
+            sleep_seconds = utils.backoff_seconds(
+                attempt, RETRY_SECONDS, MAX_RETRY_SECONDS
             )
+            if deadline:
+                # the image may still be processing, keep trying until the deadline
+                sleep_seconds = min(sleep_seconds, deadline - time.time())
+                give_up = sleep_seconds <= 0
+            else:
+                give_up = attempt >= max_retries
+            if give_up:
+                logger.error("gave up retrying %s because %s", endpoint_uri, e)
+                return False, endpoint_uri
+            logger.info("short retry because %s", e)
+            time.sleep(sleep_seconds)
+            attempt += 1
+        except Exception as e:
+            logger.exception(str(e))
             return False, endpoint_uri
-        return True, endpoint_uri
-    except ShortRetryException as e:
-        logger.info("short retry because %s", e)
-        return try_endpoint(endpoint_uri, logger)
-    except Exception as e:
-        logger.exception(str(e))
-        return False, endpoint_uri
+
+
+def verify_endpoints(
+    endpoint_uris,
+    logger,
+    user_agent=None,
+    max_workers=MAX_WORKERS,
+    deadline_seconds=DEADLINE_SECONDS,
+):
+    """
+    check the endpoints at the same time using max_workers threads sharing a
+    session, retrying images which are not ready until deadline_seconds,
+    return a report of the results in the order of endpoint_uris
+    """
+    start = time.time()
+    deadline = start + deadline_seconds
+    with requests.Session() as session:
+        session.mount(
+            "http://", HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        )
+        session.mount(
+            "https://", HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        )
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(
+                executor.map(
+                    lambda endpoint_uri: try_endpoint(
+                        endpoint_uri,
+                        logger,
+                        user_agent,
+                        session=session,
+                        deadline=deadline,
+                    ),
+                    endpoint_uris,
+                )
+            )
+    return {
+        "results": results,
+        "failed": [endpoint_uri for success, endpoint_uri in results if not success],
+        "seconds": round(time.time() - start, 3),
+    }
@@ -1,3 +1,4 @@
+import threading
 from mimetypes import guess_type
 import provider.imageresize as resizer
 from provider.storage_provider import storage_context
@@ -6,59 +7,107 @@ from provider import memory
 
 def generate_images(settings, formats, fp, info, publish_locations, logger):
     try:
-        for format_spec_name in formats:
-            format_spec = formats[format_spec_name]
+        format_specs = [
+            format_spec
+            for format_spec in formats.values()
             # if sources not present or includes file extension for this image
-            if "sources" not in format_spec or info.extension in [
-                x.strip() for x in format_spec["sources"].split(",")
-            ]:
-                download = "download" in format_spec and format_spec["download"]
-                fp.seek(0)  # rewind the tape
-                logger.info(
-                    "Attempting new conversion/resize (current RSS memory: %s)",
-                    memory.current(),
-                )
-                filename, image = resizer.resize(format_spec, fp, info, logger)
-                if filename is not None and image is not None:
-                    store_in_publish_locations(
-                        settings, filename, image, publish_locations, download
-                    )
-                    logger.info(
-                        "Stored image %s as %s" % (filename, str(publish_locations))
-                    )
-                else:
-                    raise RuntimeError(
-                        "filename or image is None. resizer.resize problem."
-                    )
+            if "sources" not in format_spec
+            or info.extension in [x.strip() for x in format_spec["sources"].split(",")]
+        ]
+        if not format_specs:
+            return
+        fp.seek(0)  # rewind the tape
+        logger.info(
+            "Attempting new conversion/resize (current RSS memory: %s)",
+            memory.current(),
+        )
+        renditions = resizer.resize_all(format_specs, fp, info, logger)
+        logger.info(
+            "Converted %s renditions of %s (current RSS memory: %s, peak RSS memory: %s)",
+            len(renditions),
+            info.filename,
+            memory.current(),
+            memory.peak(),
+        )
+        for filename, image in renditions:
+            if filename is None or image is None:
+                raise RuntimeError("filename or image is None. resizer.resize problem.")
+        store_renditions_in_publish_locations(
+            settings,
+            [
+                (filename, image, "download" in format_spec and format_spec["download"])
+                for format_spec, (filename, image) in zip(format_specs, renditions)
+            ],
+            publish_locations,
+        )
+        for filename, image in renditions:
+            logger.info("Stored image %s as %s" % (filename, str(publish_locations)))
     finally:
         fp.close()
 
 
-def store_in_publish_locations(settings, filename, image, publish_locations, download):
+def store_renditions_in_publish_locations(settings, renditions, publish_locations):
+    """
+    store each (filename, image, download) rendition in the publish locations,
+    uploading the renditions concurrently, the data of each rendition is
+    released once it is stored in all the publish locations
+    """
+    rendition_data = {}
+    uploads_remaining = {}
     try:
-        storage = storage_context(settings)
+        for index, (filename, image, download) in enumerate(renditions):
+            rendition_data[index] = image.getvalue()
+            uploads_remaining[index] = len(publish_locations)
+    finally:
+        for filename, image, download in renditions:
+            image.close()
+    lock = threading.Lock()
 
-        for resource in publish_locations:
-            image.seek(0)
-            content_type, encoding = guess_type(filename)
-            storage.set_resource_from_string(
-                resource + filename, image, content_type=content_type
-            )
+    def store(item):
+        index, resource = item
+        filename, image, download = renditions[index]
+        store_rendition(storage, filename, rendition_data[index], resource, download)
 
-            if download:
-                dict_metadata = {
-                    "Content-Disposition": str(
-                        "Content-Disposition: attachment; filename=" + filename + ";"
-                    ),
-                    "Content-Type": content_type,
-                }
-                filename_no_extension, extension = filename.rsplit(".", 1)
-                file_download = filename_no_extension + "-download." + extension
-                storage.copy_resource(
-                    resource + filename,
-                    resource + file_download,
-                    additional_dict_metadata=dict_metadata,
-                )
+    def stored(result):
+        index = result.get("item")[0]
+        with lock:
+            uploads_remaining[index] -= 1
+            if not uploads_remaining[index]:
+                del rendition_data[index]
 
-    finally:
-        image.close()
+    storage = storage_context(settings)
+    results = storage.bulk_transfer(
+        store,
+        [
+            (index, resource)
+            for index in range(len(renditions))
+            for resource in publish_locations
+        ],
+        stored,
+    )
+    for result in results:
+        if result.get("error"):
+            raise result.get("error")
+
+
+def store_rendition(storage, filename, data, resource, download):
+    "store the image data in the resource folder, and a download copy if download"
+    content_type, encoding = guess_type(filename)
+    storage.set_resource_from_string(
+        resource + filename, data, content_type=content_type
+    )
+
+    if download:
+        dict_metadata = {
+            "Content-Disposition": str(
+                "Content-Disposition: attachment; filename=" + filename + ";"
+            ),
+            "Content-Type": content_type,
+        }
+        filename_no_extension, extension = filename.rsplit(".", 1)
+        file_download = filename_no_extension + "-download." + extension
+        storage.copy_resource(
+            resource + filename,
+            resource + file_download,
+            additional_dict_metadata=dict_metadata,
+        )
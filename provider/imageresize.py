@@ -3,43 +3,88 @@ from io import BytesIO
 from wand.image import Image
 
 
-def resize(format, filep, info, logger):
+def rendition_size(format, width, height):
+    "target width and height of the format rendition of a width by height image"
+    target_height = format.get("height")
+    target_width = format.get("width")
+    if target_height is None and target_width is None:
+        target_height = height
+        target_width = width
+    elif target_width is None:
+        scale = float(target_height) / height
+        target_width = int(width * scale)
+    elif target_height is None:
+        scale = float(target_width) / width
+        target_height = int(height * scale)
+    return target_width, target_height
+
 
-    image_buffer = None
+def rendition_filename(format, info):
+    "file name of the format rendition of the image"
+    filename = info.filename
+    if format.get("prefix") is not None:
+        filename = format.get("prefix") + filename
+    if format.get("suffix") is not None:
+        filename = filename + format.get("suffix")
+    if format.get("extension") is not None:
+        filename = filename + "." + format.get("extension")
+    elif format.get("format") is not None:
+        filename = filename + "." + format["format"]
+    else:
+        filename += ".tiff"
+    return filename
+
+
+def resize_all(formats, filep, info, logger):
+    """
+    decode the image once and return a (filename, image_buffer) tuple for each
+    format in the list of formats, renditions are made in descending size order
+    with each one resized from the previous larger rendition
+    """
+    image_buffers = [None] * len(formats)
+    working = None
     image = None
     try:
 
         with Image(file=filep, resolution=96) as tiff:
-            image_format = format.get("format")
-            if image_format is not None:
-                image = tiff.convert(image_format)
-            else:
-                image = tiff
-
-            target_height = format.get("height")
-            target_width = format.get("width")
-
-            target_resolution = format.get("resolution")
-            if target_resolution is not None:
-                image.resolution = (target_resolution, target_resolution)
-
-            if target_height is None and target_width is None:
-                target_height = image.height
-                target_width = image.width
-            elif target_width is None:
-                scale = float(target_height) / image.height
-                target_width = int(image.width * scale)
-            elif target_height is None:
-                scale = float(target_width) / image.width
-                target_height = int(image.height * scale)
-
-            if target_height is not image.height or target_width is not image.width:
-                image.resize(width=target_width, height=target_height)
-
-            image_buffer = BytesIO()
-            image.save(file=image_buffer)
-            # destroy the image after saving output to release memory
-            image.destroy()
+            sizes = [
+                rendition_size(format, tiff.width, tiff.height) for format in formats
+            ]
+            order = sorted(
+                range(len(formats)),
+                key=lambda index: sizes[index][0] * sizes[index][1],
+                reverse=True,
+            )
+            for index in order:
+                format = formats[index]
+                source = working if working is not None else tiff
+                image_format = format.get("format")
+                if image_format is not None:
+                    image = source.convert(image_format)
+                else:
+                    image = source.clone()
+
+                # do not keep the resolution of the previous rendition
+                target_resolution = format.get("resolution")
+                if target_resolution is not None:
+                    image.resolution = (target_resolution, target_resolution)
+                else:
+                    image.resolution = tiff.resolution
+
+                target_width, target_height = sizes[index]
+                if target_height != image.height or target_width != image.width:
+                    image.resize(width=target_width, height=target_height)
+
+                image_buffer = BytesIO()
+                image.save(file=image_buffer)
+                image_buffers[index] = image_buffer
+
+                # keep the smaller rendition to resize the next one from,
+                # destroying the previous one to release memory
+                if working is not None:
+                    working.destroy()
+                working = image
+                image = None
 
     except Exception as e:
         message = "error resizing image %s" % info.filename
@@ -48,16 +93,16 @@ def resize(format, filep, info, logger):
         if image:
             image.destroy()
         raise RuntimeError("%s (%s)" % (message, str(e)))
+    finally:
+        if working is not None:
+            working.destroy()
 
-    filename = info.filename
-    if format.get("prefix") is not None:
-        filename = format.get("prefix") + filename
-    if format.get("suffix") is not None:
-        filename = filename + format.get("suffix")
-    if format.get("extension") is not None:
-        filename = filename + "." + format.get("extension")
-    elif format.get("format") is not None:
-        filename = filename + "." + format["format"]
-    else:
-        filename += ".tiff"
-    return filename, image_buffer
+    return [
+        (rendition_filename(format, info), image_buffer)
+        for format, image_buffer in zip(formats, image_buffers)
+    ]
+
+
+def resize(format, filep, info, logger):
+    "return the filename and image_buffer of one format rendition of the image"
+    return resize_all([format], filep, info, logger)[0]
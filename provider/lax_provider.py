@@ -1,6 +1,9 @@
 import os
 import time
 import json
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 import requests
 from dateutil.parser import parse
 import log
@@ -13,10 +16,120 @@ identity = "process_%s" % os.getpid()
 logger = log.logger("lax_provider.log", "INFO", identity, loggerName=__name__)
 
 
+# most responses kept in the Lax client cache
+LAX_CACHE_MAX_SIZE = 100
+
+# Lax client of the lax_scope, per thread
+LAX_SCOPE = threading.local()
+
+
 class ErrorCallingLaxException(Exception):
     pass
 
 
+class LaxClient:
+    """
+    GET requests to Lax through a requests session, successful responses
+    are cached by URL and headers for ttl seconds, and no responses are
+    cached if ttl is 0
+    """
+
+    def __init__(self, ttl=0, max_size=LAX_CACHE_MAX_SIZE, session=None):
+        self.session = session or requests.Session()
+        self.ttl = ttl
+        self.max_size = max_size
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, url, article_id, verify_ssl, headers):
+        "response to the GET request, from the cache if it is not expired"
+        key = (url, tuple(sorted(headers.items())))
+        if self.ttl:
+            with self.lock:
+                cached = self.cache.get(key)
+                if cached and time.time() - cached.get("time") < self.ttl:
+                    self.cache.move_to_end(key)
+                    self.hits += 1
+                    return cached.get("response")
+                self.misses += 1
+        response = self.session.get(url, verify=verify_ssl, headers=headers)
+        if self.ttl and response.status_code == 200:
+            with self.lock:
+                self.cache[key] = {
+                    "time": time.time(),
+                    "article_id": utils.pad_msid(article_id),
+                    "response": response,
+                }
+                self.cache.move_to_end(key)
+                while len(self.cache) > self.max_size:
+                    self.cache.popitem(last=False)
+        return response
+
+    def invalidate(self, article_id):
+        "remove cached responses for the article"
+        padded_article_id = utils.pad_msid(article_id)
+        with self.lock:
+            for key in [
+                key
+                for key, cached in self.cache.items()
+                if cached.get("article_id") == padded_article_id
+            ]:
+                del self.cache[key]
+
+    def counters(self):
+        "cache hit and miss counts"
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self.cache)}
+
+
+LAX_SESSION = None
+LAX_SESSION_LOCK = threading.Lock()
+
+
+def get_lax_session():
+    "requests session shared by the process to reuse connections to Lax"
+    global LAX_SESSION
+    with LAX_SESSION_LOCK:
+        if LAX_SESSION is None:
+            LAX_SESSION = requests.Session()
+        return LAX_SESSION
+
+
+def get_lax_client():
+    "Lax client of the lax_scope, or a client which caches no responses"
+    client = getattr(LAX_SCOPE, "client", None)
+    if client is None:
+        client = LaxClient(session=get_lax_session())
+    return client
+
+
+@contextmanager
+def lax_scope(settings=None):
+    """
+    inside the scope successful Lax responses are reused for
+    lax_cache_ttl_seconds, no responses are cached if the setting is 0
+    """
+    previous_client = getattr(LAX_SCOPE, "client", None)
+    LAX_SCOPE.client = LaxClient(
+        int(getattr(settings, "lax_cache_ttl_seconds", None) or 0),
+        int(getattr(settings, "lax_cache_max_size", None) or LAX_CACHE_MAX_SIZE),
+        session=get_lax_session(),
+    )
+    try:
+        yield LAX_SCOPE.client
+    finally:
+        LAX_SCOPE.client = previous_client
+
+
+def invalidate_article(article_id):
+    "remove cached Lax responses for an article after sending it to Lax"
+    client = getattr(LAX_SCOPE, "client", None)
+    if client is not None:
+        client.invalidate(article_id)
+
+
 def lax_request(
     url, article_id, verify_ssl, request_type="version", auth_key=None, headers=None
 ):
@@ -24,7 +137,7 @@ def lax_request(
     request_headers = lax_auth_header(auth_key)
     if headers:
         request_headers.update(headers)
-    response = requests.get(url, verify=verify_ssl, headers=request_headers)
+    response = get_lax_client().get(url, article_id, verify_ssl, request_headers)
     logger.info("Request to lax: GET %s", url)
     logger.info("Response from lax: %s\n%s", response.status_code, response.content)
     status_code = response.status_code
@@ -1,8 +1,8 @@
 import os
 from xml.etree import ElementTree
 from xml.etree.ElementTree import SubElement
-import requests
-from provider import cleaner
+from urllib3 import encode_multipart_formdata
+from provider import cleaner, endpoint_client
 
 REQUESTS_TIMEOUT = (10, 60)
 LONG_REQUESTS_TIMEOUT = (10, 180)
@@ -84,24 +84,30 @@ def get_meca_article_pdf_path(folder_name, version_doi, caller_name, logger):
 
 
 def post_xml_file(
-    file_path, endpoint_url, user_agent, caller_name, logger, timeout=REQUESTS_TIMEOUT
+    file_path,
+    endpoint_url,
+    user_agent,
+    caller_name,
+    logger,
+    timeout=REQUESTS_TIMEOUT,
+    settings=None,
 ):
     "POST the file_path to the XSLT endpoint"
-    headers = None
-    if user_agent:
-        headers = {"user-agent": user_agent}
     file_name = file_path.split(os.sep)[-1]
-    files = []
     logger.info(
         "%s, request to endpoint: POST file %s to %s",
         (caller_name, file_path, endpoint_url),
     )
-    response = None
     with open(file_path, "rb") as open_file:
-        files.append(("file", (file_name, open_file, "text/xml")))
-        response = requests.post(
-            endpoint_url, timeout=timeout, headers=headers, files=files
+        data, content_type = encode_multipart_formdata(
+            [("file", (file_name, open_file.read(), "text/xml"))]
         )
+    headers = {"Content-Type": content_type}
+    if user_agent:
+        headers["user-agent"] = user_agent
+    response = endpoint_client.get_endpoint_client(settings).post(
+        endpoint_url, data, headers=headers, timeout=timeout
+    )
     if response and response.status_code not in [200]:
         raise Exception(
             "%s, error posting file %s to endpoint %s: %s, %s"
@@ -125,6 +131,7 @@ def post_to_endpoint(
     caller_name,
     logger,
     timeout=REQUESTS_TIMEOUT,
+    settings=None,
 ):
     "post XML file to endpoint, catch exceptions, return response content"
     try:
@@ -135,6 +142,7 @@ def post_to_endpoint(
             caller_name,
             logger,
             timeout=timeout,
+            settings=settings,
         )
     except Exception as exception:
         logger.exception(
@@ -151,7 +159,7 @@ def post_to_endpoint(
 
 
 def post_to_endpoint_long_timeout(
-    xml_file_path, endpoint_url, user_agent, caller_name, logger
+    xml_file_path, endpoint_url, user_agent, caller_name, logger, settings=None
 ):
     "post XML file to endpoint using a long timeout, catch exceptions, return response content"
     return post_to_endpoint(
@@ -161,6 +169,7 @@ def post_to_endpoint_long_timeout(
         caller_name,
         logger,
         timeout=LONG_REQUESTS_TIMEOUT,
+        settings=settings,
     )
 
 
@@ -171,6 +180,7 @@ def post_file_data_to_endpoint(
     caller_name,
     logger,
     timeout=PDF_REQUESTS_TIMEOUT,
+    settings=None,
 ):
     "POST data from the file_path to an endpoint and return the response content"
     headers = {"Content-Type": "application/xml"}
@@ -180,13 +190,9 @@ def post_file_data_to_endpoint(
         "%s, request to endpoint: POST data from file %s to %s",
         (caller_name, file_path, endpoint_url),
     )
-    response = None
     with open(file_path, "rb") as open_file:
-        response = requests.post(
-            endpoint_url,
-            timeout=timeout,
-            headers=headers,
-            data=open_file.read(),
+        response = endpoint_client.get_endpoint_client(settings).post(
+            endpoint_url, open_file.read(), headers=headers, timeout=timeout
         )
     if response and response.status_code not in [200]:
         raise Exception(
@@ -205,7 +211,7 @@ def post_file_data_to_endpoint(
 
 
 def post_to_preprint_pdf_endpoint(
-    xml_file_path, endpoint_url, user_agent, caller_name, logger
+    xml_file_path, endpoint_url, user_agent, caller_name, logger, settings=None
 ):
     "post XML file to PDF generation endpoint, catch exceptions, return response content"
     try:
@@ -216,6 +222,7 @@ def post_to_preprint_pdf_endpoint(
             caller_name,
             logger,
             timeout=PDF_REQUESTS_TIMEOUT,
+            settings=settings,
         )
     except Exception as exception:
         logger.exception(
@@ -232,7 +239,7 @@ def post_to_preprint_pdf_endpoint(
 
 
 def post_to_enrich_endpoint(
-    xml_file_path, endpoint_url, user_agent, caller_name, logger
+    xml_file_path, endpoint_url, user_agent, caller_name, logger, settings=None
 ):
     "post XML file to enrich refs endpoint, catch exceptions, return response content"
     try:
@@ -243,6 +250,7 @@ def post_to_enrich_endpoint(
             caller_name,
             logger,
             timeout=LONG_REQUESTS_TIMEOUT,
+            settings=settings,
         )
         response_content = response.content
     except Exception as exception:
@@ -1,7 +1,18 @@
 import os
+import resource
+import sys
 import psutil
 
 
 def current():
     process = psutil.Process(os.getpid())
     return process.memory_info().rss
+
+
+def peak():
+    "peak RSS memory of the process in bytes"
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    if sys.platform == "darwin":
+        return max_rss
+    return max_rss * 1024
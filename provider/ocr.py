@@ -1,9 +1,24 @@
+import hashlib
+import io
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from provider.file_cache import FileCache
 
 
 REQUESTS_TIMEOUT = 15
 
+# default number of files posted to Mathpix at the same time
+MAX_WORKERS = 4
+
+# default size limit of the OCR response cache
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# name the response cache keys are grouped under in the file cache
+CACHE_NAME = "mathpix"
+
 DEFAULT_OPTIONS_JSON = {
     "math_inline_delimiters": ["$", "$"],
     "rm_spaces": True,
@@ -129,10 +144,94 @@ def mathpix_post_request(
     return response
 
 
+class RateLimiter:
+    "spaces out calls to wait() from any thread to at most rate per second"
+
+    def __init__(self, rate=None):
+        self.interval = 1.0 / float(rate) if rate else 0
+        self.next_time = 0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        "sleep until the next call is allowed"
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            start_time = max(now, self.next_time)
+            self.next_time = start_time + self.interval
+        if start_time > now:
+            time.sleep(start_time - now)
+
+
+def ocr_cache(settings):
+    "cache of OCR responses, if the mathpix_cache_dir setting is set"
+    cache_dir = getattr(settings, "mathpix_cache_dir", None)
+    if not cache_dir:
+        return None
+    return FileCache(
+        cache_dir,
+        int(getattr(settings, "mathpix_cache_max_bytes", None) or CACHE_MAX_BYTES),
+    )
+
+
+def file_digest(file_path):
+    "SHA-256 hex digest of the file content"
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as open_file:
+        for chunk in iter(lambda: open_file.read(64 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_cached_response_json(cache, options_type, digest):
+    "response JSON for the image content and options from the cache, or None"
+    cached_file = io.BytesIO()
+    if not cache.get_to_file(CACHE_NAME, digest, options_type, cached_file):
+        return None
+    return json.loads(cached_file.getvalue().decode("utf-8"))
+
+
+def put_cached_response_json(cache, options_type, digest, response_json):
+    "add response JSON for the image content and options to the cache"
+    cache.put(
+        CACHE_NAME,
+        digest,
+        options_type,
+        lambda open_file: open_file.write(json.dumps(response_json).encode("utf-8")),
+    )
+
+
+def ocr_file(
+    file_path, options_type, url, app_id, app_key, user_agent, rate_limiter=None
+):
+    "post the file to the endpoint using the options_type and return the response JSON"
+    if options_type == "table":
+        post_request = mathpix_table_post_request
+    elif options_type == "disp-formula":
+        post_request = mathpix_disp_formula_post_request
+    else:
+        post_request = mathpix_post_request
+    if rate_limiter:
+        rate_limiter.wait()
+    response = post_request(
+        url=url,
+        app_id=app_id,
+        app_key=app_key,
+        file_path=file_path,
+        user_agent=user_agent,
+    )
+    return response.json()
+
+
 def ocr_files(
     file_to_path_map, options_type, app_type, settings, caller_name, logger, identifier
 ):
-    "post request to an endpoint for each file and return data"
+    """
+    post request to an endpoint for each file and return data, files are posted
+    concurrently and responses are cached by the file content if the cache is
+    configured, so identical images are only sent once
+    """
     file_to_data_map = {}
     user_agent = getattr(settings, "user_agent", None)
 
@@ -146,47 +245,64 @@ def ocr_files(
         app_id = getattr(settings, "mathpix_app_id")
         app_key = getattr(settings, "mathpix_app_key")
 
-    for file_name, file_path in file_to_path_map.items():
+    cache = ocr_cache(settings)
+    rate_limiter = RateLimiter(getattr(settings, "mathpix_requests_per_second", None))
+
+    def ocr(file_path):
+        "return the response JSON and whether it came from the cache, or the exception"
+        try:
+            digest = None
+            if cache:
+                digest = file_digest(file_path)
+                response_json = get_cached_response_json(cache, options_type, digest)
+                if response_json is not None:
+                    return response_json, True, None
+            response_json = ocr_file(
+                file_path,
+                options_type,
+                settings.mathpix_endpoint,
+                app_id,
+                app_key,
+                user_agent,
+                rate_limiter,
+            )
+            # do not cache responses reporting an error
+            if (
+                cache
+                and isinstance(response_json, dict)
+                and not response_json.get("error")
+            ):
+                put_cached_response_json(cache, options_type, digest, response_json)
+            return response_json, False, None
+        except Exception as exception:
+            return None, False, exception
+
+    results = []
+    if file_to_path_map:
+        max_workers = int(getattr(settings, "mathpix_max_workers", None) or MAX_WORKERS)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(ocr, file_to_path_map.values()))
+
+    # log the results in the order of the files
+    for (file_name, file_path), (response_json, cached, exception) in zip(
+        file_to_path_map.items(), results
+    ):
         logger.info(
             "%s, OCR file from %s: file_name %s, file_path %s"
             % (caller_name, identifier, file_name, file_path)
         )
-        try:
-            if options_type == "table":
-                response = mathpix_table_post_request(
-                    url=settings.mathpix_endpoint,
-                    app_id=app_id,
-                    app_key=app_key,
-                    file_path=file_path,
-                    user_agent=user_agent,
-                )
-            elif options_type == "disp-formula":
-                response = mathpix_disp_formula_post_request(
-                    url=settings.mathpix_endpoint,
-                    app_id=app_id,
-                    app_key=app_key,
-                    file_path=file_path,
-                    user_agent=user_agent,
-                )
-            else:
-                response = mathpix_post_request(
-                    url=settings.mathpix_endpoint,
-                    app_id=app_id,
-                    app_key=app_key,
-                    file_path=file_path,
-                    user_agent=user_agent,
-                )
-
-        except Exception as exception:
+        if exception:
             logger.exception(
                 "%s, exception posting to Mathpix API endpoint, file_name %s: %s"
                 % (caller_name, file_name, str(exception)),
             )
             continue
 
-        # get the response.json and use that
-        response_json = response.json()
-
+        if cached:
+            logger.info(
+                "%s, using cached Mathpix response for %s, file_name %s"
+                % (caller_name, identifier, file_name)
+            )
         logger.info(
             "%s, JSON response from Mathpix for %s, file_name %s, file_path %s: '%s'"
             % (
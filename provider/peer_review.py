@@ -1,33 +1,212 @@
 import os
 import shutil
+import threading
+import time
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+import requests
 from elifecleaner.transform import ArticleZipFile
 from provider import cleaner, utils
 from provider.article_processing import file_extension
+from provider.file_cache import FileCache
 
 
 INF_FILE_NAME_ID_FORMAT = "inf%s"
 
 INF_FILE_NAME_FORMAT = "elife-%s-%s.%s"
 
+# number of images downloaded at the same time, and at the same time from one host
+DOWNLOAD_MAX_WORKERS = 8
+DOWNLOAD_MAX_PER_HOST = 4
 
-def download_images(href_list, to_dir, activity_name, logger, user_agent=None):
+# most attempts to download an image, and the backoff before each retry
+DOWNLOAD_ATTEMPTS = 3
+DOWNLOAD_RETRY_SECONDS = 1
+DOWNLOAD_MAX_RETRY_SECONDS = 8
+
+# response status codes worth retrying a download
+DOWNLOAD_RETRY_STATUS_CODES = [429, 500, 502, 503, 504]
+
+# bytes written to disk at a time while downloading
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# default size limit of the downloaded image cache
+IMAGE_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+
+# name the image cache keys are grouped under in the file cache
+IMAGE_CACHE_NAME = "peer_review_images"
+
+
+class RetryDownloadException(RuntimeError):
+    pass
+
+
+def image_file_cache(settings):
+    "cache of downloaded images, if the peer_review_image_cache_dir setting is set"
+    cache_dir = getattr(settings, "peer_review_image_cache_dir", None)
+    if not cache_dir:
+        return None
+    return FileCache(
+        cache_dir,
+        int(
+            getattr(settings, "peer_review_image_cache_max_bytes", None)
+            or IMAGE_CACHE_MAX_BYTES
+        ),
+    )
+
+
+def stream_download(href, open_file, user_agent=None):
+    "write the body of a GET request to the open file as it is received"
+    headers = None
+    if user_agent:
+        headers = {"user-agent": user_agent}
+    response = requests.get(
+        href, timeout=utils.REQUESTS_TIMEOUT, headers=headers, stream=True
+    )
+    try:
+        if response.status_code != 200:
+            message = "GET request returned a %s status code for %s" % (
+                response.status_code,
+                href,
+            )
+            if response.status_code in DOWNLOAD_RETRY_STATUS_CODES:
+                raise RetryDownloadException(message)
+            raise RuntimeError(message)
+        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+            open_file.write(chunk)
+    finally:
+        response.close()
+
+
+def download_with_retry(href, open_file, user_agent=None, host_semaphore=None):
+    "download to the open file, retrying server errors and connection failures"
+    for attempt in range(DOWNLOAD_ATTEMPTS):
+        # discard any data written by a failed attempt
+        open_file.seek(0)
+        open_file.truncate()
+        try:
+            if host_semaphore:
+                with host_semaphore:
+                    stream_download(href, open_file, user_agent)
+            else:
+                stream_download(href, open_file, user_agent)
+            return
+        except (
+            RetryDownloadException,
+            requests.exceptions.ConnectionError,
+            requests.exceptions.Timeout,
+        ) as exception:
+            if attempt + 1 >= DOWNLOAD_ATTEMPTS:
+                raise RuntimeError(str(exception)) from exception
+            time.sleep(
+                utils.backoff_seconds(
+                    attempt, DOWNLOAD_RETRY_SECONDS, DOWNLOAD_MAX_RETRY_SECONDS
+                )
+            )
+
+
+def download_image(
+    href, to_file, user_agent=None, file_cache=None, host_semaphore=None
+):
+    """
+    download the image to to_file, when a file cache is specified images are
+    only downloaded if they are not in the cache
+    """
+    try:
+        with open(to_file, "wb") as open_file:
+            if not file_cache:
+                download_with_retry(href, open_file, user_agent, host_semaphore)
+            elif not file_cache.get_to_file(IMAGE_CACHE_NAME, href, None, open_file):
+                file_cache.put(
+                    IMAGE_CACHE_NAME,
+                    href,
+                    None,
+                    lambda cache_file: download_with_retry(
+                        href, cache_file, user_agent, host_semaphore
+                    ),
+                )
+                file_cache.get_to_file(IMAGE_CACHE_NAME, href, None, open_file)
+    except Exception:
+        if os.path.exists(to_file):
+            os.remove(to_file)
+        raise
+    return to_file
+
+
+def unique_file_name(file_name, file_names):
+    "add a number to the file name if it is already in file_names"
+    if file_name not in file_names:
+        return file_name
+    name, extension = os.path.splitext(file_name)
+    count = 2
+    while "%s_%s%s" % (name, count, extension) in file_names:
+        count += 1
+    return "%s_%s%s" % (name, count, extension)
+
+
+def download_images(
+    href_list,
+    to_dir,
+    activity_name,
+    logger,
+    user_agent=None,
+    file_cache=None,
+    max_workers=DOWNLOAD_MAX_WORKERS,
+    max_per_host=DOWNLOAD_MAX_PER_HOST,
+):
     "download images from imgur"
+    # local file path for each href, different hrefs can have the same file name
+    href_to_file_path = OrderedDict()
+    for href in href_list:
+        if href in href_to_file_path:
+            continue
+        file_name = unique_file_name(
+            href.rsplit("/", 1)[-1],
+            [os.path.basename(path) for path in href_to_file_path.values()],
+        )
+        href_to_file_path[href] = os.path.join(to_dir, file_name)
+
+    # limit the number of downloads from each host at the same time
+    host_semaphores = {
+        urlparse(href).netloc: threading.BoundedSemaphore(max_per_host)
+        for href in href_to_file_path
+    }
+
+    def download(href):
+        try:
+            return (
+                download_image(
+                    href,
+                    href_to_file_path.get(href),
+                    user_agent,
+                    file_cache,
+                    host_semaphores.get(urlparse(href).netloc),
+                ),
+                None,
+            )
+        except RuntimeError as exception:
+            return None, exception
+
+    results = {}
+    if href_to_file_path:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = dict(
+                zip(href_to_file_path.keys(), executor.map(download, href_to_file_path))
+            )
+
+    # log the results in the order of the href list
     href_to_file_name_map = OrderedDict()
     for href in href_list:
-        file_name = href.rsplit("/", 1)[-1]
-        to_file = os.path.join(to_dir, file_name)
-        # todo!!! improve handling of potentially duplicate file_name values
         if href in href_to_file_name_map.keys():
             logger.info("%s, href %s was already downloaded" % (activity_name, href))
             continue
-        try:
-            file_path = utils.download_file(href, to_file, user_agent)
-        except RuntimeError as exception:
+        file_path, exception = results.pop(href, (None, None))
+        if exception:
             logger.info(str(exception))
             logger.info("%s, href %s could not be downloaded" % (activity_name, href))
             continue
-        logger.info("%s, downloaded href %s to %s" % (activity_name, href, to_file))
+        logger.info("%s, downloaded href %s to %s" % (activity_name, href, file_path))
         # keep track of a map of href value to local file_name
         href_to_file_name_map[href] = file_path
     return href_to_file_name_map
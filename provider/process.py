@@ -19,6 +19,25 @@ class Flag:
         self._red = True
 
 
+class SharedFlag(Flag):
+    """
+    Flag backed by a multiprocessing Event, so a stop requested in one
+    process is seen by all the worker processes sharing it
+    """
+
+    def __init__(self, event):
+        self._event = event
+
+    def green(self):
+        return not self._event.is_set()
+
+    def red(self):
+        return self._event.is_set()
+
+    def stop_process(self):
+        self._event.set()
+
+
 def monitor_interrupt(work):
     """
     Given a lambda work that takes an arbitrary long time to execute,
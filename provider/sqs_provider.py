@@ -0,0 +1,164 @@
+import time
+
+# most messages SQS allows in one receive_message or batch request
+MAX_BATCH_SIZE = 10
+
+# seconds a receive_message request waits for a message to arrive
+WAIT_TIME_SECONDS = 20
+
+# seconds to sleep after the first empty receive, doubled while idle
+IDLE_SLEEP_SECONDS = 1
+
+
+def get_client(settings):
+    "get an SQS client"
+    return settings.aws_conn(
+        "sqs",
+        {
+            "aws_access_key_id": settings.aws_access_key_id,
+            "aws_secret_access_key": settings.aws_secret_access_key,
+            "region_name": settings.sqs_region,
+        },
+    )
+
+
+def batches(items, size=MAX_BATCH_SIZE):
+    "split the list of items into lists of at most size items"
+    return [items[index : index + size] for index in range(0, len(items), size)]
+
+
+class QueueConsumer:
+    """
+    Read messages from an SQS queue using long polling and batches of up to
+    ten messages, send the resulting messages to the output queue and delete
+    each message as soon as it is processed, sleeping while the queue is idle
+    only if long polling is off
+    """
+
+    def __init__(
+        self,
+        client,
+        logger,
+        input_queue_url,
+        output_queue_url=None,
+        visibility_timeout=30,
+        wait_time_seconds=WAIT_TIME_SECONDS,
+        max_idle_sleep_seconds=10,
+    ):
+        self.client = client
+        self.logger = logger
+        self.input_queue_url = input_queue_url
+        self.output_queue_url = output_queue_url
+        self.visibility_timeout = visibility_timeout
+        self.wait_time_seconds = wait_time_seconds
+        self.max_idle_sleep_seconds = max_idle_sleep_seconds
+        self.idle_sleep_seconds = 0
+
+    def receive(self):
+        "receive a batch of messages, waiting up to wait_time_seconds for one"
+        response = self.client.receive_message(
+            QueueUrl=self.input_queue_url,
+            MaxNumberOfMessages=MAX_BATCH_SIZE,
+            VisibilityTimeout=self.visibility_timeout,
+            WaitTimeSeconds=self.wait_time_seconds,
+        )
+        return response.get("Messages") or []
+
+    def consume(self, flag, process_message):
+        """
+        receive messages until the flag is red, calling process_message for
+        each message, it returns a list of message bodies to send to the output
+        queue before the message is deleted, or None to leave the message
+        on the queue
+        """
+        while flag.green():
+            self.logger.info("reading message")
+            queue_messages = self.receive()
+            if not queue_messages:
+                self.logger.info("no messages available")
+                if not self.wait_time_seconds:
+                    self.idle_sleep()
+                continue
+            self.idle_sleep_seconds = 0
+            for queue_message in queue_messages:
+                message_bodies = process_message(queue_message)
+                if message_bodies is not None:
+                    # complete it now so it is not received again while the
+                    # rest of the batch is processed
+                    self.complete([(queue_message, message_bodies)])
+
+    def complete(self, processed):
+        """
+        send the message bodies of each processed message, then delete the
+        processed messages whose message bodies were all sent
+        """
+        send_entries = []
+        for index, (queue_message, message_bodies) in enumerate(processed):
+            for body_index, message_body in enumerate(message_bodies):
+                send_entries.append(
+                    {"Id": "%s-%s" % (index, body_index), "MessageBody": message_body}
+                )
+        failed_indexes = set()
+        for failed_id in self.send(send_entries):
+            failed_indexes.add(int(failed_id.split("-")[0]))
+        self.delete(
+            [
+                queue_message
+                for index, (queue_message, message_bodies) in enumerate(processed)
+                if index not in failed_indexes
+            ]
+        )
+
+    def send(self, entries):
+        "send message entries in batches, return the Id of entries which failed"
+        failed_ids = []
+        for batch in batches(entries):
+            response = self.client.send_message_batch(
+                QueueUrl=self.output_queue_url, Entries=batch
+            )
+            for failed in response.get("Failed") or []:
+                self.logger.error(
+                    "failed to send message %s: %s"
+                    % (failed.get("Id"), failed.get("Message"))
+                )
+                failed_ids.append(failed.get("Id"))
+        return failed_ids
+
+    def delete(self, queue_messages):
+        "delete messages from the input queue in batches"
+        for batch in batches(queue_messages):
+            self.logger.info("cancelling %s messages" % len(batch))
+            response = self.client.delete_message_batch(
+                QueueUrl=self.input_queue_url,
+                Entries=[
+                    {
+                        "Id": str(index),
+                        "ReceiptHandle": queue_message.get("ReceiptHandle"),
+                    }
+                    for index, queue_message in enumerate(batch)
+                ],
+            )
+            for failed in response.get("Failed") or []:
+                self.logger.error(
+                    "failed to delete message %s: %s"
+                    % (
+                        batch[int(failed.get("Id"))].get("MessageId"),
+                        failed.get("Message"),
+                    )
+                )
+
+    def change_visibility(self, queue_message, visibility_timeout):
+        "make the message visible again after visibility_timeout seconds"
+        self.client.change_message_visibility(
+            QueueUrl=self.input_queue_url,
+            ReceiptHandle=queue_message.get("ReceiptHandle"),
+            VisibilityTimeout=visibility_timeout,
+        )
+
+    def idle_sleep(self):
+        "sleep after an empty receive, for longer the longer the queue is idle"
+        self.idle_sleep_seconds = min(
+            max(self.idle_sleep_seconds * 2, IDLE_SLEEP_SECONDS),
+            self.max_idle_sleep_seconds,
+        )
+        time.sleep(self.idle_sleep_seconds)
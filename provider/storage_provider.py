@@ -1,10 +1,32 @@
+import os
 import re
 import io
+import shutil
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 import botocore
+from boto3.s3.transfer import TransferConfig
+from provider.file_cache import FileCache
 
 
 REQUESTER_PAYER = True
 
+# default number of objects transferred at the same time by the bulk methods
+BULK_MAX_WORKERS = 10
+
+# maximum number of keys in one delete_objects request
+DELETE_OBJECTS_MAX_KEYS = 1000
+
+# parts of a streamed upload held in memory at one time, per object
+STREAM_MAX_IN_MEMORY_CHUNKS = 2
+
+# read buffer size of a ranged read S3 object
+RANGED_READ_BUFFER_SIZE = 1024 * 1024
+
+# default size limit of the downloaded file cache
+FILE_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+
 
 def storage_context(*args):
     return S3StorageContext(*args)
@@ -33,6 +55,60 @@ class S3StorageContext:
             self.context["client"] = client
         return client
 
+    def get_transfer_config(self):
+        "multipart transfer settings for uploading and downloading objects"
+        if "transfer_config" not in self.context:
+            kwargs = {}
+            for settings_name, config_name in [
+                ("s3_multipart_threshold", "multipart_threshold"),
+                ("s3_multipart_chunksize", "multipart_chunksize"),
+                ("s3_max_concurrency", "max_concurrency"),
+            ]:
+                if getattr(self.settings, settings_name, None):
+                    kwargs[config_name] = int(getattr(self.settings, settings_name))
+            self.context["transfer_config"] = TransferConfig(**kwargs)
+        return self.context["transfer_config"]
+
+    def get_stream_transfer_config(self):
+        """
+        transfer settings for uploading from a stream, one part is uploaded at
+        a time per object so memory use is bounded by the part size
+        """
+        if "stream_transfer_config" not in self.context:
+            transfer_config = self.get_transfer_config()
+            stream_transfer_config = TransferConfig(
+                multipart_threshold=transfer_config.multipart_threshold,
+                multipart_chunksize=transfer_config.multipart_chunksize,
+                max_concurrency=1,
+            )
+            stream_transfer_config.max_in_memory_upload_chunks = (
+                STREAM_MAX_IN_MEMORY_CHUNKS
+            )
+            self.context["stream_transfer_config"] = stream_transfer_config
+        return self.context["stream_transfer_config"]
+
+    def get_file_cache(self):
+        "cache of downloaded objects, if the s3_file_cache_dir setting is set"
+        if "file_cache" not in self.context:
+            file_cache = None
+            cache_dir = getattr(self.settings, "s3_file_cache_dir", None)
+            if cache_dir:
+                file_cache = FileCache(
+                    cache_dir,
+                    int(
+                        getattr(self.settings, "s3_file_cache_max_bytes", None)
+                        or FILE_CACHE_MAX_BYTES
+                    ),
+                )
+            self.context["file_cache"] = file_cache
+        return self.context["file_cache"]
+
+    def bulk_max_workers(self):
+        "number of objects transferred at the same time by the bulk methods"
+        return int(
+            getattr(self.settings, "s3_bulk_max_workers", None) or BULK_MAX_WORKERS
+        )
+
     # Resource format expected s3://my-bucket/my/path/abc.zip
     def s3_storage_objects(self, resource):
         pattern = re.compile(r"(.*?)://(.*?)(/.*)")
@@ -68,22 +144,74 @@ class S3StorageContext:
 
     def get_resource_as_string(self, resource):
         "return resource object as bytes"
-        bucket_name, s3_key = self.s3_storage_objects(resource)
         object_buffer = io.BytesIO()
+        self.get_resource_to_file(resource, object_buffer)
+        return object_buffer.getvalue()
+
+    def get_resource_as_string_and_etag(self, resource):
+        "return resource object as bytes, and the ETag of the object returned"
+        bucket_name, s3_key = self.s3_storage_objects(resource)
         client = self.get_client_from_cache()
-        extra_args = None
+        kwargs = {
+            "Bucket": bucket_name,
+            "Key": s3_key.lstrip("/"),
+        }
         if REQUESTER_PAYER:
-            extra_args = {"RequestPayer": "requester"}
-        client.download_fileobj(
-            Bucket=bucket_name,
-            Key=s3_key.lstrip("/"),
-            Fileobj=object_buffer,
-            ExtraArgs=extra_args,
-        )
-        return object_buffer.getvalue()
+            kwargs["RequestPayer"] = "requester"
+        response = client.get_object(**kwargs)
+        return response.get("Body").read(), response.get("ETag")
 
     def get_resource_to_file(self, resource, file):
-        "save resource object data to file pointer"
+        """
+        save resource object data to file pointer, when the file cache is
+        enabled the data is read from the cache if the object ETag is unchanged
+        """
+        file_cache = self.get_file_cache()
+        if file_cache:
+            bucket_name, s3_key = self.s3_storage_objects(resource)
+            attributes = self.get_resource_attributes(resource)
+            etag = attributes.get("ETag")
+            if etag and attributes.get("ContentLength", 0) <= file_cache.max_bytes:
+                key = s3_key.lstrip("/")
+                if file_cache.get_to_file(bucket_name, key, etag, file):
+                    return
+                try:
+                    file_cache.put(
+                        bucket_name,
+                        key,
+                        etag,
+                        lambda open_file: self.download_resource_version_to_file(
+                            resource, etag, open_file
+                        ),
+                    )
+                except botocore.exceptions.ClientError as exception:
+                    # the object was replaced after its ETag was read, do not cache it
+                    if exception.response.get("Error", {}).get("Code") not in [
+                        "PreconditionFailed",
+                        "412",
+                    ]:
+                        raise
+                else:
+                    if file_cache.get_to_file(bucket_name, key, etag, file):
+                        return
+        self.download_resource_to_file(resource, file)
+
+    def download_resource_version_to_file(self, resource, etag, file):
+        "download resource object data to file pointer only if its ETag is etag"
+        bucket_name, s3_key = self.s3_storage_objects(resource)
+        client = self.get_client_from_cache()
+        kwargs = {
+            "Bucket": bucket_name,
+            "Key": s3_key.lstrip("/"),
+            "IfMatch": etag,
+        }
+        if REQUESTER_PAYER:
+            kwargs["RequestPayer"] = "requester"
+        response = client.get_object(**kwargs)
+        shutil.copyfileobj(response.get("Body"), file)
+
+    def download_resource_to_file(self, resource, file):
+        "download resource object data to file pointer"
         bucket_name, s3_key = self.s3_storage_objects(resource)
         client = self.get_client_from_cache()
         extra_args = None
@@ -94,6 +222,7 @@ class S3StorageContext:
             Key=s3_key.lstrip("/"),
             Fileobj=file,
             ExtraArgs=extra_args,
+            Config=self.get_transfer_config(),
         )
 
     def get_resource_attributes(self, resource):
@@ -115,6 +244,7 @@ class S3StorageContext:
             "Filename": file,
             "Bucket": bucket_name,
             "Key": s3_key.lstrip("/"),
+            "Config": self.get_transfer_config(),
         }
         if metadata:
             kwargs["ExtraArgs"] = metadata
@@ -125,6 +255,39 @@ class S3StorageContext:
         client = self.get_client_from_cache()
         client.upload_file(**kwargs)
 
+    def set_resource_from_fileobj(self, resource, fileobj, metadata=None):
+        """
+        create object from data read from the start to the end of the file
+        object, metadata can include ContentType key
+        """
+        bucket_name, s3_key = self.s3_storage_objects(resource)
+        extra_args = {}
+        if metadata:
+            extra_args.update(metadata)
+        if REQUESTER_PAYER:
+            extra_args["RequestPayer"] = "requester"
+        client = self.get_client_from_cache()
+        client.upload_fileobj(
+            Fileobj=StreamReader(fileobj),
+            Bucket=bucket_name,
+            Key=s3_key.lstrip("/"),
+            ExtraArgs=extra_args or None,
+            Config=self.get_stream_transfer_config(),
+        )
+
+    def open_resource(self, resource):
+        """
+        open the object as a seekable read only file object which reads data
+        from the bucket with ranged requests, for example to read members
+        of a zip file without downloading all of it
+        """
+        bucket_name, s3_key = self.s3_storage_objects(resource)
+        client = self.get_client_from_cache()
+        return io.BufferedReader(
+            S3ObjectReader(client, bucket_name, s3_key.lstrip("/")),
+            buffer_size=RANGED_READ_BUFFER_SIZE,
+        )
+
     def set_resource_from_string(self, resource, data, content_type=None):
         "create object and save data there"
         bucket_name, s3_key = self.s3_storage_objects(resource)
@@ -141,12 +304,19 @@ class S3StorageContext:
         client.put_object(**kwargs)
         # todo!!! optionally compare response etag to string MD5 to confirm it copied entirely
 
-    def list_resources(self, folder, return_keys=False):
-        "list all bucket objects for the folder"
+    def list_resources(
+        self, folder, return_keys=False, delimiter=None, start_after=None
+    ):
+        """
+        list all bucket objects for the folder, with a delimiter objects in
+        subfolders are listed only by their common prefix, which ends with the
+        delimiter, and with start_after only keys after that key are listed
+        """
         bucket_name, s3_key = self.s3_storage_objects(folder)
         folder = s3_key[1:] if s3_key[:1] == "/" else s3_key
         max_keys = 1000
         bucket_contents = []
+        common_prefixes = []
 
         client = self.get_client_from_cache()
         # set IsTruncated in a pre-response prior to the while loop
@@ -160,6 +330,10 @@ class S3StorageContext:
                 kwargs["RequestPayer"] = "requester"
             if folder:
                 kwargs["Prefix"] = folder
+            if delimiter:
+                kwargs["Delimiter"] = delimiter
+            if start_after:
+                kwargs["StartAfter"] = start_after
             # handle the continuation token
             if response.get("NextContinuationToken"):
                 kwargs["ContinuationToken"] = response.get("NextContinuationToken")
@@ -170,11 +344,15 @@ class S3StorageContext:
             if response.get("Contents"):
                 # add the Contents list to the full list of objects
                 bucket_contents += response.get("Contents")
+            if response.get("CommonPrefixes"):
+                common_prefixes += response.get("CommonPrefixes")
         if return_keys:
             # return a dict of object data
-            return bucket_contents
+            return bucket_contents + common_prefixes
         # by default return a list of key names only
-        return [key_dict.get("Key") for key_dict in bucket_contents]
+        return [key_dict.get("Key") for key_dict in bucket_contents] + [
+            prefix_dict.get("Prefix") for prefix_dict in common_prefixes
+        ]
 
     def copy_resource(
         self, orig_resource, dest_resource, additional_dict_metadata=None
@@ -218,6 +396,274 @@ class S3StorageContext:
             kwargs["RequestPayer"] = "requester"
         client.delete_object(**kwargs)
 
+    def bulk_transfer(self, transfer, items, callback=None):
+        """
+        call transfer for each item concurrently over the shared client,
+        return a result dict for each item in the same order as the items,
+        the error of a result is the exception raised, or None on success
+        """
+        # create the shared client before starting the threads
+        self.get_client_from_cache()
+
+        def transfer_item(item):
+            result = {"item": item, "error": None}
+            try:
+                transfer(item)
+            except Exception as exception:
+                result["error"] = exception
+            if callback:
+                callback(result)
+            return result
+
+        if not items:
+            return []
+        with ThreadPoolExecutor(
+            max_workers=min(self.bulk_max_workers(), len(items))
+        ) as executor:
+            return list(executor.map(transfer_item, items))
+
+    def get_resources_to_files(self, resource_files, callback=None):
+        """
+        download files concurrently, resource_files is a list of
+        (resource, file path) tuples, folders of the file paths are created,
+        return a result for each resource
+        """
+
+        def transfer(item):
+            resource, file_path = item
+            os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+            with open(file_path, "wb") as open_file:
+                self.get_resource_to_file(resource, open_file)
+
+        results = self.bulk_transfer(transfer, list(resource_files), callback)
+        return [
+            {
+                "resource": result["item"][0],
+                "file": result["item"][1],
+                "error": result["error"],
+            }
+            for result in results
+        ]
+
+    def get_resources_to_dir(self, resources, to_dir, callback=None):
+        """
+        download the resources concurrently to files in to_dir named the same
+        as the last part of each resource key, return a result for each resource,
+        raises ValueError if two resources would be downloaded to the same file
+        """
+        resource_files = [
+            (resource, os.path.join(to_dir, resource.rsplit("/", 1)[-1]))
+            for resource in resources
+        ]
+        file_name_counts = Counter(file_path for _, file_path in resource_files)
+        duplicate_file_names = sorted(
+            os.path.basename(file_path)
+            for file_path, count in file_name_counts.items()
+            if count > 1
+        )
+        if duplicate_file_names:
+            raise ValueError(
+                "resources have the same file name: %s"
+                % ", ".join(duplicate_file_names)
+            )
+        return self.get_resources_to_files(resource_files, callback)
+
+    def set_resources_from_files(self, resource_files, callback=None):
+        """
+        upload files concurrently, resource_files is a list of
+        (resource, file name) or (resource, file name, metadata) tuples,
+        return a result for each resource
+        """
+        results = self.bulk_transfer(
+            lambda item: self.set_resource_from_filename(*item),
+            list(resource_files),
+            callback,
+        )
+        return [
+            {
+                "resource": result["item"][0],
+                "file": result["item"][1],
+                "error": result["error"],
+            }
+            for result in results
+        ]
+
+    def set_resources_from_zip(self, open_zip_file, resource_members, callback=None):
+        """
+        upload members of an open ZipFile concurrently without extracting them
+        to disk, resource_members is a list of
+        (resource, member name) or (resource, member name, metadata) tuples,
+        return a result for each resource
+        """
+        # ZipFile reads are serialised by its own lock, but opening and closing
+        # members changes its shared file reference count
+        zip_lock = threading.Lock()
+
+        def transfer(item):
+            resource, member_name = item[0], item[1]
+            metadata = item[2] if len(item) > 2 else None
+            with zip_lock:
+                open_member = open_zip_file.open(member_name)
+            try:
+                self.set_resource_from_fileobj(resource, open_member, metadata)
+            finally:
+                with zip_lock:
+                    open_member.close()
+
+        results = self.bulk_transfer(transfer, list(resource_members), callback)
+        return [
+            {
+                "resource": result["item"][0],
+                "member": result["item"][1],
+                "error": result["error"],
+            }
+            for result in results
+        ]
+
+    def copy_resources(self, resource_pairs, callback=None):
+        """
+        copy objects concurrently, resource_pairs is a list of
+        (orig_resource, dest_resource) or
+        (orig_resource, dest_resource, additional_dict_metadata) tuples,
+        return a result for each copy
+        """
+        results = self.bulk_transfer(
+            lambda item: self.copy_resource(*item),
+            list(resource_pairs),
+            callback,
+        )
+        return [
+            {
+                "orig_resource": result["item"][0],
+                "resource": result["item"][1],
+                "error": result["error"],
+            }
+            for result in results
+        ]
+
+    def delete_resources(self, resources):
+        """
+        delete objects in batches with delete_objects requests,
+        return a result for each resource
+        """
+        resources = list(resources)
+        client = self.get_client_from_cache()
+        # group the keys by bucket
+        bucket_keys = {}
+        for resource in resources:
+            bucket_name, s3_key = self.s3_storage_objects(resource)
+            bucket_keys.setdefault(bucket_name, []).append(s3_key.lstrip("/"))
+        errors = {}
+        for bucket_name, keys in bucket_keys.items():
+            for index in range(0, len(keys), DELETE_OBJECTS_MAX_KEYS):
+                batch_keys = keys[index : index + DELETE_OBJECTS_MAX_KEYS]
+                kwargs = {
+                    "Bucket": bucket_name,
+                    "Delete": {
+                        "Objects": [{"Key": key} for key in batch_keys],
+                        "Quiet": True,
+                    },
+                }
+                if REQUESTER_PAYER:
+                    kwargs["RequestPayer"] = "requester"
+                try:
+                    response = client.delete_objects(**kwargs)
+                except botocore.exceptions.ClientError as exception:
+                    for key in batch_keys:
+                        errors[(bucket_name, key)] = exception
+                    continue
+                for error in response.get("Errors", []):
+                    errors[(bucket_name, error.get("Key"))] = RuntimeError(
+                        "%s: %s" % (error.get("Code"), error.get("Message"))
+                    )
+        results = []
+        for resource in resources:
+            bucket_name, s3_key = self.s3_storage_objects(resource)
+            results.append(
+                {
+                    "resource": resource,
+                    "error": errors.get((bucket_name, s3_key.lstrip("/"))),
+                }
+            )
+        return results
+
+
+def raise_transfer_errors(results):
+    "raise the exception of the first failed result of a bulk transfer, if any"
+    for result in results:
+        if result.get("error"):
+            raise result.get("error")
+
+
+class StreamReader:
+    """
+    read only view of a file object, hides seek so an upload reads the data
+    once from start to end instead of seeking around a compressed stream
+    """
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+
+    def read(self, size=-1):
+        return self.fileobj.read(size)
+
+
+class S3ObjectReader(io.RawIOBase):
+    "seekable raw file object reading an S3 object with ranged get requests"
+
+    def __init__(self, client, bucket_name, key):
+        super().__init__()
+        self.client = client
+        self.bucket_name = bucket_name
+        self.key = key
+        self.position = 0
+        self._size = None
+
+    @property
+    def size(self):
+        if self._size is None:
+            kwargs = {"Bucket": self.bucket_name, "Key": self.key}
+            if REQUESTER_PAYER:
+                kwargs["RequestPayer"] = "requester"
+            self._size = self.client.head_object(**kwargs).get("ContentLength")
+        return self._size
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self.position = offset
+        elif whence == io.SEEK_CUR:
+            self.position += offset
+        elif whence == io.SEEK_END:
+            self.position = self.size + offset
+        else:
+            raise ValueError("invalid whence (%r)" % whence)
+        return self.position
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self.size - self.position)
+        if size <= 0:
+            return 0
+        kwargs = {
+            "Bucket": self.bucket_name,
+            "Key": self.key,
+            "Range": "bytes=%s-%s" % (self.position, self.position + size - 1),
+        }
+        if REQUESTER_PAYER:
+            kwargs["RequestPayer"] = "requester"
+        data = self.client.get_object(**kwargs)["Body"].read()
+        buffer[: len(data)] = data
+        self.position += len(data)
+        return len(data)
+
 
 class UnsupportedResourceType(Exception):  # TODO
     pass
@@ -1,5 +1,6 @@
 import datetime
 import os
+import random
 import re
 import urllib
 import base64
@@ -11,12 +12,18 @@ from mimetypes import guess_type
 import requests
 from elifetools import utils as etoolsutils
 import boto3
+from botocore.config import Config
+from collections import OrderedDict
 from functools import partial
+import threading
 
 S3_DATE_FORMAT = "%Y%m%d%H%M%S"
 PUB_DATE_FORMAT = "%Y-%m-%d"
 DATE_TIME_FORMAT = "%Y-%m-%dT%H:%M:%S.000Z"
 
+# most AWS clients kept by an AWSClientRegistry
+AWS_CLIENTS_MAX_SIZE = 100
+
 
 def pad_msid(msid):
     return "{:05d}".format(int(msid))
@@ -327,23 +334,104 @@ def get_aws_connection(service_conn_map, service, service_creation_kwargs):
         service_creation_kwargs, dict
     ), "`service_creation_kwargs` must be a dictionary"
 
-    if service in service_conn_map:
-        return service_conn_map[service]
-
     map_key = get_aws_connection_key(service, service_creation_kwargs)
 
+    if map_key in service_conn_map:
+        return service_conn_map[map_key]
+
     service_conn_map[map_key] = create_aws_connection(service, service_creation_kwargs)
     return service_conn_map[map_key]
 
 
+def get_aws_client_key(service, service_creation_kwargs):
+    """
+    returns a tuple for the `service` and all the `service_creation_kwargs`
+    including credentials, a `config` is compared by its option values
+    """
+    config = service_creation_kwargs.get("config")
+    config_key = None
+    if config is not None:
+        config_key = tuple(
+            sorted(
+                (name, repr(value))
+                for name, value in getattr(config, "_user_provided_options", {}).items()
+            )
+        )
+    return (service, config_key) + tuple(
+        sorted(
+            (name, value)
+            for name, value in service_creation_kwargs.items()
+            if name != "config"
+        )
+    )
+
+
+class AWSClientRegistry:
+    """
+    thread safe cache of AWS clients shared by all the code in the process
+    which gets clients using the same service, region, credentials and config
+    """
+
+    def __init__(self, max_size=AWS_CLIENTS_MAX_SIZE):
+        self.max_size = max_size
+        self.clients = OrderedDict()
+        self.lock = threading.Lock()
+        self.created_count = 0
+        self.reused_count = 0
+
+    def get_client(self, service, service_creation_kwargs, max_pool_connections=None):
+        "return a cached client or create one"
+        assert isinstance(service, str), "`service` must be a string"
+        assert isinstance(
+            service_creation_kwargs, dict
+        ), "`service_creation_kwargs` must be a dictionary"
+        if max_pool_connections:
+            service_creation_kwargs = dict(service_creation_kwargs)
+            pool_config = Config(max_pool_connections=int(max_pool_connections))
+            config = service_creation_kwargs.get("config")
+            # options set in the config take precedence
+            service_creation_kwargs["config"] = (
+                pool_config.merge(config) if config else pool_config
+            )
+        key = get_aws_client_key(service, service_creation_kwargs)
+        # creating clients from the default boto3 session is not thread safe,
+        # so clients are created while holding the lock
+        with self.lock:
+            if key in self.clients:
+                self.clients.move_to_end(key)
+                self.reused_count += 1
+                return self.clients[key]
+            client = create_aws_connection(service, service_creation_kwargs)
+            self.clients[key] = client
+            self.created_count += 1
+            while len(self.clients) > self.max_size:
+                self.clients.popitem(last=False)
+            return client
+
+    def counters(self):
+        "count of clients created and of cached clients returned"
+        with self.lock:
+            return {"created": self.created_count, "reused": self.reused_count}
+
+    def clear(self):
+        with self.lock:
+            self.clients = OrderedDict()
+
+
+# AWS clients shared by the settings returned from get_settings()
+AWS_CLIENTS = AWSClientRegistry()
+
+
 def get_settings(env):
     """for runtime importing of settings module"""
     import settings as settings_lib
 
     settings_inst = settings_lib.get_settings(env)
 
-    settings_inst._aws_conn_map = {}
-    settings_inst.aws_conn = partial(get_aws_connection, settings_inst._aws_conn_map)
+    settings_inst.aws_conn = partial(
+        AWS_CLIENTS.get_client,
+        max_pool_connections=getattr(settings_inst, "aws_max_pool_connections", None),
+    )
 
     return settings_inst
 
@@ -386,6 +474,14 @@ def set_envvar(key, val):
 REQUESTS_TIMEOUT = (10, 60)
 
 
+def backoff_seconds(attempt, base_seconds, max_seconds):
+    """
+    seconds to sleep before retrying after the attempt number, starting at 0,
+    exponential backoff with full jitter so clients do not retry in step
+    """
+    return random.uniform(0, min(max_seconds, base_seconds * 2**attempt))
+
+
 def download_file(from_path, to_file, user_agent=None):
     "download file to disk using requests.get"
     headers = None
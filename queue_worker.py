@@ -1,9 +1,8 @@
-import time
 import json
 import os
 import re
 import yaml
-from provider import process, utils
+from provider import process, sqs_provider, utils
 import log
 from S3utility.s3_notification_info import S3NotificationInfo
 from S3utility.s3_sqs_message import S3SQSMessage
@@ -37,14 +36,7 @@ class QueueWorker:
     def connect(self):
         "connect to the queue service"
         if not self.client:
-            self.client = self.settings.aws_conn(
-                "sqs",
-                {
-                    "aws_access_key_id": self.settings.aws_access_key_id,
-                    "aws_secret_access_key": self.settings.aws_secret_access_key,
-                    "region_name": self.settings.sqs_region,
-                },
-            )
+            self.client = sqs_provider.get_client(self.settings)
 
     def queues(self):
         "get the queues"
@@ -65,71 +57,63 @@ class QueueWorker:
         # Simple connect to the queues
         input_queue_url, output_queue_url = self.queues()
 
-        rules = load_rules()
+        router = RuleRouter()
 
         # Poll for messages indefinitely
         if input_queue_url:
-            while flag.green():
-                self.logger.info("reading message")
-                queue_messages = self.client.receive_message(
-                    QueueUrl=input_queue_url,
-                    MaxNumberOfMessages=1,
-                    VisibilityTimeout=30,
-                )
-                # TODO : check for more-than-once delivery
-                # ( Dynamo conditional write? http://tinyurl.com/of3tmop )
-                if not queue_messages.get("Messages"):
-                    self.logger.info("no messages available")
-                else:
-                    for queue_message in queue_messages.get("Messages"):
-                        self.logger.info(
-                            "got message id: %s" % queue_message.get("MessageId")
-                        )
-                        s3_message = S3SQSMessage(queue_message.get("Body"))
-                        if s3_message.notification_type == "S3Event":
-                            info = S3NotificationInfo.from_S3SQSMessage(s3_message)
-                            self.logger.info("S3NotificationInfo: %s", info.to_dict())
-
-                            workflow_name = get_starter_name(rules, info)
-                            if workflow_name is None:
-                                self.logger.error(
-                                    "Could not handle file %s in bucket %s"
-                                    % (info.file_name, info.bucket_name)
-                                )
-                            else:
-                                # build message
-                                message = {
-                                    "workflow_name": workflow_name,
-                                    "workflow_data": info.to_dict(),
-                                }
-
-                                # send workflow initiation message
-                                self.client.send_message(
-                                    QueueUrl=output_queue_url,
-                                    MessageBody=json.dumps(message),
-                                )
-
-                            # cancel incoming message
-                            self.logger.info("cancelling message")
-                            self.client.delete_message(
-                                QueueUrl=input_queue_url,
-                                ReceiptHandle=queue_message.get("ReceiptHandle"),
-                            )
-                            self.logger.info("message cancelled")
-                        else:
-                            # TODO : log
-                            pass
-                time.sleep(self.sleep_seconds)
+            consumer = sqs_provider.QueueConsumer(
+                self.client,
+                self.logger,
+                input_queue_url,
+                output_queue_url,
+                visibility_timeout=30,
+                max_idle_sleep_seconds=self.sleep_seconds,
+            )
+            consumer.consume(
+                flag, lambda queue_message: self.process_message(router, queue_message)
+            )
 
             self.logger.info("graceful shutdown")
 
         else:
             self.logger.error("error obtaining queue")
 
+    def process_message(self, router, queue_message):
+        "return the workflow starter message bodies to send for a queue message"
+        # TODO : check for more-than-once delivery
+        # ( Dynamo conditional write? http://tinyurl.com/of3tmop )
+        self.logger.info("got message id: %s" % queue_message.get("MessageId"))
+        s3_message = S3SQSMessage(queue_message.get("Body"))
+        if s3_message.notification_type != "S3Event":
+            # TODO : log
+            return None
+        info = S3NotificationInfo.from_S3SQSMessage(s3_message)
+        self.logger.info("S3NotificationInfo: %s", info.to_dict())
+
+        workflow_name = router.route(info)
+        if workflow_name is None:
+            self.logger.error(
+                "Could not handle file %s in bucket %s"
+                % (info.file_name, info.bucket_name)
+            )
+            return []
+        # build workflow initiation message
+        message = {
+            "workflow_name": workflow_name,
+            "workflow_data": info.to_dict(),
+        }
+        return [json.dumps(message)]
+
+
+RULES_FILE = "newFileWorkflows.yaml"
 
-def load_rules():
+# most bucket names RuleRouter remembers the matching rule groups for
+BUCKET_GROUPS_MAX_SIZE = 1000
+
+
+def load_rules(rules_file=RULES_FILE):
     # load the rules from the YAML file
-    with open("newFileWorkflows.yaml", "r") as open_file:
+    with open(rules_file, "r") as open_file:
         return yaml.load(open_file.read(), Loader=yaml.FullLoader)
 
 
@@ -142,6 +126,83 @@ def get_starter_name(rules, info):
             return rule["starter_name"]
 
 
+class RuleRouter:
+    """
+    Match S3 notifications to the starter name of the first matching rule,
+    like get_starter_name, using regular expressions compiled once and rules
+    grouped by bucket name pattern. The rules file is loaded again when its
+    modification time changes.
+    """
+
+    def __init__(self, rules_file=RULES_FILE, rules=None):
+        self.rules_file = rules_file
+        self.mtime = None
+        # list of (bucket name regex, list of (rule order, file name regex,
+        # starter name)) grouped by bucket name pattern
+        self.groups = []
+        # indexes of the groups matching each bucket name seen
+        self.bucket_groups = {}
+        if rules is not None:
+            self.rules_file = None
+            self.compile(rules)
+
+    def compile(self, rules):
+        "compile the rules into groups by bucket name pattern"
+        groups = {}
+        for order, rule in enumerate(rules.values()):
+            bucket_name_pattern = rule["bucket_name_pattern"]
+            if bucket_name_pattern not in groups:
+                groups[bucket_name_pattern] = (re.compile(bucket_name_pattern), [])
+            groups[bucket_name_pattern][1].append(
+                (order, re.compile(rule["file_name_pattern"]), rule["starter_name"])
+            )
+        self.groups = list(groups.values())
+        self.bucket_groups = {}
+
+    def reload(self):
+        "load the rules file if it has changed since it was last loaded"
+        if not self.rules_file:
+            return
+        mtime = os.stat(self.rules_file).st_mtime
+        if mtime != self.mtime:
+            self.compile(load_rules(self.rules_file))
+            self.mtime = mtime
+
+    def matching_groups(self, bucket_name):
+        "groups whose bucket name pattern matches the bucket name"
+        if bucket_name not in self.bucket_groups:
+            if len(self.bucket_groups) >= BUCKET_GROUPS_MAX_SIZE:
+                self.bucket_groups = {}
+            self.bucket_groups[bucket_name] = [
+                group for group in self.groups if group[0].match(bucket_name)
+            ]
+        return self.bucket_groups[bucket_name]
+
+    def match(self, info):
+        "starter name of the first rule matching the info"
+        match_order = None
+        starter_name = None
+        for _, file_rules in self.matching_groups(info.bucket_name):
+            for order, file_name_regex, rule_starter_name in file_rules:
+                if match_order is not None and order > match_order:
+                    break
+                if file_name_regex.match(info.file_name):
+                    match_order = order
+                    starter_name = rule_starter_name
+                    break
+        return starter_name
+
+    def route(self, info):
+        "starter name for the S3 notification info, or None"
+        self.reload()
+        return self.match(info)
+
+    def route_many(self, infos):
+        "list of starter names, or None, for a list of S3 notification infos"
+        self.reload()
+        return [self.match(info) for info in infos]
+
+
 if __name__ == "__main__":
     ENV = utils.console_start_env()
     SETTINGS = utils.get_settings(ENV)
@@ -7,7 +7,7 @@ import json
 import importlib
 import log
 from S3utility.s3_notification_info import S3NotificationInfo
-from provider import process, utils
+from provider import process, sqs_provider, utils
 from provider.utils import bytes_decode
 
 # this is not an unused import, it is used dynamically
@@ -34,35 +34,25 @@ def main(settings, flag):
     # get the queue url
     queue_url_response = client.get_queue_url(QueueName=settings.workflow_starter_queue)
     queue_url = queue_url_response.get("QueueUrl")
-    while flag.green():
-        messages = client.receive_message(
-            QueueUrl=queue_url,
-            MaxNumberOfMessages=1,
-            VisibilityTimeout=60,
-            WaitTimeSeconds=20,
-        )
-        if messages.get("Messages"):
-            logger.info(str(len(messages.get("Messages"))) + " message received")
-            message = messages.get("Messages")[0]
-            logger.info("message contents: %s", message.get("Body"))
-            process_message(settings, logger, message)
-            client.delete_message(
-                QueueUrl=queue_url,
-                ReceiptHandle=message.get("ReceiptHandle"),
-            )
-        else:
-            logger.debug("No messages received")
+    consumer = sqs_provider.QueueConsumer(
+        client, logger, queue_url, visibility_timeout=60
+    )
+
+    def start_message_workflow(message):
+        logger.info("message contents: %s", message.get("Body"))
+        process_message(settings, logger, message)
+        # nothing to send, delete the message
+        return []
+
+    consumer.consume(flag, start_message_workflow)
 
     logger.info("graceful shutdown")
 
 
 def connect(settings):
     "connect to the queue service"
-    return settings.aws_conn('sqs', {
-        'aws_access_key_id': settings.aws_access_key_id,
-        'aws_secret_access_key': settings.aws_secret_access_key,
-        'region_name': settings.sqs_region,
-    })
+    return sqs_provider.get_client(settings)
+
 
 def process_message(settings, logger, message):
     message_payload = {}
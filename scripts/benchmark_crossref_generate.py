@@ -0,0 +1,84 @@
+# benchmark parsing the Crossref outbox test fixture XML files and generating
+# Crossref deposit XML from them, in the activity process and in process pools
+# run from the elife-bot root directory:
+#   PYTHONPATH=. python scripts/benchmark_crossref_generate.py 10
+import contextlib
+import glob
+import os
+import shutil
+import sys
+import tempfile
+import time
+from provider import crossref
+from tests import settings_mock
+
+FIXTURE_PATTERN = "tests/test_data/crossref*/outbox/*.xml"
+COPIES = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+MAX_WORKERS = [1, 2, 4]
+
+
+def copy_fixtures(to_dir, copies):
+    "copies of the fixture XML files with a different name for each copy"
+    xml_files = []
+    for copy_index in range(copies):
+        for fixture in sorted(glob.glob(FIXTURE_PATTERN)):
+            xml_file = os.path.join(
+                to_dir,
+                "%s-%s-%s"
+                % (
+                    copy_index,
+                    os.path.basename(os.path.dirname(os.path.dirname(fixture))),
+                    os.path.basename(fixture),
+                ),
+            )
+            shutil.copy(fixture, xml_file)
+            xml_files.append(xml_file)
+    return xml_files
+
+
+def parse_and_generate(xml_files, tmp_dir, crossref_config, max_workers):
+    "parse the XML files and write a deposit file for each, return good and bad files"
+    good_xml_files = []
+    bad_xml_files = []
+    crossref.override_tmp_dir(tmp_dir)
+    article_object_map = crossref.article_xml_list_parse(
+        xml_files, bad_xml_files, tmp_dir, max_workers=max_workers
+    )
+    crossref.generate_crossref_xml_to_disk(
+        article_object_map,
+        crossref_config,
+        good_xml_files,
+        bad_xml_files,
+        max_workers=max_workers,
+    )
+    return good_xml_files, bad_xml_files
+
+
+CROSSREF_CONFIG = crossref.elifecrossref_config(settings_mock)
+with tempfile.TemporaryDirectory() as input_dir:
+    XML_FILES = copy_fixtures(input_dir, COPIES)
+    expected = None
+    for max_workers in MAX_WORKERS:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # the XML parser prints the name of each file it parses
+            with open(os.devnull, "w") as devnull:
+                with contextlib.redirect_stdout(devnull):
+                    start = time.perf_counter()
+                    result = parse_and_generate(
+                        XML_FILES, tmp_dir, CROSSREF_CONFIG, max_workers
+                    )
+                    seconds = time.perf_counter() - start
+        if expected is None:
+            expected = result
+        assert result == expected
+        print(
+            "%s max_workers, %s articles (%s good, %s bad): %.2f s, %.1f articles/s"
+            % (
+                max_workers,
+                len(XML_FILES),
+                len(result[0]),
+                len(result[1]),
+                seconds,
+                len(XML_FILES) / seconds,
+            )
+        )
@@ -0,0 +1,80 @@
+# benchmark routing S3 notifications to workflow starters with the rules
+# in newFileWorkflows.yaml plus synthetic rules
+# run from the elife-bot root directory:
+#   PYTHONPATH=. python scripts/benchmark_rule_routing.py
+import random
+import time
+from S3utility.s3_notification_info import S3NotificationInfo
+from queue_worker import RuleRouter, get_starter_name, load_rules
+
+KEY_COUNT = 5000
+SYNTHETIC_RULE_COUNTS = [0, 50, 200]
+REPEAT = 3
+
+
+def synthetic_rules(rules, rule_count):
+    "rules from the rules file followed by rules for other buckets and files"
+    all_rules = dict(rules)
+    for index in range(rule_count):
+        all_rules["Synthetic%s" % index] = {
+            "bucket_name_pattern": ".*elife-synthetic-%s$" % (index % 20),
+            "file_name_pattern": r"folder-%s/.*\.(xml|zip)" % index,
+            "starter_name": "Synthetic%s" % index,
+        }
+    return all_rules
+
+
+def synthetic_infos(rules, key_count):
+    "S3 notifications for keys in buckets matching and not matching the rules"
+    bucket_names = [
+        "prod-elife-production-final",
+        "prod-elife-silent-corrections",
+        "prod-elife-bot-digests-input",
+        "prod-elife-epp-meca",
+        "prod-elife-synthetic-3",
+        "prod-elife-unknown",
+    ]
+    file_names = [
+        "elife-%05d-vor-r1.zip",
+        "DIGEST %05d.docx",
+        "silent-corrections/%05d-v1-meca.zip",
+        "folder-3/%05d.xml",
+        "%05d.txt",
+    ]
+    infos = []
+    for index in range(key_count):
+        infos.append(
+            S3NotificationInfo(
+                "ObjectCreated:Put",
+                "2024-01-01T00:00:00.000Z",
+                random.choice(bucket_names),
+                random.choice(file_names) % index,
+                "",
+                0,
+            )
+        )
+    return infos
+
+
+random.seed(1)
+RULES = load_rules()
+for rule_count in SYNTHETIC_RULE_COUNTS:
+    rules = synthetic_rules(RULES, rule_count)
+    infos = synthetic_infos(rules, KEY_COUNT)
+
+    start = time.process_time()
+    for _ in range(REPEAT):
+        expected = [get_starter_name(rules, info) for info in infos]
+    rules_time = (time.process_time() - start) / REPEAT
+
+    router = RuleRouter(rules=rules)
+    start = time.process_time()
+    for _ in range(REPEAT):
+        routed = router.route_many(infos)
+    router_time = (time.process_time() - start) / REPEAT
+
+    assert routed == expected
+    print(
+        "%s rules, %s keys: get_starter_name %.2f ms, RuleRouter %.2f ms"
+        % (len(rules), KEY_COUNT, rules_time * 1000, router_time * 1000)
+    )
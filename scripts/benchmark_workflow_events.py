@@ -0,0 +1,109 @@
+# benchmark the decider CPU time per decision over synthetic event histories
+# run from the elife-bot root directory:
+#   PYTHONPATH=. python scripts/benchmark_workflow_events.py
+import time
+from workflow.objects import Workflow
+from workflow.helper import define_workflow_step
+
+STEP_COUNT = 25
+EVENT_COUNTS = [1000, 2500, 5000, 10000]
+REPEAT = 5
+
+
+def workflow_definition(step_count):
+    "a definition similar to a long workflow like IngestMeca"
+    return {
+        "name": "Benchmark",
+        "task_list": "DefaultTaskList",
+        "steps": [
+            define_workflow_step("Step%s" % index, None) for index in range(step_count)
+        ],
+    }
+
+
+def synthetic_events(event_count, step_count):
+    """
+    history where each step fails and is retried until the event count is
+    reached, then all but the last step are completed
+    """
+    events = [
+        {
+            "eventId": 1,
+            "eventType": "WorkflowExecutionStarted",
+            "workflowExecutionStartedEventAttributes": {"input": "{}"},
+        }
+    ]
+    step = 0
+    while len(events) < event_count - 3 * step_count:
+        event_id = len(events) + 1
+        events.append(
+            {
+                "eventId": event_id,
+                "eventType": "ActivityTaskScheduled",
+                "activityTaskScheduledEventAttributes": {
+                    "activityType": {"name": "Step%s" % step, "version": "1"},
+                    "activityId": "Step%s" % step,
+                },
+            }
+        )
+        events.append(
+            {
+                "eventId": event_id + 1,
+                "eventType": "ActivityTaskStarted",
+                "activityTaskStartedEventAttributes": {"scheduledEventId": event_id},
+            }
+        )
+        events.append(
+            {
+                "eventId": event_id + 2,
+                "eventType": "ActivityTaskFailed",
+                "activityTaskFailedEventAttributes": {"scheduledEventId": event_id},
+            }
+        )
+        step = (step + 1) % step_count
+    for step in range(step_count - 1):
+        event_id = len(events) + 1
+        events.append(
+            {
+                "eventId": event_id,
+                "eventType": "ActivityTaskScheduled",
+                "activityTaskScheduledEventAttributes": {
+                    "activityType": {"name": "Step%s" % step, "version": "1"},
+                    "activityId": "Step%s" % step,
+                },
+            }
+        )
+        events.append(
+            {
+                "eventId": event_id + 1,
+                "eventType": "ActivityTaskCompleted",
+                "activityTaskCompletedEventAttributes": {"scheduledEventId": event_id},
+            }
+        )
+    return events
+
+
+def decide(definition, decision):
+    "the step status queries made by do_workflow for one decision task"
+    workflow_object = Workflow(None, None, decision=decision, definition=definition)
+    workflow_object.is_workflow_complete()
+    workflow_object.last_activity_status(decision)
+    return workflow_object.get_next_activities()
+
+
+for event_count in EVENT_COUNTS:
+    definition = workflow_definition(STEP_COUNT)
+    decision = {"events": synthetic_events(event_count, STEP_COUNT)}
+    start = time.process_time()
+    for _ in range(REPEAT):
+        next_activities = decide(definition, decision)
+    cpu_time = (time.process_time() - start) / REPEAT
+    print(
+        "%s events, %s steps: %.2f ms CPU per decision, next activity %s"
+        % (
+            len(decision["events"]),
+            STEP_COUNT,
+            cpu_time * 1000,
+            next_activities[0]["activity_id"],
+        )
+    )
@@ -0,0 +1,62 @@
+# local stand-in for the Mathpix API for testing OCR activities without
+# sending images to Mathpix, responds to every POST with the same OCR data
+# after an optional delay to simulate the API response time
+# run from the elife-bot root directory:
+#   python scripts/mathpix_stub.py 8090 0.5
+# then set mathpix_endpoint = "http://localhost:8090/v3/text" in settings.py
+import json
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PORT = int(sys.argv[1]) if len(sys.argv) > 1 else 8090
+DELAY_SECONDS = float(sys.argv[2]) if len(sys.argv) > 2 else 0
+
+RESPONSE_JSON = {
+    "request_id": "stub",
+    "is_printed": True,
+    "is_handwritten": False,
+    "confidence": 1,
+    "confidence_rate": 1,
+    "text": "$x^{2}$",
+    "latex_styled": "x^{2}",
+    "html": '<div><span class="math-inline"><mathml>x^{2}</mathml></span></div>',
+    "data": [
+        {
+            "type": "mathml",
+            "value": (
+                '<math xmlns="http://www.w3.org/1998/Math/MathML">'
+                "<msup><mi>x</mi><mn>2</mn></msup></math>"
+            ),
+        },
+        {"type": "latex", "value": "x^{2}"},
+        {"type": "tsv", "value": "x\ty\n1\t2"},
+        {
+            "type": "table_html",
+            "value": (
+                "<table><tr><td>x</td><td>y</td></tr>"
+                "<tr><td>1</td><td>2</td></tr></table>"
+            ),
+        },
+    ],
+}
+
+
+class MathpixStubHandler(BaseHTTPRequestHandler):
+    "respond to a POST with the example OCR data"
+
+    def do_POST(self):
+        # read the request body so the client can finish sending
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if DELAY_SECONDS:
+            time.sleep(DELAY_SECONDS)
+        body = json.dumps(RESPONSE_JSON).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+print("Mathpix stub listening on http://localhost:%s/v3/text" % PORT)
+ThreadingHTTPServer(("localhost", PORT), MathpixStubHandler).serve_forever()
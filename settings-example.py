@@ -32,6 +32,19 @@ class exp:
 
     # PPP S3 settings
     storage_provider = "s3"
+    # S3 transfer tuning, unset values use the boto3 defaults
+    s3_multipart_threshold = None
+    s3_multipart_chunksize = None
+    s3_max_concurrency = None
+    s3_bulk_max_workers = 10
+    # expand zip files by reading them from S3 with ranged requests instead of downloading
+    expand_zip_ranged_read = False
+    # folder to cache downloaded S3 objects by ETag, shared by workers on the host
+    s3_file_cache_dir = None
+    s3_file_cache_max_bytes = 1024 * 1024 * 1024
+    # optional local disk cache of downloaded peer review images
+    peer_review_image_cache_dir = None
+    peer_review_image_cache_max_bytes = 1024 * 1024 * 1024
     publishing_buckets_prefix = "exp-"
     # shouldn't need this but uploads seem to fail without. Should correspond with the s3 region
     # hostname list here http://docs.aws.amazon.com/general/latest/gr/rande.html#s3_region
@@ -53,6 +66,14 @@ class exp:
     lax_article_related = "http://gateway.internal/articles/{article_id}/related"
     verify_ssl = True  # False when testing
     lax_auth_key = ""
+    # seconds a successful Lax response is reused during an activity, 0 to disable
+    lax_cache_ttl_seconds = 0
+    lax_cache_max_size = 100
+    # retries, circuit breaker and gzip request bodies of XSLT and validation endpoints
+    endpoint_max_retries = 3
+    endpoint_failure_threshold = 5
+    endpoint_reset_seconds = 60
+    endpoint_gzip_requests = False
 
     no_download_extensions = "tif"
 
@@ -62,6 +83,14 @@ class exp:
     swf_region = "us-east-1"
     domain = "Publish.dev"
     default_task_list = "DefaultTaskList"
+    # number of activity tasks a worker process runs at the same time
+    worker_slots = 1
+    # worker slot pool type, thread or process
+    worker_pool = "thread"
+    # connections per AWS client, clients are shared by the worker slot threads
+    aws_max_pool_connections = 10
+    # events of workflow histories the decider caches between decision tasks, 0 to disable
+    decider_history_cache_events = 0
 
     # SES settings
     # email needs to be verified by AWS
@@ -151,6 +180,9 @@ class exp:
 
     # EJP S3 settings
     ejp_bucket = "elife-ejp-ftp-dev"
+    # optional folder of parsed EJP author CSV files shared by workers on the host
+    ejp_author_index_dir = None
+    ejp_author_index_max_bytes = 256 * 1024 * 1024
 
     # Templates settings
     email_templates_path = "/opt/elife-email-templates"
@@ -165,6 +197,11 @@ class exp:
     crossref_url = "http://test.crossref.org/servlet/deposit"
     crossref_login_id = ""
     crossref_login_passwd = ""
+    # Crossref files deposited at a time, and times to retry a failed deposit
+    crossref_deposit_max_workers = 4
+    crossref_deposit_max_retries = 3
+    # processes to parse and generate Crossref deposit XML in, 1 for none
+    crossref_generate_max_workers = 1
 
     # PubMed generation
     elifepubmed_config_file = "pubmed.cfg"
@@ -300,6 +337,9 @@ class exp:
     # IIIF
     path_to_iiif_server = "https://pathto--iiif.elifesciences.org/"
     iiif_resolver = "{article_id}/{article_fig}/full/full/0/default.jpg"
+    # figure endpoints checked at the same time, and seconds allowed per article
+    iiif_verify_max_workers = 10
+    iiif_verify_deadline_seconds = 240
 
     # Fastly CDNs
     fastly_service_ids = ["3M35rb7puabccOLrFFxy2"]
@@ -309,6 +349,9 @@ class exp:
 
     # BigQuery settings
     big_query_project_id = ""
+    # seconds query results are kept in memory, and the most results kept
+    bigquery_cache_seconds = 600
+    bigquery_cache_max_entries = 1000
 
     # DOAJ deposit settings
     journal_eissn = ""
@@ -352,6 +395,11 @@ class exp:
     )
     docmap_account_id = "https://sciety.org/groups/elife"
     docmap_index_url = "https://example.org/path/index"
+    # folder to cache docmap responses, shared by workers on the host
+    docmap_cache_dir = None
+    docmap_cache_max_bytes = 512 * 1024 * 1024
+    # seconds a cached article docmap is used without asking the endpoint
+    docmap_cache_max_age_seconds = 300
 
     assessment_terms_yaml = "assessment_terms.yaml"
 
@@ -359,6 +407,12 @@ class exp:
     mathpix_endpoint = ""
     mathpix_app_id = "elife-bot"
     mathpix_app_key = ""
+    # files posted to Mathpix at the same time, and most requests per second
+    mathpix_max_workers = 4
+    mathpix_requests_per_second = None
+    # optional local disk cache of Mathpix responses by image content
+    mathpix_cache_dir = None
+    mathpix_cache_max_bytes = 256 * 1024 * 1024
 
     # EPP settings
     epp_data_bucket = "epp_bucket"
@@ -413,6 +467,19 @@ class dev:
 
     # PPP S3 settings
     storage_provider = "s3"
+    # S3 transfer tuning, unset values use the boto3 defaults
+    s3_multipart_threshold = None
+    s3_multipart_chunksize = None
+    s3_max_concurrency = None
+    s3_bulk_max_workers = 10
+    # expand zip files by reading them from S3 with ranged requests instead of downloading
+    expand_zip_ranged_read = False
+    # folder to cache downloaded S3 objects by ETag, shared by workers on the host
+    s3_file_cache_dir = None
+    s3_file_cache_max_bytes = 1024 * 1024 * 1024
+    # optional local disk cache of downloaded peer review images
+    peer_review_image_cache_dir = None
+    peer_review_image_cache_max_bytes = 1024 * 1024 * 1024
     publishing_buckets_prefix = "dev-"
     # shouldn't need this but uploads seem to fail without. Should correspond with the s3 region
     # hostname list here http://docs.aws.amazon.com/general/latest/gr/rande.html#s3_region
@@ -434,6 +501,14 @@ class dev:
     lax_article_related = "http://gateway.internal/articles/{article_id}/related"
     verify_ssl = True  # False when testing
     lax_auth_key = ""
+    # seconds a successful Lax response is reused during an activity, 0 to disable
+    lax_cache_ttl_seconds = 0
+    lax_cache_max_size = 100
+    # retries, circuit breaker and gzip request bodies of XSLT and validation endpoints
+    endpoint_max_retries = 3
+    endpoint_failure_threshold = 5
+    endpoint_reset_seconds = 60
+    endpoint_gzip_requests = False
 
     no_download_extensions = "tif"
 
@@ -443,6 +518,14 @@ class dev:
     swf_region = "us-east-1"
     domain = "Publish.dev"
     default_task_list = "DefaultTaskList"
+    # number of activity tasks a worker process runs at the same time
+    worker_slots = 1
+    # worker slot pool type, thread or process
+    worker_pool = "thread"
+    # connections per AWS client, clients are shared by the worker slot threads
+    aws_max_pool_connections = 10
+    # events of workflow histories the decider caches between decision tasks, 0 to disable
+    decider_history_cache_events = 0
 
     # SES settings
     # email needs to be verified by AWS
@@ -532,6 +615,9 @@ class dev:
 
     # EJP S3 settings
     ejp_bucket = "elife-ejp-ftp-dev"
+    # optional folder of parsed EJP author CSV files shared by workers on the host
+    ejp_author_index_dir = None
+    ejp_author_index_max_bytes = 256 * 1024 * 1024
 
     # Templates settings
     email_templates_path = "/opt/elife-email-templates"
@@ -546,6 +632,11 @@ class dev:
     crossref_url = "http://test.crossref.org/servlet/deposit"
     crossref_login_id = ""
     crossref_login_passwd = ""
+    # Crossref files deposited at a time, and times to retry a failed deposit
+    crossref_deposit_max_workers = 4
+    crossref_deposit_max_retries = 3
+    # processes to parse and generate Crossref deposit XML in, 1 for none
+    crossref_generate_max_workers = 1
 
     # PubMed generation
     elifepubmed_config_file = "pubmed.cfg"
@@ -677,6 +768,9 @@ class dev:
     # IIIF
     path_to_iiif_server = "https://pathto--iiif.elifesciences.org/"
     iiif_resolver = "{article_id}/{article_fig}/full/full/0/default.jpg"
+    # figure endpoints checked at the same time, and seconds allowed per article
+    iiif_verify_max_workers = 10
+    iiif_verify_deadline_seconds = 240
 
     # Fastly CDNs
     fastly_service_ids = ["3M35rb7puabccOLrFFxy2"]
@@ -686,6 +780,9 @@ class dev:
 
     # BigQuery settings
     big_query_project_id = ""
+    # seconds query results are kept in memory, and the most results kept
+    bigquery_cache_seconds = 600
+    bigquery_cache_max_entries = 1000
 
     # DOAJ deposit settings
     journal_eissn = ""
@@ -729,6 +826,11 @@ class dev:
     )
     docmap_account_id = "https://sciety.org/groups/elife"
     docmap_index_url = "https://example.org/path/index"
+    # folder to cache docmap responses, shared by workers on the host
+    docmap_cache_dir = None
+    docmap_cache_max_bytes = 512 * 1024 * 1024
+    # seconds a cached article docmap is used without asking the endpoint
+    docmap_cache_max_age_seconds = 300
 
     assessment_terms_yaml = "assessment_terms.yaml"
 
@@ -736,6 +838,12 @@ class dev:
     mathpix_endpoint = ""
     mathpix_app_id = "elife-bot"
     mathpix_app_key = ""
+    # files posted to Mathpix at the same time, and most requests per second
+    mathpix_max_workers = 4
+    mathpix_requests_per_second = None
+    # optional local disk cache of Mathpix responses by image content
+    mathpix_cache_dir = None
+    mathpix_cache_max_bytes = 256 * 1024 * 1024
 
     # EPP settings
     epp_data_bucket = "epp_bucket"
@@ -790,6 +898,19 @@ class live:
 
     # PPP S3 settings
     storage_provider = "s3"
+    # S3 transfer tuning, unset values use the boto3 defaults
+    s3_multipart_threshold = None
+    s3_multipart_chunksize = None
+    s3_max_concurrency = None
+    s3_bulk_max_workers = 10
+    # expand zip files by reading them from S3 with ranged requests instead of downloading
+    expand_zip_ranged_read = False
+    # folder to cache downloaded S3 objects by ETag, shared by workers on the host
+    s3_file_cache_dir = None
+    s3_file_cache_max_bytes = 1024 * 1024 * 1024
+    # optional local disk cache of downloaded peer review images
+    peer_review_image_cache_dir = None
+    peer_review_image_cache_max_bytes = 1024 * 1024 * 1024
     publishing_buckets_prefix = ""
     # shouldn't need this but uploads seem to fail without. Should correspond with the s3 region
     # hostname list here http://docs.aws.amazon.com/general/latest/gr/rande.html#s3_region
@@ -812,6 +933,14 @@ class live:
     lax_article_related = "http://gateway.internal/articles/{article_id}/related"
     verify_ssl = True  # False when testing
     lax_auth_key = ""
+    # seconds a successful Lax response is reused during an activity, 0 to disable
+    lax_cache_ttl_seconds = 0
+    lax_cache_max_size = 100
+    # retries, circuit breaker and gzip request bodies of XSLT and validation endpoints
+    endpoint_max_retries = 3
+    endpoint_failure_threshold = 5
+    endpoint_reset_seconds = 60
+    endpoint_gzip_requests = False
 
     no_download_extensions = "tif"
 
@@ -821,6 +950,14 @@ class live:
     swf_region = "us-east-1"
     domain = "Publish"
     default_task_list = "DefaultTaskList"
+    # number of activity tasks a worker process runs at the same time
+    worker_slots = 1
+    # worker slot pool type, thread or process
+    worker_pool = "thread"
+    # connections per AWS client, clients are shared by the worker slot threads
+    aws_max_pool_connections = 10
+    # events of workflow histories the decider caches between decision tasks, 0 to disable
+    decider_history_cache_events = 0
 
     # SES settings
     # email needs to be verified by AWS
@@ -910,6 +1047,9 @@ class live:
 
     # EJP S3 settings
     ejp_bucket = "elife-ejp-ftp"
+    # optional folder of parsed EJP author CSV files shared by workers on the host
+    ejp_author_index_dir = None
+    ejp_author_index_max_bytes = 256 * 1024 * 1024
 
     # Templates settings
     email_templates_path = "/opt/elife-email-templates"
@@ -924,6 +1064,11 @@ class live:
     crossref_url = "http://doi.crossref.org/servlet/deposit"
     crossref_login_id = ""
     crossref_login_passwd = ""
+    # Crossref files deposited at a time, and times to retry a failed deposit
+    crossref_deposit_max_workers = 4
+    crossref_deposit_max_retries = 3
+    # processes to parse and generate Crossref deposit XML in, 1 for none
+    crossref_generate_max_workers = 1
 
     # PubMed generation
     elifepubmed_config_file = "pubmed.cfg"
@@ -1059,6 +1204,9 @@ class live:
     # IIIF
     path_to_iiif_server = "https://pathto--iiif.elifesciences.org/"
     iiif_resolver = "{article_id}/{article_fig}/full/full/0/default.jpg"
+    # figure endpoints checked at the same time, and seconds allowed per article
+    iiif_verify_max_workers = 10
+    iiif_verify_deadline_seconds = 240
 
     # Fastly CDNs
     fastly_service_ids = ["3M35rb7puabccOLrFFxy2"]
@@ -1068,6 +1216,9 @@ class live:
 
     # BigQuery settings
     big_query_project_id = ""
+    # seconds query results are kept in memory, and the most results kept
+    bigquery_cache_seconds = 600
+    bigquery_cache_max_entries = 1000
 
     # DOAJ deposit settings
     journal_eissn = ""
@@ -1111,6 +1262,11 @@ class live:
     )
     docmap_account_id = "https://sciety.org/groups/elife"
     docmap_index_url = "https://example.org/path/index"
+    # folder to cache docmap responses, shared by workers on the host
+    docmap_cache_dir = None
+    docmap_cache_max_bytes = 512 * 1024 * 1024
+    # seconds a cached article docmap is used without asking the endpoint
+    docmap_cache_max_age_seconds = 300
 
     assessment_terms_yaml = "assessment_terms.yaml"
 
@@ -1118,6 +1274,12 @@ class live:
     mathpix_endpoint = "https://api.mathpix.com.example.org/v3/text"
     mathpix_app_id = "elife-bot"
     mathpix_app_key = "key"
+    # files posted to Mathpix at the same time, and most requests per second
+    mathpix_max_workers = 4
+    mathpix_requests_per_second = None
+    # optional local disk cache of Mathpix responses by image content
+    mathpix_cache_dir = None
+    mathpix_cache_max_bytes = 256 * 1024 * 1024
 
     # EPP settings
     epp_data_bucket = "epp_bucket"
@@ -25,6 +25,12 @@ class FakeSession:
         except:
             return None
 
+    def store_values(self, values):
+        self.session_dict.update(values)
+
+    def get_values(self, keys):
+        return {key: self.get_value(key) for key in keys}
+
     @staticmethod
     def get_full_key(execution_id, key):
         return execution_id + "__" + key
@@ -70,6 +76,21 @@ class FakeSQSClient:
                 if q_message.get("ReceiptHandle") != kwargs.get("ReceiptHandle")
             ]
 
+    def send_message_batch(self, **kwargs):
+        for entry in kwargs.get("Entries"):
+            self.send_message(
+                QueueUrl=kwargs.get("QueueUrl"), MessageBody=entry.get("MessageBody")
+            )
+        return {"Successful": kwargs.get("Entries")}
+
+    def delete_message_batch(self, **kwargs):
+        for entry in kwargs.get("Entries"):
+            self.delete_message(
+                QueueUrl=kwargs.get("QueueUrl"),
+                ReceiptHandle=entry.get("ReceiptHandle"),
+            )
+        return {"Successful": kwargs.get("Entries")}
+
     def change_message_visibility(self, **kwargs):
         pass
 
@@ -178,6 +199,12 @@ class FakeStorageContext:
         # default used by verify glencoe tests
         return '<mock><media content-type="glencoe play-in-place height-250 width-310" id="media1" mime-subtype="wmv" mimetype="video" xlink:href="elife-00569-media1.wmv"></media></mock>'
 
+    def get_resource_as_string_and_etag(self, resource):
+        return (
+            self.get_resource_as_string(resource),
+            self.get_resource_attributes(resource).get("ETag"),
+        )
+
     def set_resource_from_filename(self, resource, file_name, metadata=None):
         "resource name can be different than the file name"
         bucket_name, s3_key = self.s3_storage_objects(resource)
@@ -202,7 +229,23 @@ class FakeStorageContext:
                 else:
                     open_file.write(bytes(data, encoding="utf8"))
 
-    def list_resources(self, resource, return_keys=False):
+    def set_resource_from_fileobj(self, resource, fileobj, metadata=None):
+        bucket_name, s3_key = self.s3_storage_objects(resource)
+        destination_path = os.path.join(self.dest_folder, s3_key.lstrip("/"))
+        # create folders if they do not exist
+        os.makedirs(os.path.dirname(destination_path), exist_ok=True)
+        with open(destination_path, "wb") as open_file:
+            open_file.write(fileobj.read())
+
+    def open_resource(self, resource):
+        bucket_name, s3_key = self.s3_storage_objects(resource)
+        return open(self.dir + s3_key, "rb")
+
+    def list_resources(
+        self, resource, return_keys=False, delimiter=None, start_after=None
+    ):
+        if start_after:
+            return [key for key in self.resources if key > start_after]
         return self.resources
 
     def copy_resource(self, origin, destination, additional_dict_metadata=None):
@@ -228,6 +271,91 @@ class FakeStorageContext:
                 if len(os.listdir(file_name)) <= 0:
                     os.rmdir(file_name)
 
+    def bulk_transfer(self, transfer, items, callback=None):
+        "transfer each item in turn, collecting the results"
+        results = []
+        for item in items:
+            result = {"item": item, "error": None}
+            try:
+                transfer(item)
+            except Exception as exception:
+                result["error"] = exception
+            if callback:
+                callback(result)
+            results.append(result)
+        return results
+
+    def get_resources_to_files(self, resource_files, callback=None):
+        def transfer(item):
+            resource, file_path = item
+            os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+            with open(file_path, "wb") as open_file:
+                self.get_resource_to_file(resource, open_file)
+
+        return [
+            {
+                "resource": result["item"][0],
+                "file": result["item"][1],
+                "error": result["error"],
+            }
+            for result in self.bulk_transfer(transfer, resource_files, callback)
+        ]
+
+    def get_resources_to_dir(self, resources, to_dir, callback=None):
+        return self.get_resources_to_files(
+            [
+                (resource, os.path.join(to_dir, resource.rsplit("/", 1)[-1]))
+                for resource in resources
+            ],
+            callback,
+        )
+
+    def set_resources_from_files(self, resource_files, callback=None):
+        return [
+            {
+                "resource": result["item"][0],
+                "file": result["item"][1],
+                "error": result["error"],
+            }
+            for result in self.bulk_transfer(
+                lambda item: self.set_resource_from_filename(*item),
+                resource_files,
+                callback,
+            )
+        ]
+
+    def set_resources_from_zip(self, open_zip_file, resource_members, callback=None):
+        def transfer(item):
+            with open_zip_file.open(item[1]) as open_member:
+                self.set_resource_from_fileobj(item[0], open_member, *item[2:])
+
+        return [
+            {
+                "resource": result["item"][0],
+                "member": result["item"][1],
+                "error": result["error"],
+            }
+            for result in self.bulk_transfer(transfer, resource_members, callback)
+        ]
+
+    def copy_resources(self, resource_pairs, callback=None):
+        return [
+            {
+                "orig_resource": result["item"][0],
+                "resource": result["item"][1],
+                "error": result["error"],
+            }
+            for result in self.bulk_transfer(
+                lambda item: self.copy_resource(*item), resource_pairs, callback
+            )
+        ]
+
+    def delete_resources(self, resources):
+        return [
+            {"resource": result["item"], "error": result["error"]}
+            for result in self.bulk_transfer(self.delete_resource, resources)
+        ]
+
 
 def fake_get_tmp_dir(path=None):
     tmp = "tests/tmp/"
@@ -262,6 +390,13 @@ class FakeResponse:
     def json(self):
         return self.response_json
 
+    def iter_content(self, chunk_size=1):
+        if self.content:
+            yield self.content
+
+    def close(self):
+        pass
+
 
 class FakeFileInfo:
     def __init__(self):
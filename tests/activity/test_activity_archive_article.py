@@ -102,14 +102,48 @@ class TestArchiveArticle(unittest.TestCase):
         self, fake_storage_context, fake_list_resources, fake_get_resource_to_file
     ):
         """test exception in download_files for test coverage"""
+        directory = TempDirectory()
         fake_storage_context.return_value = FakeStorageContext()
         fake_list_resources.return_value = ["fake_bucket_file.zip"]
         fake_get_resource_to_file.side_effect = Exception("Something went wrong!")
         success = self.activity.download_files(
-            "bucket_name", "expanded_folder", "zip_dir_path"
+            "bucket_name", "expanded_folder", directory.path
         )
         self.assertIsNone(success)
 
+    @patch.object(FakeStorageContext, "get_resource_to_file")
+    @patch.object(FakeStorageContext, "list_resources")
+    @patch.object(activity_module, "storage_context")
+    def test_download_files_subfolders(
+        self, fake_storage_context, fake_list_resources, fake_get_resource_to_file
+    ):
+        "test files with the same name in different subfolders are both downloaded"
+        directory = TempDirectory()
+        fake_storage_context.return_value = FakeStorageContext()
+        fake_list_resources.return_value = [
+            "expanded_folder/elife-00353-v1.xml",
+            "expanded_folder/figures/image.jpg",
+            "expanded_folder/supplements/image.jpg",
+        ]
+        fake_get_resource_to_file.side_effect = (
+            lambda resource, open_file: open_file.write(resource.encode("utf-8"))
+        )
+        success = self.activity.download_files(
+            "bucket_name", "expanded_folder", directory.path
+        )
+        self.assertTrue(success)
+        for file_path in [
+            "elife-00353-v1.xml",
+            os.path.join("figures", "image.jpg"),
+            os.path.join("supplements", "image.jpg"),
+        ]:
+            with open(os.path.join(directory.path, file_path), "rb") as open_file:
+                self.assertEqual(
+                    open_file.read().decode("utf-8"),
+                    "s3://bucket_name/expanded_folder/%s"
+                    % file_path.replace(os.sep, "/"),
+                )
+
 
 if __name__ == "__main__":
     unittest.main()
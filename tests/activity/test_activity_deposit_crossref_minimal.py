@@ -34,7 +34,7 @@ class TestDepositCrossrefMinimal(unittest.TestCase):
 
     @patch.object(clinical_trials, "registry_name_to_doi_map")
     @patch.object(activity_module.email_provider, "smtp_connect")
-    @patch("requests.post")
+    @patch("requests.Session.post")
     @patch("provider.outbox_provider.storage_context")
     @patch.object(activity_DepositCrossrefMinimal, "clean_tmp_dir")
     @data(
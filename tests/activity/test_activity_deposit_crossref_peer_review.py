@@ -34,6 +34,8 @@ class TestDepositCrossrefPeerReview(unittest.TestCase):
     def tearDown(self):
         TempDirectory.cleanup_all()
         self.activity.clean_tmp_dir()
+        # clear BigQuery results cached by the test
+        bigquery.QUERY_CACHES.clear()
 
     def tmp_dir(self):
         "return the tmp dir name for the activity"
@@ -44,7 +46,7 @@ class TestDepositCrossrefPeerReview(unittest.TestCase):
     @patch.object(activity_module, "check_vor_is_published")
     @patch.object(activity_module.email_provider, "smtp_connect")
     @patch("requests.head")
-    @patch("requests.post")
+    @patch("requests.Session.post")
     @patch("provider.outbox_provider.storage_context")
     @patch.object(activity_DepositCrossrefPeerReview, "clean_tmp_dir")
     @data(
@@ -342,7 +344,7 @@ class TestDepositCrossrefPeerReview(unittest.TestCase):
     @patch.object(activity_module, "check_vor_is_published")
     @patch.object(activity_module.email_provider, "smtp_connect")
     @patch("requests.head")
-    @patch("requests.post")
+    @patch("requests.Session.post")
     @patch("provider.outbox_provider.storage_context")
     def test_do_activity_crossref_exception(
         self,
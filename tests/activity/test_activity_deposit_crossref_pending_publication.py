@@ -43,7 +43,7 @@ class TestDepositCrossrefPendingPublication(unittest.TestCase):
 
     @patch.object(activity_module.email_provider, "smtp_connect")
     @patch("provider.crossref.doi_does_not_exist")
-    @patch("requests.post")
+    @patch("requests.Session.post")
     @patch("provider.outbox_provider.storage_context")
     @patch.object(activity_DepositCrossrefPendingPublication, "clean_tmp_dir")
     def test_do_activity(
@@ -137,7 +137,7 @@ class TestDepositCrossrefPendingPublication(unittest.TestCase):
     @patch.object(utils, "get_current_datetime")
     @patch.object(activity_module.email_provider, "smtp_connect")
     @patch("provider.crossref.doi_does_not_exist")
-    @patch("requests.post")
+    @patch("requests.Session.post")
     @patch("provider.outbox_provider.storage_context")
     @patch.object(activity_DepositCrossrefPendingPublication, "clean_tmp_dir")
     def test_do_activity_no_accepted_date(
@@ -237,7 +237,7 @@ class TestDepositCrossrefPendingPublication(unittest.TestCase):
 
     @patch.object(activity_module.email_provider, "smtp_connect")
     @patch("provider.crossref.doi_does_not_exist")
-    @patch("requests.post")
+    @patch("requests.Session.post")
     @patch("provider.outbox_provider.storage_context")
     @patch.object(activity_DepositCrossrefPendingPublication, "clean_tmp_dir")
     def test_do_activity_one_doi_exists(
@@ -307,7 +307,7 @@ class TestDepositCrossrefPendingPublication(unittest.TestCase):
     @patch.object(activity_module.email_provider, "smtp_connect")
     @patch("provider.crossref.generate.build_crossref_xml")
     @patch("provider.crossref.doi_does_not_exist")
-    @patch("requests.post")
+    @patch("requests.Session.post")
     @patch("provider.outbox_provider.storage_context")
     def test_do_activity_crossref_generation_exception(
         self,
@@ -332,7 +332,7 @@ class TestDepositCrossrefPendingPublication(unittest.TestCase):
 
     @patch.object(activity_module.email_provider, "smtp_connect")
     @patch("provider.crossref.doi_does_not_exist")
-    @patch("requests.post")
+    @patch("requests.Session.post")
     @patch("provider.outbox_provider.storage_context")
     def test_do_activity_crossref_deposit_exception(
         self,
@@ -49,7 +49,7 @@ class TestDepositCrossrefPostedContent(unittest.TestCase):
     @patch.object(cleaner, "get_docmap")
     @patch.object(activity_module.email_provider, "smtp_connect")
     @patch.object(lax_provider, "article_status_version_map")
-    @patch("requests.post")
+    @patch("requests.Session.post")
     @patch("provider.outbox_provider.storage_context")
     @patch.object(activity_DepositCrossrefPostedContent, "clean_tmp_dir")
     def test_do_activity(
@@ -187,7 +187,7 @@ class TestDepositCrossrefPostedContent(unittest.TestCase):
     @patch.object(cleaner, "get_docmap")
     @patch.object(activity_module.email_provider, "smtp_connect")
     @patch.object(lax_provider, "article_status_version_map")
-    @patch("requests.post")
+    @patch("requests.Session.post")
     @patch("provider.outbox_provider.storage_context")
     @patch.object(activity_DepositCrossrefPostedContent, "clean_tmp_dir")
     def test_do_activity_original_publication_date(
@@ -338,7 +338,7 @@ class TestDepositCrossrefPostedContent(unittest.TestCase):
     @patch.object(cleaner, "get_docmap")
     @patch.object(activity_module.email_provider, "smtp_connect")
     @patch.object(lax_provider, "article_status_version_map")
-    @patch("requests.post")
+    @patch("requests.Session.post")
     @patch("provider.outbox_provider.storage_context")
     @patch.object(activity_DepositCrossrefPostedContent, "clean_tmp_dir")
     def test_do_activity_update_date(
@@ -489,7 +489,7 @@ class TestDepositCrossrefPostedContent(unittest.TestCase):
     @patch.object(cleaner, "get_docmap")
     @patch.object(activity_module.email_provider, "smtp_connect")
     @patch.object(lax_provider, "article_status_version_map")
-    @patch("requests.post")
+    @patch("requests.Session.post")
     @patch("provider.outbox_provider.storage_context")
     @patch.object(activity_DepositCrossrefPostedContent, "clean_tmp_dir")
     def test_do_activity_vor_exists(
@@ -528,7 +528,7 @@ class TestDepositCrossrefPostedContent(unittest.TestCase):
     @patch.object(cleaner, "get_docmap")
     @patch.object(activity_module.email_provider, "smtp_connect")
     @patch.object(lax_provider, "article_status_version_map")
-    @patch("requests.post")
+    @patch("requests.Session.post")
     @patch("provider.outbox_provider.storage_context")
     @patch.object(activity_DepositCrossrefPostedContent, "clean_tmp_dir")
     def test_do_activity_older_preprint_version(
@@ -569,7 +569,7 @@ class TestDepositCrossrefPostedContent(unittest.TestCase):
     @patch.object(cleaner, "get_docmap")
     @patch.object(activity_module.email_provider, "smtp_connect")
     @patch.object(lax_provider, "article_status_version_map")
-    @patch("requests.post")
+    @patch("requests.Session.post")
     @patch("provider.outbox_provider.storage_context")
     @patch.object(activity_DepositCrossrefPostedContent, "clean_tmp_dir")
     def test_build_crossref_xml_empty(
@@ -607,7 +607,7 @@ class TestDepositCrossrefPostedContent(unittest.TestCase):
     @patch.object(cleaner, "get_docmap")
     @patch.object(activity_module.email_provider, "smtp_connect")
     @patch.object(lax_provider, "article_status_version_map")
-    @patch("requests.post")
+    @patch("requests.Session.post")
     @patch("provider.outbox_provider.storage_context")
     def test_do_activity_crossref_exception(
         self,
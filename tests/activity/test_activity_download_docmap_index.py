@@ -141,8 +141,17 @@ class TestDownloadDocmapIndex(unittest.TestCase):
         # assert output bucket contents contains the new docmap index
         self.assertEqual(
             sorted(os.listdir(os.path.join(directory.path, "docmaps"))),
-            ["run_2024_06_27_0001", "run_2024_06_27_0002"],
+            ["latest_run.json", "run_2024_06_27_0001", "run_2024_06_27_0002"],
         )
+        # assert the latest run object points to the new run folder
+        with open(
+            os.path.join(directory.path, "docmaps", "latest_run.json"),
+            "r",
+            encoding="utf-8",
+        ) as open_file:
+            self.assertEqual(
+                json.loads(open_file.read()), {"run_folder": "run_2024_06_27_0002"}
+            )
 
     @patch("provider.docmap_provider.get_docmap_index_json")
     @patch.object(activity_module, "get_session")
@@ -291,6 +300,61 @@ class TestRunFolderNames(unittest.TestCase):
         self.assertEqual(result, expected)
 
 
+class TestLatestRunFolder(unittest.TestCase):
+    "tests for latest_run_folder()"
+
+    def setUp(self):
+        self.directory = TempDirectory()
+        self.bucket_path = "s3://poa_packaging_bucket/docmaps/"
+        self.resources = [
+            "docmaps/latest_run.json",
+            "docmaps/run_2024_06_26_0001/",
+            "docmaps/run_2024_06_27_0001/",
+        ]
+        self.fake_storage = FakeStorageContext(
+            self.directory.path, self.resources, dest_folder=self.directory.path
+        )
+
+    def tearDown(self):
+        TempDirectory.cleanup_all()
+
+    def test_latest_run_folder(self):
+        "test the latest run folder is read from the latest run object"
+        activity_module.save_latest_run_folder(
+            self.fake_storage, self.bucket_path, "run_2024_06_27_0001"
+        )
+        with patch.object(
+            FakeStorageContext, "list_resources", return_value=[]
+        ) as fake_list_resources:
+            result = activity_module.latest_run_folder(
+                self.fake_storage, self.bucket_path
+            )
+        self.assertEqual(result, "run_2024_06_27_0001")
+        # only folders after the latest run folder are listed
+        self.assertEqual(
+            fake_list_resources.call_args[1],
+            {"delimiter": "/", "start_after": "docmaps/run_2024_06_27_0001/"},
+        )
+
+    def test_latest_run_folder_not_updated(self):
+        "test a run folder newer than the latest run object"
+        activity_module.save_latest_run_folder(
+            self.fake_storage, self.bucket_path, "run_2024_06_26_0001"
+        )
+        result = activity_module.latest_run_folder(self.fake_storage, self.bucket_path)
+        self.assertEqual(result, "run_2024_06_27_0001")
+
+    def test_no_latest_run_object(self):
+        "test listing all run folders if there is no latest run object"
+        result = activity_module.latest_run_folder(self.fake_storage, self.bucket_path)
+        self.assertEqual(result, "run_2024_06_27_0001")
+
+    def test_no_run_folders(self):
+        self.fake_storage.resources = []
+        result = activity_module.latest_run_folder(self.fake_storage, self.bucket_path)
+        self.assertEqual(result, None)
+
+
 class TestNewRunFolder(unittest.TestCase):
     "tests for new_run_folder()"
 
@@ -1,10 +1,15 @@
 import copy
+from io import BytesIO
 import os
 import unittest
+from zipfile import ZipFile
 from mock import mock, patch
 from testfixtures import TempDirectory
 from ddt import ddt, data
-from activity.activity_ExpandArticle import activity_ExpandArticle
+from activity.activity_ExpandArticle import (
+    activity_ExpandArticle,
+    zip_upload_file_names,
+)
 from tests.activity import classes_mock, helpers, settings_mock
 from tests.activity.classes_mock import FakeStorageContext, FakeSession
 import tests.activity.test_activity_data as testdata
@@ -68,6 +73,47 @@ class TestExpandArticle(unittest.TestCase):
             )
             index += 1
 
+    @patch.object(activity_ExpandArticle, "get_tmp_dir")
+    @patch("activity.activity_ExpandArticle.get_session")
+    @patch("activity.activity_ExpandArticle.storage_context")
+    def test_do_activity_ranged_read(
+        self, mock_storage_context, mock_session, mock_get_tmp_dir
+    ):
+        "read the zip from the bucket instead of downloading it"
+        directory = TempDirectory()
+        fake_storage = FakeStorageContext(dest_folder=directory.path)
+        fake_storage.get_resource_to_file = mock.MagicMock()
+        mock_storage_context.return_value = fake_storage
+        mock_session.return_value = FakeSession(testdata.session_example)
+        mock_get_tmp_dir.return_value = classes_mock.fake_get_tmp_dir(
+            testdata.ExpandArticle_path
+        )
+        self.expandarticle.emit_monitor_event = mock.MagicMock()
+        self.expandarticle.logger = mock.MagicMock()
+        input_data = copy.copy(testdata.ExpandArticle_data)
+        input_data["run"] = "cf9c7e86-7355-4bb4-b48e-0bc284221251"
+
+        with patch.object(settings_mock, "expand_zip_ranged_read", True, create=True):
+            success = self.expandarticle.do_activity(input_data)
+        self.assertEqual(True, success)
+        bucket_folder_path = os.path.join(
+            directory.path,
+            testdata.session_example.get("expanded_folder"),
+        )
+        self.assertEqual(
+            sorted(
+                file_name
+                for file_name in os.listdir(bucket_folder_path)
+                if file_name != ".gitkeep"
+            ),
+            [
+                file_dict["name"]
+                for file_dict in testdata.ExpandArticle_files_dest_bytes_expected
+            ],
+        )
+        # the zip was not downloaded
+        fake_storage.get_resource_to_file.assert_not_called()
+
     @patch("activity.activity_ExpandArticle.get_session")
     @patch("activity.activity_ExpandArticle.storage_context")
     def test_do_activity_invalid_articleid(self, mock_storage_context, mock_session):
@@ -112,6 +158,24 @@ class TestExpandArticle(unittest.TestCase):
         with self.assertRaises(RuntimeError):
             self.expandarticle.check_filenames(["elife-12345"])
 
+    def test_zip_upload_file_names(self):
+        zip_buffer = BytesIO()
+        with ZipFile(zip_buffer, "w") as open_zip:
+            for name in [
+                "elife-12345-vor.xml",
+                ".DS_Store",
+                "_hidden.txt",
+                "folder/",
+                "folder/elife-12345-fig1.tif",
+                "elife-12345-vor.pdf",
+            ]:
+                open_zip.writestr(name, b"")
+        with ZipFile(zip_buffer) as open_zip:
+            self.assertEqual(
+                zip_upload_file_names(open_zip),
+                ["elife-12345-vor.xml", "elife-12345-vor.pdf"],
+            )
+
     def create_temp_folder(self, plus=None):
         if not os.path.exists("tests/tmp"):
             os.makedirs("tests/tmp")
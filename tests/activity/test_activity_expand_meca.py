@@ -238,7 +238,7 @@ class TestExpandMeca(unittest.TestCase):
     @patch.object(activity_module, "get_session")
     @patch.object(activity_module, "storage_context")
     @patch.object(activity_module.download_helper, "storage_context")
-    @patch.object(FakeStorageContext, "set_resource_from_filename")
+    @patch.object(FakeStorageContext, "set_resource_from_fileobj")
     def test_set_resource_exception(
         self,
         fake_set_resource,
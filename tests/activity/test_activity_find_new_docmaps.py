@@ -4,7 +4,7 @@ import json
 import unittest
 from mock import patch
 from testfixtures import TempDirectory
-from provider import github_provider
+from provider import docmap_provider, github_provider
 import activity.activity_FindNewDocmaps as activity_module
 from activity.activity_FindNewDocmaps import (
     activity_FindNewDocmaps as activity_class,
@@ -297,6 +297,77 @@ class TestFindNewDocmaps(unittest.TestCase):
             ["run_2024_06_27_0001", "run_2024_06_27_0002"],
         )
 
+    @patch.object(activity_module, "storage_context")
+    @patch.object(activity_module, "get_session")
+    @patch.object(activity_class, "clean_tmp_dir")
+    def test_prev_docmap_profile(
+        self,
+        fake_clean_tmp_dir,
+        fake_session,
+        fake_storage_context,
+    ):
+        "test the previous docmap profile is compared instead of the docmap index"
+        directory = TempDirectory()
+        fake_clean_tmp_dir.return_value = None
+        fake_session.return_value = FakeSession(
+            {
+                "run": self.run,
+                "new_run_docmap_index_resource": (
+                    "s3://poa_packaging_bucket/docmaps/run_2024_06_27_0002/"
+                    "docmap_index/docmap_index.json"
+                ),
+                "prev_run_docmap_index_resource": (
+                    "s3://poa_packaging_bucket/docmaps/run_2024_06_27_0001/"
+                    "docmap_index/docmap_index.json"
+                ),
+            }
+        )
+        docmap_index = {
+            "docmaps": [json.loads(read_fixture("sample_docmap_for_87445.json"))]
+        }
+        resources = self.populate_docmap_index_files(
+            directory.path, {"docmaps": []}, docmap_index
+        )
+        # replace the previous docmap index with its profile
+        prev_folder = os.path.join(
+            directory.path, "docmaps", "run_2024_06_27_0001", "docmap_index"
+        )
+        os.remove(os.path.join(prev_folder, "docmap_index.json"))
+        with open(
+            os.path.join(prev_folder, "docmap_profile.json"), "w", encoding="utf-8"
+        ) as open_file:
+            open_file.write(
+                docmap_provider.docmap_profile_to_json(
+                    docmap_provider.docmap_profile_step_map(docmap_index)
+                )
+            )
+        fake_storage_context.return_value = FakeStorageContext(
+            directory.path, resources, dest_folder=directory.path
+        )
+
+        # do the activity
+        result = self.activity.do_activity(self.activity_data)
+
+        # check assertions
+        self.assertEqual(result, True)
+        self.assertEqual(self.activity.statuses.get("email"), None)
+        # the new docmap profile is saved next to the new docmap index
+        with open(
+            os.path.join(
+                directory.path,
+                "docmaps",
+                "run_2024_06_27_0002",
+                "docmap_index",
+                "docmap_profile.json",
+            ),
+            "r",
+            encoding="utf-8",
+        ) as open_file:
+            self.assertEqual(
+                docmap_provider.docmap_profile_from_json(open_file.read()),
+                docmap_provider.docmap_profile_step_map(docmap_index),
+            )
+
 
 class TestSendAdminEmail(unittest.TestCase):
     def setUp(self):
@@ -41,7 +41,7 @@ class TestGeneratePreprintPdf(unittest.TestCase):
     @patch("provider.outbox_provider.storage_context")
     @patch.object(activity_module, "storage_context")
     @patch.object(activity_module, "get_session")
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_do_activity(
         self,
         fake_post,
@@ -186,7 +186,7 @@ class TestGeneratePreprintPdf(unittest.TestCase):
     @patch("provider.outbox_provider.storage_context")
     @patch.object(activity_module, "storage_context")
     @patch.object(activity_module, "get_session")
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_do_activity_post_publication(
         self,
         fake_post,
@@ -393,7 +393,7 @@ class TestGeneratePreprintPdf(unittest.TestCase):
     @patch("provider.preprint.generate_new_pdf_href")
     @patch.object(activity_module, "storage_context")
     @patch.object(activity_module, "get_session")
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_do_activity_save_pdf_exception(
         self,
         fake_post,
@@ -460,7 +460,7 @@ class TestGeneratePreprintPdf(unittest.TestCase):
     @patch("provider.outbox_provider.storage_context")
     @patch.object(activity_module, "storage_context")
     @patch.object(activity_module, "get_session")
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_do_activity_upload_to_s3_exception(
         self,
         fake_post,
@@ -21,6 +21,7 @@ from activity.activity_ModifyMecaXml import (
 from tests import bigquery_test_data, read_fixture
 from tests.classes_mock import (
     FakeBigQueryClient,
+    FakeBigQueryPreprintMetadataClient,
     FakeBigQueryRowIterator,
 )
 from tests.activity.classes_mock import (
@@ -77,9 +78,9 @@ class TestModifyMecaXml(unittest.TestCase):
         self.session.store_value("docmap_string", None)
         # reload the module which had MagicMock applied to revert the mock
         importlib.reload(docmaptools)
+        # clear BigQuery results cached by the test
+        bigquery.QUERY_CACHES.clear()
 
-    @patch.object(bigquery, "get_author_data")
-    @patch.object(bigquery, "get_funding_data")
     @patch.object(bigquery, "get_client")
     @patch("docmaptools.parse.get_web_content")
     @patch.object(activity_module, "storage_context")
@@ -90,8 +91,6 @@ class TestModifyMecaXml(unittest.TestCase):
         fake_storage_context,
         fake_get_web_content,
         fake_bigquery_get_client,
-        fake_funding_data,
-        fake_author_data,
     ):
         directory = TempDirectory()
 
@@ -125,22 +124,13 @@ class TestModifyMecaXml(unittest.TestCase):
         fake_get_web_content.side_effect = mock_get_web_content
 
         # mock BigQuery
-        rows = FakeBigQueryRowIterator(
-            [bigquery_test_data.PREPRINT_95901_V1_DATA_AVAILABILITY_RESULT]
+        client = FakeBigQueryPreprintMetadataClient(
+            [bigquery_test_data.PREPRINT_95901_V1_DATA_AVAILABILITY_RESULT],
+            funding_rows=bigquery_test_data.PREPRINT_95901_V1_FUNDING_RESULT,
+            author_rows=bigquery_test_data.PREPRINT_95901_V1_AUTHOR_DETAILS_RESULT,
         )
-        client = FakeBigQueryClient(rows)
         fake_bigquery_get_client.return_value = client
 
-        funding_data_rows = FakeBigQueryRowIterator(
-            bigquery_test_data.PREPRINT_95901_V1_FUNDING_RESULT
-        )
-        fake_funding_data.return_value = funding_data_rows
-
-        author_data_rows = FakeBigQueryRowIterator(
-            bigquery_test_data.PREPRINT_95901_V1_AUTHOR_DETAILS_RESULT
-        )
-        fake_author_data.return_value = author_data_rows
-
         # do the activity
         result = self.activity.do_activity(test_activity_data.ingest_meca_data)
         # assertions
@@ -334,8 +324,6 @@ class TestModifyMecaXml(unittest.TestCase):
             in xml_string
         )
 
-    @patch.object(bigquery, "get_author_data")
-    @patch.object(bigquery, "get_funding_data")
     @patch.object(bigquery, "get_client")
     @patch("docmaptools.parse.get_web_content")
     @patch.object(utils, "get_current_datetime")
@@ -348,8 +336,6 @@ class TestModifyMecaXml(unittest.TestCase):
         fake_datetime,
         fake_get_web_content,
         fake_bigquery_get_client,
-        fake_funding_data,
-        fake_author_data,
     ):
         "test if the docmap_string is missing some data"
         directory = TempDirectory()
@@ -395,22 +381,13 @@ class TestModifyMecaXml(unittest.TestCase):
         fake_get_web_content.side_effect = mock_get_web_content
 
         # mock BigQuery
-        rows = FakeBigQueryRowIterator(
-            [bigquery_test_data.PREPRINT_95901_V1_DATA_AVAILABILITY_RESULT]
+        client = FakeBigQueryPreprintMetadataClient(
+            [bigquery_test_data.PREPRINT_95901_V1_DATA_AVAILABILITY_RESULT],
+            funding_rows=bigquery_test_data.PREPRINT_95901_V1_FUNDING_RESULT,
+            author_rows=bigquery_test_data.PREPRINT_95901_V1_AUTHOR_DETAILS_RESULT,
         )
-        client = FakeBigQueryClient(rows)
         fake_bigquery_get_client.return_value = client
 
-        funding_data_rows = FakeBigQueryRowIterator(
-            bigquery_test_data.PREPRINT_95901_V1_FUNDING_RESULT
-        )
-        fake_funding_data.return_value = funding_data_rows
-
-        author_data_rows = FakeBigQueryRowIterator(
-            bigquery_test_data.PREPRINT_95901_V1_AUTHOR_DETAILS_RESULT
-        )
-        fake_author_data.return_value = author_data_rows
-
         # do the activity
         result = self.activity.do_activity(test_activity_data.ingest_meca_data)
         # assertions
@@ -721,8 +698,7 @@ class TestModifyMecaXml(unittest.TestCase):
         fake_get_web_content.side_effect = mock_get_web_content
 
         # mock BigQuery
-        rows = FakeBigQueryRowIterator([])
-        client = FakeBigQueryClient(rows)
+        client = FakeBigQueryPreprintMetadataClient()
         fake_bigquery_get_client.return_value = client
 
         # do the activity
@@ -737,7 +713,6 @@ class TestModifyMecaXml(unittest.TestCase):
             in self.activity.logger.loginfo
         )
 
-    @patch.object(bigquery, "get_author_data")
     @patch.object(activity_module, "add_data_availability")
     @patch.object(bigquery, "get_client")
     @patch("docmaptools.parse.get_web_content")
@@ -752,7 +727,6 @@ class TestModifyMecaXml(unittest.TestCase):
         fake_get_web_content,
         fake_bigquery_get_client,
         fake_add_data_availability,
-        fake_author_data,
     ):
         "test if an exception is raised when adding data availability XML"
         directory = TempDirectory()
@@ -792,17 +766,13 @@ class TestModifyMecaXml(unittest.TestCase):
         fake_get_web_content.side_effect = mock_get_web_content
 
         # mock BigQuery
-        rows = FakeBigQueryRowIterator(
-            bigquery_test_data.PREPRINT_95901_V1_FUNDING_RESULT
+        client = FakeBigQueryPreprintMetadataClient(
+            [bigquery_test_data.PREPRINT_95901_V1_DATA_AVAILABILITY_RESULT],
+            funding_rows=bigquery_test_data.PREPRINT_95901_V1_FUNDING_RESULT,
+            author_rows=bigquery_test_data.PREPRINT_95901_V1_AUTHOR_DETAILS_RESULT,
         )
-        client = FakeBigQueryClient(rows)
         fake_bigquery_get_client.return_value = client
 
-        author_data_rows = FakeBigQueryRowIterator(
-            bigquery_test_data.PREPRINT_95901_V1_AUTHOR_DETAILS_RESULT
-        )
-        fake_author_data.return_value = author_data_rows
-
         fake_add_data_availability.side_effect = Exception("An exception")
 
         # do the activity
@@ -817,8 +787,6 @@ class TestModifyMecaXml(unittest.TestCase):
             ),
         )
 
-    @patch.object(bigquery, "get_author_data")
-    @patch.object(activity_module, "get_funding_data")
     @patch.object(bigquery, "get_client")
     @patch.object(utils, "get_current_datetime")
     @patch.object(activity_module, "storage_context")
@@ -829,8 +797,6 @@ class TestModifyMecaXml(unittest.TestCase):
         fake_storage_context,
         fake_datetime,
         fake_bigquery_get_client,
-        fake_get_funding_data,
-        fake_author_data,
     ):
         "test if BigQuery returns no funding data"
         directory = TempDirectory()
@@ -869,19 +835,12 @@ class TestModifyMecaXml(unittest.TestCase):
         )
 
         # mock BigQuery
-        rows = FakeBigQueryRowIterator(
-            bigquery_test_data.PREPRINT_95901_V1_DATA_AVAILABILITY_RESULT
+        client = FakeBigQueryPreprintMetadataClient(
+            [bigquery_test_data.PREPRINT_95901_V1_DATA_AVAILABILITY_RESULT],
+            author_rows=bigquery_test_data.PREPRINT_95901_V1_AUTHOR_DETAILS_RESULT,
         )
-        client = FakeBigQueryClient(rows)
         fake_bigquery_get_client.return_value = client
 
-        fake_get_funding_data.return_value = []
-
-        author_data_rows = FakeBigQueryRowIterator(
-            bigquery_test_data.PREPRINT_95901_V1_AUTHOR_DETAILS_RESULT
-        )
-        fake_author_data.return_value = author_data_rows
-
         # do the activity
         result = self.activity.do_activity(test_activity_data.ingest_meca_data)
         # assertions
@@ -894,7 +853,6 @@ class TestModifyMecaXml(unittest.TestCase):
             in self.activity.logger.loginfo
         )
 
-    @patch.object(bigquery, "get_author_data")
     @patch.object(activity_module, "add_funding")
     @patch.object(bigquery, "get_client")
     @patch("docmaptools.parse.get_web_content")
@@ -909,7 +867,6 @@ class TestModifyMecaXml(unittest.TestCase):
         fake_get_web_content,
         fake_bigquery_get_client,
         fake_add_funding,
-        fake_author_data,
     ):
         "test if an exception is raised when adding funding XML"
         directory = TempDirectory()
@@ -949,17 +906,13 @@ class TestModifyMecaXml(unittest.TestCase):
         fake_get_web_content.side_effect = mock_get_web_content
 
         # mock BigQuery
-        rows = FakeBigQueryRowIterator(
-            bigquery_test_data.PREPRINT_95901_V1_DATA_AVAILABILITY_RESULT
+        client = FakeBigQueryPreprintMetadataClient(
+            [bigquery_test_data.PREPRINT_95901_V1_DATA_AVAILABILITY_RESULT],
+            funding_rows=bigquery_test_data.PREPRINT_95901_V1_FUNDING_RESULT,
+            author_rows=bigquery_test_data.PREPRINT_95901_V1_AUTHOR_DETAILS_RESULT,
         )
-        client = FakeBigQueryClient(rows)
         fake_bigquery_get_client.return_value = client
 
-        author_data_rows = FakeBigQueryRowIterator(
-            bigquery_test_data.PREPRINT_95901_V1_AUTHOR_DETAILS_RESULT
-        )
-        fake_author_data.return_value = author_data_rows
-
         fake_add_funding.side_effect = Exception("An exception")
 
         # do the activity
@@ -974,8 +927,6 @@ class TestModifyMecaXml(unittest.TestCase):
             ),
         )
 
-    @patch.object(bigquery, "get_author_data")
-    @patch.object(bigquery, "get_funding_data")
     @patch.object(bigquery, "get_client")
     @patch.object(utils, "get_current_datetime")
     @patch.object(activity_module, "storage_context")
@@ -986,8 +937,6 @@ class TestModifyMecaXml(unittest.TestCase):
         fake_storage_context,
         fake_datetime,
         fake_bigquery_get_client,
-        fake_funding_data,
-        fake_author_data,
     ):
         "test if no author data is found"
         directory = TempDirectory()
@@ -1026,19 +975,12 @@ class TestModifyMecaXml(unittest.TestCase):
         )
 
         # mock BigQuery
-        rows = FakeBigQueryRowIterator(
-            bigquery_test_data.PREPRINT_95901_V1_DATA_AVAILABILITY_RESULT
+        client = FakeBigQueryPreprintMetadataClient(
+            [bigquery_test_data.PREPRINT_95901_V1_DATA_AVAILABILITY_RESULT],
+            funding_rows=bigquery_test_data.PREPRINT_95901_V1_FUNDING_RESULT,
         )
-        client = FakeBigQueryClient(rows)
         fake_bigquery_get_client.return_value = client
 
-        funding_data_rows = FakeBigQueryRowIterator(
-            bigquery_test_data.PREPRINT_95901_V1_FUNDING_RESULT
-        )
-        fake_funding_data.return_value = funding_data_rows
-
-        fake_author_data.return_value = []
-
         # do the activity
         result = self.activity.do_activity(test_activity_data.ingest_meca_data)
         # assertions
@@ -1052,7 +994,6 @@ class TestModifyMecaXml(unittest.TestCase):
         )
 
     @patch.object(activity_module, "add_author_orcid")
-    @patch.object(bigquery, "get_funding_data")
     @patch.object(bigquery, "get_client")
     @patch.object(utils, "get_current_datetime")
     @patch.object(activity_module, "storage_context")
@@ -1063,7 +1004,6 @@ class TestModifyMecaXml(unittest.TestCase):
         fake_storage_context,
         fake_datetime,
         fake_bigquery_get_client,
-        fake_funding_data,
         fake_add_author_orcid,
     ):
         "test if and excepiton is raised adding author data"
@@ -1103,20 +1043,13 @@ class TestModifyMecaXml(unittest.TestCase):
         )
 
         # mock BigQuery
-        rows = FakeBigQueryRowIterator(
-            bigquery_test_data.PREPRINT_95901_V1_DATA_AVAILABILITY_RESULT
+        client = FakeBigQueryPreprintMetadataClient(
+            [bigquery_test_data.PREPRINT_95901_V1_DATA_AVAILABILITY_RESULT],
+            funding_rows=bigquery_test_data.PREPRINT_95901_V1_FUNDING_RESULT,
+            author_rows=bigquery_test_data.PREPRINT_95901_V1_AUTHOR_DETAILS_RESULT,
         )
-        client = FakeBigQueryClient(rows)
         fake_bigquery_get_client.return_value = client
 
-        funding_data_rows = FakeBigQueryRowIterator(
-            bigquery_test_data.PREPRINT_95901_V1_FUNDING_RESULT
-        )
-        fake_funding_data.return_value = funding_data_rows
-
-        author_data_rows = FakeBigQueryRowIterator(
-            bigquery_test_data.PREPRINT_95901_V1_AUTHOR_DETAILS_RESULT
-        )
         exception_message = "An exception"
         fake_add_author_orcid.side_effect = Exception(exception_message)
 
@@ -1369,8 +1302,8 @@ class TestClearEditors(unittest.TestCase):
         self.assertEqual(xml_string, expected)
 
 
-class TestGetDataAvailabilityData(unittest.TestCase):
-    "test for get_data_availability_data()"
+class TestGetPreprintMetadata(unittest.TestCase):
+    "tests for get_preprint_metadata()"
 
     def setUp(self):
         self.article_id = 95901
@@ -1378,89 +1311,21 @@ class TestGetDataAvailabilityData(unittest.TestCase):
         self.caller_name = "ModifyMecaXml"
         self.logger = FakeLogger()
 
-    @patch.object(bigquery, "get_client")
-    def test_get_data_availability_data(self, fake_bigquery_get_client):
-        "test getting data availability data using BigQuery"
-        # mock BigQuery
-        rows = FakeBigQueryRowIterator(
-            [bigquery_test_data.PREPRINT_95901_V1_DATA_AVAILABILITY_RESULT]
-        )
-        client = FakeBigQueryClient(rows)
-        fake_bigquery_get_client.return_value = client
-
-        # invoke
-        result = activity_module.get_data_availability_data(
-            self.article_id, self.version, settings_mock, self.caller_name, self.logger
-        )
-        # assert
-        self.assertIsNotNone(result)
-
-    @patch.object(bigquery, "get_data_availability_data")
-    @patch.object(bigquery, "get_client")
-    def test_exception(self, fake_bigquery_get_client, fake_get_data):
-        "test an exception is raised getting data from BigQuery"
-        client = FakeBigQueryClient([])
-        fake_bigquery_get_client.return_value = client
-        exception_message = "An exception"
-        fake_get_data.side_effect = Exception(exception_message)
-        # invoke
-        activity_module.get_data_availability_data(
-            self.article_id,
-            self.version,
-            settings_mock,
-            self.caller_name,
-            self.logger,
-        )
-        # assert
-        self.assertEqual(
-            (
-                "%s, exception getting data availability data from"
-                " BigQuery for article_id %s, version %s: %s"
-            )
-            % (self.caller_name, self.article_id, self.version, exception_message),
-            self.logger.logexception,
-        )
-
-
-class TestGetFundingData(unittest.TestCase):
-    "tests for get_funding_data()"
-
-    def setUp(self):
-        self.article_id = 95901
-        self.version = 1
-        self.caller_name = "ModifyMecaXml"
-        self.logger = FakeLogger()
+    def tearDown(self):
+        bigquery.QUERY_CACHES.clear()
 
     @patch.object(bigquery, "get_client")
-    def test_get_funding_data(self, fake_bigquery_get_client):
-        "test getting funding data from BigQuery"
+    def test_get_preprint_metadata(self, fake_bigquery_get_client):
+        "test getting data availability, funding and author data in one query"
         # mock BigQuery
-        rows = FakeBigQueryRowIterator(
-            bigquery_test_data.PREPRINT_95901_V1_FUNDING_RESULT
+        client = FakeBigQueryPreprintMetadataClient(
+            [bigquery_test_data.PREPRINT_95901_V1_DATA_AVAILABILITY_RESULT],
+            funding_rows=bigquery_test_data.PREPRINT_95901_V1_FUNDING_RESULT,
+            author_rows=bigquery_test_data.PREPRINT_95901_V1_AUTHOR_DETAILS_RESULT,
         )
-        client = FakeBigQueryClient(rows)
-        fake_bigquery_get_client.return_value = client
-        # invoke
-        result = activity_module.get_funding_data(
-            self.article_id,
-            self.version,
-            settings_mock,
-            self.caller_name,
-            self.logger,
-        )
-        # assert
-        self.assertIsNotNone(result)
-
-    @patch.object(bigquery, "get_funding_data")
-    @patch.object(bigquery, "get_client")
-    def test_exception(self, fake_bigquery_get_client, fake_get_data):
-        "test exception raised when getting funding data from BigQuery"
-        client = FakeBigQueryClient([])
         fake_bigquery_get_client.return_value = client
-        exception_message = "An exception"
-        fake_get_data.side_effect = Exception(exception_message)
         # invoke
-        activity_module.get_funding_data(
+        result = activity_module.get_preprint_metadata(
             self.article_id,
             self.version,
             settings_mock,
@@ -1468,55 +1333,29 @@ class TestGetFundingData(unittest.TestCase):
             self.logger,
         )
         # assert
-        self.assertEqual(
-            (
-                "%s, exception getting funding data from"
-                " BigQuery for article_id %s, version %s: %s"
-            )
-            % (self.caller_name, self.article_id, self.version, exception_message),
-            self.logger.logexception,
-        )
-
-
-class TestGetAuthorData(unittest.TestCase):
-    "tests for get_author_data()"
-
-    def setUp(self):
-        self.article_id = 95901
-        self.version = 1
-        self.caller_name = "ModifyMecaXml"
-        self.logger = FakeLogger()
-
-    @patch.object(bigquery, "get_client")
-    def test_get_author_data(self, fake_bigquery_get_client):
-        "test getting author data from BigQuery"
-        # mock BigQuery
-        rows = FakeBigQueryRowIterator(
-            bigquery_test_data.PREPRINT_95901_V1_AUTHOR_DETAILS_RESULT
-        )
-        client = FakeBigQueryClient(rows)
-        fake_bigquery_get_client.return_value = client
-        # invoke
-        result = activity_module.get_author_data(
+        self.assertIsNotNone(result.data_availability_data)
+        self.assertEqual(len(result.funding_data), 6)
+        self.assertEqual(len(result.author_data), 1)
+        # the second time the result comes from the cache
+        activity_module.get_preprint_metadata(
             self.article_id,
             self.version,
             settings_mock,
             self.caller_name,
             self.logger,
         )
-        # assert
-        self.assertIsNotNone(result)
+        self.assertEqual(len(client.queries), 1)
 
-    @patch.object(bigquery, "get_author_data")
+    @patch.object(bigquery, "get_preprint_metadata")
     @patch.object(bigquery, "get_client")
     def test_exception(self, fake_bigquery_get_client, fake_get_data):
-        "test exception raised when getting author data from BigQuery"
+        "test exception raised when getting preprint metadata from BigQuery"
         client = FakeBigQueryClient([])
         fake_bigquery_get_client.return_value = client
         exception_message = "An exception"
         fake_get_data.side_effect = Exception(exception_message)
         # invoke
-        activity_module.get_author_data(
+        result = activity_module.get_preprint_metadata(
             self.article_id,
             self.version,
             settings_mock,
@@ -1524,9 +1363,10 @@ class TestGetAuthorData(unittest.TestCase):
             self.logger,
         )
         # assert
+        self.assertIsNone(result)
         self.assertEqual(
             (
-                "%s, exception getting author data from"
+                "%s, exception getting preprint metadata from"
                 " BigQuery for article_id %s, version %s: %s"
             )
             % (self.caller_name, self.article_id, self.version, exception_message),
@@ -1,6 +1,7 @@
 import os
 import shutil
 import unittest
+import zipfile
 from mock import patch
 from testfixtures import TempDirectory
 import activity.activity_PushSWHDeposit as activity_module
@@ -75,6 +76,61 @@ class TestPushSWHDeposit(unittest.TestCase):
             )
         )
 
+    @patch.object(activity_object, "post_file_to_swh")
+    @patch.object(activity_module, "get_session")
+    @patch.object(activity_module, "storage_context")
+    def test_do_activity_zip_parts(
+        self, mock_storage_context, mock_session, mock_post_file_to_swh
+    ):
+        "test each zip file is sent once, and only the final one is not in progress"
+        mock_storage_context.return_value = FakeStorageContext("tests/files_source")
+        mock_session.return_value = FakeSession(
+            testdata.SoftwareHeritageDeposit_session_example
+        )
+        response = FakeResponse(201)
+        with open(
+            "tests/test_data/software_heritage/response_content_example.xml", "rb"
+        ) as open_file:
+            response.content = open_file.read()
+        zip_file_names = []
+
+        def post_file_to_swh(**kwargs):
+            # the zip file is complete when it is sent
+            with zipfile.ZipFile(kwargs.get("zip_file_path")) as open_zip:
+                self.assertIsNone(open_zip.testzip())
+            zip_file_names.append(os.path.basename(kwargs.get("zip_file_path")))
+            return response
+
+        mock_post_file_to_swh.side_effect = post_file_to_swh
+        # do_activity
+        return_value = self.activity.do_activity(
+            testdata.SoftwareHeritageDeposit_data_example
+        )
+        # assertions
+        self.assertEqual(return_value, self.activity.ACTIVITY_SUCCESS)
+        self.assertTrue(len(zip_file_names) > 2)
+        self.assertEqual(
+            zip_file_names,
+            [
+                "elife-30274-v1-era_part%04d.zip" % (index + 1)
+                for index in range(len(zip_file_names))
+            ],
+        )
+        calls = [call[1] for call in mock_post_file_to_swh.call_args_list]
+        self.assertEqual(
+            calls[0].get("endpoint_url"), "https://deposit.swh.example.org/1/elife/"
+        )
+        self.assertIsNotNone(calls[0].get("atom_file_path"))
+        for call in calls[1:]:
+            self.assertNotEqual(
+                call.get("endpoint_url"), "https://deposit.swh.example.org/1/elife/"
+            )
+            self.assertIsNone(call.get("atom_file_path"))
+        self.assertEqual(
+            [call.get("in_progress") for call in calls],
+            [True] * (len(calls) - 1) + [False],
+        )
+
     @patch("requests.post")
     @patch.object(activity_module, "get_session")
     @patch.object(activity_module, "storage_context")
@@ -95,9 +151,9 @@ class TestPushSWHDeposit(unittest.TestCase):
         self.assertEqual(return_value, self.activity.ACTIVITY_PERMANENT_FAILURE)
 
     @patch.object(activity_module, "get_session")
+    @patch.object(settings_mock, "software_heritage_deposit_endpoint", "")
     def test_do_activity_no_endpoint_in_settings(self, mock_session):
         # set endpoint setting to blank string
-        self.activity.settings.software_heritage_deposit_endpoint = ""
         mock_session.return_value = FakeSession(
             testdata.SoftwareHeritageDeposit_session_example
         )
@@ -242,6 +298,52 @@ class TestSplitZipFile(unittest.TestCase):
         self.assertEqual(logger.loginfo, loginfo_expected)
         self.assertEqual(return_value, return_value_expected)
 
+    def test_split_zip_file_parts(self):
+        "test each part is a valid zip file of the planned members and their data"
+        zip_file_path = os.path.join(
+            "tests",
+            "files_source",
+            "software_heritage",
+            "run",
+            "cf9c7e86-7355-4bb4-b48e-0bc284221251",
+            "elife-30274-v1-era.zip",
+        )
+        directory = TempDirectory()
+        max_zip_size = 500000
+        with zipfile.ZipFile(zip_file_path) as open_zip:
+            parts = activity_module.plan_zip_parts(
+                open_zip.infolist(),
+                activity_module.zip_file_name_start(zip_file_path),
+                FakeLogger(),
+                max_zip_size,
+            )
+        # call the function
+        return_value = activity_module.split_zip_file(
+            zip_file_path, directory.path, FakeLogger(), max_zip_size
+        )
+        # test assertions
+        self.assertEqual(return_value, [part[0] for part in parts])
+        self.assertTrue(len(parts) > 1)
+        with zipfile.ZipFile(zip_file_path) as open_zip:
+            for new_zip_file_name, zip_members in parts:
+                new_zip_file_path = os.path.join(directory.path, new_zip_file_name)
+                with zipfile.ZipFile(new_zip_file_path) as new_zip:
+                    self.assertIsNone(new_zip.testzip())
+                    self.assertEqual(
+                        new_zip.namelist(),
+                        [zip_info.filename for zip_info in zip_members],
+                    )
+                    for zip_info in zip_members:
+                        new_zip_info = new_zip.getinfo(zip_info.filename)
+                        self.assertEqual(
+                            new_zip_info.compress_type, zip_info.compress_type
+                        )
+                        self.assertEqual(new_zip_info.CRC, zip_info.CRC)
+                        self.assertEqual(
+                            new_zip.read(zip_info.filename),
+                            open_zip.read(zip_info.filename),
+                        )
+
 
 class TestEndpointFromResponse(unittest.TestCase):
     def test_endpoint_from_response(self):
@@ -2,6 +2,7 @@ import time
 import os
 import ftplib
 from datetime import datetime
+from google.cloud.bigquery.table import Row
 
 
 class FakeSWFClient:
@@ -99,6 +100,12 @@ class FakeSWFClient:
     def respond_activity_task_completed(self, **kwargs):
         pass
 
+    def respond_activity_task_canceled(self, **kwargs):
+        pass
+
+    def record_activity_task_heartbeat(self, **kwargs):
+        return {"cancelRequested": False}
+
     def request_cancel_workflow_execution(self, **kwargs):
         pass
 
@@ -166,6 +173,42 @@ class FakeBigQueryRowIterator:
             yield row
 
 
+class FakeBigQueryPreprintMetadataClient:
+    "answer a preprint metadata query with the same rows for each version queried"
+
+    def __init__(
+        self, data_availability_rows=None, funding_rows=None, author_rows=None
+    ):
+        self.data_availability_rows = data_availability_rows or []
+        self.funding_rows = funding_rows or []
+        self.author_rows = author_rows or []
+        self.queries = []
+
+    def query(self, query, job_config=None):
+        self.queries.append((query, job_config))
+        rows = []
+        for struct_parameter in job_config.query_parameters[0].values:
+            rows.append(
+                Row(
+                    (
+                        struct_parameter.struct_values.get("manuscript_id"),
+                        struct_parameter.struct_values.get("manuscript_version_str"),
+                        [dict(row.items()) for row in self.data_availability_rows],
+                        [dict(row.items()) for row in self.funding_rows],
+                        [dict(row.items()) for row in self.author_rows],
+                    ),
+                    {
+                        "manuscript_id": 0,
+                        "manuscript_version_str": 1,
+                        "data_availability": 2,
+                        "funding": 3,
+                        "author": 4,
+                    },
+                )
+            )
+        return FakeBigQueryJob(FakeBigQueryRowIterator(rows))
+
+
 class FakeFTPServer:
     def __init__(self, dir=None):
         # original directory
@@ -223,16 +266,62 @@ class FakeStrictRedis:
 
     def __init__(self):
         self._session_hashes = {}
+        # count of requests sent, a pipeline counts as one request
+        self.request_count = 0
 
     def expire(self, *args):
-        pass
+        self.request_count += 1
 
     def hget(self, session_hash, key):
+        self.request_count += 1
         if not self._session_hashes.get(session_hash):
             return None
         return self._session_hashes.get(session_hash).get(key)
 
-    def hset(self, session_hash, key, value):
+    def hmget(self, session_hash, keys):
+        self.request_count += 1
+        return [self._session_hashes.get(session_hash, {}).get(key) for key in keys]
+
+    def hgetall(self, session_hash):
+        self.request_count += 1
+        return {
+            bytes(key, encoding="utf-8"): bytes(value, encoding="utf-8")
+            for key, value in self._session_hashes.get(session_hash, {}).items()
+        }
+
+    def hset(self, session_hash, key=None, value=None, mapping=None):
+        self.request_count += 1
         if not self._session_hashes.get(session_hash):
             self._session_hashes[session_hash] = {}
-        self._session_hashes[session_hash][key] = str(value)
+        if key is not None:
+            self._session_hashes[session_hash][key] = str(value)
+        for mapping_key, mapping_value in (mapping or {}).items():
+            self._session_hashes[session_hash][mapping_key] = str(mapping_value)
+
+    def pipeline(self):
+        return FakeRedisPipeline(self)
+
+
+class FakeRedisPipeline:
+    "queue commands and send them to the FakeStrictRedis as one request"
+
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+        self.commands = []
+
+    def __getattr__(self, name):
+        def queue_command(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+            return self
+
+        return queue_command
+
+    def execute(self):
+        request_count = self.redis_client.request_count
+        results = [
+            getattr(self.redis_client, name)(*args, **kwargs)
+            for name, args, kwargs in self.commands
+        ]
+        self.commands = []
+        self.redis_client.request_count = request_count + 1
+        return results
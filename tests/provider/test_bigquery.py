@@ -6,7 +6,11 @@ from google.cloud._helpers import UTC
 from google.auth.exceptions import DefaultCredentialsError
 from provider import bigquery
 from tests.activity.classes_mock import FakeLogger
-from tests.classes_mock import FakeBigQueryClient, FakeBigQueryRowIterator
+from tests.classes_mock import (
+    FakeBigQueryClient,
+    FakeBigQueryPreprintMetadataClient,
+    FakeBigQueryRowIterator,
+)
 from tests import bigquery_test_data, bigquery_preprint_test_data, settings_mock
 
 
@@ -300,10 +304,9 @@ class TestGetDataAvailabilityData(unittest.TestCase):
         "test getting data availability data from BigQuery"
         manuscript_id = 95901
         version = 1
-        rows = FakeBigQueryRowIterator(
+        client = FakeBigQueryPreprintMetadataClient(
             [bigquery_test_data.PREPRINT_95901_V1_DATA_AVAILABILITY_RESULT]
         )
-        client = FakeBigQueryClient(rows)
         # run the query
         result = bigquery.get_data_availability_data(client, manuscript_id, version)
         # check the result
@@ -355,8 +358,7 @@ class TestGetDataAvailabilityData(unittest.TestCase):
         "test if data availability BigQuery query returns no rows"
         manuscript_id = 95901
         version = 1
-        rows = FakeBigQueryRowIterator([])
-        client = FakeBigQueryClient(rows)
+        client = FakeBigQueryPreprintMetadataClient()
         # run the query
         result = bigquery.get_data_availability_data(client, manuscript_id, version)
         # check the result
@@ -422,10 +424,9 @@ class TestGetFundingData(unittest.TestCase):
         "test getting preprint funding data from BigQuery"
         manuscript_id = 95901
         version = 1
-        rows = FakeBigQueryRowIterator(
-            bigquery_test_data.PREPRINT_95901_V1_FUNDING_RESULT
+        client = FakeBigQueryPreprintMetadataClient(
+            funding_rows=bigquery_test_data.PREPRINT_95901_V1_FUNDING_RESULT
         )
-        client = FakeBigQueryClient(rows)
         # run the query
         result = bigquery.get_funding_data(client, manuscript_id, version)
         # check the result
@@ -464,3 +465,181 @@ class TestParseFundingData(unittest.TestCase):
     def test_none(self):
         "test if funding_data argument is None"
         self.assertEqual(bigquery.parse_funding_data(None), None)
+
+
+class TestGetAuthorData(unittest.TestCase):
+    "tests for get_author_data()"
+
+    def test_get_author_data(self):
+        "test getting preprint author data from BigQuery"
+        client = FakeBigQueryPreprintMetadataClient(
+            author_rows=bigquery_test_data.PREPRINT_95901_V1_AUTHOR_DETAILS_RESULT
+        )
+        # run the query
+        result = bigquery.get_author_data(client, 95901, 1)
+        # check the result
+        self.assertEqual(
+            bigquery.parse_author_data(result),
+            bigquery.parse_author_data(
+                bigquery_test_data.PREPRINT_95901_V1_AUTHOR_DETAILS_RESULT
+            ),
+        )
+
+
+class TestQueryCache(unittest.TestCase):
+    "tests for QueryCache"
+
+    @patch("time.monotonic")
+    def test_expires(self, fake_monotonic):
+        "test a value is not returned after ttl_seconds"
+        fake_monotonic.return_value = 100
+        cache = bigquery.QueryCache(ttl_seconds=60)
+        cache.put("key", "value")
+        self.assertEqual(cache.get("key"), "value")
+        fake_monotonic.return_value = 160
+        self.assertIsNone(cache.get("key"))
+        self.assertEqual(len(cache.entries), 0)
+
+    def test_max_entries(self):
+        "test the oldest values are removed when there are too many"
+        cache = bigquery.QueryCache(max_entries=2)
+        for key in ["one", "two", "three"]:
+            cache.put(key, key)
+        self.assertIsNone(cache.get("one"))
+        self.assertEqual(cache.get("three"), "three")
+
+
+class TestGetQueryCache(unittest.TestCase):
+    def tearDown(self):
+        bigquery.QUERY_CACHES.clear()
+
+    def test_get_query_cache(self):
+        class Settings:
+            bigquery_cache_seconds = 30
+
+        cache = bigquery.get_query_cache(Settings)
+        self.assertEqual(cache.ttl_seconds, 30)
+        self.assertEqual(cache.max_entries, bigquery.CACHE_MAX_ENTRIES)
+        self.assertIs(bigquery.get_query_cache(Settings), cache)
+
+    def test_get_query_cache_settings(self):
+        "test a cache with different settings is not shared"
+
+        class Settings:
+            bigquery_cache_seconds = 30
+
+        cache = bigquery.get_query_cache(Settings)
+        default_cache = bigquery.get_query_cache()
+        self.assertIsNot(default_cache, cache)
+        self.assertEqual(default_cache.ttl_seconds, bigquery.CACHE_SECONDS)
+        self.assertEqual(cache.ttl_seconds, 30)
+
+
+class TestManuscriptData(unittest.TestCase):
+    "tests for manuscript_data()"
+
+    def test_manuscript_data(self):
+        "test the first row is cached by DOI"
+        rows = FakeBigQueryRowIterator([bigquery_test_data.ARTICLE_RESULT_15747])
+        client = FakeBigQueryClient(rows)
+        cache = bigquery.QueryCache()
+        doi = "10.7554/eLife.15747"
+        result = bigquery.manuscript_data(client, doi, cache)
+        self.assertEqual(result.DOI, doi)
+        # the second time the row comes from the cache
+        client.result = FakeBigQueryRowIterator([])
+        self.assertEqual(bigquery.manuscript_data(client, doi, cache), result)
+
+    def test_no_rows(self):
+        "test no rows are not cached"
+        client = FakeBigQueryClient(FakeBigQueryRowIterator([]))
+        cache = bigquery.QueryCache()
+        self.assertIsNone(bigquery.manuscript_data(client, "10.7554/eLife.1", cache))
+        self.assertEqual(len(cache.entries), 0)
+
+
+class TestPreprintMetadataQuery(unittest.TestCase):
+    def test_preprint_metadata_query(self):
+        "test the query has a column for each view and unnests the versions"
+        query = bigquery.preprint_metadata_query()
+        for view_name in [
+            bigquery.BIG_QUERY_DATA_AVAILABILITY_VIEW_NAME,
+            bigquery.BIG_QUERY_PREPRINT_FUNDING_VIEW_NAME,
+            bigquery.BIG_QUERY_PREPRINT_AUTHOR_VIEW_NAME,
+        ]:
+            self.assertTrue("`%s`" % view_name in query)
+        self.assertTrue(query.endswith("FROM UNNEST(@versions) AS version"))
+
+
+class TestGetPreprintMetadata(unittest.TestCase):
+    "tests for get_preprint_metadata()"
+
+    def test_get_preprint_metadata(self):
+        "test data for many versions is returned by one query job"
+        client = FakeBigQueryPreprintMetadataClient(
+            [bigquery_test_data.PREPRINT_95901_V1_DATA_AVAILABILITY_RESULT],
+            funding_rows=bigquery_test_data.PREPRINT_95901_V1_FUNDING_RESULT,
+            author_rows=bigquery_test_data.PREPRINT_95901_V1_AUTHOR_DETAILS_RESULT,
+        )
+        versions = [(95901, 1), ("95901", "2"), (95901, 1)]
+        # invoke
+        result = bigquery.get_preprint_metadata(client, versions)
+        # assert
+        self.assertEqual(len(client.queries), 1)
+        job_config = client.queries[0][1]
+        self.assertEqual(len(job_config.query_parameters[0].values), 2)
+        self.assertEqual(sorted(result.keys()), [("95901", "1"), ("95901", "2")])
+        metadata = result.get(("95901", "1"))
+        self.assertEqual(
+            metadata.data_availability_data.get("long_manuscript_identifier"),
+            "eLife-RP-RA-2023-89331R2",
+        )
+        # the rows can be parsed the same as rows from the separate queries
+        funding_awards = bigquery.parse_funding_data(metadata.funding_data)
+        self.assertEqual(
+            funding_awards[0].institution_name,
+            "HHS | NIH | National Heart, Lung, and Blood Institute (NHLBI)",
+        )
+        self.assertEqual(
+            bigquery.parse_author_data(metadata.author_data),
+            bigquery.parse_author_data(
+                bigquery_test_data.PREPRINT_95901_V1_AUTHOR_DETAILS_RESULT
+            ),
+        )
+
+    def test_cache(self):
+        "test only versions not in the cache are queried"
+        client = FakeBigQueryPreprintMetadataClient(
+            [bigquery_test_data.PREPRINT_95901_V1_DATA_AVAILABILITY_RESULT],
+            bigquery_test_data.PREPRINT_95901_V1_FUNDING_RESULT,
+            bigquery_test_data.PREPRINT_95901_V1_AUTHOR_DETAILS_RESULT,
+        )
+        cache = bigquery.QueryCache()
+        bigquery.get_preprint_metadata(client, [(95901, 1)], cache)
+        result = bigquery.get_preprint_metadata(client, [(95901, 1), (95901, 2)], cache)
+        self.assertEqual(len(client.queries), 2)
+        self.assertEqual(len(client.queries[1][1].query_parameters[0].values), 1)
+        self.assertEqual(len(result.get(("95901", "1")).funding_data), 6)
+        # all versions cached
+        bigquery.get_preprint_metadata(client, [(95901, 2), (95901, 1)], cache)
+        self.assertEqual(len(client.queries), 2)
+
+    def test_empty_not_cached(self):
+        "test a version with no data is queried again"
+        client = FakeBigQueryPreprintMetadataClient()
+        cache = bigquery.QueryCache()
+        result = bigquery.get_preprint_metadata(client, [(95901, 1)], cache)
+        self.assertFalse(result.get(("95901", "1")).is_complete())
+        bigquery.get_preprint_metadata(client, [(95901, 1)], cache)
+        self.assertEqual(len(client.queries), 2)
+
+    def test_incomplete_not_cached(self):
+        "test a version missing some of its data is queried again"
+        client = FakeBigQueryPreprintMetadataClient(
+            funding_rows=bigquery_test_data.PREPRINT_95901_V1_FUNDING_RESULT
+        )
+        cache = bigquery.QueryCache()
+        result = bigquery.get_preprint_metadata(client, [(95901, 1)], cache)
+        self.assertFalse(result.get(("95901", "1")).is_complete())
+        bigquery.get_preprint_metadata(client, [(95901, 1)], cache)
+        self.assertEqual(len(client.queries), 2)
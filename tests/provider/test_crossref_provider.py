@@ -4,6 +4,7 @@ import unittest
 from collections import OrderedDict
 from xml.etree import ElementTree
 from mock import patch
+import requests
 from testfixtures import TempDirectory
 from elifecrossref import clinical_trials, generate
 from elifearticle.article import Article, ArticleDate, Contributor
@@ -29,6 +30,7 @@ class TestCrossrefProvider(unittest.TestCase):
 
     def tearDown(self):
         TempDirectory.cleanup_all()
+        crossref.DEPOSIT_CLIENTS.clear()
 
     def test_elifecrossref_config(self):
         """test reading the crossref config file"""
@@ -53,6 +55,53 @@ class TestCrossrefProvider(unittest.TestCase):
         self.assertEqual(len(article_object_map), 1)
         self.assertEqual(len(bad_xml_files), 1)
 
+    def test_article_xml_list_parse_max_workers(self):
+        "test parsing in a process pool keeps the order of the files"
+        article_xml_files = [
+            self.good_xml_file,
+            self.bad_xml_file,
+            "tests/test_data/crossref/outbox/elife_poa_e03977.xml",
+        ]
+        bad_xml_files = []
+        article_object_map = crossref.article_xml_list_parse(
+            article_xml_files, bad_xml_files, self.directory.path, max_workers=2
+        )
+        self.assertEqual(
+            list(article_object_map), [article_xml_files[0], article_xml_files[2]]
+        )
+        self.assertEqual(
+            [article.doi for article in article_object_map.values()],
+            ["10.7554/eLife.18753", "10.7554/eLife.03977"],
+        )
+        self.assertEqual(bad_xml_files, [self.bad_xml_file])
+
+    def test_map_articles(self):
+        self.assertEqual(
+            crossref.map_articles(abs, [-1, 2, -3], max_workers=2), [1, 2, 3]
+        )
+        self.assertEqual(crossref.map_articles(abs, [], max_workers=2), [])
+
+    @patch.object(crossref, "ProcessPoolExecutor")
+    def test_map_articles_broken_pool(self, fake_executor):
+        "test the items are processed in this process if the pool fails"
+        fake_executor.side_effect = crossref.BrokenProcessPool("child died")
+        self.assertEqual(
+            crossref.map_articles(abs, [-1, 2, -3], max_workers=2), [1, 2, 3]
+        )
+        self.assertEqual(
+            fake_executor.call_args[1].get("mp_context").get_start_method(), "spawn"
+        )
+
+    def test_generate_max_workers(self):
+        class Settings:
+            crossref_generate_max_workers = 3
+
+        self.assertEqual(crossref.generate_max_workers(Settings), 3)
+        self.assertEqual(
+            crossref.generate_max_workers(settings_mock),
+            crossref.GENERATE_MAX_WORKERS,
+        )
+
     def test_contributor_orcid_authenticated(self):
         "test setting Contributor orcid_authenticated attribute"
         article = Article()
@@ -184,7 +233,7 @@ class TestCrossrefProvider(unittest.TestCase):
         )
         self.assertEqual(payload, expected)
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_upload_files_to_endpoint(self, fake_request):
         status_code = 200
         xml_files = [self.good_xml_file]
@@ -198,8 +247,9 @@ class TestCrossrefProvider(unittest.TestCase):
         self.assertEqual(status, expected_status)
         self.assertEqual(http_detail_list, expected_detail)
 
-    @patch("requests.post")
-    def test_upload_files_to_endpoint_failure(self, fake_request):
+    @patch("time.sleep")
+    @patch("requests.Session.post")
+    def test_upload_files_to_endpoint_failure(self, fake_request, fake_sleep):
         status_code = 500
         xml_files = [self.good_xml_file]
 
@@ -230,6 +280,174 @@ class TestCrossrefProvider(unittest.TestCase):
         self.assertEqual(len(good_xml_files), 1)
         self.assertEqual(len(bad_xml_files), 1)
 
+    def test_generate_crossref_xml_to_disk_deposit_file_map(self):
+        articles = crossref.parse_article_xml([self.good_xml_file], self.directory.path)
+        article_object_map = OrderedDict([(self.good_xml_file, articles[0])])
+        deposit_file_map = {}
+        crossref_config = crossref.elifecrossref_config(settings_mock)
+        with patch.object(crossref.generate, "TMP_DIR", self.directory.path):
+            crossref.generate_crossref_xml_to_disk(
+                article_object_map,
+                crossref_config,
+                [],
+                [],
+                deposit_file_map=deposit_file_map,
+            )
+        self.assertEqual(list(deposit_file_map.values()), [self.good_xml_file])
+        self.assertTrue(os.path.exists(list(deposit_file_map)[0]))
+
+    def test_generate_crossref_xml_to_disk_same_manuscript(self):
+        "test two outbox files for the same manuscript get their own deposit file"
+        articles = crossref.parse_article_xml([self.good_xml_file], self.directory.path)
+        article_object_map = OrderedDict(
+            [("first.xml", articles[0]), ("second.xml", articles[0])]
+        )
+        deposit_file_map = {}
+        crossref_config = crossref.elifecrossref_config(settings_mock)
+        with patch.object(crossref.generate, "TMP_DIR", self.directory.path):
+            crossref.generate_crossref_xml_to_disk(
+                article_object_map,
+                crossref_config,
+                [],
+                [],
+                deposit_file_map=deposit_file_map,
+            )
+        self.assertEqual(sorted(deposit_file_map.values()), ["first.xml", "second.xml"])
+        self.assertEqual(len(os.listdir(self.directory.path)), 2)
+
+    def test_generate_crossref_xml_to_disk_max_workers(self):
+        "test generating in a process pool reports good and bad files in order"
+        articles = crossref.parse_article_xml([self.good_xml_file], self.directory.path)
+        article_object_map = OrderedDict(
+            [
+                ("fake_file_will_raise_exception.xml", None),
+                (self.good_xml_file, articles[0]),
+            ]
+        )
+        good_xml_files = []
+        bad_xml_files = []
+        deposit_file_map = {}
+        crossref_config = crossref.elifecrossref_config(settings_mock)
+        with patch.object(crossref.generate, "TMP_DIR", self.directory.path):
+            crossref.generate_crossref_xml_to_disk(
+                article_object_map,
+                crossref_config,
+                good_xml_files,
+                bad_xml_files,
+                deposit_file_map=deposit_file_map,
+                max_workers=2,
+            )
+        self.assertEqual(good_xml_files, [self.good_xml_file])
+        self.assertEqual(bad_xml_files, ["fake_file_will_raise_exception.xml"])
+        self.assertEqual(
+            os.listdir(self.directory.path),
+            [os.path.basename(deposit_file) for deposit_file in deposit_file_map],
+        )
+
+
+@patch("time.sleep")
+@patch("requests.Session.post")
+class TestCrossrefDepositClient(unittest.TestCase):
+    def setUp(self):
+        self.client = crossref.CrossrefDepositClient(max_workers=2, max_retries=2)
+        self.xml_files = [
+            "tests/test_data/crossref/outbox/elife-18753-v1.xml",
+            "tests/test_data/crossref/outbox/elife_poa_e03977.xml",
+        ]
+
+    def test_deposit_files(self, fake_post, fake_sleep):
+        fake_post.return_value = FakeResponse(200)
+        results = self.client.deposit_files("", {}, self.xml_files, "user_agent")
+        self.assertEqual([result.get("xml_file") for result in results], self.xml_files)
+        self.assertEqual([result.get("status_code") for result in results], [200, 200])
+        self.assertEqual(
+            fake_post.call_args[1].get("headers"), {"user-agent": "user_agent"}
+        )
+        fake_sleep.assert_not_called()
+
+    def test_server_error_retried(self, fake_post, fake_sleep):
+        "test a server error is retried and the file is deposited"
+        fake_post.side_effect = [FakeResponse(503), FakeResponse(200)]
+        result = self.client.deposit_file("", {}, self.xml_files[0])
+        self.assertEqual(result.get("status_code"), 200)
+        self.assertEqual(fake_post.call_count, 2)
+        self.assertEqual(fake_sleep.call_count, 1)
+
+    def test_client_error_not_retried(self, fake_post, fake_sleep):
+        fake_post.return_value = FakeResponse(400)
+        result = self.client.deposit_file("", {}, self.xml_files[0])
+        self.assertEqual(result.get("status_code"), 400)
+        self.assertEqual(fake_post.call_count, 1)
+
+    def test_connection_error(self, fake_post, fake_sleep):
+        "test a connection error is retried and returned when retries are exhausted"
+        fake_post.side_effect = requests.exceptions.ConnectionError("refused")
+        result = self.client.deposit_file("", {}, self.xml_files[0])
+        self.assertEqual(result.get("status_code"), None)
+        self.assertEqual(result.get("error"), "refused")
+        self.assertEqual(fake_post.call_count, 3)
+        self.assertEqual(fake_sleep.call_count, 2)
+
+    def test_missing_file(self, fake_post, fake_sleep):
+        result = self.client.deposit_file("", {}, "does_not_exist.xml")
+        self.assertEqual(result.get("status_code"), None)
+        self.assertIsNotNone(result.get("error"))
+        fake_post.assert_not_called()
+
+
+class TestGetDepositClient(unittest.TestCase):
+    def tearDown(self):
+        crossref.DEPOSIT_CLIENTS.clear()
+
+    def test_get_deposit_client(self):
+        class Settings:
+            crossref_deposit_max_workers = 2
+            crossref_deposit_max_retries = 0
+
+        client = crossref.get_deposit_client(Settings)
+        self.assertEqual(client.max_workers, 2)
+        self.assertEqual(client.max_retries, 0)
+        self.assertIs(crossref.get_deposit_client(Settings), client)
+
+    def test_get_deposit_client_settings(self):
+        "test a client with different settings is not shared"
+
+        class Settings:
+            crossref_deposit_max_workers = 2
+            crossref_deposit_max_retries = 0
+
+        client = crossref.get_deposit_client(Settings)
+        default_client = crossref.get_deposit_client()
+        self.assertIsNot(default_client, client)
+        self.assertEqual(default_client.max_workers, crossref.DEPOSIT_MAX_WORKERS)
+        self.assertEqual(default_client.max_retries, crossref.DEPOSIT_MAX_RETRIES)
+
+
+class TestDepositedXmlFiles(unittest.TestCase):
+    def test_deposited_xml_files(self):
+        "test an XML file is only deposited if all of its deposit files were"
+        xml_files = ["outbox/one.xml", "outbox/two.xml", "outbox/three.xml"]
+        deposit_file_map = {
+            "tmp/one.xml": "outbox/one.xml",
+            "tmp/two_a.xml": "outbox/two.xml",
+            "tmp/two_b.xml": "outbox/two.xml",
+            "tmp/three.xml": "outbox/three.xml",
+        }
+        deposit_results = [
+            crossref.deposit_result("tmp/one.xml", FakeResponse(200)),
+            crossref.deposit_result("tmp/two_a.xml", FakeResponse(200)),
+            crossref.deposit_result("tmp/two_b.xml", FakeResponse(500)),
+            crossref.deposit_result("tmp/three.xml", error="refused"),
+        ]
+        self.assertEqual(
+            crossref.deposited_xml_files(xml_files, deposit_file_map, deposit_results),
+            ["outbox/one.xml"],
+        )
+        self.assertEqual(
+            crossref.deposited_files(deposit_results),
+            ["tmp/one.xml", "tmp/two_a.xml"],
+        )
+
 
 class TestBuildCrossrefXml(unittest.TestCase):
     def setUp(self):
@@ -253,6 +471,34 @@ class TestBuildCrossrefXml(unittest.TestCase):
         self.assertEqual(len(good_xml_files), 1)
         self.assertEqual(len(bad_xml_files), 0)
 
+    def test_build_crossref_xml_max_workers(self):
+        "test building in a process pool returns the objects in order"
+        xml_files = [
+            self.good_xml_file,
+            "tests/test_data/crossref/outbox/elife_poa_e03977.xml",
+        ]
+        articles = crossref.parse_article_xml(xml_files, self.directory.path)
+        article_object_map = OrderedDict(zip(xml_files, articles))
+        good_xml_files = []
+        bad_xml_files = []
+        crossref_xml_file_map = {}
+        crossref_config = crossref.elifecrossref_config(settings_mock)
+        result = crossref.build_crossref_xml(
+            article_object_map,
+            crossref_config,
+            good_xml_files,
+            bad_xml_files,
+            crossref_xml_file_map=crossref_xml_file_map,
+            max_workers=2,
+        )
+        self.assertEqual(len(result), 2)
+        self.assertEqual(good_xml_files, xml_files)
+        self.assertEqual(bad_xml_files, [])
+        self.assertEqual(
+            [crossref_xml_file_map.get(c_xml) for c_xml in result], xml_files
+        )
+        self.assertTrue("eLife.03977" in result[1].output_xml())
+
     @patch.object(generate, "build_crossref_xml")
     def test_build_crossref_xml_exception(self, mock_build):
         "raise an exception when building object"
@@ -375,7 +621,7 @@ class TestClearRelProgramTag(unittest.TestCase):
     def tearDown(self):
         TempDirectory.cleanup_all()
 
-    @patch.object(clinical_trials, "registry_name_to_doi_map")  
+    @patch.object(clinical_trials, "registry_name_to_doi_map")
     def test_clear_rel_program_tag(self, fake_clinical_trial_name_map):
         fake_clinical_trial_name_map.return_value = {
             "ClinicalTrials.gov": "10.18810/clinical-trials-gov",
@@ -498,6 +744,33 @@ class TestCrossrefXmlToDisk(unittest.TestCase):
         self.assertEqual(len(file_list), 1)
         self.assertTrue(file_list[0].endswith(".xml"))
 
+    @patch.object(clinical_trials, "registry_name_to_doi_map")
+    def test_crossref_xml_to_disk_same_batch_id(self, fake_clinical_trial_name_map):
+        "test a second file with the same batch_id does not overwrite the first"
+        fake_clinical_trial_name_map.return_value = {}
+        xml_file = "tests/test_data/crossref_minimal/outbox/elife-1234567890-v99.xml"
+        articles = crossref.parse_article_xml([xml_file], self.directory.path)
+        article_object_map = OrderedDict([(xml_file, articles[0])])
+        crossref_config = crossref.elifecrossref_config(settings_mock)
+        crossref_xml_object = crossref.build_crossref_xml(
+            article_object_map, crossref_config, [], []
+        )[0]
+        # invoke function
+        first_file = crossref.crossref_xml_to_disk(
+            crossref_xml_object, self.directory.path
+        )
+        second_file = crossref.crossref_xml_to_disk(
+            crossref_xml_object, self.directory.path
+        )
+        # assertion
+        self.assertEqual(
+            os.path.basename(first_file), "%s.xml" % crossref_xml_object.batch_id
+        )
+        self.assertEqual(
+            os.path.basename(second_file), "%s-2.xml" % crossref_xml_object.batch_id
+        )
+        self.assertEqual(len(os.listdir(self.directory.path)), 2)
+
 
 class TestDoiExists(unittest.TestCase):
     def setUp(self):
@@ -1,7 +1,11 @@
+import io
 import json
+import os
+import time
 import unittest
 import datetime
 from mock import patch
+from testfixtures import TempDirectory
 from docmaptools import parse
 from provider import docmap_provider, utils
 from tests import read_fixture, settings_mock
@@ -53,6 +57,95 @@ class TestGetDocmapIndex(unittest.TestCase):
             docmap_provider.get_docmap_index(self.url, self.logger)
 
 
+class TestDocmapCache(unittest.TestCase):
+    def tearDown(self):
+        TempDirectory.cleanup_all()
+
+    def test_docmap_cache(self):
+        directory = TempDirectory()
+        with patch.object(
+            settings_mock, "docmap_cache_dir", directory.path, create=True
+        ):
+            cache = docmap_provider.docmap_cache(settings_mock)
+        self.assertIsNone(cache.get("https://example.org/"))
+        cache.put("https://example.org/", '"etag"', None, b'{"docmaps": []}\n')
+        cached = cache.get("https://example.org/")
+        with cached.get("file") as open_file:
+            self.assertEqual(open_file.read(), b'{"docmaps": []}\n')
+        self.assertEqual(cached.get("etag"), '"etag"')
+        self.assertTrue(cached.get("time") <= time.time())
+
+    def test_docmap_cache_no_settings(self):
+        self.assertIsNone(docmap_provider.docmap_cache(settings_mock))
+
+
+class TestGetDocmapResponse(unittest.TestCase):
+    def setUp(self):
+        self.directory = TempDirectory()
+        self.cache = docmap_provider.DocmapCache(
+            os.path.join(self.directory.path, "cache")
+        )
+        self.url = "https://example.org/"
+
+    def tearDown(self):
+        TempDirectory.cleanup_all()
+
+    @patch("requests.get")
+    def test_not_modified(self, mock_requests_get):
+        "a conditional request is made and cached content returned if not modified"
+        response = FakeResponse(200, content=b"test")
+        response.headers = {"ETag": '"1"', "Last-Modified": "Mon, 01 Jan 2024"}
+        mock_requests_get.return_value = response
+        result = docmap_provider.get_docmap_response(self.url, cache=self.cache)
+        self.assertEqual(result, (200, b"test"))
+        mock_requests_get.return_value = FakeResponse(304)
+        result = docmap_provider.get_docmap_response(self.url, cache=self.cache)
+        self.assertEqual(result, (200, b"test"))
+        headers = mock_requests_get.call_args[1].get("headers")
+        self.assertEqual(headers.get("If-None-Match"), '"1"')
+        self.assertEqual(headers.get("If-Modified-Since"), "Mon, 01 Jan 2024")
+        self.assertEqual(headers.get("Accept-Encoding"), "gzip")
+
+    @patch("requests.get")
+    def test_not_modified_touch(self, mock_requests_get):
+        "a not modified response updates the cached time without rewriting the file"
+        response = FakeResponse(200, content=b"test")
+        response.headers = {"ETag": '"1"'}
+        mock_requests_get.return_value = response
+        docmap_provider.get_docmap_response(self.url, cache=self.cache)
+        cache_path = self.cache.file_cache.path("docmap", self.url, None)
+        os.utime(cache_path, (0, 0))
+        inode = os.stat(cache_path).st_ino
+        mock_requests_get.return_value = FakeResponse(304)
+        docmap_provider.get_docmap_response(self.url, cache=self.cache)
+        self.assertEqual(os.stat(cache_path).st_ino, inode)
+        cached = self.cache.get(self.url)
+        cached.get("file").close()
+        self.assertTrue(cached.get("time") > 0)
+
+    @patch("requests.get")
+    def test_max_age(self, mock_requests_get):
+        "no request is made while the cached content is newer than max_age"
+        mock_requests_get.return_value = FakeResponse(200, content=b"test")
+        docmap_provider.get_docmap_response(self.url, cache=self.cache, max_age=60)
+        result = docmap_provider.get_docmap_response(
+            self.url, cache=self.cache, max_age=60
+        )
+        self.assertEqual(result, (200, b"test"))
+        self.assertEqual(mock_requests_get.call_count, 1)
+        # an expired cached response is requested again
+        with patch.object(time, "time", return_value=time.time() + 61):
+            docmap_provider.get_docmap_response(self.url, cache=self.cache, max_age=60)
+        self.assertEqual(mock_requests_get.call_count, 2)
+
+    @patch("requests.get")
+    def test_error_not_cached(self, mock_requests_get):
+        mock_requests_get.return_value = FakeResponse(404, content=b"not found")
+        result = docmap_provider.get_docmap_response(self.url, cache=self.cache)
+        self.assertEqual(result, (404, b"not found"))
+        self.assertIsNone(self.cache.get(self.url))
+
+
 class TestGetDocmapIndexByAccountId(unittest.TestCase):
     def setUp(self):
         self.logger = FakeLogger()
@@ -228,6 +321,60 @@ class TestProfileDocmapSteps(unittest.TestCase):
         self.assertEqual(result, expected)
 
 
+class TestIterDocmapIndex(unittest.TestCase):
+    "tests for iter_docmap_index()"
+
+    def test_iter_docmap_index(self):
+        "docmaps are read from small reads of the file"
+        docmaps = [
+            json.loads(read_fixture("sample_docmap_for_84364.json")),
+            json.loads(read_fixture("sample_docmap_for_87445.json")),
+        ]
+        index_string = json.dumps(
+            {"count": 12345, "other": [{"docmaps": []}], "docmaps": docmaps},
+            indent=2,
+        )
+        result = list(
+            docmap_provider.iter_docmap_index(io.StringIO(index_string), read_size=7)
+        )
+        self.assertEqual(result, docmaps)
+
+    def test_iter_docmap_index_empty(self):
+        for index_string in ["{}", '{"docmaps": []}', '{"docmaps": null}']:
+            result = list(docmap_provider.iter_docmap_index(io.StringIO(index_string)))
+            self.assertEqual(result, [])
+
+    def test_iter_docmap_index_invalid(self):
+        with self.assertRaises(ValueError):
+            list(docmap_provider.iter_docmap_index(io.StringIO('{"docmaps": [{}')))
+
+
+class TestDocmapProfileJson(unittest.TestCase):
+    "tests for docmap_profile_to_json() and docmap_profile_from_json()"
+
+    def test_round_trip(self):
+        docmap_index_json = {
+            "docmaps": [json.loads(read_fixture("sample_docmap_for_87445.json"))]
+        }
+        step_map = docmap_provider.docmap_profile_step_map(docmap_index_json)
+        json_string = docmap_provider.docmap_profile_to_json(step_map)
+        self.assertEqual(
+            json.loads(json_string).get("10.7554/eLife.87445.1"),
+            [1, 4, "2023-05-12T14:00:00+00:00"],
+        )
+        self.assertEqual(
+            docmap_provider.docmap_profile_from_json(json_string), step_map
+        )
+
+    def test_docmap_profile_resource(self):
+        self.assertEqual(
+            docmap_provider.docmap_profile_resource(
+                "s3://bucket/docmaps/run_2024_06_27_0001/docmap_index/docmap_index.json"
+            ),
+            "s3://bucket/docmaps/run_2024_06_27_0001/docmap_index/docmap_profile.json",
+        )
+
+
 class TestChangedVersionDoiData(unittest.TestCase):
     "tests for changed_version_doi_data()"
 
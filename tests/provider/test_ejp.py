@@ -12,6 +12,7 @@ from mock import patch
 from ddt import ddt, data, unpack
 from provider import ejp, utils
 from provider.ejp import EJP
+from provider.file_cache import FileCache
 from tests import settings_mock
 from tests.activity.classes_mock import FakeStorageContext
 
@@ -21,6 +22,7 @@ class TestProviderEJP(unittest.TestCase):
     def setUp(self):
         self.directory = TempDirectory()
         self.ejp = EJP(settings_mock, tmp_dir=self.directory.path)
+        ejp.LATEST_S3_FILE_NAMES.clear()
         self.author_column_headings = [
             "ms_no",
             "author_seq",
@@ -45,6 +47,7 @@ class TestProviderEJP(unittest.TestCase):
 
     def tearDown(self):
         TempDirectory.cleanup_all()
+        ejp.LATEST_S3_FILE_NAMES.clear()
 
     @tempdir()
     @data(
@@ -423,6 +426,43 @@ class TestProviderEJP(unittest.TestCase):
         # assert results
         self.assertEqual(s3_key_name, expected_s3_key_name)
 
+    @patch.object(arrow, "utcnow")
+    @patch("provider.ejp.EJP.latest_s3_file_name_by_convention")
+    @patch("provider.ejp.EJP.ejp_bucket_file_list")
+    def test_find_latest_s3_file_name_reused(
+        self, fake_ejp_bucket_file_list, fake_by_convention, fake_utcnow
+    ):
+        "test the bucket is listed once a day and the expected name is preferred"
+        fake_utcnow.return_value = arrow.arrow.Arrow(2019, 6, 10)
+        fake_by_convention.return_value = None
+        fake_ejp_bucket_file_list.return_value = [
+            {
+                "name": "ejp_query_tool_query_id_POA_Author_2019_06_09_eLife.csv",
+                "last_modified_timestamp": 1560038400,
+            }
+        ]
+        for _ in range(2):
+            self.assertEqual(
+                self.ejp.find_latest_s3_file_name("poa_author"),
+                "ejp_query_tool_query_id_POA_Author_2019_06_09_eLife.csv",
+            )
+        self.assertEqual(fake_ejp_bucket_file_list.call_count, 1)
+        # a file with the expected name for the day is found once it exists
+        fake_by_convention.return_value = (
+            "ejp_query_tool_query_id_POA_Author_2019_06_10_eLife.csv"
+        )
+        for _ in range(2):
+            self.assertEqual(
+                self.ejp.find_latest_s3_file_name("poa_author"),
+                "ejp_query_tool_query_id_POA_Author_2019_06_10_eLife.csv",
+            )
+        self.assertEqual(fake_by_convention.call_count, 3)
+        # the bucket is listed again the next day
+        fake_utcnow.return_value = arrow.arrow.Arrow(2019, 6, 11)
+        fake_by_convention.return_value = None
+        self.ejp.find_latest_s3_file_name("poa_author")
+        self.assertEqual(fake_ejp_bucket_file_list.call_count, 2)
+
     @patch("provider.ejp.storage_context")
     def test_ejp_bucket_file_list(self, fake_storage_context):
         bucket_list_file_new = os.path.join(
@@ -456,6 +496,138 @@ class TestProviderEJP(unittest.TestCase):
         )
 
 
+class TestAuthorIndex(unittest.TestCase):
+    "the index returns the same authors as scanning the CSV file"
+
+    def test_authors(self):
+        document = os.path.join("tests", "test_data", "ejp_author_file.csv")
+        index = ejp.AuthorIndex.from_document(document)
+        for doi_id in [None, 3, "13", 666]:
+            for corresponding in [None, True, False]:
+                self.assertEqual(
+                    index.authors(doi_id, corresponding),
+                    ejp.author_detail_list(document, doi_id, corresponding),
+                )
+
+    def test_preprint_authors(self):
+        document = os.path.join("tests", "test_data", "ejp_preprint_author_file.csv")
+        index = ejp.AuthorIndex.from_document(document)
+        for doi_id in [86939, "91826", 666]:
+            for version in [None, 1, "2", 3]:
+                self.assertEqual(
+                    index.preprint_authors(doi_id, version),
+                    ejp.preprint_author_detail_list(document, doi_id, version),
+                )
+
+
+class TestGetAuthorIndex(unittest.TestCase):
+    def setUp(self):
+        self.directory = TempDirectory()
+        self.ejp = EJP(settings_mock, tmp_dir=self.directory.path)
+        self.s3_key_name = (
+            "ejp_query_tool_query_id_15a)_Accepted_Paper_Details_2019_06_10_eLife.csv"
+        )
+        shutil.copy(
+            os.path.join("tests", "test_data", "ejp_author_file.csv"),
+            os.path.join(self.directory.path, self.s3_key_name),
+        )
+        self.storage = FakeStorageContext(self.directory.path, [self.s3_key_name])
+        self.etag = '"etag"'
+        self.storage.get_resource_attributes = lambda resource: {"ETag": self.etag}
+        ejp.AUTHOR_INDEXES.clear()
+
+    def tearDown(self):
+        ejp.AUTHOR_INDEXES.clear()
+        TempDirectory.cleanup_all()
+
+    @patch("provider.ejp.storage_context")
+    @patch("provider.ejp.EJP.find_latest_s3_file_name")
+    def test_get_author_index(self, fake_find_latest, fake_storage_context):
+        "test the CSV file is only downloaded again when its ETag changes"
+        fake_find_latest.return_value = self.s3_key_name
+        fake_storage_context.return_value = self.storage
+        with patch.object(
+            self.storage,
+            "get_resource_as_string",
+            wraps=self.storage.get_resource_as_string,
+        ) as fake_get:
+            first_authors = self.ejp.get_authors(13)
+            second_authors = self.ejp.get_authors(3)
+            self.assertEqual(fake_get.call_count, 1)
+            self.etag = '"new_etag"'
+            self.ejp.get_authors(13)
+            self.assertEqual(fake_get.call_count, 2)
+        self.assertEqual(len(first_authors[1]), 4)
+        self.assertEqual(len(second_authors[1]), 3)
+
+    @patch("provider.ejp.storage_context")
+    @patch("provider.ejp.EJP.find_latest_s3_file_name")
+    def test_saved_author_index(self, fake_find_latest, fake_storage_context):
+        "test an index saved by another process is used"
+        fake_find_latest.return_value = self.s3_key_name
+        fake_storage_context.return_value = self.storage
+        index_dir = os.path.join(self.directory.path, "index")
+        with patch.object(
+            settings_mock, "ejp_author_index_dir", index_dir, create=True
+        ):
+            with patch.object(
+                self.storage,
+                "get_resource_as_string",
+                wraps=self.storage.get_resource_as_string,
+            ) as fake_get:
+                expected = self.ejp.get_authors(13)
+                # clear the indexes in memory as if in another process
+                ejp.AUTHOR_INDEXES.clear()
+                self.assertEqual(self.ejp.get_authors(13), expected)
+                self.assertEqual(fake_get.call_count, 1)
+        self.assertEqual(len(os.listdir(index_dir)), 1)
+
+    @patch("provider.ejp.storage_context")
+    @patch("provider.ejp.EJP.find_latest_s3_file_name")
+    def test_saved_author_index_corrupt(self, fake_find_latest, fake_storage_context):
+        "test an index which cannot be loaded is built again"
+        fake_find_latest.return_value = self.s3_key_name
+        fake_storage_context.return_value = self.storage
+        index_dir = os.path.join(self.directory.path, "index")
+        cache = FileCache(index_dir, ejp.AUTHOR_INDEX_CACHE_MAX_BYTES)
+        cache.put(
+            settings_mock.ejp_bucket,
+            self.s3_key_name,
+            self.etag,
+            lambda open_file: open_file.write(b"not a pickle"),
+        )
+        with patch.object(
+            settings_mock, "ejp_author_index_dir", index_dir, create=True
+        ):
+            authors = self.ejp.get_authors(13)
+            self.assertEqual(len(authors[1]), 4)
+            # the saved index was replaced
+            ejp.AUTHOR_INDEXES.clear()
+            self.assertEqual(self.ejp.get_authors(13), authors)
+
+    @patch("provider.ejp.storage_context")
+    @patch("provider.ejp.EJP.find_latest_s3_file_name")
+    def test_get_author_index_replaced(self, fake_find_latest, fake_storage_context):
+        "test the index is kept under the ETag of the content downloaded"
+        fake_find_latest.return_value = self.s3_key_name
+        fake_storage_context.return_value = self.storage
+        # the object is replaced after its ETag is read
+        self.storage.get_resource_as_string_and_etag = lambda resource: (
+            self.storage.get_resource_as_string(resource),
+            '"new_etag"',
+        )
+        self.ejp.get_authors(13)
+        self.assertEqual(
+            list(ejp.AUTHOR_INDEXES),
+            [
+                (
+                    "s3://%s/%s" % (settings_mock.ejp_bucket, self.s3_key_name),
+                    '"new_etag"',
+                )
+            ],
+        )
+
+
 class TestAuthorDetailList(unittest.TestCase):
     def setUp(self):
         self.author_csv_file = os.path.join("tests", "test_data", "ejp_author_file.csv")
@@ -0,0 +1,194 @@
+import gzip
+import unittest
+import requests
+from mock import patch
+from provider import endpoint_client
+from tests.activity.classes_mock import FakeResponse
+
+ENDPOINT_URL = "https://example.org/xsl"
+
+
+def fake_response(status_code, headers=None):
+    response = FakeResponse(status_code, content=b"<root/>")
+    response.headers = headers or {}
+    return response
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    @patch("time.monotonic")
+    def test_circuit_breaker(self, fake_monotonic):
+        "test the circuit opens after the failure threshold and resets"
+        fake_monotonic.return_value = 100
+        breaker = endpoint_client.CircuitBreaker(failure_threshold=2, reset_seconds=60)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+        # one trial request is allowed after reset_seconds
+        fake_monotonic.return_value = 160
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.failures, 0)
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_to_dict(self):
+        histogram = endpoint_client.LatencyHistogram(buckets=[1, 10])
+        for seconds in [0.5, 1, 2, 20]:
+            histogram.observe(seconds)
+        self.assertEqual(
+            histogram.to_dict(),
+            {"count": 4, "sum": 23.5, "buckets": {"1": 2, "10": 3, "+Inf": 4}},
+        )
+
+
+class TestRetryAfterSeconds(unittest.TestCase):
+    def test_seconds(self):
+        response = fake_response(503, {"Retry-After": "5"})
+        self.assertEqual(endpoint_client.retry_after_seconds(response, 0, 2, 30), 5)
+
+    def test_max_seconds(self):
+        response = fake_response(503, {"Retry-After": "120"})
+        self.assertEqual(endpoint_client.retry_after_seconds(response, 0, 2, 30), 30)
+
+    def test_http_date(self):
+        response = fake_response(503, {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})
+        self.assertEqual(endpoint_client.retry_after_seconds(response, 0, 2, 30), 0)
+
+    @patch.object(endpoint_client.utils, "backoff_seconds")
+    def test_no_header(self, fake_backoff_seconds):
+        fake_backoff_seconds.return_value = 1.5
+        response = fake_response(503)
+        self.assertEqual(endpoint_client.retry_after_seconds(response, 2, 2, 30), 1.5)
+        fake_backoff_seconds.assert_called_with(2, 2, 30)
+
+
+@patch("time.sleep")
+@patch("requests.Session.post")
+class TestEndpointClientPost(unittest.TestCase):
+    def setUp(self):
+        self.client = endpoint_client.EndpointClient(
+            max_retries=2, failure_threshold=3, reset_seconds=60
+        )
+
+    def test_post(self, fake_post, fake_sleep):
+        fake_post.return_value = fake_response(200)
+        response = self.client.post(ENDPOINT_URL, b"<root/>", timeout=10)
+        self.assertEqual(response.status_code, 200)
+        fake_post.assert_called_with(
+            ENDPOINT_URL, data=b"<root/>", headers={}, timeout=10
+        )
+        fake_sleep.assert_not_called()
+        self.assertEqual(self.client.histograms()[ENDPOINT_URL]["count"], 1)
+
+    def test_retry_after(self, fake_post, fake_sleep):
+        "test an overloaded response is retried after the Retry-After seconds"
+        fake_post.side_effect = [
+            fake_response(429, {"Retry-After": "3"}),
+            fake_response(200),
+        ]
+        response = self.client.post(ENDPOINT_URL, b"<root/>")
+        self.assertEqual(response.status_code, 200)
+        fake_sleep.assert_called_once_with(3.0)
+
+    def test_retries_exhausted(self, fake_post, fake_sleep):
+        "test the last response is returned when all retries fail"
+        fake_post.return_value = fake_response(503)
+        response = self.client.post(ENDPOINT_URL, b"<root/>")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(fake_post.call_count, 3)
+
+    def test_client_error_not_retried(self, fake_post, fake_sleep):
+        fake_post.return_value = fake_response(400)
+        response = self.client.post(ENDPOINT_URL, b"<root/>")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(fake_post.call_count, 1)
+
+    def test_connection_error(self, fake_post, fake_sleep):
+        "test a connection error is retried and raised when retries are exhausted"
+        fake_post.side_effect = requests.exceptions.ConnectionError("refused")
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            self.client.post(ENDPOINT_URL, b"<root/>")
+        self.assertEqual(fake_post.call_count, 3)
+        self.assertEqual(fake_sleep.call_count, 2)
+
+    def test_read_timeout_not_retried(self, fake_post, fake_sleep):
+        "test a read timeout is raised without sending the request again"
+        fake_post.side_effect = requests.exceptions.ReadTimeout("timed out")
+        with self.assertRaises(requests.exceptions.ReadTimeout):
+            self.client.post(ENDPOINT_URL, b"<root/>")
+        self.assertEqual(fake_post.call_count, 1)
+        fake_sleep.assert_not_called()
+
+    def test_circuit_open(self, fake_post, fake_sleep):
+        "test requests fail fast once the circuit is open"
+        fake_post.return_value = fake_response(503)
+        response = self.client.post(ENDPOINT_URL, b"<root/>")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(fake_post.call_count, 3)
+        with self.assertRaises(endpoint_client.CircuitOpenException):
+            self.client.post(ENDPOINT_URL, b"<root/>")
+        self.assertEqual(fake_post.call_count, 3)
+        # other endpoints are not affected
+        fake_post.return_value = fake_response(200)
+        response = self.client.post("https://example.org/dtd", b"<root/>")
+        self.assertEqual(response.status_code, 200)
+
+    def test_gzip_requests(self, fake_post, fake_sleep):
+        fake_post.return_value = fake_response(200)
+        self.client.gzip_requests = True
+        self.client.post(ENDPOINT_URL, b"<root/>")
+        self.assertEqual(
+            gzip.decompress(fake_post.call_args[1].get("data")), b"<root/>"
+        )
+        self.assertEqual(
+            fake_post.call_args[1].get("headers"), {"Content-Encoding": "gzip"}
+        )
+
+
+class TestGetEndpointClient(unittest.TestCase):
+    def tearDown(self):
+        endpoint_client.ENDPOINT_CLIENTS.clear()
+
+    def test_get_endpoint_client(self):
+        class Settings:
+            endpoint_max_retries = 0
+            endpoint_gzip_requests = True
+
+        client = endpoint_client.get_endpoint_client(Settings)
+        self.assertEqual(client.max_retries, 0)
+        self.assertTrue(client.gzip_requests)
+        self.assertEqual(client.failure_threshold, endpoint_client.FAILURE_THRESHOLD)
+        self.assertIs(endpoint_client.get_endpoint_client(Settings), client)
+        # a caller without settings does not get the client configured by Settings
+        default_client = endpoint_client.get_endpoint_client()
+        self.assertIsNot(default_client, client)
+        self.assertEqual(default_client.max_retries, endpoint_client.MAX_RETRIES)
+        self.assertEqual(len(endpoint_client.histograms()), 2)
+
+
+class TestTemporaryFailureSeconds(unittest.TestCase):
+    def tearDown(self):
+        endpoint_client.ENDPOINT_CLIENTS.clear()
+
+    @patch("time.monotonic")
+    def test_temporary_failure_seconds(self, fake_monotonic):
+        fake_monotonic.return_value = 100
+        self.assertEqual(
+            endpoint_client.temporary_failure_seconds(ENDPOINT_URL, 10), 10
+        )
+        client = endpoint_client.get_endpoint_client()
+        breaker, _ = client.endpoint_state(ENDPOINT_URL)
+        for _ in range(client.failure_threshold):
+            breaker.record_failure()
+        # wait until the open circuit lets a request through
+        fake_monotonic.return_value = 110
+        self.assertEqual(
+            endpoint_client.temporary_failure_seconds(ENDPOINT_URL, 10), 50
+        )
+        fake_monotonic.return_value = 200
+        self.assertEqual(
+            endpoint_client.temporary_failure_seconds(ENDPOINT_URL, 10), 10
+        )
@@ -73,6 +73,99 @@ class TestRedisSession(unittest.TestCase):
         redis_session_object.store_value(key, value)
         self.assertEqual(redis_session_object.get_value(key), value)
 
+    @patch("redis.StrictRedis")
+    def test_store_values(self, fake_strict_redis):
+        session_key = "session_key"
+        values = {"foo": "bar", "article_id": "353"}
+        redis_client = FakeStrictRedis()
+        fake_strict_redis.return_value = redis_client
+        redis_session_object = RedisSession(settings_mock, None, session_key)
+        redis_session_object.store_values(values)
+        # hset and expire are sent in one pipeline
+        self.assertEqual(redis_client.request_count, 1)
+        self.assertEqual(
+            redis_session_object.get_values(["foo", "article_id", "version"]),
+            {"foo": "bar", "article_id": "353", "version": None},
+        )
+        self.assertEqual(redis_client.request_count, 2)
+
+    @patch("redis.StrictRedis")
+    def test_scoped(self, fake_strict_redis):
+        session_key = "session_key"
+        redis_client = FakeStrictRedis()
+        redis_client.hset(session_key, "foo", '"bar"')
+        redis_client.request_count = 0
+        fake_strict_redis.return_value = redis_client
+        redis_session_object = RedisSession(settings_mock, {"baz": 1}, session_key)
+        redis_session_object.scoped = True
+        self.assertEqual(redis_session_object.get_value("foo"), "bar")
+        self.assertEqual(redis_session_object.get_value("baz"), 1)
+        redis_session_object.store_value("version", "1")
+        self.assertEqual(redis_session_object.get_value("version"), "1")
+        # one HGETALL, the stored value is not written yet
+        self.assertEqual(redis_client.request_count, 1)
+        self.assertIsNone(redis_client.hget(session_key, "version"))
+        redis_session_object.flush()
+        self.assertEqual(redis_client.hget(session_key, "version"), '"1"')
+        # nothing left to write
+        request_count = redis_client.request_count
+        redis_session_object.flush()
+        self.assertEqual(redis_client.request_count, request_count)
+
+    def test_connection_pool_shared(self):
+        first_session = RedisSession(settings_mock, None, "first")
+        second_session = RedisSession(settings_mock, None, "second")
+        self.assertEqual(
+            first_session.redis_client.connection_pool,
+            second_session.redis_client.connection_pool,
+        )
+
+
+class TestSessionScope(unittest.TestCase):
+    @patch("redis.StrictRedis")
+    def test_session_scope(self, fake_strict_redis):
+        redis_client = FakeStrictRedis()
+        fake_strict_redis.return_value = redis_client
+        with execution_context.session_scope():
+            session = execution_context.get_session(settings_mock, None, "run")
+            session.store_value("foo", "bar")
+            # the same session is returned in the scope
+            self.assertEqual(
+                execution_context.get_session(settings_mock, None, "run"), session
+            )
+            self.assertEqual(
+                execution_context.get_session(settings_mock, None, "run").get_value(
+                    "foo"
+                ),
+                "bar",
+            )
+            self.assertIsNone(redis_client.hget("run", "foo"))
+        # written when the scope exits
+        self.assertEqual(redis_client.hget("run", "foo"), '"bar"')
+        self.assertNotEqual(
+            execution_context.get_session(settings_mock, None, "run"), session
+        )
+
+    @patch("redis.StrictRedis")
+    def test_session_scope_exception(self, fake_strict_redis):
+        "stored values are written when the scope exits with an exception"
+        redis_client = FakeStrictRedis()
+        fake_strict_redis.return_value = redis_client
+        with self.assertRaises(RuntimeError):
+            with execution_context.session_scope():
+                session = execution_context.get_session(settings_mock, None, "run")
+                session.store_value("foo", "bar")
+                raise RuntimeError("An exception")
+        self.assertEqual(redis_client.hget("run", "foo"), '"bar"')
+
+    def test_session_scope_file_session(self):
+        "sessions without a flush are not shared"
+        with execution_context.session_scope():
+            session = execution_context.get_session(TestSettings(), None, "run")
+            self.assertNotEqual(
+                execution_context.get_session(TestSettings(), None, "run"), session
+            )
+
 
 class TestS3Session(unittest.TestCase):
     def tearDown(self):
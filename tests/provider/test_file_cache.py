@@ -0,0 +1,58 @@
+import os
+import time
+import unittest
+from io import BytesIO
+from testfixtures import TempDirectory
+from provider.file_cache import FileCache
+
+
+def write_data(data):
+    "download function writing data to the file pointer"
+    return lambda open_file: open_file.write(data)
+
+
+class TestFileCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = TempDirectory()
+        self.file_cache = FileCache(os.path.join(self.directory.path, "cache"), 10)
+
+    def tearDown(self):
+        TempDirectory.cleanup_all()
+
+    def test_put_get(self):
+        self.file_cache.put("bucket", "key.xml", '"etag"', write_data(b"<article/>"))
+        file = BytesIO()
+        self.assertTrue(
+            self.file_cache.get_to_file("bucket", "key.xml", '"etag"', file)
+        )
+        self.assertEqual(file.getvalue(), b"<article/>")
+
+    def test_get_changed_etag(self):
+        self.file_cache.put("bucket", "key.xml", '"etag"', write_data(b"<article/>"))
+        self.assertFalse(
+            self.file_cache.get_to_file("bucket", "key.xml", '"etag2"', BytesIO())
+        )
+
+    def test_put_exception(self):
+        "no file is added to the cache if the download fails"
+
+        def download(open_file):
+            open_file.write(b"<art")
+            raise RuntimeError("An exception")
+
+        with self.assertRaises(RuntimeError):
+            self.file_cache.put("bucket", "key.xml", '"etag"', download)
+        self.assertEqual(os.listdir(self.file_cache.directory), [])
+
+    def test_evict(self):
+        "least recently used files are removed when the cache is too big"
+        self.file_cache.put("bucket", "1", '"1"', write_data(b"1111"))
+        self.file_cache.put("bucket", "2", '"2"', write_data(b"2222"))
+        # set the modification times apart and use the first file
+        past = time.time() - 60
+        os.utime(self.file_cache.path("bucket", "2", '"2"'), (past, past))
+        self.assertTrue(self.file_cache.get_to_file("bucket", "1", '"1"', BytesIO()))
+        self.file_cache.put("bucket", "3", '"3"', write_data(b"3333"))
+        self.assertTrue(self.file_cache.get_to_file("bucket", "1", '"1"', BytesIO()))
+        self.assertFalse(self.file_cache.get_to_file("bucket", "2", '"2"', BytesIO()))
+        self.assertTrue(self.file_cache.get_to_file("bucket", "3", '"3"', BytesIO()))
@@ -1,3 +1,4 @@
+import time
 import unittest
 from mock import mock, patch
 from provider.iiif import ShortRetryException
@@ -68,6 +69,62 @@ class TestIiif(unittest.TestCase):
         success, test_endpoint = iiif.try_endpoint("test_endpoint", self.fake_logger)
         self.assertEqual(success, False)
 
+    @patch("time.sleep")
+    @patch("requests.head")
+    def test_try_endpoint_max_retries(self, request_mock, fake_sleep):
+        "retries stop after max_retries with increasing sleeps"
+        self._given_responses(request_mock, *[404] * 10)
+        success, test_endpoint = iiif.try_endpoint(
+            "test_endpoint", self.fake_logger, max_retries=3
+        )
+        self.assertEqual(success, False)
+        self.assertEqual(request_mock.call_count, 4)
+        self.assertEqual(fake_sleep.call_count, 3)
+        self.assertEqual(self.fake_logger.logerror, "gave up retrying %s because %s")
+
+    @patch("time.sleep")
+    @patch("requests.head")
+    def test_try_endpoint_deadline(self, request_mock, fake_sleep):
+        "no retry is made after the deadline"
+        self._given_responses(request_mock, 504, 200)
+        success, test_endpoint = iiif.try_endpoint(
+            "test_endpoint", self.fake_logger, deadline=time.time() - 1
+        )
+        self.assertEqual(success, False)
+        self.assertEqual(request_mock.call_count, 1)
+        fake_sleep.assert_not_called()
+
+    @patch("time.sleep")
+    @patch("requests.head")
+    def test_try_endpoint_retry_until_deadline(self, request_mock, fake_sleep):
+        "an image which is not ready is retried until the deadline, not max_retries"
+        self._given_responses(request_mock, *[404] * 10 + [200])
+        success, test_endpoint = iiif.try_endpoint(
+            "test_endpoint", self.fake_logger, max_retries=3, deadline=time.time() + 60
+        )
+        self.assertEqual(success, True)
+        self.assertEqual(request_mock.call_count, 11)
+        self.assertEqual(fake_sleep.call_count, 10)
+
+    @patch("time.sleep")
+    @patch("requests.Session.head")
+    def test_verify_endpoints(self, request_mock, fake_sleep):
+        status_codes = {"fig1": [200], "fig2": [504, 200], "fig3": [500]}
+
+        def head(endpoint_uri, **kwargs):
+            return ObjectView({"status_code": status_codes[endpoint_uri].pop(0)})
+
+        request_mock.side_effect = head
+        report = iiif.verify_endpoints(
+            ["fig1", "fig2", "fig3"], self.fake_logger, max_workers=3
+        )
+        self.assertEqual(
+            report.get("results"),
+            [(True, "fig1"), (True, "fig2"), (False, "fig3")],
+        )
+        self.assertEqual(report.get("failed"), ["fig3"])
+        self.assertEqual(request_mock.call_count, 4)
+
     def _given_responses(self, request_mock, *status_codes):
         request_mock.side_effect = [
             ObjectView({"status_code": code}) for code in status_codes
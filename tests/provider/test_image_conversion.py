@@ -1,5 +1,6 @@
 import unittest
 import os
+from io import BytesIO
 from mock import patch
 from testfixtures import TempDirectory
 from provider import article_structure, image_conversion
@@ -54,7 +55,46 @@ class TestImageConversion(unittest.TestCase):
             % (self.image_file_base, cdn_bucket_name),
         )
 
-    @patch("provider.imageresize.resize")
+    @patch.object(image_conversion, "storage_context")
+    def test_generate_images_renditions(self, fake_storage_context):
+        "test each rendition and its download copy is stored"
+        directory = TempDirectory()
+        fake_storage_context.return_value = FakeStorageContext(
+            directory=directory.path, dest_folder=directory.path
+        )
+        formats = {
+            "Original": {"sources": "tif", "format": "jpg", "download": "yes"},
+            "Small": {"sources": "tif", "format": "png", "width": 100},
+            "Medium": {"sources": "tif", "format": "jpg", "width": 300, "suffix": "-m"},
+            "Other": {"sources": "gif", "format": "jpg"},
+        }
+        info = article_structure.ArticleInfo(self.tif_file)
+        image_conversion.generate_images(
+            settings_mock,
+            formats,
+            self.file_pointer,
+            info,
+            ["s3://bucket/"],
+            self.logger,
+        )
+        self.assertEqual(
+            sorted(os.listdir(directory.path)),
+            [
+                "%s%s" % (self.image_file_base, suffix)
+                for suffix in ["-download.jpg", "-m.jpg", ".jpg", ".png"]
+            ],
+        )
+        self.assertTrue(
+            [
+                message
+                for message in self.logger.loginfo
+                if message.startswith(
+                    "Converted 3 renditions of %s" % self.image_file_base
+                )
+            ]
+        )
+
+    @patch("provider.imageresize.resize_all")
     @patch.object(image_conversion, "storage_context")
     def test_generate_images_resize_error(self, fake_storage_context, fake_resize):
         directory = TempDirectory()
@@ -63,7 +103,7 @@ class TestImageConversion(unittest.TestCase):
         )
         info = article_structure.ArticleInfo(self.tif_file)
         publish_locations = []
-        fake_resize.return_value = None, None
+        fake_resize.return_value = [(None, None)]
         with self.assertRaises(RuntimeError):
             image_conversion.generate_images(
                 settings_mock,
@@ -73,3 +113,39 @@ class TestImageConversion(unittest.TestCase):
                 publish_locations,
                 self.logger,
             )
+
+    @patch.object(image_conversion, "storage_context")
+    def test_store_renditions_in_publish_locations(self, fake_storage_context):
+        "test the data of a rendition is shared by its uploads and the images closed"
+        storage = FakeStorageContext()
+        fake_storage_context.return_value = storage
+        renditions = [
+            ("image.jpg", BytesIO(b"jpg"), False),
+            ("image.png", BytesIO(b"png"), False),
+        ]
+        stored_data = []
+        with patch.object(
+            storage,
+            "set_resource_from_string",
+            side_effect=lambda resource, data, content_type=None: stored_data.append(
+                (resource, data)
+            ),
+        ):
+            image_conversion.store_renditions_in_publish_locations(
+                settings_mock, renditions, ["s3://bucket/", "s3://other_bucket/"]
+            )
+        self.assertEqual(
+            [resource for resource, data in stored_data],
+            [
+                "s3://bucket/image.jpg",
+                "s3://other_bucket/image.jpg",
+                "s3://bucket/image.png",
+                "s3://other_bucket/image.png",
+            ],
+        )
+        self.assertEqual(
+            [data for resource, data in stored_data][::2], [b"jpg", b"png"]
+        )
+        self.assertIs(stored_data[0][1], stored_data[1][1])
+        self.assertIs(stored_data[2][1], stored_data[3][1])
+        self.assertTrue(all(image.closed for filename, image, download in renditions))
@@ -33,6 +33,32 @@ class TestImageresize(unittest.TestCase):
         self.assertEqual(new_file_name, expected_file_name)
         self.assertIsNotNone(image_buffer)
 
+    def test_resize_all(self):
+        "test renditions of each format are made from one decoded image"
+        file_name = "tests/files_source/elife-00353-fig1-v1.tif"
+        info, format_spec = image_spec_info(file_name)
+        formats = [
+            format_spec,
+            {"format": "png", "width": 100},
+            {"format": "jpg", "width": 300, "suffix": "-m"},
+        ]
+        with open(file_name, "rb") as open_file:
+            renditions = resizer.resize_all(formats, open_file, info, self.fake_logger)
+        self.assertEqual(
+            [rendition[0] for rendition in renditions],
+            [
+                "tests/files_source/elife-00353-fig1-v1.jpg",
+                "tests/files_source/elife-00353-fig1-v1.png",
+                "tests/files_source/elife-00353-fig1-v1-m.jpg",
+            ],
+        )
+        widths = []
+        for rendition in renditions:
+            with wand.image.Image(blob=rendition[1].getvalue()) as image:
+                widths.append(image.width)
+        self.assertEqual(widths[1:], [100, 300])
+        self.assertTrue(widths[0] > 300)
+
     @patch.object(wand.image.Image, "convert")
     def test_resize_exception_in_convert(self, fake_convert):
         fake_convert.side_effect = Exception("An exception")
@@ -3,6 +3,7 @@ import provider.utils as utils
 import provider.lax_provider as lax_provider
 import tests.settings_mock as settings_mock
 import base64
+import time
 import json
 import tests.test_data as test_data
 from provider.lax_provider import ErrorCallingLaxException
@@ -96,7 +97,7 @@ class TestLaxProvider(unittest.TestCase):
         )
         self.assertEqual("2015-11-30T00:00:00Z", result)
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_article_version_200(self, mock_requests_get):
         response = MagicMock()
         response.status_code = 200
@@ -108,7 +109,7 @@ class TestLaxProvider(unittest.TestCase):
         self.assertEqual(status_code, 200)
         self.assertEqual(versions, [{"status": "preprint"}, {"version": 1}])
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_article_version_404(self, mock_requests_get):
         response = MagicMock()
         response.status_code = 404
@@ -117,7 +118,7 @@ class TestLaxProvider(unittest.TestCase):
         self.assertEqual(status_code, 404)
         self.assertIsNone(versions)
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_article_version_500(self, mock_requests_get):
         response = MagicMock()
         response.status_code = 500
@@ -129,7 +130,7 @@ class TestLaxProvider(unittest.TestCase):
             settings_mock,
         )
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_article_json_200(self, mock_requests_get):
         article_json = {"status": "vor"}
         response = MagicMock()
@@ -141,7 +142,7 @@ class TestLaxProvider(unittest.TestCase):
         # data returned will be exactly the value assigned to the mock response
         self.assertEqual(data, article_json)
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_article_related_200(self, mock_requests_get):
         related_article_json = []
         response = MagicMock()
@@ -169,7 +170,7 @@ class TestLaxProvider(unittest.TestCase):
         expected = "an_auth_key"
         self.assertEqual(lax_provider.lax_auth_key(settings_mock, True), expected)
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_article_snippet_200_auth(self, mock_requests_get):
         expected_data = {"version": 1, "type": "research-article"}
         # add a preprint article, which has no version key, for test coverage
@@ -182,7 +183,7 @@ class TestLaxProvider(unittest.TestCase):
         data = lax_provider.article_snippet("08411", 1, settings_mock, True)
         self.assertEqual(data, expected_data)
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_article_snippet_403(self, mock_requests_get):
         "scenario where the request is not authorized"
         response = MagicMock()
@@ -559,3 +560,108 @@ class TestGetXmlFileName(unittest.TestCase):
             settings_mock, "folder", "bucket", version=None
         )
         self.assertEqual(result, None)
+
+
+class TestLaxClient(unittest.TestCase):
+    def setUp(self):
+        self.url = "https://example.org/api/article/08411/versions"
+        self.headers = {"Authorization": "public"}
+        self.response = MagicMock()
+        self.response.status_code = 200
+
+    @patch("requests.Session.get")
+    def test_get_cached(self, mock_session_get):
+        "a response is requested once while it is cached"
+        mock_session_get.return_value = self.response
+        client = lax_provider.LaxClient(ttl=60)
+        for _ in range(3):
+            result = client.get(self.url, "08411", True, self.headers)
+        self.assertEqual(result, self.response)
+        self.assertEqual(mock_session_get.call_count, 1)
+        self.assertEqual(client.counters(), {"hits": 2, "misses": 1, "size": 1})
+
+    @patch("requests.Session.get")
+    def test_get_no_ttl(self, mock_session_get):
+        mock_session_get.return_value = self.response
+        client = lax_provider.LaxClient()
+        client.get(self.url, "08411", True, self.headers)
+        client.get(self.url, "08411", True, self.headers)
+        self.assertEqual(mock_session_get.call_count, 2)
+
+    @patch("requests.Session.get")
+    def test_get_expired(self, mock_session_get):
+        mock_session_get.return_value = self.response
+        client = lax_provider.LaxClient(ttl=60)
+        client.get(self.url, "08411", True, self.headers)
+        with patch("time.time", return_value=time.time() + 61):
+            client.get(self.url, "08411", True, self.headers)
+        self.assertEqual(mock_session_get.call_count, 2)
+
+    @patch("requests.Session.get")
+    def test_get_not_found(self, mock_session_get):
+        "an unsuccessful response is not cached"
+        self.response.status_code = 404
+        mock_session_get.return_value = self.response
+        client = lax_provider.LaxClient(ttl=60)
+        client.get(self.url, "08411", True, self.headers)
+        client.get(self.url, "08411", True, self.headers)
+        self.assertEqual(mock_session_get.call_count, 2)
+
+    @patch("requests.Session.get")
+    def test_max_size(self, mock_session_get):
+        mock_session_get.return_value = self.response
+        client = lax_provider.LaxClient(ttl=60, max_size=2)
+        for article_id in ["1", "2", "1", "3"]:
+            client.get(self.url + article_id, article_id, True, self.headers)
+        # the least recently used response was removed
+        client.get(self.url + "2", "2", True, self.headers)
+        self.assertEqual(mock_session_get.call_count, 4)
+        self.assertEqual(client.counters().get("size"), 2)
+
+    @patch("requests.Session.get")
+    def test_invalidate(self, mock_session_get):
+        mock_session_get.return_value = self.response
+        client = lax_provider.LaxClient(ttl=60)
+        client.get(self.url, 8411, True, self.headers)
+        client.get("https://example.org/api/article/00666", 666, True, self.headers)
+        client.invalidate("08411")
+        client.get(self.url, 8411, True, self.headers)
+        self.assertEqual(mock_session_get.call_count, 3)
+        self.assertEqual(client.counters().get("size"), 2)
+
+    @patch("requests.Session.get")
+    def test_article_versions_cached(self, mock_session_get):
+        "version lookups for an article in a lax_scope make one request to Lax"
+
+        class Settings:
+            lax_article_versions = settings_mock.lax_article_versions
+            verify_ssl = settings_mock.verify_ssl
+            lax_cache_ttl_seconds = 60
+
+        self.response.json.return_value = {
+            "versions": test_data.lax_article_versions_response_data
+        }
+        mock_session_get.return_value = self.response
+        with lax_provider.lax_scope(Settings):
+            lax_provider.article_highest_version("08411", Settings)
+            lax_provider.was_ever_poa("08411", Settings)
+            lax_provider.article_publication_date("08411", Settings)
+            self.assertEqual(mock_session_get.call_count, 1)
+            lax_provider.invalidate_article("08411")
+            lax_provider.article_highest_version("08411", Settings)
+            self.assertEqual(mock_session_get.call_count, 2)
+        # responses are not cached outside the scope
+        lax_provider.article_highest_version("08411", Settings)
+        lax_provider.article_highest_version("08411", Settings)
+        self.assertEqual(mock_session_get.call_count, 4)
+
+    @patch("requests.Session.get")
+    def test_lax_scope_default_ttl(self, mock_session_get):
+        "no responses are cached in a lax_scope by default"
+        mock_session_get.return_value = self.response
+        with lax_provider.lax_scope(settings_mock) as client:
+            self.assertEqual(client.ttl, 0)
+            lax_provider.get_lax_client().get(self.url, "08411", True, self.headers)
+            lax_provider.get_lax_client().get(self.url, "08411", True, self.headers)
+        self.assertEqual(mock_session_get.call_count, 2)
+        self.assertIsNone(getattr(lax_provider.LAX_SCOPE, "client", None))
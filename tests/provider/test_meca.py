@@ -154,7 +154,7 @@ class TestPostXmlFile(unittest.TestCase):
     def tearDown(self):
         TempDirectory.cleanup_all()
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_post_xml_file(self, fake_post):
         "test post_xml_file()"
         status_code = 200
@@ -169,7 +169,7 @@ class TestPostXmlFile(unittest.TestCase):
         )
         self.assertEqual(result, self.transformed_xml)
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_status_code_400(self, fake_post):
         "test response status_code 400"
         status_code = 400
@@ -184,7 +184,7 @@ class TestPostXmlFile(unittest.TestCase):
                 logger,
             )
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_bad_response(self, fake_post):
         "test if response content is None"
         logger = FakeLogger()
@@ -252,7 +252,7 @@ class TestPostFileDataToEndpoint(unittest.TestCase):
     def tearDown(self):
         TempDirectory.cleanup_all()
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_post_data(self, fake_post):
         "test post_file_data_to_endpoint()"
         status_code = 200
@@ -267,7 +267,7 @@ class TestPostFileDataToEndpoint(unittest.TestCase):
         )
         self.assertEqual(result.content, self.transformed_xml)
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_status_code_400(self, fake_post):
         "test response status_code 400"
         status_code = 400
@@ -282,7 +282,7 @@ class TestPostFileDataToEndpoint(unittest.TestCase):
                 logger,
             )
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_bad_response(self, fake_post):
         "test if response content is None"
         logger = FakeLogger()
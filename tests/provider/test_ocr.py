@@ -1,5 +1,6 @@
 import unittest
 from mock import patch
+from testfixtures import TempDirectory
 from provider import ocr
 from tests import settings_mock
 from tests.activity import test_activity_data
@@ -197,6 +198,127 @@ class TestOcrFiles(unittest.TestCase):
         # test for logging
         self.assertEqual(self.logger.logexception, excepted_log_message)
 
+    @patch("requests.post")
+    def test_file_order(self, fake_request):
+        "test results and log messages follow the order of the files"
+        fake_request.return_value = FakeResponse(200, {"data": []})
+        file_to_path_map = {
+            "sa1-inf%s.jpg" % index: self.file_path for index in range(1, 11)
+        }
+        # invoke
+        result = ocr.ocr_files(
+            file_to_path_map,
+            "math",
+            "default",
+            settings_mock,
+            self.caller_name,
+            self.logger,
+            self.identifier,
+        )
+        # assert
+        self.assertEqual(list(result.keys()), list(file_to_path_map.keys()))
+        self.assertEqual(fake_request.call_count, 10)
+        self.assertEqual(
+            [
+                message.split("file_name ")[1].split(",")[0]
+                for message in self.logger.loginfo
+                if "OCR file from" in message
+            ],
+            list(file_to_path_map.keys()),
+        )
+
+
+class TestOcrFilesCache(unittest.TestCase):
+    "test ocr_files() with a response cache"
+
+    def setUp(self):
+        self.caller_name = "PreprintOcr"
+        self.logger = FakeLogger()
+        self.file_path = "tests/files_source/digests/outbox/99999/digest-99999.jpg"
+        self.directory = TempDirectory()
+
+    def tearDown(self):
+        TempDirectory.cleanup_all()
+
+    def ocr_files(self, file_to_path_map, options_type="math"):
+        with patch.object(
+            settings_mock, "mathpix_cache_dir", self.directory.path, create=True
+        ):
+            return ocr.ocr_files(
+                file_to_path_map,
+                options_type,
+                "preprint",
+                settings_mock,
+                self.caller_name,
+                self.logger,
+                "test.xml",
+            )
+
+    @patch("requests.post")
+    def test_cache(self, fake_request):
+        "test an image with the same content is only posted once"
+        response_json = {"data": [{"type": "latex", "value": "x"}]}
+        fake_request.return_value = FakeResponse(200, response_json)
+        # invoke
+        first_result = self.ocr_files({"inf1.jpg": self.file_path})
+        second_result = self.ocr_files({"inf2.jpg": self.file_path})
+        # assert
+        self.assertEqual(fake_request.call_count, 1)
+        self.assertDictEqual(first_result, {"inf1.jpg": response_json})
+        self.assertDictEqual(second_result, {"inf2.jpg": response_json})
+        self.assertTrue(
+            "%s, using cached Mathpix response for test.xml, file_name inf2.jpg"
+            % self.caller_name
+            in self.logger.loginfo
+        )
+
+    @patch("requests.post")
+    def test_cache_options_type(self, fake_request):
+        "test the same image is posted again for a different options_type"
+        fake_request.return_value = FakeResponse(200, {"data": []})
+        # invoke
+        self.ocr_files({"inf1.jpg": self.file_path}, "math")
+        self.ocr_files({"inf1.jpg": self.file_path}, "table")
+        # assert
+        self.assertEqual(fake_request.call_count, 2)
+
+    @patch("requests.post")
+    def test_error_not_cached(self, fake_request):
+        "test a response reporting an error is not cached"
+        fake_request.return_value = FakeResponse(200, {"error": "An error"})
+        # invoke
+        self.ocr_files({"inf1.jpg": self.file_path})
+        self.ocr_files({"inf1.jpg": self.file_path})
+        # assert
+        self.assertEqual(fake_request.call_count, 2)
+
+
+class TestRateLimiter(unittest.TestCase):
+    "test RateLimiter"
+
+    @patch("time.sleep")
+    @patch("time.monotonic")
+    def test_wait(self, fake_monotonic, fake_sleep):
+        "test calls are spaced out by the rate"
+        fake_monotonic.return_value = 100.0
+        rate_limiter = ocr.RateLimiter(4)
+        # invoke
+        for _ in range(3):
+            rate_limiter.wait()
+        # assert
+        self.assertEqual(
+            [call_args[0][0] for call_args in fake_sleep.call_args_list], [0.25, 0.5]
+        )
+
+    @patch("time.sleep")
+    def test_no_rate(self, fake_sleep):
+        "test there is no wait if no rate is specified"
+        rate_limiter = ocr.RateLimiter()
+        # invoke
+        rate_limiter.wait()
+        # assert
+        fake_sleep.assert_not_called()
+
 
 EQUATION_DATA = test_activity_data.EXAMPLE_OCR_RESPONSE_JSON.get("data")
 
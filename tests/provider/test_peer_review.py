@@ -71,6 +71,119 @@ class TestDownloadImages(unittest.TestCase):
             "GET request returned a 404 status code for %s" % from_url,
         )
 
+    @patch("requests.get")
+    def test_duplicate_file_names(self, fake_get):
+        "test different hrefs with the same file name are saved to different files"
+        fake_get.return_value = FakeResponse(200, content=b"test")
+        logger = FakeLogger()
+        directory = TempDirectory()
+        href_list = [
+            "https://example.org/one/from.jpg",
+            "https://example.org/two/from.jpg",
+        ]
+        expected = {
+            href_list[0]: os.path.join(directory.path, "from.jpg"),
+            href_list[1]: os.path.join(directory.path, "from_2.jpg"),
+        }
+        # invoke
+        result = peer_review.download_images(
+            href_list, directory.path, "MecaPeerReviewImages", logger
+        )
+        # assert
+        self.assertDictEqual(result, expected)
+        self.assertEqual(sorted(os.listdir(directory.path)), ["from.jpg", "from_2.jpg"])
+
+    @patch("time.sleep")
+    @patch("requests.get")
+    def test_retry(self, fake_get, fake_sleep):
+        "test a server error response is retried"
+        fake_get.side_effect = [FakeResponse(503), FakeResponse(200, content=b"test")]
+        logger = FakeLogger()
+        directory = TempDirectory()
+        from_url = "https://example.org/from.jpg"
+        # invoke
+        result = peer_review.download_images(
+            [from_url], directory.path, "MecaPeerReviewImages", logger
+        )
+        # assert
+        self.assertEqual(list(result.keys()), [from_url])
+        self.assertEqual(fake_get.call_count, 2)
+        self.assertEqual(fake_sleep.call_count, 1)
+        with open(result.get(from_url), "rb") as open_file:
+            self.assertEqual(open_file.read(), b"test")
+
+    @patch("time.sleep")
+    @patch("requests.get")
+    def test_retry_failed(self, fake_get, fake_sleep):
+        "test no partial file remains after all attempts fail"
+        fake_get.return_value = FakeResponse(503)
+        logger = FakeLogger()
+        directory = TempDirectory()
+        from_url = "https://example.org/from.jpg"
+        # invoke
+        result = peer_review.download_images(
+            [from_url], directory.path, "MecaPeerReviewImages", logger
+        )
+        # assert
+        self.assertDictEqual(result, {})
+        self.assertEqual(fake_get.call_count, peer_review.DOWNLOAD_ATTEMPTS)
+        self.assertEqual(os.listdir(directory.path), [])
+
+    @patch("requests.get")
+    def test_file_cache(self, fake_get):
+        "test an image in the file cache is not downloaded again"
+        fake_get.return_value = FakeResponse(200, content=b"test")
+        logger = FakeLogger()
+        directory = TempDirectory()
+        file_cache = peer_review.FileCache(os.path.join(directory.path, "cache"), 1024)
+        from_url = "https://example.org/from.jpg"
+        for folder_name in ["first", "second"]:
+            to_dir = os.path.join(directory.path, folder_name)
+            os.mkdir(to_dir)
+            # invoke
+            result = peer_review.download_images(
+                [from_url],
+                to_dir,
+                "MecaPeerReviewImages",
+                logger,
+                file_cache=file_cache,
+            )
+            # assert
+            with open(result.get(from_url), "rb") as open_file:
+                self.assertEqual(open_file.read(), b"test")
+        self.assertEqual(fake_get.call_count, 1)
+
+
+class TestImageFileCache(unittest.TestCase):
+    "tests for image_file_cache()"
+
+    def tearDown(self):
+        TempDirectory.cleanup_all()
+
+    def test_image_file_cache(self):
+        directory = TempDirectory()
+
+        class Settings:
+            peer_review_image_cache_dir = directory.path
+
+        file_cache = peer_review.image_file_cache(Settings)
+        self.assertEqual(file_cache.directory, directory.path)
+        self.assertEqual(file_cache.max_bytes, peer_review.IMAGE_CACHE_MAX_BYTES)
+
+    def test_no_setting(self):
+        self.assertIsNone(peer_review.image_file_cache(object()))
+
+
+class TestUniqueFileName(unittest.TestCase):
+    "tests for unique_file_name()"
+
+    def test_unique_file_name(self):
+        self.assertEqual(peer_review.unique_file_name("a.jpg", []), "a.jpg")
+        self.assertEqual(peer_review.unique_file_name("a.jpg", ["a.jpg"]), "a_2.jpg")
+        self.assertEqual(
+            peer_review.unique_file_name("a.jpg", ["a.jpg", "a_2.jpg"]), "a_3.jpg"
+        )
+
 
 class TestGenerateNewImageFileNames(unittest.TestCase):
     "tests for generate_new_image_file_names()"
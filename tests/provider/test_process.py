@@ -1,7 +1,8 @@
 import unittest
+import multiprocessing
 from mock import patch
 from provider import process
-from provider.process import Flag
+from provider.process import Flag, SharedFlag
 from tests.classes_mock import FakeFlag
 
 
@@ -23,6 +24,19 @@ class TestExpandArticle(unittest.TestCase):
         self.assertTrue(flag.red())
 
 
+class TestSharedFlag(unittest.TestCase):
+    def test_shared_flag(self):
+        "test the SharedFlag object is red for every process sharing its event"
+        event = multiprocessing.Event()
+        flag = SharedFlag(event)
+        other_flag = SharedFlag(event)
+        self.assertTrue(flag.green())
+        self.assertFalse(flag.red())
+        other_flag.stop_process()
+        self.assertFalse(flag.green())
+        self.assertTrue(flag.red())
+
+
 class TestMonitorInterrupt(unittest.TestCase):
     def test_monitor_interrupt(self):
         "test when flag goes red"
@@ -0,0 +1,182 @@
+import unittest
+from mock import MagicMock, patch
+from provider import sqs_provider
+from tests.classes_mock import FakeFlag
+from tests.activity.classes_mock import FakeLogger
+
+
+def queue_messages(count):
+    "list of SQS messages"
+    return [
+        {
+            "MessageId": "message_%s" % index,
+            "ReceiptHandle": "receipt_%s" % index,
+            "Body": "body_%s" % index,
+        }
+        for index in range(count)
+    ]
+
+
+class TestBatches(unittest.TestCase):
+    def test_batches(self):
+        self.assertEqual(
+            [len(batch) for batch in sqs_provider.batches(list(range(23)))],
+            [10, 10, 3],
+        )
+
+    def test_batches_empty(self):
+        self.assertEqual(sqs_provider.batches([]), [])
+
+
+class TestQueueConsumer(unittest.TestCase):
+    def setUp(self):
+        self.logger = FakeLogger()
+        self.client = MagicMock()
+        self.client.send_message_batch.return_value = {}
+        self.client.delete_message_batch.return_value = {}
+        self.consumer = sqs_provider.QueueConsumer(
+            self.client, self.logger, "input_queue", "output_queue"
+        )
+
+    def test_consume(self):
+        "messages are received in batches, each is sent and deleted once processed"
+        self.client.receive_message.return_value = {"Messages": queue_messages(10)}
+        self.consumer.consume(
+            FakeFlag(0), lambda queue_message: [queue_message.get("Body")]
+        )
+        self.client.receive_message.assert_called_with(
+            QueueUrl="input_queue",
+            MaxNumberOfMessages=10,
+            VisibilityTimeout=30,
+            WaitTimeSeconds=20,
+        )
+        self.assertEqual(
+            [
+                call_args[1].get("Entries")[0].get("MessageBody")
+                for call_args in self.client.send_message_batch.call_args_list
+            ],
+            ["body_%s" % index for index in range(10)],
+        )
+        self.assertEqual(
+            [
+                call_args[1].get("Entries")
+                for call_args in self.client.delete_message_batch.call_args_list
+            ],
+            [
+                [{"Id": "0", "ReceiptHandle": "receipt_%s" % index}]
+                for index in range(10)
+            ],
+        )
+
+    def test_consume_delete_before_next_message(self):
+        "a message is deleted before the next message in the batch is processed"
+        self.client.receive_message.return_value = {"Messages": queue_messages(2)}
+        deleted_counts = []
+
+        def process_message(queue_message):
+            deleted_counts.append(self.client.delete_message_batch.call_count)
+            return []
+
+        self.consumer.consume(FakeFlag(0), process_message)
+        self.assertEqual(deleted_counts, [0, 1])
+
+    def test_consume_keep_message(self):
+        "a message is not deleted if process_message returns None"
+        self.client.receive_message.return_value = {"Messages": queue_messages(2)}
+        self.consumer.consume(
+            FakeFlag(0),
+            lambda queue_message: (
+                None if queue_message.get("MessageId") == "message_0" else []
+            ),
+        )
+        self.client.send_message_batch.assert_not_called()
+        self.assertEqual(
+            self.client.delete_message_batch.call_args[1].get("Entries"),
+            [{"Id": "0", "ReceiptHandle": "receipt_1"}],
+        )
+
+    def test_consume_send_failed(self):
+        "a message is not deleted if sending its message bodies failed"
+        self.client.receive_message.return_value = {"Messages": queue_messages(3)}
+        self.client.send_message_batch.side_effect = [
+            {},
+            {"Failed": [{"Id": "0-0", "Message": "An error"}]},
+            {},
+        ]
+        self.consumer.consume(
+            FakeFlag(0), lambda queue_message: [queue_message.get("Body")]
+        )
+        self.assertEqual(
+            [
+                call_args[1].get("Entries")[0].get("ReceiptHandle")
+                for call_args in self.client.delete_message_batch.call_args_list
+            ],
+            ["receipt_0", "receipt_2"],
+        )
+        self.assertEqual(self.logger.logerror, "failed to send message 0-0: An error")
+
+    def test_consume_exception(self):
+        "messages processed before an exception are completed"
+
+        def process_message(queue_message):
+            if queue_message.get("MessageId") == "message_1":
+                raise RuntimeError("An exception")
+            return [queue_message.get("Body")]
+
+        self.client.receive_message.return_value = {"Messages": queue_messages(3)}
+        with self.assertRaises(RuntimeError):
+            self.consumer.consume(FakeFlag(0), process_message)
+        self.assertEqual(
+            self.client.delete_message_batch.call_args[1].get("Entries"),
+            [{"Id": "0", "ReceiptHandle": "receipt_0"}],
+        )
+
+    def test_delete_failed(self):
+        self.client.delete_message_batch.return_value = {
+            "Failed": [{"Id": "0", "Message": "An error"}]
+        }
+        self.consumer.delete(queue_messages(1))
+        self.assertEqual(
+            self.logger.logerror, "failed to delete message message_0: An error"
+        )
+
+    @patch("time.sleep")
+    def test_consume_idle_long_polling(self, fake_sleep):
+        "no sleep after an empty receive when long polling"
+        self.client.receive_message.return_value = {}
+        flag = MagicMock()
+        flag.green.side_effect = [True] * 3 + [False]
+        self.consumer.consume(flag, lambda queue_message: [])
+        self.assertEqual(self.client.receive_message.call_count, 3)
+        fake_sleep.assert_not_called()
+
+    @patch("time.sleep")
+    def test_consume_idle(self, fake_sleep):
+        "sleep only when no messages are received, for longer while idle"
+        self.consumer.wait_time_seconds = 0
+        self.client.receive_message.return_value = {}
+        flag = MagicMock()
+        flag.green.side_effect = [True] * 6 + [False]
+        self.consumer.consume(flag, lambda queue_message: [])
+        self.assertEqual(
+            [call_args[0][0] for call_args in fake_sleep.call_args_list],
+            [1, 2, 4, 8, 10, 10],
+        )
+        self.client.delete_message_batch.assert_not_called()
+
+    @patch("time.sleep")
+    def test_consume_idle_reset(self, fake_sleep):
+        "the idle sleep starts again after messages are received"
+        self.consumer.wait_time_seconds = 0
+        self.client.receive_message.side_effect = [
+            {},
+            {},
+            {"Messages": queue_messages(1)},
+            {},
+        ]
+        flag = MagicMock()
+        flag.green.side_effect = [True] * 4 + [False]
+        self.consumer.consume(flag, lambda queue_message: [])
+        self.assertEqual(
+            [call_args[0][0] for call_args in fake_sleep.call_args_list], [1, 2, 1]
+        )
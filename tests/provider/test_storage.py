@@ -1,11 +1,14 @@
 import datetime
+import io
 import os
 from io import BytesIO
 import unittest
+import zipfile
 from mock import MagicMock, patch
 from testfixtures import TempDirectory
 import botocore
 from provider.storage_provider import (
+    raise_transfer_errors,
     storage_context,
     S3StorageContext,
     UnsupportedResourceType,
@@ -42,6 +45,13 @@ class FakeS3Client:
                 "Content-Type": kwargs.get("ExtraArgs").get("ContentType")
             }
 
+    def upload_fileobj(self, **kwargs):
+        self.object.write(kwargs.get("Fileobj").read())
+        if kwargs.get("ExtraArgs") and kwargs.get("ExtraArgs").get("ContentType"):
+            self.object_metadata = {
+                "Content-Type": kwargs.get("ExtraArgs").get("ContentType")
+            }
+
     def put_object(self, **kwargs):
         if kwargs.get("Body"):
             self.object.write(kwargs.get("Body"))
@@ -63,6 +73,34 @@ class FakeS3Client:
     def delete_object(self, **kwargs):
         pass
 
+    def delete_objects(self, **kwargs):
+        return {}
+
+
+class FakeRangedS3Client:
+    "client serving ranged get_object requests from bytes"
+
+    def __init__(self, data):
+        self.data = data
+        self.get_object_count = 0
+
+    def head_object(self, **kwargs):
+        return {"ContentLength": len(self.data)}
+
+    def get_object(self, **kwargs):
+        self.get_object_count += 1
+        start, end = kwargs.get("Range").split("=")[1].split("-")
+        return {"Body": BytesIO(self.data[int(start) : int(end) + 1])}
+
+
+def zip_bytes(members):
+    "create zip file bytes from a dict of member names and bytes"
+    zip_buffer = BytesIO()
+    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as open_zip:
+        for name, data in members.items():
+            open_zip.writestr(name, data)
+    return zip_buffer.getvalue()
+
 
 class TestStorageContext(unittest.TestCase):
     def test_storage_context_instatiation(self):
@@ -125,6 +163,15 @@ class TestGetResourceAsString(unittest.TestCase):
         result = storage.get_resource_as_string("s3://a/1")
         self.assertEqual(result, b"example")
 
+    def test_get_resource_as_string_and_etag(self):
+        client = MagicMock()
+        client.get_object.return_value = {"Body": BytesIO(b"example"), "ETag": '"1"'}
+        storage = S3StorageContext(settings_mock)
+        storage.context["client"] = client
+        result = storage.get_resource_as_string_and_etag("s3://a/1")
+        self.assertEqual(result, (b"example", '"1"'))
+        self.assertEqual(client.get_object.call_args[1].get("Key"), "1")
+
 
 class TestGetResourceToFile(unittest.TestCase):
     def tearDown(self):
@@ -142,6 +189,77 @@ class TestGetResourceToFile(unittest.TestCase):
             self.assertEqual(open_file.read(), b"example")
 
 
+class TestGetResourceFileCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = TempDirectory()
+        self.client = MagicMock()
+        self.client.head_object.return_value = {"ETag": '"1"', "ContentLength": 7}
+        self.client.download_fileobj.side_effect = lambda **kwargs: kwargs.get(
+            "Fileobj"
+        ).write(b"example")
+        self.client.get_object.side_effect = lambda **kwargs: {
+            "Body": BytesIO(b"example")
+        }
+
+    def tearDown(self):
+        TempDirectory.cleanup_all()
+
+    def storage(self, max_bytes=None):
+        "storage context using a file cache in the temporary directory"
+        with patch.object(
+            settings_mock, "s3_file_cache_dir", self.directory.path, create=True
+        ), patch.object(
+            settings_mock, "s3_file_cache_max_bytes", max_bytes, create=True
+        ):
+            storage = S3StorageContext(settings_mock)
+            storage.context["client"] = self.client
+            storage.get_file_cache()
+        return storage
+
+    def test_get_resource_cached(self):
+        "the object is downloaded once while its ETag is unchanged"
+        storage = self.storage()
+        self.assertEqual(storage.get_resource_as_string("s3://a/1"), b"example")
+        # a new storage context uses the same cache folder
+        self.assertEqual(self.storage().get_resource_as_string("s3://a/1"), b"example")
+        self.assertEqual(self.client.head_object.call_count, 2)
+        self.assertEqual(self.client.get_object.call_count, 1)
+        self.assertEqual(self.client.get_object.call_args[1].get("IfMatch"), '"1"')
+        self.client.download_fileobj.assert_not_called()
+
+    def test_get_resource_changed_etag(self):
+        storage = self.storage()
+        storage.get_resource_as_string("s3://a/1")
+        self.client.head_object.return_value = {"ETag": '"2"', "ContentLength": 7}
+        storage.get_resource_as_string("s3://a/1")
+        self.assertEqual(self.client.get_object.call_count, 2)
+
+    def test_get_resource_replaced(self):
+        "an object replaced after its ETag is read is downloaded but not cached"
+        self.client.get_object.side_effect = botocore.exceptions.ClientError(
+            {"Error": {"Code": "PreconditionFailed"}}, "GetObject"
+        )
+        storage = self.storage()
+        self.assertEqual(storage.get_resource_as_string("s3://a/1"), b"example")
+        self.assertEqual(self.client.download_fileobj.call_count, 1)
+        self.assertEqual(os.listdir(self.directory.path), [])
+
+    def test_get_resource_too_big(self):
+        "objects bigger than the cache are not cached"
+        storage = self.storage(max_bytes=6)
+        storage.get_resource_as_string("s3://a/1")
+        storage.get_resource_as_string("s3://a/1")
+        self.assertEqual(self.client.download_fileobj.call_count, 2)
+        self.assertEqual(os.listdir(self.directory.path), [])
+
+    def test_get_resource_no_cache(self):
+        "no head_object request is made if the file cache is not enabled"
+        storage = S3StorageContext(settings_mock)
+        storage.context["client"] = self.client
+        self.assertEqual(storage.get_resource_as_string("s3://a/1"), b"example")
+        self.client.head_object.assert_not_called()
+
+
 class TestGetResourceAttributes(unittest.TestCase):
     @patch("boto3.client")
     def test_get_resource_attributes(self, fake_s3_client):
@@ -262,6 +380,21 @@ class TestListResources(unittest.TestCase):
             ],
         )
 
+    def test_list_resources_delimiter(self):
+        storage = S3StorageContext(settings_mock)
+        storage.context["client"] = MagicMock()
+        storage.context["client"].list_objects_v2.return_value = {
+            "Contents": [{"Key": "folder/latest_run.json"}],
+            "CommonPrefixes": [{"Prefix": "folder/run_2/"}],
+        }
+        result = storage.list_resources(
+            "s3://a/folder/", delimiter="/", start_after="folder/run_1/"
+        )
+        self.assertEqual(result, ["folder/latest_run.json", "folder/run_2/"])
+        kwargs = storage.context["client"].list_objects_v2.call_args[1]
+        self.assertEqual(kwargs.get("Delimiter"), "/")
+        self.assertEqual(kwargs.get("StartAfter"), "folder/run_1/")
+
 
 class TestCopyResource(unittest.TestCase):
     def setUp(self):
@@ -319,3 +452,234 @@ class TestDeleteResourceFromString(unittest.TestCase):
         fake_delete_object.assert_called_with(
             Bucket="a", Key="1", RequestPayer="requester"
         )
+
+
+class TestGetTransferConfig(unittest.TestCase):
+    @patch.object(settings_mock, "s3_multipart_threshold", 1024 * 1024, create=True)
+    @patch.object(settings_mock, "s3_multipart_chunksize", 1024 * 1024, create=True)
+    def test_get_transfer_config(self):
+        storage = S3StorageContext(settings_mock)
+        config = storage.get_transfer_config()
+        self.assertEqual(config.multipart_threshold, 1024 * 1024)
+        self.assertEqual(config.multipart_chunksize, 1024 * 1024)
+        # cached for the storage context
+        self.assertEqual(storage.get_transfer_config(), config)
+
+
+class TestGetResourcesToDir(unittest.TestCase):
+    def tearDown(self):
+        TempDirectory.cleanup_all()
+
+    @patch("boto3.client")
+    def test_get_resources_to_dir(self, fake_s3_client):
+        directory = TempDirectory()
+        fake_s3_client.return_value = FakeS3Client()
+        storage = S3StorageContext(settings_mock)
+        callback_results = []
+        results = storage.get_resources_to_dir(
+            ["s3://a/folder/1.xml", "s3://a/folder/2.tif"],
+            directory.path,
+            callback=callback_results.append,
+        )
+        self.assertEqual(
+            [result.get("file") for result in results],
+            [
+                os.path.join(directory.path, "1.xml"),
+                os.path.join(directory.path, "2.tif"),
+            ],
+        )
+        self.assertEqual([result.get("error") for result in results], [None, None])
+        self.assertEqual(len(callback_results), 2)
+        with open(os.path.join(directory.path, "2.tif"), "rb") as open_file:
+            self.assertEqual(open_file.read(), b"example")
+
+    @patch.object(FakeS3Client, "download_fileobj")
+    @patch("boto3.client")
+    def test_get_resources_to_dir_exception(self, fake_s3_client, fake_download):
+        directory = TempDirectory()
+        fake_s3_client.return_value = FakeS3Client()
+        fake_download.side_effect = Exception("An exception")
+        storage = S3StorageContext(settings_mock)
+        results = storage.get_resources_to_dir(["s3://a/folder/1.xml"], directory.path)
+        self.assertEqual(str(results[0].get("error")), "An exception")
+        with self.assertRaises(Exception):
+            raise_transfer_errors(results)
+
+    @patch("boto3.client")
+    def test_get_resources_to_files(self, fake_s3_client):
+        "test files are downloaded to their paths and the folders created"
+        directory = TempDirectory()
+        fake_s3_client.return_value = FakeS3Client()
+        storage = S3StorageContext(settings_mock)
+        file_paths = [
+            os.path.join(directory.path, "figures", "1.tif"),
+            os.path.join(directory.path, "supplements", "1.tif"),
+        ]
+        results = storage.get_resources_to_files(
+            [
+                ("s3://a/folder/figures/1.tif", file_paths[0]),
+                ("s3://a/folder/supplements/1.tif", file_paths[1]),
+            ]
+        )
+        self.assertEqual([result.get("file") for result in results], file_paths)
+        self.assertEqual([result.get("error") for result in results], [None, None])
+        for file_path in file_paths:
+            with open(file_path, "rb") as open_file:
+                self.assertEqual(open_file.read(), b"example")
+
+    def test_get_resources_to_dir_same_file_name(self):
+        "resources in different folders with the same file name are not overwritten"
+        storage = S3StorageContext(settings_mock)
+        storage.context["client"] = MagicMock()
+        with self.assertRaises(ValueError):
+            storage.get_resources_to_dir(
+                ["s3://a/folder/1.xml", "s3://a/other_folder/1.xml"], "tmp"
+            )
+        storage.context["client"].download_fileobj.assert_not_called()
+
+    def test_get_resources_to_dir_empty(self):
+        storage = S3StorageContext(settings_mock)
+        storage.context["client"] = MagicMock()
+        self.assertEqual(storage.get_resources_to_dir([], "tmp"), [])
+
+
+class TestSetResourcesFromFiles(unittest.TestCase):
+    def tearDown(self):
+        TempDirectory.cleanup_all()
+
+    @patch("boto3.client")
+    def test_set_resources_from_files(self, fake_s3_client):
+        directory = TempDirectory()
+        file_path = os.path.join(directory.path, "1.xml")
+        with open(file_path, "wb") as open_file:
+            open_file.write(b"<article/>")
+        fake_s3_client.return_value = FakeS3Client()
+        storage = S3StorageContext(settings_mock)
+        results = storage.set_resources_from_files(
+            [
+                ("s3://a/folder/1.xml", file_path),
+                ("s3://a/folder/2.xml", file_path, {"ContentType": "text/xml"}),
+            ]
+        )
+        self.assertEqual(
+            [result.get("resource") for result in results],
+            ["s3://a/folder/1.xml", "s3://a/folder/2.xml"],
+        )
+        self.assertEqual([result.get("error") for result in results], [None, None])
+        raise_transfer_errors(results)
+
+
+class TestCopyResources(unittest.TestCase):
+    def test_copy_resources(self):
+        storage = S3StorageContext(settings_mock)
+        storage.context["client"] = MagicMock()
+        results = storage.copy_resources(
+            [
+                ("s3://a/1", "s3://b/1"),
+                ("s3://a/1", "s3://b/2", {"Content-Type": "application/json"}),
+            ]
+        )
+        self.assertEqual(
+            [result.get("resource") for result in results], ["s3://b/1", "s3://b/2"]
+        )
+        self.assertEqual(storage.context["client"].copy_object.call_count, 2)
+
+
+class TestDeleteResources(unittest.TestCase):
+    @patch.object(FakeS3Client, "delete_objects")
+    @patch("boto3.client")
+    def test_delete_resources(self, fake_s3_client, fake_delete_objects):
+        fake_s3_client.return_value = FakeS3Client()
+        fake_delete_objects.return_value = {
+            "Errors": [{"Key": "2", "Code": "AccessDenied", "Message": "Access Denied"}]
+        }
+        storage = S3StorageContext(settings_mock)
+        results = storage.delete_resources(["s3://a/1", "s3://a/2"])
+        fake_delete_objects.assert_called_with(
+            Bucket="a",
+            Delete={"Objects": [{"Key": "1"}, {"Key": "2"}], "Quiet": True},
+            RequestPayer="requester",
+        )
+        self.assertIsNone(results[0].get("error"))
+        self.assertEqual(str(results[1].get("error")), "AccessDenied: Access Denied")
+
+
+class TestSetResourceFromFileobj(unittest.TestCase):
+    @patch("boto3.client")
+    def test_set_resource_from_fileobj(self, fake_s3_client):
+        client = FakeS3Client()
+        fake_s3_client.return_value = client
+        storage = S3StorageContext(settings_mock)
+        storage.set_resource_from_fileobj(
+            "s3://a/1.xml", BytesIO(b"<article/>"), {"ContentType": "text/xml"}
+        )
+        self.assertEqual(client.object.getvalue(), b"<article/>")
+        self.assertEqual(client.object_metadata, {"Content-Type": "text/xml"})
+
+    def test_stream_transfer_config(self):
+        storage = S3StorageContext(settings_mock)
+        config = storage.get_stream_transfer_config()
+        self.assertEqual(config.max_request_concurrency, 1)
+        self.assertEqual(config.max_in_memory_upload_chunks, 2)
+
+
+class TestSetResourcesFromZip(unittest.TestCase):
+    def test_set_resources_from_zip(self):
+        members = {"1.xml": b"<article/>", "folder/2.txt": b"text" * 1000}
+        storage = S3StorageContext(settings_mock)
+        storage.context["client"] = MagicMock()
+        uploaded = {}
+        storage.context["client"].upload_fileobj.side_effect = (
+            lambda **kwargs: uploaded.update(
+                {kwargs.get("Key"): kwargs.get("Fileobj").read()}
+            )
+        )
+        with zipfile.ZipFile(BytesIO(zip_bytes(members))) as open_zip:
+            results = storage.set_resources_from_zip(
+                open_zip,
+                [
+                    ("s3://a/expanded/1.xml", "1.xml", {"ContentType": "text/xml"}),
+                    ("s3://a/expanded/folder/2.txt", "folder/2.txt"),
+                ],
+            )
+        self.assertEqual(
+            [result.get("member") for result in results], ["1.xml", "folder/2.txt"]
+        )
+        self.assertEqual([result.get("error") for result in results], [None, None])
+        self.assertEqual(
+            uploaded,
+            {"expanded/1.xml": b"<article/>", "expanded/folder/2.txt": b"text" * 1000},
+        )
+
+    def test_set_resources_from_zip_missing_member(self):
+        storage = S3StorageContext(settings_mock)
+        storage.context["client"] = MagicMock()
+        with zipfile.ZipFile(BytesIO(zip_bytes({"1.xml": b""}))) as open_zip:
+            results = storage.set_resources_from_zip(
+                open_zip, [("s3://a/expanded/2.xml", "2.xml")]
+            )
+        self.assertTrue(isinstance(results[0].get("error"), KeyError))
+
+
+class TestOpenResource(unittest.TestCase):
+    def test_open_resource_zip(self):
+        members = {"1.xml": b"<article/>", "2.txt": b"text" * 1000}
+        client = FakeRangedS3Client(zip_bytes(members))
+        storage = S3StorageContext(settings_mock)
+        storage.context["client"] = client
+        with storage.open_resource("s3://a/folder/article.zip") as open_file:
+            with zipfile.ZipFile(open_file) as open_zip:
+                self.assertEqual(open_zip.namelist(), ["1.xml", "2.txt"])
+                self.assertEqual(open_zip.read("2.txt"), b"text" * 1000)
+        # small reads are served from the read buffer
+        self.assertTrue(client.get_object_count < 10)
+
+    def test_open_resource_seek(self):
+        client = FakeRangedS3Client(b"0123456789")
+        storage = S3StorageContext(settings_mock)
+        storage.context["client"] = client
+        with storage.open_resource("s3://a/file.txt") as open_file:
+            open_file.seek(-3, io.SEEK_END)
+            self.assertEqual(open_file.read(), b"789")
+            open_file.seek(2)
+            self.assertEqual(open_file.read(3), b"234")
@@ -3,6 +3,7 @@ import os
 import unittest
 import time
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from xml.etree.ElementTree import Element, SubElement
 import arrow
 from mock import patch
@@ -214,6 +215,121 @@ class TestUtils(unittest.TestCase):
             )  # generated key can be used as a map key
 
 
+class TestGetAwsConnection(unittest.TestCase):
+    @patch.object(utils, "create_aws_connection")
+    def test_get_aws_connection(self, fake_create):
+        "a client is created once per key"
+        fake_create.side_effect = lambda service, kwargs: object()
+        service_conn_map = {}
+        kwargs = {"region_name": "us-east-1"}
+        client = utils.get_aws_connection(service_conn_map, "s3", kwargs)
+        self.assertEqual(
+            utils.get_aws_connection(service_conn_map, "s3", kwargs), client
+        )
+        self.assertNotEqual(
+            utils.get_aws_connection(service_conn_map, "sqs", kwargs), client
+        )
+        self.assertEqual(fake_create.call_count, 2)
+
+
+class TestAWSClientRegistry(unittest.TestCase):
+    def setUp(self):
+        self.kwargs = {
+            "aws_access_key_id": "id",
+            "aws_secret_access_key": "key",
+            "region_name": "us-east-1",
+        }
+
+    @patch.object(utils, "create_aws_connection")
+    def test_get_client(self, fake_create):
+        fake_create.side_effect = lambda service, kwargs: object()
+        registry = utils.AWSClientRegistry()
+        client = registry.get_client("s3", self.kwargs)
+        self.assertEqual(registry.get_client("s3", dict(self.kwargs)), client)
+        # different credentials
+        other_kwargs = dict(self.kwargs)
+        other_kwargs["aws_session_token"] = "token"
+        self.assertNotEqual(registry.get_client("s3", other_kwargs), client)
+        self.assertEqual(registry.counters(), {"created": 2, "reused": 1})
+
+    @patch.object(utils, "create_aws_connection")
+    def test_get_client_config(self, fake_create):
+        "configs with the same options share a client"
+        fake_create.side_effect = lambda service, kwargs: object()
+        registry = utils.AWSClientRegistry()
+        first_kwargs = dict(self.kwargs)
+        first_kwargs["config"] = botocore.config.Config(connect_timeout=50)
+        second_kwargs = dict(self.kwargs)
+        second_kwargs["config"] = botocore.config.Config(connect_timeout=50)
+        third_kwargs = dict(self.kwargs)
+        third_kwargs["config"] = botocore.config.Config(connect_timeout=70)
+        client = registry.get_client("swf", first_kwargs)
+        self.assertEqual(registry.get_client("swf", second_kwargs), client)
+        self.assertNotEqual(registry.get_client("swf", third_kwargs), client)
+
+    @patch.object(utils, "create_aws_connection")
+    def test_get_client_max_pool_connections(self, fake_create):
+        fake_create.side_effect = lambda service, kwargs: object()
+        registry = utils.AWSClientRegistry()
+        kwargs = dict(self.kwargs)
+        kwargs["config"] = botocore.config.Config(connect_timeout=50)
+        registry.get_client("swf", kwargs, max_pool_connections=20)
+        config = fake_create.call_args[0][1].get("config")
+        self.assertEqual(config.max_pool_connections, 20)
+        self.assertEqual(config.connect_timeout, 50)
+        # the config passed in is not changed, it has the botocore default
+        self.assertEqual(kwargs.get("config").max_pool_connections, 10)
+
+    @patch.object(utils, "create_aws_connection")
+    def test_get_client_max_size(self, fake_create):
+        "the least recently used client is removed"
+        fake_create.side_effect = lambda service, kwargs: object()
+        registry = utils.AWSClientRegistry(max_size=2)
+        s3_client = registry.get_client("s3", self.kwargs)
+        registry.get_client("sqs", self.kwargs)
+        registry.get_client("s3", self.kwargs)
+        registry.get_client("swf", self.kwargs)
+        self.assertEqual(list(registry.clients.values())[0], s3_client)
+        self.assertEqual(len(registry.clients), 2)
+        registry.get_client("sqs", self.kwargs)
+        self.assertEqual(registry.counters(), {"created": 4, "reused": 1})
+
+    @patch.object(utils, "create_aws_connection")
+    def test_get_client_threads(self, fake_create):
+        "threads getting the same client concurrently create it once"
+
+        def create(service, kwargs):
+            time.sleep(0.01)
+            return object()
+
+        fake_create.side_effect = create
+        registry = utils.AWSClientRegistry()
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            clients = list(
+                executor.map(
+                    lambda _: registry.get_client("s3", self.kwargs), range(16)
+                )
+            )
+        self.assertEqual(len(set(id(client) for client in clients)), 1)
+        self.assertEqual(registry.counters(), {"created": 1, "reused": 15})
+
+    def test_get_settings(self):
+        "settings from get_settings share the process wide registry"
+        with patch.dict(sys.modules, {"settings": FakeSettingsModule}):
+            settings = utils.get_settings("dev")
+        self.assertEqual(settings.aws_conn.func, utils.AWS_CLIENTS.get_client)
+        self.assertEqual(settings.aws_conn.keywords, {"max_pool_connections": 25})
+
+
+class FakeSettingsModule:
+    class dev:
+        aws_max_pool_connections = 25
+
+    @staticmethod
+    def get_settings(env):
+        return FakeSettingsModule.dev()
+
+
 class TestElementXmlString(unittest.TestCase):
     "tests for utils.element_xml_string()"
 
@@ -250,6 +366,7 @@ class TestSettingsEnvironment(unittest.TestCase):
 
         class ci:
             "mock settings object for testing"
+
             pass
 
         settings_object = ci
@@ -473,5 +590,21 @@ class TestDownloadFile(unittest.TestCase):
             utils.download_file(from_path, to_file, user_agent)
 
 
+class TestBackoffSeconds(unittest.TestCase):
+    "tests for backoff_seconds()"
+
+    @patch("random.uniform")
+    def test_backoff_seconds(self, fake_uniform):
+        fake_uniform.side_effect = lambda low, high: high
+        self.assertEqual(
+            [utils.backoff_seconds(attempt, 1, 10) for attempt in range(6)],
+            [1, 2, 4, 8, 10, 10],
+        )
+
+    def test_backoff_seconds_jitter(self):
+        for attempt in range(10):
+            self.assertTrue(0 <= utils.backoff_seconds(attempt, 0.5, 3) <= 3)
+
+
 if __name__ == "__main__":
     unittest.main()
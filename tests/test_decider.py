@@ -149,6 +149,137 @@ class TestDeciderDecide(unittest.TestCase):
         # make assertions on error log
         self.assertTrue("error processing workflow" in self.logger.logerror)
 
+    @patch.object(decider.HistoryCache, "evict")
+    @patch("logging.getLogger")
+    @patch.object(FakeSWFClient, "poll_for_decision_task")
+    @patch("boto3.client")
+    @patch.object(settings_mock, "decider_history_cache_events", 1000, create=True)
+    def test_decide_history_cache(
+        self, fake_client, fake_poll, fake_get_logger, fake_evict
+    ):
+        "test polling with the history cache, the workflow is not closed"
+        decision_events = read_fixture("decision_ping.py")
+        fake_get_logger.return_value = self.logger
+        fake_client.return_value = FakeSWFClient()
+        fake_poll.return_value = decision_events
+        # invoke decide
+        decider.decide(settings_mock, self.flag)
+        # make some assertions on log values
+        self.assertTrue(fake_poll.call_args[1].get("reverseOrder"))
+        self.assertTrue("scheduling task: PingWorker" in self.logger.loginfo)
+        self.assertFalse(fake_evict.called)
+
+    @patch.object(decider.HistoryCache, "evict")
+    @patch("logging.getLogger")
+    @patch.object(FakeSWFClient, "poll_for_decision_task")
+    @patch("boto3.client")
+    @patch.object(settings_mock, "decider_history_cache_events", 1000, create=True)
+    def test_decide_history_cache_evict(
+        self, fake_client, fake_poll, fake_get_logger, fake_evict
+    ):
+        "cached history is evicted when the workflow cannot be loaded"
+        decision_events = read_fixture("decision_events.py")
+        fake_get_logger.return_value = self.logger
+        fake_client.return_value = FakeSWFClient()
+        fake_poll.return_value = decision_events
+        # invoke decide
+        decider.decide(settings_mock, self.flag)
+        self.assertTrue(fake_evict.called)
+
+
+def history_events(first_event_id, last_event_id):
+    "simple events for a workflow execution history"
+    return [
+        {"eventId": event_id, "eventType": "DecisionTaskScheduled"}
+        for event_id in range(first_event_id, last_event_id + 1)
+    ]
+
+
+def reverse_order_page(first_event_id, last_event_id, next_page_token=None):
+    "a poll_for_decision_task response with events newest first"
+    decision = {
+        "taskToken": "token",
+        "workflowExecution": {"workflowId": "workflow_id", "runId": "run_id"},
+        "events": list(reversed(history_events(first_event_id, last_event_id))),
+    }
+    if next_page_token:
+        decision["nextPageToken"] = next_page_token
+    return decision
+
+
+class TestHistoryCache(unittest.TestCase):
+    def setUp(self):
+        self.client = FakeSWFClient()
+        self.key = ("workflow_id", "run_id")
+
+    @patch.object(FakeSWFClient, "poll_for_decision_task")
+    def test_get_all_events_miss(self, fake_poll):
+        "no cached events, page in the whole history"
+        history_cache = decider.HistoryCache(1000)
+        fake_poll.return_value = reverse_order_page(1, 100)
+        decision = history_cache.get_all_events(
+            reverse_order_page(101, 200, "page_2"), self.client, None, None, None, 100
+        )
+        self.assertEqual(fake_poll.call_count, 1)
+        self.assertEqual(
+            [event["eventId"] for event in decision["events"]], list(range(1, 201))
+        )
+        self.assertIsNone(decision.get("nextPageToken"))
+        self.assertEqual(history_cache.misses, 1)
+        self.assertEqual(len(history_cache.get(self.key)), 200)
+
+    @patch.object(FakeSWFClient, "poll_for_decision_task")
+    def test_get_all_events_hit(self, fake_poll):
+        "only the events after the cached events are polled"
+        history_cache = decider.HistoryCache(1000)
+        history_cache.put(self.key, history_events(1, 195))
+        decision = history_cache.get_all_events(
+            reverse_order_page(101, 200, "page_2"), self.client, None, None, None, 100
+        )
+        self.assertEqual(fake_poll.call_count, 0)
+        self.assertEqual(
+            [event["eventId"] for event in decision["events"]], list(range(1, 201))
+        )
+        self.assertIsNone(decision.get("nextPageToken"))
+        self.assertEqual(history_cache.hits, 1)
+
+    def test_get_all_events_no_events(self):
+        history_cache = decider.HistoryCache(1000)
+        decision = history_cache.get_all_events(
+            {"startedEventId": 0}, self.client, None, None, None, 100
+        )
+        self.assertEqual(decision, {"startedEventId": 0})
+
+    def test_put_bounded(self):
+        "least recently used histories are evicted to bound the cached events"
+        history_cache = decider.HistoryCache(250)
+        history_cache.put(("workflow_1", "run_id"), history_events(1, 100))
+        history_cache.put(("workflow_2", "run_id"), history_events(1, 100))
+        history_cache.get(("workflow_1", "run_id"))
+        history_cache.put(("workflow_3", "run_id"), history_events(1, 100))
+        self.assertIsNotNone(history_cache.get(("workflow_1", "run_id")))
+        self.assertIsNone(history_cache.get(("workflow_2", "run_id")))
+        self.assertEqual(history_cache.event_count, 200)
+        # a history larger than the cache is not cached
+        history_cache.put(("workflow_4", "run_id"), history_events(1, 300))
+        self.assertIsNone(history_cache.get(("workflow_4", "run_id")))
+
+    def test_evict(self):
+        history_cache = decider.HistoryCache(1000)
+        history_cache.put(self.key, history_events(1, 10))
+        history_cache.evict(self.key)
+        self.assertIsNone(history_cache.get(self.key))
+        self.assertEqual(history_cache.event_count, 0)
+
+
+class TestGetHistoryCacheEvents(unittest.TestCase):
+    def test_get_history_cache_events_default(self):
+        self.assertEqual(decider.get_history_cache_events(settings_mock), 0)
+
+    @patch.object(settings_mock, "decider_history_cache_events", "1000", create=True)
+    def test_get_history_cache_events(self):
+        self.assertEqual(decider.get_history_cache_events(settings_mock), 1000)
+
 
 class TestTrimmedDecision(unittest.TestCase):
     def setUp(self):
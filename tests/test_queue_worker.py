@@ -4,7 +4,7 @@ import json
 from mock import patch
 from testfixtures import TempDirectory
 from queue_worker import QueueWorker
-from queue_worker import load_rules, get_starter_name
+from queue_worker import load_rules, get_starter_name, RuleRouter
 from S3utility.s3_notification_info import S3NotificationInfo
 from provider.utils import bytes_decode
 from tests import settings_mock, test_data
@@ -196,3 +196,89 @@ class TestGetStarterName(unittest.TestCase):
         expected_starter_name = "SilentIngestMeca"
         starter_name = get_starter_name(rules, info)
         self.assertEqual(starter_name, expected_starter_name)
+
+
+class TestRuleRouter(unittest.TestCase):
+    def tearDown(self):
+        TempDirectory.cleanup_all()
+
+    def test_route(self):
+        "same starter names as get_starter_name"
+        router = RuleRouter(rules=test_data.queue_worker_rules)
+        for data in [
+            test_data.queue_worker_article_zip_data,
+            test_data.ingest_digest_data,
+            test_data.ingest_decision_letter_data,
+            test_data.silent_ingest_meca_data,
+        ]:
+            info = S3NotificationInfo.from_dict(data)
+            self.assertEqual(
+                router.route(info),
+                get_starter_name(test_data.queue_worker_rules, info),
+            )
+
+    def test_route_no_match(self):
+        router = RuleRouter(rules=test_data.queue_worker_rules)
+        data = dict(test_data.silent_ingest_meca_data)
+        data["file_name"] = "95901-v1-meca.zip"
+        self.assertIsNone(router.route(S3NotificationInfo.from_dict(data)))
+
+    def test_route_rule_order(self):
+        "the first matching rule is used when rules in other groups also match"
+        rules = {
+            "Docx": {
+                "bucket_name_pattern": ".*input$",
+                "file_name_pattern": r".*\.docx",
+                "starter_name": "First",
+            },
+            "AnyBucketZip": {
+                "bucket_name_pattern": ".*",
+                "file_name_pattern": r".*\.zip",
+                "starter_name": "Second",
+            },
+            "Zip": {
+                "bucket_name_pattern": ".*input$",
+                "file_name_pattern": r".*\.zip",
+                "starter_name": "Third",
+            },
+        }
+        router = RuleRouter(rules=rules)
+        data = dict(test_data.ingest_digest_data)
+        data["file_name"] = "DIGEST 99999.zip"
+        info = S3NotificationInfo.from_dict(data)
+        self.assertEqual(router.route(info), "Second")
+        self.assertEqual(router.route(info), get_starter_name(rules, info))
+        self.assertEqual(len(router.groups), 2)
+
+    def test_route_many(self):
+        router = RuleRouter()
+        infos = [
+            S3NotificationInfo.from_dict(test_data.queue_worker_article_zip_data),
+            S3NotificationInfo.from_dict(test_data.ingest_digest_data),
+        ]
+        self.assertEqual(router.route_many(infos), ["IngestArticleZip", "IngestDigest"])
+
+    def test_reload(self):
+        "the rules file is loaded again after it is modified"
+        directory = TempDirectory()
+        rules_file = os.path.join(directory.path, "rules.yaml")
+        info = S3NotificationInfo.from_dict(test_data.ingest_digest_data)
+        with open(rules_file, "w") as open_file:
+            open_file.write(
+                "DigestInputFile:\n"
+                "  bucket_name_pattern: '.*elife-bot-digests-input$'\n"
+                "  file_name_pattern: '.*\\.zip'\n"
+                "  starter_name: 'IngestDigest'\n"
+            )
+        router = RuleRouter(rules_file)
+        self.assertIsNone(router.route(info))
+        with open(rules_file, "w") as open_file:
+            open_file.write(
+                "DigestInputFile:\n"
+                "  bucket_name_pattern: '.*elife-bot-digests-input$'\n"
+                "  file_name_pattern: '.*\\.(docx|zip)'\n"
+                "  starter_name: 'IngestDigest'\n"
+            )
+        # set a different modification time
+        os.utime(rules_file, (router.mtime + 1, router.mtime + 1))
+        self.assertEqual(router.route(info), "IngestDigest")
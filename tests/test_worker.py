@@ -1,9 +1,12 @@
 import unittest
 import json
+import time
 from mock import patch
 import botocore
+from provider.process import Flag
 from tests import settings_mock
-from tests.classes_mock import FakeFlag, FakeSWFClient
+from provider.execution_context import get_session
+from tests.classes_mock import FakeFlag, FakeStrictRedis, FakeSWFClient
 from tests.activity.classes_mock import FakeLogger
 import worker
 from activity.activity_PingWorker import activity_PingWorker as activity_class
@@ -113,6 +116,79 @@ class TestWorkerWork(unittest.TestCase):
         self.assertEqual(self.logger.loginfo[-1], "graceful shutdown")
 
 
+class TestWorkerSettings(unittest.TestCase):
+    def test_get_worker_slots_default(self):
+        self.assertEqual(worker.get_worker_slots(settings_mock), 1)
+
+    @patch.object(settings_mock, "worker_slots", "4", create=True)
+    def test_get_worker_slots(self):
+        self.assertEqual(worker.get_worker_slots(settings_mock), 4)
+
+    @patch.object(settings_mock, "worker_slots", "many", create=True)
+    def test_get_worker_slots_invalid(self):
+        self.assertEqual(worker.get_worker_slots(settings_mock), 1)
+
+    def test_get_worker_pool_default(self):
+        self.assertEqual(worker.get_worker_pool(settings_mock), "thread")
+
+    @patch.object(settings_mock, "worker_pool", "process", create=True)
+    def test_get_worker_pool_process(self):
+        self.assertEqual(worker.get_worker_pool(settings_mock), "process")
+
+
+class TestWarmActivityClasses(unittest.TestCase):
+    def test_warm_activity_classes(self):
+        logger = FakeLogger()
+        imported = worker.warm_activity_classes(logger)
+        self.assertTrue("activity_PingWorker" in imported)
+
+
+class TestWorkerSlots(unittest.TestCase):
+    def setUp(self):
+        self.flag = FakeFlag(0.001)
+        self.logger = FakeLogger()
+        with open("tests/test_data/activity.json", "r", encoding="utf-8") as open_file:
+            self.activity_json = json.loads(open_file.read())
+        self.activity_json["activityType"]["name"] = "PingWorker"
+
+    @patch.object(worker, "warm_activity_classes")
+    @patch("logging.getLogger")
+    @patch.object(FakeSWFClient, "poll_for_activity_task")
+    @patch("boto3.client")
+    @patch.object(settings_mock, "worker_slots", 2, create=True)
+    def test_work_thread_slots(
+        self, fake_client, fake_poll, fake_get_logger, fake_warm
+    ):
+        "run the worker with two thread slots"
+        fake_get_logger.return_value = self.logger
+        fake_client.return_value = FakeSWFClient()
+        fake_poll.return_value = self.activity_json
+        # invoke work
+        worker.work(settings_mock, self.flag)
+        # make some assertions on log values
+        self.assertTrue("starting 2 thread worker slots" in str(self.logger.loginfo))
+        self.assertTrue(
+            "respond_activity_task_completed returned None" in str(self.logger.loginfo)
+        )
+        self.assertEqual(self.logger.loginfo[-1], "graceful shutdown")
+        # the slots share one SWF client
+        self.assertEqual(fake_client.call_count, 1)
+
+    @patch.object(FakeSWFClient, "poll_for_activity_task")
+    def test_run_slot_exception(self, fake_poll):
+        "an exception in one slot stops every slot"
+        fake_poll.side_effect = Exception("An exception")
+        flag = Flag()
+        with self.assertRaises(Exception):
+            worker.run_slot(
+                settings_mock, flag, self.logger, FakeSWFClient(), "worker_1_0"
+            )
+        self.assertTrue(flag.red())
+        self.assertEqual(
+            self.logger.logexception, "worker slot worker_1_0 stopped unexpectedly"
+        )
+
+
 class TestProcessActivity(unittest.TestCase):
     def setUp(self):
         self.flag = FakeFlag(0.001)
@@ -196,6 +272,191 @@ class TestProcessActivity(unittest.TestCase):
         # make some assertions on log values
         self.assertEqual(self.logger.logerror, "error executing activity %s")
 
+    @patch("redis.StrictRedis")
+    @patch.object(activity_class, "do_activity")
+    def test_process_activity_session(self, fake_do_activity, fake_strict_redis):
+        "session values stored by the activity are written before responding"
+        redis_client = FakeStrictRedis()
+        fake_strict_redis.return_value = redis_client
+
+        def do_activity(data=None):
+            get_session(settings_mock, data, "run").store_value("foo", "bar")
+            get_session(settings_mock, data, "run").store_value("baz", 1)
+            self.assertIsNone(redis_client.hget("run", "foo"))
+            return activity_class.ACTIVITY_SUCCESS
+
+        fake_do_activity.side_effect = do_activity
+        worker.process_activity(
+            self.activity_json, settings_mock, self.logger, FakeSWFClient(), self.token
+        )
+        # the hget by the test and one pipeline writing both values
+        self.assertEqual(redis_client.request_count, 2)
+        self.assertEqual(redis_client.hget("run", "foo"), '"bar"')
+        self.assertEqual(redis_client.hget("run", "baz"), "1")
+        self.assertTrue(
+            "respond_activity_task_completed returned None" in str(self.logger.loginfo)
+        )
+
+    @patch.object(FakeStrictRedis, "pipeline")
+    @patch("redis.StrictRedis")
+    @patch.object(activity_class, "do_activity")
+    def test_process_activity_session_exception(
+        self, fake_do_activity, fake_strict_redis, fake_pipeline
+    ):
+        "the activity fails if its session values cannot be written"
+        fake_strict_redis.return_value = FakeStrictRedis()
+        fake_pipeline.side_effect = Exception("An exception")
+
+        def do_activity(data=None):
+            get_session(settings_mock, data, "run").store_value("foo", "bar")
+            return activity_class.ACTIVITY_SUCCESS
+
+        fake_do_activity.side_effect = do_activity
+        worker.process_activity(
+            self.activity_json, settings_mock, self.logger, FakeSWFClient(), self.token
+        )
+        self.assertEqual(self.logger.logerror, "error executing activity %s")
+        self.assertTrue(
+            "respond_activity_task_failed returned None" in str(self.logger.loginfo)
+        )
+
+
+class TestProcessActivityCancel(unittest.TestCase):
+    def setUp(self):
+        self.logger = FakeLogger()
+        with open("tests/test_data/activity.json", "r", encoding="utf-8") as open_file:
+            self.activity_json = json.loads(open_file.read())
+        self.activity_json["activityType"]["name"] = "PingWorker"
+        self.token = "token"
+
+    @patch.object(worker, "heartbeat_interval")
+    @patch.object(FakeSWFClient, "record_activity_task_heartbeat")
+    @patch.object(activity_class, "do_activity")
+    def test_process_activity_cancel_requested(
+        self, fake_do_activity, fake_heartbeat, fake_interval
+    ):
+        "activity stops early after SWF requests a cancel"
+
+        def do_activity(data=None):
+            # wait long enough for a heartbeat
+            time.sleep(0.05)
+            return activity_class.ACTIVITY_TEMPORARY_FAILURE
+
+        fake_interval.return_value = 0.01
+        fake_do_activity.side_effect = do_activity
+        fake_heartbeat.return_value = {"cancelRequested": True}
+        worker.process_activity(
+            self.activity_json, settings_mock, self.logger, FakeSWFClient(), self.token
+        )
+        self.assertTrue(fake_heartbeat.called)
+        self.assertTrue("activity task cancel requested" in self.logger.loginfo)
+        self.assertEqual(
+            self.logger.loginfo[-1], "respond_activity_task_canceled returned None"
+        )
+
+
+class TestHeartbeatInterval(unittest.TestCase):
+    def test_heartbeat_interval(self):
+        activity_object = activity_class(settings_mock, None)
+        self.assertEqual(worker.heartbeat_interval(activity_object), 10)
+
+    def test_heartbeat_interval_none(self):
+        activity_object = activity_class(settings_mock, None)
+        activity_object.default_task_heartbeat_timeout = "NONE"
+        self.assertIsNone(worker.heartbeat_interval(activity_object))
+
+
+class TestHeartbeatDetails(unittest.TestCase):
+    def test_heartbeat_details_none(self):
+        self.assertIsNone(worker.heartbeat_details(None))
+
+    def test_heartbeat_details_dict(self):
+        self.assertEqual(
+            worker.heartbeat_details({"files_uploaded": 1, "files_total": 2}),
+            '{"files_total": 2, "files_uploaded": 1}',
+        )
+
+    def test_heartbeat_details_truncated(self):
+        self.assertEqual(len(worker.heartbeat_details("a" * 3000)), 2048)
+
+
+class TestActivityHeartbeat(unittest.TestCase):
+    def setUp(self):
+        self.logger = FakeLogger()
+        self.activity_object = activity_class(settings_mock, self.logger)
+
+    @patch.object(FakeSWFClient, "record_activity_task_heartbeat")
+    def test_beat(self, fake_heartbeat):
+        fake_heartbeat.return_value = {"cancelRequested": False}
+        self.activity_object.set_heartbeat_details("3 files uploaded")
+        heartbeat = worker.ActivityHeartbeat(
+            FakeSWFClient(), self.logger, "token", self.activity_object
+        )
+        self.assertTrue(heartbeat.beat())
+        fake_heartbeat.assert_called_with(
+            taskToken="token", details="3 files uploaded"
+        )
+        self.assertFalse(self.activity_object.cancel_requested)
+
+    @patch.object(FakeSWFClient, "record_activity_task_heartbeat")
+    def test_beat_cancel_requested(self, fake_heartbeat):
+        fake_heartbeat.return_value = {"cancelRequested": True}
+        heartbeat = worker.ActivityHeartbeat(
+            FakeSWFClient(), self.logger, "token", self.activity_object
+        )
+        self.assertTrue(heartbeat.beat())
+        fake_heartbeat.assert_called_with(taskToken="token")
+        self.assertTrue(self.activity_object.cancel_requested)
+
+    @patch.object(FakeSWFClient, "record_activity_task_heartbeat")
+    def test_beat_exception(self, fake_heartbeat):
+        fake_heartbeat.side_effect = botocore.exceptions.ClientError(
+            {"Error": {"Code": "UnknownResourceFault"}},
+            "operation_name",
+        )
+        heartbeat = worker.ActivityHeartbeat(
+            FakeSWFClient(), self.logger, "token", self.activity_object
+        )
+        self.assertFalse(heartbeat.beat())
+
+    @patch.object(FakeSWFClient, "record_activity_task_heartbeat")
+    def test_beat_throttling_exception(self, fake_heartbeat):
+        "test heartbeats continue after a throttling error"
+        fake_heartbeat.side_effect = botocore.exceptions.ClientError(
+            {"Error": {"Code": "ThrottlingException"}},
+            "operation_name",
+        )
+        heartbeat = worker.ActivityHeartbeat(
+            FakeSWFClient(), self.logger, "token", self.activity_object
+        )
+        self.assertTrue(heartbeat.beat())
+
+    @patch.object(FakeSWFClient, "record_activity_task_heartbeat")
+    def test_start_stop(self, fake_heartbeat):
+        fake_heartbeat.return_value = {"cancelRequested": False}
+        with worker.ActivityHeartbeat(
+            FakeSWFClient(), self.logger, "token", self.activity_object, 0.01
+        ) as heartbeat:
+            time.sleep(0.05)
+        self.assertIsNone(heartbeat.thread)
+        self.assertTrue(fake_heartbeat.called)
+
+    def test_start_no_token(self):
+        heartbeat = worker.ActivityHeartbeat(
+            FakeSWFClient(), self.logger, None, self.activity_object
+        )
+        heartbeat.start()
+        self.assertIsNone(heartbeat.thread)
+
+
+class TestRespondCanceled(unittest.TestCase):
+    def test_respond_canceled(self):
+        logger = FakeLogger()
+        worker.respond_canceled(FakeSWFClient(), logger, "token", "details")
+        self.assertEqual(
+            logger.loginfo[-1], "respond_activity_task_canceled returned None"
+        )
+
 
 class TestRespondCompleted(unittest.TestCase):
     def setUp(self):
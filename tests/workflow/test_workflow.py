@@ -3,7 +3,7 @@ from mock import patch
 from tests import read_fixture, settings_mock
 from tests.classes_mock import FakeSWFClient
 from tests.activity.classes_mock import FakeLogger
-from workflow.objects import Workflow, WorkflowLayer1Decisions
+from workflow.objects import Workflow, WorkflowEventIndex, WorkflowLayer1Decisions
 from workflow.helper import define_workflow_step
 
 
@@ -37,6 +37,80 @@ NEXT_STEP = {
 }
 
 
+RETRIED_PING_EVENTS = [
+    {
+        "eventType": "ActivityTaskScheduled",
+        "activityTaskScheduledEventAttributes": {
+            "activityType": {"version": "1", "name": "Ping"},
+            "activityId": "Ping",
+        },
+        "eventId": 5,
+    },
+    {
+        "eventType": "ActivityTaskFailed",
+        "activityTaskFailedEventAttributes": {"scheduledEventId": 5},
+        "eventId": 7,
+    },
+    {
+        "eventType": "ActivityTaskScheduled",
+        "activityTaskScheduledEventAttributes": {
+            "activityType": {"version": "1", "name": "Ping"},
+            "activityId": "Ping",
+        },
+        "eventId": 10,
+    },
+    {
+        "eventType": "ActivityTaskStarted",
+        "activityTaskStartedEventAttributes": {"scheduledEventId": 10},
+        "eventId": 11,
+    },
+]
+
+
+class TestWorkflowEventIndex(unittest.TestCase):
+    def test_index_not_completed(self):
+        index = WorkflowEventIndex(RETRIED_PING_EVENTS)
+        self.assertFalse(index.activity_completed("Ping", "Ping"))
+        self.assertEqual(index.last_activity_status, "ActivityTaskFailed")
+        self.assertFalse(index.cancel_requested)
+        self.assertEqual(index.event_count, 4)
+
+    def test_index_completed(self):
+        index = WorkflowEventIndex(RETRIED_PING_EVENTS)
+        index.add_events(
+            [
+                {
+                    "eventType": "ActivityTaskCompleted",
+                    "activityTaskCompletedEventAttributes": {"scheduledEventId": 10},
+                    "eventId": 12,
+                },
+                {"eventType": "WorkflowExecutionCancelRequested", "eventId": 13},
+            ]
+        )
+        self.assertTrue(index.activity_completed("Ping", "Ping"))
+        self.assertTrue(index.activity_completed("Ping", None))
+        self.assertTrue(index.activity_completed(None, "Ping"))
+        self.assertFalse(index.activity_completed("Ping", "Ping2"))
+        self.assertFalse(index.activity_completed(None, None))
+        self.assertEqual(index.last_activity_status, "ActivityTaskCompleted")
+        self.assertTrue(index.cancel_requested)
+
+    def test_index_decision_cache(self):
+        workflow_object = Workflow(settings_mock, FakeLogger())
+        decision = {"events": list(RETRIED_PING_EVENTS)}
+        index = workflow_object.event_index(decision)
+        self.assertEqual(workflow_object.event_index(decision), index)
+        # adding events to the history rebuilds the index
+        decision["events"].append(
+            {
+                "eventType": "ActivityTaskCompleted",
+                "activityTaskCompletedEventAttributes": {"scheduledEventId": 10},
+                "eventId": 12,
+            }
+        )
+        self.assertTrue(workflow_object.activity_status(decision, "Ping", "Ping"))
+
+
 class TestWorkflowLayer1Decisions(unittest.TestCase):
     def setUp(self):
         self.decisions = WorkflowLayer1Decisions()
@@ -90,6 +164,7 @@ class TestWorkflow(unittest.TestCase):
 
     def test_complete_workflow(self):
         self.assertIsNone(self.workflow.complete_workflow())
+        self.assertTrue(self.workflow.closed)
 
     def test_is_workflow_complete_false(self):
         "test is not complete"
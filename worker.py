@@ -1,10 +1,15 @@
 import json
 import os
 import importlib
+import multiprocessing
+import pkgutil
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import botocore
 from botocore.config import Config
 from log import create_log
-from provider import process, utils
+from provider import endpoint_client, execution_context, lax_provider, process, utils
 import activity
 from activity.objects import Activity
 
@@ -14,20 +19,47 @@ Amazon SWF worker
 """
 
 
+WORKER_POOL_THREAD = "thread"
+WORKER_POOL_PROCESS = "process"
+
+
 def work(settings, flag):
+    slots = get_worker_slots(settings)
+    if slots > 1:
+        work_slots(settings, flag, slots, get_worker_pool(settings))
+        return
+
     # Log
     identity = "worker_%s" % os.getpid()
 
     logger = create_log("worker.log", settings.setLevel, identity)
 
     # Simple connect
-    client = settings.aws_conn('swf', {
-        'aws_access_key_id': settings.aws_access_key_id,
-        'aws_secret_access_key': settings.aws_secret_access_key,
-        'region_name': settings.swf_region,
-        'config': Config(connect_timeout=50, read_timeout=70),
-    })
+    client = connect(settings)
+
+    poll_activities(settings, flag, logger, client, identity)
+
+    logger.info("AWS client counters: %s", utils.AWS_CLIENTS.counters())
+    if endpoint_client.ENDPOINT_CLIENTS:
+        logger.info("Endpoint latency histograms: %s", endpoint_client.histograms())
+    logger.info("graceful shutdown")
+
+
+def connect(settings):
+    "connect to the SWF service"
+    return settings.aws_conn(
+        "swf",
+        {
+            "aws_access_key_id": settings.aws_access_key_id,
+            "aws_secret_access_key": settings.aws_secret_access_key,
+            "region_name": settings.swf_region,
+            "config": Config(connect_timeout=50, read_timeout=70),
+        },
+    )
+
 
+def poll_activities(settings, flag, logger, client, identity):
+    "poll for activity tasks and process them one at a time until the flag is red"
     token = None
 
     # Poll for an activity task indefinitely
@@ -64,9 +96,130 @@ def work(settings, flag):
         # Reset and loop
         token = None
 
+
+def get_worker_slots(settings):
+    "number of activity tasks to run at the same time, from the settings"
+    try:
+        return max(int(getattr(settings, "worker_slots", 1)), 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+def get_worker_pool(settings):
+    "worker slot pool type, thread or process, from the settings"
+    pool = getattr(settings, "worker_pool", None)
+    if pool == WORKER_POOL_PROCESS:
+        return WORKER_POOL_PROCESS
+    return WORKER_POOL_THREAD
+
+
+def work_slots(settings, flag, slots, pool=WORKER_POOL_THREAD):
+    """
+    Poll for and run up to slots activity tasks at the same time.
+    Each slot polls SWF independently. Activity modules are imported once
+    before the slots start so they all share them; thread slots also share
+    one SWF client. When the flag goes red each slot finishes its in-flight
+    task before the worker exits.
+    """
+    identity = "worker_%s" % os.getpid()
+
+    logger = create_log("worker.log", settings.setLevel, identity)
+
+    warm_activity_classes(logger)
+
+    logger.info("starting %s %s worker slots", slots, pool)
+    if pool == WORKER_POOL_PROCESS:
+        run_process_slots(settings, flag, logger, slots, identity)
+    else:
+        run_thread_slots(settings, flag, logger, slots, identity)
+
+    logger.info("AWS client counters: %s", utils.AWS_CLIENTS.counters())
+    if endpoint_client.ENDPOINT_CLIENTS:
+        logger.info("Endpoint latency histograms: %s", endpoint_client.histograms())
     logger.info("graceful shutdown")
 
 
+def slot_identity(identity, slot):
+    return "%s_%s" % (identity, slot)
+
+
+def run_slot(settings, flag, logger, client, identity):
+    "run a single worker slot, stop every slot if it fails"
+    try:
+        poll_activities(settings, flag, logger, client, identity)
+    except Exception:
+        logger.exception("worker slot %s stopped unexpectedly" % identity)
+        flag.stop_process()
+        raise
+
+
+def run_thread_slots(settings, flag, logger, slots, identity):
+    "run the slots in a thread pool sharing one SWF client"
+    client = connect(settings)
+    with ThreadPoolExecutor(max_workers=slots) as executor:
+        futures = [
+            executor.submit(
+                run_slot, settings, flag, logger, client, slot_identity(identity, slot)
+            )
+            for slot in range(slots)
+        ]
+    # leaving the executor block waits for the in-flight tasks to drain
+    for future in futures:
+        future.result()
+
+
+def process_slot(settings, shared_flag, logger, identity):
+    "entry point of a forked worker slot process"
+    # a SIGTERM received by the slot process stops every slot
+    signal.signal(signal.SIGTERM, lambda signum, frame: shared_flag.stop_process())
+    # clients are not safe to share across a fork, connect in the slot process
+    client = connect(settings)
+    run_slot(settings, shared_flag, logger, client, identity)
+
+
+def run_process_slots(settings, flag, logger, slots, identity):
+    """
+    run the slots in forked processes, which inherit the imported activity
+    modules, for activities which are CPU bound
+    """
+    context = multiprocessing.get_context("fork")
+    shared_flag = process.SharedFlag(context.Event())
+    processes = [
+        context.Process(
+            target=process_slot,
+            args=(settings, shared_flag, logger, slot_identity(identity, slot)),
+        )
+        for slot in range(slots)
+    ]
+    for slot_process in processes:
+        slot_process.start()
+    while any(slot_process.is_alive() for slot_process in processes):
+        if shared_flag.green() and not flag.green():
+            logger.info("stopping worker slots")
+            shared_flag.stop_process()
+        for slot_process in processes:
+            slot_process.join(timeout=1)
+
+
+def warm_activity_classes(logger):
+    """
+    Import every activity module up front, so worker slots share the
+    imported activity classes instead of each importing them on first use
+    """
+    activity_names = [
+        module_name
+        for _, module_name, _ in pkgutil.iter_modules(activity.__path__)
+        if module_name.startswith("activity_")
+    ]
+    imported = []
+    for activity_name in sorted(activity_names):
+        if import_activity_class(activity_name):
+            imported.append(activity_name)
+        else:
+            logger.info("could not import activity module %s" % activity_name)
+    return imported
+
+
 def process_activity(activity_task, settings, logger, client, token):
 
     # Build a string for the object name
@@ -89,10 +242,16 @@ def process_activity(activity_task, settings, logger, client, token):
         # Get the data to pass
         data = get_input(activity_task)
 
-        # Do the activity
+        # Do the activity, recording heartbeats while it runs, session values
+        # are cached for the activity and written before responding
         try:
-            activity_result = activity_object.do_activity(data)
+            with ActivityHeartbeat(client, logger, token, activity_object):
+                with execution_context.session_scope(), lax_provider.lax_scope(
+                    settings
+                ):
+                    activity_result = activity_object.do_activity(data)
         except Exception:
+            activity_result = False
             logger.error(
                 "error executing activity %s",
                 activity_name,
@@ -106,7 +265,12 @@ def process_activity(activity_task, settings, logger, client, token):
         )
 
         # Complete the activity task if it was successful
-        if isinstance(activity_result, str):
+        if getattr(
+            activity_object, "cancel_requested", None
+        ) and activity_result not in [Activity.ACTIVITY_SUCCESS, True]:
+            # SWF requested the cancel and the activity stopped early
+            respond_canceled(client, logger, token, activity_object.result)
+        elif isinstance(activity_result, str):
             if activity_result == Activity.ACTIVITY_SUCCESS:
                 message = activity_object.result
                 respond_completed(client, logger, token, message)
@@ -148,6 +312,99 @@ def process_activity(activity_task, settings, logger, client, token):
         logger.info(reason)
 
 
+# maximum length of heartbeat details accepted by SWF
+HEARTBEAT_DETAILS_MAX_LENGTH = 2048
+
+
+def heartbeat_interval(activity_object):
+    "seconds between heartbeats, a third of the activity heartbeat timeout"
+    try:
+        timeout = int(activity_object.default_task_heartbeat_timeout)
+    except (AttributeError, TypeError, ValueError):
+        # heartbeat timeout may be NONE or not set
+        return None
+    return max(timeout / 3.0, 1)
+
+
+def heartbeat_details(details):
+    "format the progress details of an activity to send with a heartbeat"
+    if details is None:
+        return None
+    if not isinstance(details, str):
+        details = json.dumps(details, sort_keys=True)
+    return details[:HEARTBEAT_DETAILS_MAX_LENGTH]
+
+
+class ActivityHeartbeat:
+    """
+    Record activity task heartbeats with SWF from a background thread while an
+    activity is in progress, so a stuck or dead worker is detected quickly.
+    The activity heartbeat_details are sent as progress details, and if SWF
+    requests a cancel the activity cancel_requested is set so it can stop early
+    """
+
+    def __init__(self, client, logger, token, activity_object, interval=None):
+        self.client = client
+        self.logger = logger
+        self.token = token
+        self.activity_object = activity_object
+        self.interval = (
+            interval if interval is not None else heartbeat_interval(activity_object)
+        )
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def start(self):
+        if not self.interval or self.client is None or self.token is None:
+            return
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            if not self.beat():
+                break
+
+    def beat(self):
+        "record one heartbeat, return False if no more heartbeats should be sent"
+        kwargs = {"taskToken": self.token}
+        details = heartbeat_details(
+            getattr(self.activity_object, "heartbeat_details", None)
+        )
+        if details is not None:
+            kwargs["details"] = details
+        try:
+            response = self.client.record_activity_task_heartbeat(**kwargs)
+        except botocore.exceptions.ClientError as exception:
+            _log_swf_response_error(self.logger, exception)
+            # the task timed out or was closed already, otherwise the error may be
+            # throttling or transient and the next heartbeat can succeed
+            return (
+                exception.response.get("Error", {}).get("Code")
+                != "UnknownResourceFault"
+            )
+        except Exception:
+            self.logger.exception("exception recording activity task heartbeat")
+            return True
+        if response and response.get("cancelRequested"):
+            self.logger.info("activity task cancel requested")
+            self.activity_object.cancel_requested = True
+        return True
+
+
 def get_input(activity_task):
     """
     Given a response from polling for activity from SWF via boto,
@@ -259,6 +516,21 @@ def respond_failed(client, logger, token, details, reason):
         _log_swf_response_error(logger, exception)
 
 
+def respond_canceled(client, logger, token, details):
+    """
+    Given an SWF client and logger as resources,
+    the token to specify an accepted activity and details
+    to send, communicate with SWF that the activity was canceled
+    """
+    try:
+        out = client.respond_activity_task_canceled(
+            taskToken=token, details=str(details)
+        )
+        logger.info("respond_activity_task_canceled returned %s" % out)
+    except botocore.exceptions.ClientError as exception:
+        _log_swf_response_error(logger, exception)
+
+
 def signal_fail_workflow(client, logger, domain, workflow_id, run_id):
     """
     Given an SWF client and logger as resources,
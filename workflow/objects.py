@@ -90,6 +90,72 @@ class WorkflowLayer1Decisions:
         )
 
 
+# decision types which close the workflow execution
+CLOSE_DECISION_TYPES = [
+    "CompleteWorkflowExecution",
+    "FailWorkflowExecution",
+    "CancelWorkflowExecution",
+]
+
+
+class WorkflowEventIndex:
+    """
+    Index of a decision event history, built in one pass over the events,
+    so the status of each workflow step can be looked up without
+    scanning the events again
+    """
+
+    def __init__(self, events):
+        # scheduledEventId to its activity type name and activity id
+        self.scheduled = {}
+        # activity (type name, id), type name, and id with a completed task
+        self.completed_activities = set()
+        self.completed_types = set()
+        self.completed_ids = set()
+        # eventType of the last ActivityTaskCompleted or ActivityTaskFailed event
+        self.last_activity_status = None
+        self.cancel_requested = False
+        self.event_count = 0
+        self.add_events(events)
+
+    def add_events(self, events):
+        "add events to the index, events must be added in history order"
+        completed_event_ids = []
+        for event in events:
+            self.event_count += 1
+            event_type = event.get("eventType")
+            if "activityTaskScheduledEventAttributes" in event:
+                attributes = event["activityTaskScheduledEventAttributes"]
+                activity_type = attributes.get("activityType", {}).get("name")
+                activity_id = attributes.get("activityId")
+                self.scheduled[event.get("eventId")] = (activity_type, activity_id)
+            elif event_type == "ActivityTaskCompleted":
+                attributes = event.get("activityTaskCompletedEventAttributes", {})
+                completed_event_ids.append(attributes.get("scheduledEventId"))
+            if event_type in ["ActivityTaskCompleted", "ActivityTaskFailed"]:
+                self.last_activity_status = event_type
+            elif event_type == "WorkflowExecutionCancelRequested":
+                self.cancel_requested = True
+        # a scheduled event may be listed after its completion, match them last
+        for scheduled_event_id in completed_event_ids:
+            if scheduled_event_id not in self.scheduled:
+                continue
+            activity_type, activity_id = self.scheduled[scheduled_event_id]
+            self.completed_activities.add((activity_type, activity_id))
+            self.completed_types.add(activity_type)
+            self.completed_ids.add(activity_id)
+
+    def activity_completed(self, activity_type=None, activity_id=None):
+        "whether a task of the activity type and/or activity id was completed"
+        if activity_type is not None and activity_id is not None:
+            return (activity_type, activity_id) in self.completed_activities
+        if activity_type is not None:
+            return activity_type in self.completed_types
+        if activity_id is not None:
+            return activity_id in self.completed_ids
+        return False
+
+
 class Workflow(object):
     # Base class for extending
     def __init__(
@@ -131,6 +197,12 @@ class Workflow(object):
         self.default_task_start_to_close_timeout = 30
         self.description = None
 
+        # index of the decision events, built once per decision
+        self._event_index = None
+        self._event_index_decision = None
+        # set when a decision closed the workflow execution
+        self.closed = False
+
     def load_definition(self, definition):
         """
         Given a JSON representation of an entire workflow definition,
@@ -167,6 +239,12 @@ class Workflow(object):
             taskToken=self.token, decisions=workflow_decisions.data
         )
         self.logger.info("respond_decision_task_completed returned %s" % out)
+        if workflow_decisions and [
+            decision
+            for decision in workflow_decisions.data
+            if decision.get("decisionType") in CLOSE_DECISION_TYPES
+        ]:
+            self.closed = True
 
     def is_workflow_complete(self):
         """
@@ -292,6 +370,21 @@ class Workflow(object):
         """
         return utils.get_current_datetime().strftime("%Y-%m-%dT%H:%M:%SZ")
 
+    def event_index(self, decision):
+        """
+        Return the index of the decision events, building it only if the
+        decision or its number of events changed since the last call
+        """
+        events = decision["events"]
+        if (
+            self._event_index is None
+            or self._event_index_decision is not decision
+            or self._event_index.event_count != len(events)
+        ):
+            self._event_index = WorkflowEventIndex(events)
+            self._event_index_decision = decision
+        return self._event_index
+
     def activity_status(self, decision, activityType=None, activityID=None):
         """
         Given an activityType and/or activityID as the activity details, and
@@ -302,85 +395,14 @@ class Workflow(object):
         if activityType is None and activityID is None:
             return False
 
-        eventId_list = []
-
-        for event in decision["events"]:
-            eventId = None
-            # Find the all matching eventID for the activityType and/or activityID
-            if activityType is not None and activityID is not None:
-                try:
-                    if (
-                        event["activityTaskScheduledEventAttributes"]["activityType"][
-                            "name"
-                        ]
-                        == activityType
-                        and event["activityTaskScheduledEventAttributes"]["activityId"]
-                        == activityID
-                    ):
-                        eventId_list.append(event["eventId"])
-                except KeyError:
-                    pass
-            elif activityType is not None and activityID is None:
-                try:
-                    if (
-                        event["activityTaskScheduledEventAttributes"]["activityType"][
-                            "name"
-                        ]
-                        == activityType
-                    ):
-                        eventId_list.append(event["eventId"])
-                except KeyError:
-                    pass
-            elif activityID is not None and activityType is None:
-                try:
-                    if (
-                        event["activityTaskScheduledEventAttributes"]["activityId"]
-                        == activityID
-                    ):
-                        eventId_list.append(event["eventId"])
-                except KeyError:
-                    pass
-
-        # Now if we have an eventId, find if in the decision history is was
-        #  successfully completed
-        if len(eventId_list) <= 0:
-            return False
-        for event in decision["events"]:
-            for eventId in eventId_list:
-                # Find the first matching eventID for the activityType
-                try:
-                    if (
-                        event["activityTaskCompletedEventAttributes"][
-                            "scheduledEventId"
-                        ]
-                        == eventId
-                    ):
-                        # Found matching data, now check completion
-                        if event["eventType"] == "ActivityTaskCompleted":
-                            # Good!
-                            return True
-                        break
-                except KeyError:
-                    pass
-        # Default
-        return False
+        return self.event_index(decision).activity_completed(activityType, activityID)
 
     def last_activity_status(self, decision):
         """
         Given a decision response from SWF, determine whether the
         last run activity Failed or Completed
         """
-        status = None
-        # Traverse the array in reverse order
-        for event in decision["events"][::-1]:
-            if event["eventType"] == "ActivityTaskCompleted":
-                status = "ActivityTaskCompleted"
-                break
-            elif event["eventType"] == "ActivityTaskFailed":
-                status = "ActivityTaskFailed"
-                break
-
-        return status
+        return self.event_index(decision).last_activity_status
 
     def handle_nextPageToken(self):
         # Quick test for nextPageToken
@@ -427,16 +449,12 @@ class Workflow(object):
 
     def check_for_failed_workflow_request(self, decision):
         try:
-            # Traverse the array in reverse order
-            # This is an optimisation since if there is a failure record it will
-            # always be at the end of the array
-            for event in decision["events"][::-1]:
-                if event["eventType"] == "WorkflowExecutionCancelRequested":
-                    # terminate
-                    workflow_decisions = WorkflowLayer1Decisions()
-                    workflow_decisions.fail_workflow_execution()
-                    self.complete_decision(workflow_decisions)
-                    return
+            if self.event_index(decision).cancel_requested:
+                # terminate
+                workflow_decisions = WorkflowLayer1Decisions()
+                workflow_decisions.fail_workflow_execution()
+                self.complete_decision(workflow_decisions)
+                return
         except TypeError:
             pass
 